@@ -5,6 +5,8 @@ module.exports = {
   },
   setupFilesAfterEnv: ['<rootDir>/src/setupTests.js'],
   moduleNameMapper: {
-    '\\.(css|less|scss|sass)$': 'identity-obj-proxy'
+    '\\.(css|less|scss|sass)$': 'identity-obj-proxy',
+    // Served by scripts/vite-image-manifest.js; tests see no optimized images
+    '^virtual:image-manifest$': '<rootDir>/scripts/empty-image-manifest.json'
   }
 };
@@ -0,0 +1,151 @@
+import fs from 'node:fs'
+import path from 'node:path'
+
+// What the app imports the manifest as
+const VIRTUAL_ID = 'virtual:image-manifest'
+const RESOLVED_ID = '\0' + VIRTUAL_ID
+
+// Content types of the hashed outputs, by extension
+const CONTENT_TYPES = { '.webp': 'image/webp', '.avif': 'image/avif', '.jpg': 'image/jpeg' }
+
+// URLs of files under src/, which Vite only publishes when imported, under a hashed name
+const IMPORTED_PREFIX = '/src/'
+
+/**
+ * Serve the image manifest generated by scripts/build_optimizer.py as
+ * `virtual:image-manifest`.
+ *
+ * The manifest is keyed by the URL a page loads an image from. Public images
+ * keep that URL in production, but images imported from src/ get a hashed
+ * /assets/ URL from Vite, so every src/ URL in the manifest (keys and
+ * outputs alike) becomes an import of the file: a key then matches the URL
+ * of the page's own import, and the outputs are published with the build,
+ * in the dev server and in the build alike.
+ *
+ * Content-hashed outputs are staged outside the web roots, under their own
+ * URL prefix: the dev server serves them from the staging directory, and
+ * the build publishes the ones the manifest references, in place of the
+ * plain optimized copies under public/, which nothing loads then.
+ *
+ * The manifest is generated outside src/ by the opt-in optimizer step and
+ * never committed; without one every image is served as it is.
+ *
+ * @param {Object} options - {
+ *   manifest: path of the manifest, relative to the Vite root,
+ *   hashedDir: staging directory of hashed outputs (hashed_assets.dir), relative to the Vite root,
+ *   hashedUrl: URL the hashed outputs are published under (hashed_assets.url),
+ *   unpublish: build output directories of the plain optimized copies under public/
+ * }
+ * @returns {Object} - Vite plugin
+ */
+export default function imageManifest({
+  manifest = '.image-manifest.json',
+  hashedDir = '../.hashed_images',
+  hashedUrl = '/assets/img',
+  unpublish = ['assets/images/optimized']
+} = {}) {
+  const hashedPrefix = hashedUrl.replace(/\/$/, '') + '/'
+  let manifestPath
+  let hashedPath
+  let outDir
+  // Hashed file names the manifest references, published by the build
+  const hashed = new Set()
+
+  const readManifest = (warn) => {
+    try {
+      return JSON.parse(fs.readFileSync(manifestPath, 'utf-8'))
+    } catch (error) {
+      warn(`No usable image manifest at ${manifest} (${error.code || error.message}); ` +
+           'images are served unoptimized. Run `npm run optimize:images` to generate it.')
+      return { version: 1, images: {} }
+    }
+  }
+
+  return {
+    name: 'radiofusion-image-manifest',
+
+    configResolved(config) {
+      manifestPath = path.resolve(config.root, manifest)
+      hashedPath = path.resolve(config.root, hashedDir)
+      outDir = path.resolve(config.root, config.build.outDir)
+    },
+
+    configureServer(server) {
+      server.middlewares.use(hashedPrefix, (req, res, next) => {
+        // Names are flat, so anything with a separator is not a staged file
+        const name = decodeURIComponent(req.url.split('?')[0].replace(/^\//, ''))
+        const file = path.join(hashedPath, name)
+        if (/[/\\]/.test(name) || !fs.statSync(file, { throwIfNoEntry: false })?.isFile()) return next()
+        res.setHeader('Content-Type', CONTENT_TYPES[path.extname(name)] || 'application/octet-stream')
+        fs.createReadStream(file).pipe(res)
+      })
+    },
+
+    resolveId(id) {
+      return id === VIRTUAL_ID ? RESOLVED_ID : null
+    },
+
+    load(id) {
+      if (id !== RESOLVED_ID) return null
+      this.addWatchFile(manifestPath)
+      const { version = 1, images = {} } = readManifest(message => this.warn(message))
+
+      const imports = new Map()
+      const importName = (url) => {
+        if (!imports.has(url)) imports.set(url, `image${imports.size}`)
+        return imports.get(url)
+      }
+      // JSON, except that src/ URLs are replaced by the names they are imported as
+      hashed.clear()
+      const serialize = (value) => {
+        if (typeof value === 'string' && value.startsWith(IMPORTED_PREFIX)) return importName(value)
+        if (typeof value === 'string' && value.startsWith(hashedPrefix)) hashed.add(value.slice(hashedPrefix.length))
+        if (Array.isArray(value)) return `[${value.map(serialize).join(',')}]`
+        if (value && typeof value === 'object') {
+          return `{${Object.entries(value).map(([key, item]) => `${JSON.stringify(key)}:${serialize(item)}`).join(',')}}`
+        }
+        return JSON.stringify(value)
+      }
+
+      const entries = Object.entries(images).map(([url, entry]) => {
+        const key = url.startsWith(IMPORTED_PREFIX) ? `[${importName(url)}]` : JSON.stringify(url)
+        return `  ${key}: ${serialize(entry)}`
+      })
+      return [
+        ...[...imports].map(([url, name]) => `import ${name} from ${JSON.stringify(url)}`),
+        `export default { version: ${JSON.stringify(version)}, images: {`,
+        entries.join(',\n'),
+        '} }',
+        ''
+      ].join('\n')
+    },
+
+    generateBundle() {
+      for (const name of hashed) {
+        const file = path.join(hashedPath, name)
+        if (!fs.existsSync(file)) {
+          this.error(`${hashedPrefix}${name} is in the image manifest but not in ${hashedDir}; ` +
+                     'run `npm run optimize:images` again.')
+        }
+        this.emitFile({ type: 'asset', fileName: `${hashedPrefix.slice(1)}${name}`, source: fs.readFileSync(file) })
+      }
+    },
+
+    writeBundle() {
+      // Vite copies public/ as it is; the hashed copies replace the plain ones
+      if (!hashed.size) return
+      for (const dir of unpublish) {
+        fs.rmSync(path.join(outDir, dir), { recursive: true, force: true })
+      }
+    },
+
+    handleHotUpdate({ file, server }) {
+      // A rebuilt manifest can change any image on the page
+      if (file !== manifestPath) return
+      const module = server.moduleGraph.getModuleById(RESOLVED_ID)
+      if (module) server.moduleGraph.invalidateModule(module)
+      server.ws.send({ type: 'full-reload' })
+      return []
+    }
+  }
+}
@@ -1,4 +1,5 @@
 import React, { useState, useRef } from 'react';
+import { resolveOptimizedImage } from '../hooks/useOptimizedImage';
 
 const ImageUpload = ({ 
   currentImage, 
@@ -11,7 +12,8 @@ const ImageUpload = ({
   showUploadButton = true,
   overlayContent = null,
   alt = "Uploaded image",
-  mobileImage = null
+  mobileImage = null,
+  sizes = "100vw"
 }) => {
   const [dragActive, setDragActive] = useState(false);
   const [previewImage, setPreviewImage] = useState(currentImage);
@@ -72,6 +74,12 @@ const ImageUpload = ({
     }
   };
 
+  // Optimized outputs from the build manifest; uploaded previews (data URLs)
+  // are not in it and load as-is. Route preload headers are generated from
+  // the same entries and sizes, so the browser reuses the preloaded hero.
+  const desktop = resolveOptimizedImage(previewImage);
+  const mobile = resolveOptimizedImage(mobileImage || previewImage || currentImage);
+
   const shapeClasses = shape === "circle" ? "rounded-full" : "rounded-xl";
   const containerClasses = `relative ${aspectRatio} ${containerClassName}`;
   const shadowClasses = "shadow-lg hover:shadow-xl transition-shadow duration-300";
@@ -92,9 +100,11 @@ const ImageUpload = ({
         {previewImage ? (
           <>
             <picture>
-              <source media="(max-width: 768px)" srcSet={mobileImage || previewImage || currentImage} />
+              <source media="(max-width: 768px)" srcSet={mobile.srcSet || mobile.src} sizes={sizes} />
               <img
-                src={previewImage}
+                src={desktop.src}
+                srcSet={desktop.srcSet || undefined}
+                sizes={desktop.srcSet ? sizes : undefined}
                 alt={alt}
                 className={`w-full h-full object-cover object-center ${shapeClasses}`}
                 style={{ width: '100%', height: '100%', objectFit: 'cover', objectPosition: 'center' }}
@@ -1,12 +1,19 @@
-import React, { useState, useEffect, useRef } from 'react';
+import React, { useState, useEffect, useRef, useMemo } from 'react';
 import PropTypes from 'prop-types';
+import { resolveOptimizedImage } from '../hooks/useOptimizedImage';
 
 /**
  * OptimizedImage Component
  * 
  * A React component that automatically loads WebP images when available,
- * with fallback to original formats. Includes lazy loading, error handling,
- * and loading states for better user experience.
+ * with fallback to original formats. Optimized URLs, dimensions and responsive
+ * variants come from the build manifest, so no requests are spent probing.
+ * When the build also emitted AVIF (or a JPEG fallback), a <picture> offers
+ * every format smallest first and the browser picks the first it supports.
+ * The manifest's inline preview and dominant colour paint the image box
+ * until the full image has loaded, without an extra request.
+ * Includes lazy loading, error handling, and loading states for better user
+ * experience.
  */
 const OptimizedImage = ({
   src,
@@ -21,6 +28,7 @@ const OptimizedImage = ({
   onLoad = () => {},
   onError = () => {},
   responsive = false,
+  sizes = '100vw',
   mobileSize = 'w-full h-auto',
   tabletSize = 'sm:w-full sm:h-auto',
   desktopSize = 'md:w-full md:h-auto',
@@ -29,46 +37,11 @@ const OptimizedImage = ({
   const [imageSrc, setImageSrc] = useState(placeholder);
   const [isLoading, setIsLoading] = useState(true);
   const [hasError, setHasError] = useState(false);
+  const [hasLoaded, setHasLoaded] = useState(false);
   const [isInView, setIsInView] = useState(!lazy);
   const imgRef = useRef(null);
   const observerRef = useRef(null);
 
-  /**
-   * Generate WebP version of the image path
-   */
-  const getWebPPath = (originalPath) => {
-    if (!originalPath) return null;
-    
-    // Check if it's already a WebP image
-    if (originalPath.toLowerCase().endsWith('.webp')) {
-      return originalPath;
-    }
-    
-    // Handle public assets paths
-    if (originalPath.startsWith('/assets/')) {
-      const relativePath = originalPath.substring('/assets/'.length);
-      const nameWithoutExt = relativePath.substring(0, relativePath.lastIndexOf('.'));
-      return `/assets/webp/frontend/src/assets/${nameWithoutExt}.webp`;
-    }
-    
-    // Extract directory and filename for other paths
-    const lastSlashIndex = originalPath.lastIndexOf('/');
-    const directory = originalPath.substring(0, lastSlashIndex + 1);
-    const filename = originalPath.substring(lastSlashIndex + 1);
-    
-    // Remove extension and add .webp
-    const nameWithoutExt = filename.substring(0, filename.lastIndexOf('.'));
-    
-    // Try different WebP path patterns
-    const webpPaths = [
-      `${directory}webp/${nameWithoutExt}.webp`,
-      `${directory}${nameWithoutExt}.webp`,
-      originalPath.replace(/\.[^/.]+$/, '.webp')
-    ];
-    
-    return webpPaths;
-  };
-
   /**
    * Check if WebP is supported by the browser
    */
@@ -80,58 +53,35 @@ const OptimizedImage = ({
   };
 
   /**
-   * Check if an image URL exists
+   * Optimized URL, dimensions and srcSet from the build manifest
    */
-  const checkImageExists = (url) => {
-    return new Promise((resolve) => {
-      const img = new Image();
-      img.onload = () => resolve(true);
-      img.onerror = () => resolve(false);
-      img.src = url;
-    });
-  };
+  const resolved = useMemo(
+    () => resolveOptimizedImage(src, { enableWebP: supportsWebP() }),
+    [src]
+  );
+
+  /**
+   * Inline preview from the build manifest, painted behind the image until it loads
+   */
+  const preview = resolved.placeholder;
+  const previewStyle = preview && !hasLoaded
+    ? {
+      backgroundColor: preview.color,
+      backgroundImage: `url(${preview.lqip})`,
+      backgroundSize: 'cover',
+      backgroundPosition: 'center'
+    }
+    : {};
 
   /**
-   * Load the optimal image format
+   * Load the optimal image format from the build manifest
    */
-  const loadOptimalImage = async () => {
+  const loadOptimalImage = () => {
     if (!src || !isInView) return;
 
-    setIsLoading(true);
     setHasError(false);
-
-    try {
-      // If WebP is supported, try WebP versions first
-      if (supportsWebP()) {
-        const webpPaths = getWebPPath(src);
-        
-        if (Array.isArray(webpPaths)) {
-          // Try each WebP path
-          for (const webpPath of webpPaths) {
-            const exists = await checkImageExists(webpPath);
-            if (exists) {
-              setImageSrc(webpPath);
-              setIsLoading(false);
-              return;
-            }
-          }
-        }
-      }
-
-      // Fallback to original image
-      const originalExists = await checkImageExists(src);
-      if (originalExists) {
-        setImageSrc(src);
-      } else {
-        throw new Error('Image not found');
-      }
-    } catch (error) {
-      console.warn(`Failed to load image: ${src}`, error);
-      setHasError(true);
-      onError(error);
-    } finally {
-      setIsLoading(false);
-    }
+    setImageSrc(resolved.src);
+    setIsLoading(false);
   };
 
   /**
@@ -169,11 +119,16 @@ const OptimizedImage = ({
     }
   }, [src, isInView]);
 
+  useEffect(() => {
+    setHasLoaded(false);
+  }, [src]);
+
   /**
    * Handle image load event
    */
   const handleImageLoad = (event) => {
     setIsLoading(false);
+    setHasLoaded(true);
     onLoad(event);
   };
 
@@ -187,20 +142,11 @@ const OptimizedImage = ({
   };
 
   /**
-   * Generate responsive srcSet for different screen densities
+   * Responsive srcSet built from the manifest's breakpoint variants
    */
   const generateSrcSet = () => {
-    if (!imageSrc || hasError) return '';
-    
-    const basePath = imageSrc.substring(0, imageSrc.lastIndexOf('.'));
-    const extension = imageSrc.substring(imageSrc.lastIndexOf('.'));
-    
-    // Generate different density versions
-    return [
-      `${imageSrc} 1x`,
-      `${basePath}@2x${extension} 2x`,
-      `${basePath}@3x${extension} 3x`
-    ].join(', ');
+    if (!imageSrc || hasError || imageSrc !== resolved.src) return undefined;
+    return resolved.srcSet || undefined;
   };
 
   // Generate responsive classes
@@ -228,11 +174,13 @@ const OptimizedImage = ({
           ...style,
           width: width || style.width || 'auto',
           height: height || style.height || 'auto',
+          aspectRatio: resolved.width ? `${resolved.width} / ${resolved.height}` : undefined,
           display: 'flex',
           alignItems: 'center',
           justifyContent: 'center',
           backgroundColor: '#f0f0f0',
-          color: '#666'
+          color: '#666',
+          ...previewStyle
         }}
       >
         {typeof placeholder === 'string' ? (
@@ -267,27 +215,47 @@ const OptimizedImage = ({
     );
   }
 
+  const usePicture = resolved.sources.length > 0 && imageSrc === resolved.src;
+
   // Render the optimized image
-  return (
+  const image = (
     <img
       ref={imgRef}
-      src={imageSrc}
-      srcSet={generateSrcSet()}
+      src={usePicture ? resolved.fallbackSrc : imageSrc}
+      srcSet={usePicture ? undefined : generateSrcSet()}
+      sizes={!usePicture && generateSrcSet() ? sizes : undefined}
       alt={alt}
       className={`optimized-image ${isLoading ? 'loading' : 'loaded'} ${getResponsiveClasses()}`}
       style={{
+        ...previewStyle,
         ...style,
         opacity: isLoading ? 0.5 : 1,
         transition: 'opacity 0.3s ease-in-out'
       }}
-      width={width}
-      height={height}
+      width={width ?? resolved.width ?? undefined}
+      height={height ?? resolved.height ?? undefined}
       onLoad={handleImageLoad}
       onError={handleImageError}
       loading={lazy ? 'lazy' : 'eager'}
       {...props}
     />
   );
+
+  if (!usePicture) return image;
+
+  return (
+    <picture>
+      {resolved.sources.map(source => (
+        <source
+          key={source.type}
+          type={source.type}
+          srcSet={source.srcSet}
+          sizes={source.responsive ? sizes : undefined}
+        />
+      ))}
+      {image}
+    </picture>
+  );
 };
 
 OptimizedImage.propTypes = {
@@ -303,6 +271,7 @@ OptimizedImage.propTypes = {
   onLoad: PropTypes.func,
   onError: PropTypes.func,
   responsive: PropTypes.bool,
+  sizes: PropTypes.string,
   mobileSize: PropTypes.string,
   tabletSize: PropTypes.string,
   desktopSize: PropTypes.string
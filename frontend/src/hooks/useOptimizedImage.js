@@ -1,4 +1,93 @@
 import { useState, useEffect, useCallback } from 'react';
+import imageManifest from 'virtual:image-manifest';
+
+// <source> types for the formats the build can emit
+const MIME_TYPES = {
+  avif: 'image/avif',
+  webp: 'image/webp'
+};
+
+/**
+ * Build a width-descriptor srcSet from a full-size image and its variants.
+ *
+ * @param {string} fullSrc - Full-size image URL
+ * @param {number} width - Full-size width
+ * @param {Array} variants - [{ src, width }] responsive variants
+ * @returns {string} - srcSet, empty when there is nothing but the full size
+ */
+const buildSrcSet = (fullSrc, width, variants = []) => {
+  const candidates = [
+    ...variants.filter(variant => variant.width < width),
+    { src: fullSrc, width }
+  ];
+  return candidates.length > 1
+    ? candidates.map(candidate => `${candidate.src} ${candidate.width}w`).join(', ')
+    : '';
+};
+
+/**
+ * Resolve an image against the build manifest generated by
+ * scripts/build_optimizer.py. No network requests are made: the manifest
+ * already knows which WebP/AVIF/JPEG outputs exist, their dimensions and
+ * responsive variants. `src` is the URL the page uses, whether it is a
+ * public path or the URL of an imported asset (see scripts/vite-image-manifest.js).
+ *
+ * `sources` lists the modern formats smallest first for a <picture>, whose
+ * browser-side type check replaces WebP detection; `fallbackSrc` is what the
+ * inner <img> loads when no source type is supported. `placeholder` is the
+ * build's inline preview ({ lqip, color }), shown while the image loads.
+ *
+ * @param {string} src - Original image source
+ * @param {Object} options - { enableWebP }
+ * @returns {Object} - { src, format, width, height, bytes, srcSet, sources, fallbackSrc, placeholder }
+ */
+export const resolveOptimizedImage = (src, { enableWebP = true } = {}) => {
+  const entry = src ? imageManifest.images[src] : null;
+
+  if (!entry) {
+    return {
+      src, format: 'original', width: null, height: null, bytes: null,
+      srcSet: '', sources: [], fallbackSrc: src, placeholder: null
+    };
+  }
+
+  const useWebP = enableWebP || src.toLowerCase().endsWith('.webp');
+  const formats = entry.formats || {};
+  const modern = [
+    { format: 'webp', src: entry.webp, bytes: entry.bytes, variants: entry.variants },
+    ...Object.entries(formats)
+      .filter(([format]) => MIME_TYPES[format])
+      .map(([format, output]) => ({ format, ...output }))
+  ];
+
+  // Only worth a <picture> when there is more than WebP to choose from
+  const sources = modern.length > 1
+    ? modern
+      .sort((a, b) => a.bytes - b.bytes)
+      .map(output => {
+        const srcSet = buildSrcSet(output.src, entry.width, output.variants);
+        return {
+          type: MIME_TYPES[output.format],
+          format: output.format,
+          bytes: output.bytes,
+          srcSet: srcSet || output.src,
+          responsive: Boolean(srcSet)
+        };
+      })
+    : [];
+
+  return {
+    src: useWebP ? entry.webp : src,
+    format: useWebP ? 'webp' : 'original',
+    width: entry.width,
+    height: entry.height,
+    bytes: entry.bytes,
+    srcSet: useWebP ? buildSrcSet(entry.webp, entry.width, entry.variants) : '',
+    sources,
+    fallbackSrc: formats.jpeg ? formats.jpeg.src : src,
+    placeholder: entry.placeholder || null
+  };
+};
 
 /**
  * Custom hook for optimized image loading with WebP support
@@ -20,7 +109,11 @@ export const useOptimizedImage = (src, options = {}) => {
     isLoading: true,
     hasError: false,
     format: null,
-    size: null
+    size: null,
+    width: null,
+    height: null,
+    srcSet: '',
+    sources: []
   });
 
   /**
@@ -36,111 +129,28 @@ export const useOptimizedImage = (src, options = {}) => {
   }, []);
 
   /**
-   * Generate WebP version paths
-   */
-  const getWebPPaths = useCallback((originalPath) => {
-    if (!originalPath) return [];
-    
-    if (originalPath.toLowerCase().endsWith('.webp')) {
-      return [originalPath];
-    }
-    
-    const lastSlashIndex = originalPath.lastIndexOf('/');
-    const directory = originalPath.substring(0, lastSlashIndex + 1);
-    const filename = originalPath.substring(lastSlashIndex + 1);
-    const nameWithoutExt = filename.substring(0, filename.lastIndexOf('.'));
-    
-    return [
-      `${directory}webp/${nameWithoutExt}.webp`,
-      `${directory}${nameWithoutExt}.webp`,
-      originalPath.replace(/\.[^/.]+$/, '.webp')
-    ];
-  }, []);
-
-  /**
-   * Check if an image exists and get its metadata
+   * Resolve the optimal image from the build manifest
    */
-  const checkImage = useCallback((url) => {
-    return new Promise((resolve) => {
-      const img = new Image();
-      
-      img.onload = () => {
-        resolve({
-          exists: true,
-          width: img.naturalWidth,
-          height: img.naturalHeight,
-          size: img.naturalWidth * img.naturalHeight
-        });
-      };
-      
-      img.onerror = () => {
-        resolve({ exists: false });
-      };
-      
-      img.src = url;
-    });
-  }, []);
-
-  /**
-   * Load the optimal image format
-   */
-  const loadOptimalImage = useCallback(async () => {
+  const loadOptimalImage = useCallback(() => {
     if (!src) {
       setState(prev => ({ ...prev, hasError: true, isLoading: false }));
       return;
     }
 
-    setState(prev => ({ ...prev, isLoading: true, hasError: false }));
-
-    try {
-      let selectedSrc = src;
-      let selectedFormat = 'original';
-
-      // Try WebP versions if supported
-      if (enableWebP && supportsWebP()) {
-        const webpPaths = getWebPPaths(src);
-        
-        for (const webpPath of webpPaths) {
-          const result = await checkImage(webpPath);
-          if (result.exists) {
-            selectedSrc = webpPath;
-            selectedFormat = 'webp';
-            setState(prev => ({
-              ...prev,
-              src: selectedSrc,
-              format: selectedFormat,
-              size: result.size,
-              isLoading: false,
-              hasError: false
-            }));
-            return;
-          }
-        }
-      }
-
-      // Fallback to original image
-      const originalResult = await checkImage(src);
-      if (originalResult.exists) {
-        setState(prev => ({
-          ...prev,
-          src: selectedSrc,
-          format: selectedFormat,
-          size: originalResult.size,
-          isLoading: false,
-          hasError: false
-        }));
-      } else {
-        throw new Error('Image not found');
-      }
-    } catch (error) {
-      console.warn(`Failed to load optimized image: ${src}`, error);
-      setState(prev => ({
-        ...prev,
-        hasError: true,
-        isLoading: false
-      }));
-    }
-  }, [src, enableWebP, supportsWebP, getWebPPaths, checkImage]);
+    const resolved = resolveOptimizedImage(src, { enableWebP: enableWebP && supportsWebP() });
+    setState(prev => ({
+      ...prev,
+      src: resolved.src,
+      format: resolved.format,
+      size: resolved.width && resolved.height ? resolved.width * resolved.height : null,
+      width: resolved.width,
+      height: resolved.height,
+      srcSet: resolved.srcSet,
+      sources: resolved.sources,
+      isLoading: false,
+      hasError: false
+    }));
+  }, [src, enableWebP, supportsWebP]);
 
   /**
    * Preload image
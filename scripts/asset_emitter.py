@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Content-Hashed Asset Emitter for RadioFusion Image Optimizer
+Stages optimized images under content-hashed names, so they can be served
+with immutable caching, and removes the ones no build references anymore.
+The frontend build publishes the staged files the image manifest references.
+"""
+
+import os
+import re
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from image_dedup import DedupIndex
+from optimization_cache import OptimizationCache
+
+# Hex digits of the content hash kept in file names
+DEFAULT_HASH_LENGTH = 10
+
+# Builds whose files survive garbage collection: the current one plus the
+# previous one, whose pages may still be cached in browsers after a deploy
+DEFAULT_KEEP_BUILDS = 2
+
+# Records the files each recent build referenced
+INDEX_FILE = '.emitted.json'
+
+
+class HashedAssetEmitter:
+    """
+    Copies files into one flat directory as <stem>.<hash><suffix>.
+
+    A name changes whenever the contents do, so a re-optimized image gets a
+    new URL instead of hiding behind a year-long cache entry; identical
+    files from different folders share one name. Files are hardlinked
+    (copied where linking fails), and outputs are replaced by rename, so an
+    emitted file never changes after it is published.
+    """
+
+    def __init__(self, emit_dir: Path, url: str, hash_length: int = DEFAULT_HASH_LENGTH,
+                 keep_builds: int = DEFAULT_KEEP_BUILDS):
+        """
+        Initialize the HashedAssetEmitter.
+
+        Args:
+            emit_dir (Path): Directory the hashed files are written to; it
+                should hold nothing else
+            url (str): URL the frontend build publishes emit_dir under
+            hash_length (int): Hex digits of the content hash in file names
+            keep_builds (int): Recent builds whose files are kept by collect_garbage()
+
+        Raises:
+            ValueError: If hash_length or keep_builds is out of range
+        """
+        if not 8 <= hash_length <= 64:
+            raise ValueError(f"Hash length must be between 8 and 64, got {hash_length}")
+        if keep_builds < 1:
+            raise ValueError(f"keep_builds must be at least 1, got {keep_builds}")
+        self.emit_dir = emit_dir
+        self.url = url.rstrip('/')
+        self.hash_length = hash_length
+        self.keep_builds = keep_builds
+        self.pattern = re.compile(rf'\.[0-9a-f]{{{hash_length}}}\.[a-z0-9]+$')
+        self.emitted: Set[str] = set()
+        self.created = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], project_root: Path) -> Optional['HashedAssetEmitter']:
+        """
+        Build an emitter from a 'hashed_assets' configuration block.
+
+        Args:
+            config (Optional[Dict[str, Any]]): Block with 'enabled', 'dir',
+                'url', 'hash_length' and 'keep_builds'
+            project_root (Path): Directory 'dir' is relative to
+
+        Returns:
+            Optional[HashedAssetEmitter]: None when disabled
+
+        Raises:
+            ValueError: If a setting is missing or out of range
+        """
+        if not config or not config.get('enabled', False):
+            return None
+        for key in ('dir', 'url'):
+            if not config.get(key):
+                raise ValueError(f"'{key}' is required")
+        return cls(project_root / config['dir'], config['url'], hash_length=config.get('hash_length', DEFAULT_HASH_LENGTH),
+                   keep_builds=config.get('keep_builds', DEFAULT_KEEP_BUILDS))
+
+    def emit(self, path: Path) -> Path:
+        """
+        Publish a file under its content-hashed name.
+
+        Args:
+            path (Path): File to publish
+
+        Returns:
+            Path: The hashed file in emit_dir
+        """
+        digest = OptimizationCache.hash_file(path)[:self.hash_length]
+        target = self.emit_dir / f"{path.stem}.{digest}{path.suffix.lower()}"
+        if not target.exists():
+            DedupIndex.link_output(path, target)
+            self.created += 1
+        self.emitted.add(target.name)
+        return target
+
+    def get_url(self, target: Path) -> str:
+        """Get the URL an emitted file is served from."""
+        return f"{self.url}/{target.name}"
+
+    def load_index(self) -> List[List[str]]:
+        """Get the file names referenced by recent builds, newest first."""
+        try:
+            with open(self.emit_dir / INDEX_FILE, 'r') as f:
+                builds = json.load(f).get('builds', [])
+        except (OSError, ValueError, AttributeError):
+            return []
+        return [list(names) for names in builds if isinstance(names, list)]
+
+    def collect_garbage(self) -> Tuple[int, int]:
+        """
+        Record this build's files and delete hashed files no recent build references.
+
+        Only names carrying a content hash are considered, so stray files
+        placed in emit_dir by hand are left alone.
+
+        Returns:
+            Tuple[int, int]: (files removed, bytes freed)
+        """
+        # Regenerating an unchanged build does not push older builds out
+        current, previous = sorted(self.emitted), self.load_index()
+        builds = (previous if previous[:1] == [current] else [current] + previous)[:self.keep_builds]
+        referenced = {name for names in builds for name in names}
+        removed = freed = 0
+        if self.emit_dir.exists():
+            for entry in os.scandir(self.emit_dir):
+                if entry.is_file() and self.pattern.search(entry.name) and entry.name not in referenced:
+                    freed += entry.stat().st_size
+                    os.unlink(entry.path)
+                    removed += 1
+
+        self.emit_dir.mkdir(parents=True, exist_ok=True)
+        index_path = self.emit_dir / INDEX_FILE
+        temp_path = index_path.with_name(f"{INDEX_FILE}.{os.getpid()}.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump({'builds': builds}, f, indent=2)
+            f.write('\n')
+        os.replace(temp_path, index_path)
+        return removed, freed
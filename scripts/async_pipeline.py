@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Asyncio Conversion Pipeline for RadioFusion Batch Image Optimizer
+Streams images through discover -> cache check -> encode -> verify -> record stages.
+"""
+
+import os
+import time
+import signal
+import asyncio
+import subprocess
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from image_optimizer import SUFFIX_FORMATS, ImageOptimizer
+from image_probe import probe_image
+from image_scanner import scan_images
+from job_supervisor import AtomicOutputs, JobCancelled, JobSupervisor
+from optimization_cache import OptimizationCache
+from result_writer import CACHED, CONVERTED, FAILED, QUARANTINED, SKIPPED
+from tracing import Tracer
+
+# Encoder stderr kept per job for error messages; everything before it is
+# read and dropped as it streams in
+STDERR_TAIL_BYTES = 4096
+
+# Read size when draining encoder output pipes
+PIPE_CHUNK_SIZE = 64 * 1024
+
+# Queue slots between stages per unit of concurrency; bounds memory no
+# matter how many files are discovered
+QUEUE_SLOTS_PER_JOB = 2
+
+
+class DirectoryJob(NamedTuple):
+    """A configured directory and the optimizer holding its settings."""
+    optimizer: ImageOptimizer
+    input_dir: Path
+    output_dir: Path
+    recursive: bool
+    skip_dirs: List[Path]
+
+
+class FileJob:
+    """
+    An image moving through the pipeline, with the state each stage adds.
+    """
+
+    def __init__(self, directory: DirectoryJob, path: Path, stat: os.stat_result):
+        """
+        Initialize the FileJob.
+
+        Args:
+            directory (DirectoryJob): Directory the image was discovered in
+            path (Path): Path to the image
+            stat (os.stat_result): Stat taken during discovery
+        """
+        self.directory = directory
+        self.path = path
+        self.stat = stat
+        self.started = time.perf_counter()
+        self.optimizer = directory.optimizer
+        self.outputs: List[Path] = []
+        self.source_hash: Optional[str] = None
+        self.cache_entries: List[Tuple[Path, str, Dict[str, Any]]] = []
+        self.staged: Optional[AtomicOutputs] = None
+        self.memory = 0
+        self.attempts = 0
+        self.status = ''
+        self.error: Optional[str] = None
+        self.stale_reason: Optional[str] = None
+
+
+class AsyncConversionPipeline:
+    """
+    Staged asyncio pipeline for many concurrent conversions.
+
+    Stages are connected by bounded queues, so discovery never runs far ahead
+    of encoding. FFmpeg runs through asyncio subprocesses limited by one
+    semaphore, with stdout/stderr drained as they stream; Pillow encodes and
+    adaptive quality searches keep their synchronous path in worker threads,
+    under the same semaphore. Supervisor settings (timeout, retries, backoff,
+    quarantine, memory budget) apply as in threaded mode.
+    """
+
+    def __init__(self, supervisor: JobSupervisor, concurrency: int, tracer: Optional[Tracer] = None):
+        """
+        Initialize the AsyncConversionPipeline.
+
+        Args:
+            supervisor (JobSupervisor): Timeout, retry and quarantine settings
+            concurrency (int): Encodes running at once across all directories
+            tracer (Tracer): Per-stage span recorder (default: disabled)
+        """
+        self.supervisor = supervisor
+        self.concurrency = max(1, concurrency)
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.staged: Set[AtomicOutputs] = set()
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        self.file_durations: List[float] = []
+
+    def run(self, directories: List[DirectoryJob]) -> None:
+        """
+        Convert every image in the directories, returning once all are recorded.
+
+        On cancellation the event loop cancels every stage, running encoders
+        are killed and their staged outputs discarded.
+
+        Args:
+            directories (List[DirectoryJob]): Directories to process
+        """
+        # Start the Pillow pools before any worker threads, so they never
+        # fork a multi-threaded process
+        for directory in directories:
+            directory.optimizer.start_process_pool()
+        try:
+            asyncio.run(self.run_stages(directories))
+        finally:
+            for staged in list(self.staged):
+                staged.discard()
+            self.staged.clear()
+
+    async def run_stages(self, directories: List[DirectoryJob]) -> None:
+        """Wire the stages together and wait for the last one to drain."""
+        size = self.concurrency * QUEUE_SLOTS_PER_JOB
+        discovered: asyncio.Queue = asyncio.Queue(size)
+        to_encode: asyncio.Queue = asyncio.Queue(size)
+        to_verify: asyncio.Queue = asyncio.Queue(size)
+        to_record: asyncio.Queue = asyncio.Queue(size)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def discover() -> None:
+            await self.discover(directories, discovered)
+            await discovered.put(None)
+
+        async def check_cache() -> None:
+            await self.consume(discovered, lambda job: self.check_cache(job, to_encode, to_record),
+                               workers=self.concurrency)
+            await to_encode.put(None)
+
+        async def encode() -> None:
+            # One task per file, admitted by the semaphore rather than a fixed
+            # set of workers; each running task holds a numbered slot, which
+            # names its row in traces
+            tasks: Set[asyncio.Task] = set()
+            free_slots = list(range(self.concurrency, 0, -1))
+            while True:
+                job = await to_encode.get()
+                if job is None:
+                    break
+                await semaphore.acquire()
+                # Jobs are admitted in order once their decode memory fits
+                try:
+                    reserved = await asyncio.to_thread(self.supervisor.memory.acquire, job.memory,
+                                                       self.supervisor.check_cancelled)
+                except JobCancelled:
+                    semaphore.release()
+                    continue
+                slot = free_slots.pop()
+                task = asyncio.create_task(self.guard(job, self.encode(job, f"encode-{slot}",
+                                                                       to_verify, to_record)))
+
+                def release(_: asyncio.Task, slot: int = slot, reserved: int = reserved) -> None:
+                    free_slots.append(slot)
+                    self.supervisor.memory.release(reserved)
+                    semaphore.release()
+
+                task.add_done_callback(release)
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+            await to_verify.put(None)
+
+        async def verify() -> None:
+            await self.consume(to_verify, lambda job: self.verify(job, to_record))
+            await to_record.put(None)
+
+        async def record() -> None:
+            await self.consume(to_record, self.record)
+
+        await asyncio.gather(discover(), check_cache(), encode(), verify(), record())
+
+    async def guard(self, job: FileJob, stage: Awaitable[None]) -> None:
+        """
+        Run one stage for a job, counting an unexpected error as a failed file.
+
+        Args:
+            job (FileJob): Job the stage handles
+            stage (Awaitable[None]): Stage coroutine
+        """
+        try:
+            await stage
+        except Exception as e:
+            if job.staged is not None:
+                job.staged.discard()
+                self.staged.discard(job.staged)
+            print(f"❌ Unexpected error processing {job.path.name}: {str(e)}")
+            job.optimizer.update_stats(errors=1)
+            job.optimizer.results.file_result(job.path, FAILED, time.perf_counter() - job.started,
+                                              job.stat.st_size, error=str(e))
+
+    async def consume(self, queue: asyncio.Queue, handle: Callable[[FileJob], Awaitable[None]],
+                      workers: int = 1) -> None:
+        """
+        Run stage workers until the end-of-stream marker (None) arrives.
+
+        The marker is put back for sibling workers, so one marker stops them all.
+
+        Args:
+            queue (asyncio.Queue): Stage inbox
+            handle (Callable): Coroutine function handling one job
+            workers (int): Concurrent workers for the stage
+        """
+        async def worker() -> None:
+            while True:
+                job = await queue.get()
+                if job is None:
+                    await queue.put(None)
+                    return
+                await self.guard(job, handle(job))
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        # Leave the queue empty for the next stage's marker
+        while not queue.empty():
+            queue.get_nowait()
+
+    async def discover(self, directories: List[DirectoryJob], outbox: asyncio.Queue) -> None:
+        """
+        Stage 1: walk every directory and queue each image as it is found.
+
+        The walk yields to the loop at every queued file, and blocks while
+        the next stage's queue is full.
+        """
+        for directory in directories:
+            scanned_files = scan_images(directory.input_dir, ImageOptimizer.SUPPORTED_FORMATS,
+                                        directory.optimizer.exclude_matcher, recursive=directory.recursive,
+                                        skip_dirs=[directory.output_dir, *directory.skip_dirs])
+            dedup = directory.optimizer.dedup
+            for scanned in self.tracer.trace_iter('discover', scanned_files, worker='discover'):
+                if self.supervisor.cancelled.is_set():
+                    return
+                # Duplicates get their canonical copy's outputs after the run
+                if dedup is not None and dedup.is_duplicate(scanned.path):
+                    continue
+                await outbox.put(FileJob(directory, scanned.path, scanned.stat))
+
+    async def check_cache(self, job: FileJob, to_encode: asyncio.Queue, to_record: asyncio.Queue) -> None:
+        """
+        Stage 2: pick the file's profile, apply the size limits and skip it if
+        it is up to date, quarantined, too large or restored from the
+        persistent cache.
+
+        The checks stat, hash and link files, so they run in a worker thread.
+        """
+        await asyncio.to_thread(self.check_job, job)
+        await (to_record if job.status else to_encode).put(job)
+
+    def check_job(self, job: FileJob) -> None:
+        """Resolve a job's outputs and set its status if it needs no encode."""
+        directory = job.directory
+        job.optimizer = directory.optimizer.get_profile_optimizer(job.path, directory.input_dir)
+        output_path = job.optimizer.get_output_path(job.path, directory.output_dir, True, directory.input_dir)
+
+        with self.tracer.span('stat', job.path, bytes_in=job.stat.st_size) as span:
+            job.outputs = job.optimizer.get_format_outputs(job.path, output_path)
+            job.stale_reason = job.optimizer.get_stale_reason(job.path, job.stat, job.outputs, directory.input_dir)
+            span.set(up_to_date=job.stale_reason is None)
+
+        if job.stale_reason is None:
+            job.status = SKIPPED
+            return
+        if job.optimizer.placeholders is not None:
+            job.optimizer.placeholders.discard(job.path)
+        if self.supervisor.is_quarantined(job.path, job.stat):
+            job.status = QUARANTINED
+            return
+        optimizer = job.optimizer.apply_size_limits(job.path, job.stat.st_size)
+        if optimizer is None:
+            job.status = SKIPPED
+            job.error = 'exceeds max_file_size_mb'
+            return
+        job.optimizer = optimizer
+        job.memory = optimizer.estimate_memory(job.path, job.stat.st_size)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if job.optimizer.cache is not None:
+            with self.tracer.span('cache', job.path, bytes_in=job.stat.st_size) as span:
+                job.source_hash = (optimizer.state.hash_source(job.path, job.stat) if optimizer.state is not None
+                                   else OptimizationCache.hash_file(job.path))
+                job.cache_entries = job.optimizer.get_cache_entries(job.source_hash, job.outputs)
+                hit = all(job.optimizer.cache.fetch(key, output) for output, key, _ in job.cache_entries)
+                span.set(hit=hit)
+            if hit:
+                job.status = CACHED
+
+    async def encode(self, job: FileJob, slot: str, to_verify: asyncio.Queue, to_record: asyncio.Queue) -> None:
+        """
+        Stage 3: encode every output to staged temporary files, retrying
+        failures with exponential backoff.
+
+        Args:
+            job (FileJob): Job to encode
+            slot (str): Concurrency slot the job holds, its worker id in traces
+            to_verify (asyncio.Queue): Inbox of the verify stage
+            to_record (asyncio.Queue): Inbox of the record stage
+        """
+        job.staged = AtomicOutputs(job.outputs)
+        self.staged.add(job.staged)
+        print(f"🔄 Converting {job.path.name} ({job.stale_reason})...")
+
+        for attempt in range(self.supervisor.retries + 1):
+            if self.supervisor.cancelled.is_set():
+                # Dropped unrecorded, as in threaded mode
+                job.staged.discard()
+                self.staged.discard(job.staged)
+                return
+            job.attempts += 1
+            if await self.encode_once(job, slot):
+                await to_verify.put(job)
+                return
+            if attempt < self.supervisor.retries:
+                delay = self.supervisor.backoff * 2 ** attempt
+                print(f"🔁 Retrying {job.path.name} in {delay:.1f}s "
+                      f"(attempt {attempt + 2}/{self.supervisor.retries + 1})")
+                await asyncio.sleep(delay)
+
+        job.staged.discard()
+        self.staged.discard(job.staged)
+        job.status = FAILED
+        await to_record.put(job)
+
+    async def encode_once(self, job: FileJob, slot: str) -> bool:
+        """Make one attempt at writing every staged output."""
+        optimizer = job.optimizer
+        if (optimizer.searches_quality() or optimizer.can_decode_with_pillow(job.path)
+                or optimizer.batcher is not None):
+            # Bounded by the supervisor's timeouts inside the thread; batched
+            # encodes block there until their chunk's FFmpeg process is done
+            return await asyncio.to_thread(self.write_outputs, job)
+
+        with self.tracer.span('convert', job.path, worker=slot, engine='ffmpeg',
+                              bytes_in=job.stat.st_size) as span:
+            success = await self.run_ffmpeg(optimizer.build_convert_command(job.path, job.staged.temps),
+                                            job.path.name)
+            if self.tracer.enabled:
+                span.set(bytes_out=sum(optimizer.get_file_size(temp) for temp in job.staged.temps))
+        return success
+
+    def write_outputs(self, job: FileJob) -> bool:
+        """Encode a job's staged outputs on the synchronous (Pillow or adaptive) path."""
+        with self.tracer.span('convert', job.path, engine=job.optimizer.engine,
+                              bytes_in=job.stat.st_size) as span:
+            success = job.optimizer.write_outputs(job.path, job.staged.temps)
+            if self.tracer.enabled:
+                span.set(bytes_out=sum(job.optimizer.get_file_size(temp) for temp in job.staged.temps))
+        return success
+
+    async def run_ffmpeg(self, cmd: List[str], name: str) -> bool:
+        """
+        Run an FFmpeg command as an asyncio subprocess within the supervisor timeout.
+
+        Both pipes are drained as they stream; only the tail of stderr is kept
+        for the error message.
+
+        Args:
+            cmd (List[str]): FFmpeg command
+            name (str): File name for messages
+
+        Returns:
+            bool: True if FFmpeg exited successfully
+        """
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdin=subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE, start_new_session=True)
+        stderr_tail = bytearray()
+
+        async def drain(stream: asyncio.StreamReader, keep: Optional[bytearray]) -> None:
+            while True:
+                chunk = await stream.read(PIPE_CHUNK_SIZE)
+                if not chunk:
+                    return
+                if keep is not None:
+                    keep.extend(chunk)
+                    del keep[:-STDERR_TAIL_BYTES]
+
+        async def finish() -> None:
+            await asyncio.gather(drain(process.stdout, None), drain(process.stderr, stderr_tail))
+            await process.wait()
+
+        try:
+            await asyncio.wait_for(finish(), timeout=self.supervisor.timeout)
+        except asyncio.TimeoutError:
+            print(f"⏱️  Timed out converting {name} after {self.supervisor.timeout:.0f}s")
+            return False
+        finally:
+            if process.returncode is None:
+                # Kill the whole session: wait() only returns once the pipes
+                # close, and a child of the encoder may still hold them open
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await process.wait()
+
+        if process.returncode != 0:
+            print(f"❌ Error converting {name}: {stderr_tail.decode(errors='replace').strip()}")
+            return False
+        return True
+
+    async def verify(self, job: FileJob, to_record: asyncio.Queue) -> None:
+        """
+        Stage 4: check each staged output's header before renaming it into place.
+
+        An encoder that exits cleanly but leaves an empty or foreign file
+        fails the job instead of replacing a good output.
+        """
+        with self.tracer.span('write', job.path, worker='verify') as span:
+            self.verify_outputs(job)
+            if self.tracer.enabled and job.status == CONVERTED:
+                span.set(bytes_out=sum(job.optimizer.get_file_size(output) for output in job.outputs))
+        self.staged.discard(job.staged)
+        await to_record.put(job)
+
+    def verify_outputs(self, job: FileJob) -> None:
+        """Commit a job's staged outputs if their headers match their formats."""
+        temps = job.staged.temps
+        problem = None
+        if not temps[0].exists():
+            problem = "no WebP was written"
+        for temp in temps:
+            if problem is None and temp.exists():
+                info = probe_image(temp)
+                if info is None or info['format'] != SUFFIX_FORMATS[temp.suffix.lower()]:
+                    problem = f"{temp.suffix} output is not a valid image"
+
+        if problem is None:
+            job.staged.commit()
+            job.status = CONVERTED
+        else:
+            print(f"❌ Verification failed for {job.path.name}: {problem}")
+            job.staged.discard()
+            job.status = FAILED
+
+    def store_outputs(self, job: FileJob) -> None:
+        """Store a converted job's outputs in the persistent cache."""
+        with self.tracer.span('cache_store', job.path):
+            for output, cache_key, cache_params in job.cache_entries:
+                if output.exists():
+                    job.optimizer.cache.store(cache_key, job.source_hash, output, cache_params)
+
+    async def record(self, job: FileJob) -> None:
+        """
+        Stage 5: report the job, update stats, the cache and the quarantine,
+        and add the outputs to the run manifest.
+        """
+        optimizer, name = job.optimizer, job.path.name
+        original_size = job.stat.st_size
+        new_size = optimizer.get_file_size(job.outputs[0]) if job.outputs else 0
+        error = job.error
+
+        if job.status == SKIPPED:
+            if error is None:
+                print(f"⏭️  Skipping {name} ({optimizer.describe_up_to_date()})")
+                await asyncio.to_thread(optimizer.collect_placeholder, job.path, job.outputs[0])
+            optimizer.update_stats(skipped=1)
+        elif job.status == QUARANTINED:
+            print(f"⛔ Skipping {name} (quarantined after repeated failures)")
+            optimizer.update_stats(quarantined=1)
+            error = 'quarantined after repeated failures'
+        elif job.status == CACHED:
+            await asyncio.to_thread(optimizer.record_build, job.path, job.stat, job.outputs,
+                                    job.directory.input_dir)
+            print(f"♻️  {name} -> {job.outputs[0].name} (cached)")
+            optimizer.update_stats(cached=1, total_size_before=original_size, total_size_after=new_size)
+        elif job.status == CONVERTED:
+            self.supervisor.quarantine.release(job.path)
+            if job.cache_entries:
+                await asyncio.to_thread(self.store_outputs, job)
+            await asyncio.to_thread(optimizer.record_build, job.path, job.stat, job.outputs,
+                                    job.directory.input_dir)
+            optimizer.report_conversion(job.path, job.outputs, original_size, new_size)
+            optimizer.update_stats(processed=1, total_size_before=original_size, total_size_after=new_size)
+        else:
+            self.supervisor.quarantine.add(job.path, job.stat, job.attempts)
+            if optimizer.state is not None:
+                optimizer.state.forget(job.path)
+            print(f"⛔ Quarantined {name} after {job.attempts} failed attempts")
+            optimizer.update_stats(errors=1)
+            error = f"failed after {job.attempts} attempts"
+
+        duration = time.perf_counter() - job.started
+        outputs = [output for output in job.outputs if output.exists()] if job.status != FAILED else []
+        self.file_durations.append(duration)
+        optimizer.results.file_result(job.path, job.status, duration, original_size,
+                                      new_size if outputs else 0, outputs, error)
+        self.manifest[str(job.path)] = {
+            'status': job.status,
+            'outputs': {
+                SUFFIX_FORMATS[output.suffix.lower()]: {'path': str(output), 'bytes': output.stat().st_size}
+                for output in outputs
+            }
+        }
+        placeholder = optimizer.placeholders.get(job.path) if optimizer.placeholders is not None else None
+        if placeholder is not None:
+            self.manifest[str(job.path)]['placeholder'] = placeholder
@@ -11,34 +11,95 @@ import time
 import threading
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import argparse
-from image_optimizer import ImageOptimizer
+from async_pipeline import AsyncConversionPipeline, DirectoryJob
+from build_state import BuildState
+from image_dedup import DEDUP_MODES, DedupIndex
+from ffmpeg_batch import MAX_BATCH_THREADS, FFmpegBatcher
+from image_placeholders import PLACEHOLDERS_AVAILABLE, PlaceholderStore
+from image_optimizer import ENGINES, SUFFIX_FORMATS, ImageOptimizer
+from image_profiles import create_profile_matcher
+from image_scanner import ExcludeMatcher, ScannedFile, scan_images
+from memory_budget import MB
+from job_supervisor import JobCancelled, JobSupervisor, WorkerPool, handle_signals
+from optimization_cache import OptimizationCache
+from optimizer_config import ENCODER_KEYS, EXECUTION_MODES, OptimizerConfig
+from result_writer import OUTPUT_MODES, ResultWriter
+from tracing import PROFILE_TOP, Tracer, run_profiled
 
 class BatchImageOptimizer:
     """
     Advanced batch image optimizer with multi-threading and configuration support.
     """
     
-    def __init__(self, config_file: str = None):
+    def __init__(self, config_file: str = None, config: Optional[OptimizerConfig] = None):
         """
         Initialize the BatchImageOptimizer.
         
         Args:
             config_file (str): Path to configuration file
+            config (OptimizerConfig): Configuration built in memory (e.g. by
+                the build optimizer); takes precedence over config_file
         """
-        self.config = self.load_config(config_file)
+        self.config = config if config is not None else self.load_config(config_file)
         self.total_stats = {
             'processed': 0,
+            'cached': 0,
             'skipped': 0,
+            'quarantined': 0,
             'errors': 0,
+            'deduplicated': 0,
+            'dedup_bytes_saved': 0,
+            'dedup_source_bytes': 0,
             'total_size_before': 0,
             'total_size_after': 0,
             'directories_processed': 0
         }
+        self.file_durations: List[float] = []
         self.lock = threading.Lock()
+        self.file_executor = None
+        self.process_pool = None
+        self.cache = None
+        self.supervisor = None
+        self.tracer = Tracer()
+        self.results = ResultWriter()
+        self.directory_results: List[Dict[str, Any]] = []
+        self.exclude_matcher = None
+        self.profile_matcher = None
+        self.dedup = None
+        self.state = None
+        self.placeholders = None
+        self.batcher = None
+        self.manifest_entries: Optional[Dict[str, Dict[str, Any]]] = None
     
-    def load_config(self, config_file: str = None) -> Dict[str, Any]:
+    def get_file_workers(self) -> int:
+        """
+        Get the number of file-level workers shared by all directories.
+        
+        Returns:
+            int: Configured file workers, or the CPU count when unset
+        """
+        return self.config.get('file_workers') or os.cpu_count() or 1
+    
+    def get_file_threads(self) -> int:
+        """
+        Get the number of files processed at once.
+        
+        Batched FFmpeg encodes block their thread until their chunk is done,
+        so process slots get extra threads to fill their chunks, up to
+        MAX_BATCH_THREADS in all (never fewer than the file workers).
+        
+        Returns:
+            int: File workers, times the chunk input limit when batching
+            within the thread cap
+        """
+        workers = self.get_file_workers()
+        if self.batcher is None:
+            return workers
+        return max(workers, min(workers * self.batcher.limits.max_inputs, MAX_BATCH_THREADS))
+    
+    def load_config(self, config_file: str = None) -> OptimizerConfig:
         """
         Load configuration from file or use defaults.
         
@@ -46,46 +107,18 @@ class BatchImageOptimizer:
             config_file (str): Path to configuration file
             
         Returns:
-            Dict[str, Any]: Configuration dictionary
-        """
-        default_config = {
-            "quality": 85,
-            "lossless": False,
-            "max_workers": 4,
-            "recursive": True,
-            "preserve_structure": True,
-            "create_backup": False,
-            "directories": [
-                {
-                    "input": "frontend/src/assets/images",
-                    "output": "frontend/src/assets/images/webp",
-                    "quality": 85
-                },
-                {
-                    "input": "frontend/public/images",
-                    "output": "frontend/public/images/webp",
-                    "quality": 90
-                }
-            ],
-            "exclude_patterns": [
-                "*.webp",
-                "**/node_modules/**",
-                "**/venv/**",
-                "**/.git/**"
-            ]
-        }
-        
+            OptimizerConfig: File settings deep-merged over the defaults
+        """
         if config_file and Path(config_file).exists():
             try:
-                with open(config_file, 'r') as f:
-                    user_config = json.load(f)
-                    default_config.update(user_config)
-                    print(f"✅ Loaded configuration from {config_file}")
+                config = OptimizerConfig.load(config_file)
+                print(f"✅ Loaded configuration from {config_file}")
+                return config
             except Exception as e:
                 print(f"⚠️  Error loading config file: {e}")
                 print("Using default configuration")
         
-        return default_config
+        return OptimizerConfig()
     
     def save_config(self, config_file: str) -> None:
         """
@@ -96,7 +129,7 @@ class BatchImageOptimizer:
         """
         try:
             with open(config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
+                json.dump(self.config.to_dict(), f, indent=2)
             print(f"✅ Configuration saved to {config_file}")
         except Exception as e:
             print(f"❌ Error saving configuration: {e}")
@@ -111,10 +144,19 @@ class BatchImageOptimizer:
         Returns:
             bool: True if should be excluded
         """
-        for pattern in self.config.get('exclude_patterns', []):
-            if path.match(pattern):
-                return True
-        return False
+        return self.get_exclude_matcher().matches(path.as_posix(), is_dir=path.is_dir())
+    
+    def get_exclude_matcher(self) -> ExcludeMatcher:
+        """
+        Get the exclude patterns compiled once for the whole run.
+        
+        Returns:
+            ExcludeMatcher: Compiled exclude patterns
+        """
+        patterns = list(self.config['exclude_patterns'])
+        if self.exclude_matcher is None or self.exclude_matcher.patterns != patterns:
+            self.exclude_matcher = ExcludeMatcher(patterns)
+        return self.exclude_matcher
     
     def process_directory_batch(self, directory_config: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -129,41 +171,230 @@ class BatchImageOptimizer:
         input_dir = Path(directory_config['input'])
         output_dir = Path(directory_config['output'])
         
-        # Use directory-specific quality or global quality
-        quality = directory_config.get('quality', self.config['quality'])
-        lossless = directory_config.get('lossless', self.config['lossless'])
+        optimizer = self.create_directory_optimizer(directory_config)
+        if optimizer is None:
+            return {'success': False, 'error': 'Directory not found'}
+        
+        # Process directory, never walking into any configured output folder
+        start_time = time.time()
+        optimizer.process_directory(input_dir, output_dir, self.config['recursive'],
+                                    skip_dirs=self.get_output_dirs())
+        end_time = time.time()
+        
+        self.add_directory_stats(optimizer)
+        
+        return {
+            'success': True,
+            'directory': str(input_dir),
+            'stats': optimizer.stats,
+            'duration': end_time - start_time
+        }
+    
+    def create_directory_optimizer(self, directory_config: Dict[str, Any]) -> Optional[ImageOptimizer]:
+        """
+        Create the optimizer holding a directory's settings.
+        
+        Args:
+            directory_config (Dict[str, Any]): Directory configuration
+            
+        Returns:
+            Optional[ImageOptimizer]: Optimizer for the directory, or None if
+            the input directory does not exist
+        """
+        input_dir = Path(directory_config['input'])
+        output_dir = Path(directory_config['output'])
         
         print(f"\n📁 Processing directory: {input_dir}")
         print(f"📤 Output directory: {output_dir}")
-        print(f"🎯 Quality: {quality}%, Lossless: {lossless}")
         
         if not input_dir.exists():
             print(f"⚠️  Input directory does not exist: {input_dir}")
-            return {'success': False, 'error': 'Directory not found'}
+            return None
         
-        # Initialize optimizer for this directory
-        optimizer = ImageOptimizer(quality=quality, lossless=lossless)
+        # Initialize optimizer for this directory; files go to the shared pool
+        optimizer = ImageOptimizer.from_config(
+            self.config, directory_config,
+            executor=self.file_executor,
+            process_pool=self.process_pool,
+            cache=self.cache,
+            profiles=self.profile_matcher if directory_config.get('use_profiles', True) else None,
+            supervisor=self.supervisor,
+            tracer=self.tracer,
+            results=self.results,
+            dedup=self.dedup,
+            state=self.state,
+            placeholders=self.placeholders,
+            batcher=self.batcher)
         
-        # Process directory
-        start_time = time.time()
-        optimizer.process_directory(input_dir, output_dir, self.config['recursive'])
-        end_time = time.time()
+        # Directory-specific quality or global quality
+        print(f"🎯 Quality: {optimizer.quality}%, Lossless: {optimizer.lossless}")
+        quality_target = optimizer.quality_target
+        if quality_target is not None:
+            print(f"🎚️  Adaptive quality: {quality_target.min_quality}-{optimizer.quality}, "
+                  f"SSIM >= {quality_target.min_ssim}, max bytes: {quality_target.max_bytes}")
+        return optimizer
+    
+    def get_output_dirs(self) -> List[Path]:
+        """Get every configured output folder, pruned from all directory scans."""
+        return [Path(d['output']) for d in self.config.get('directories', [])]
+    
+    def add_directory_stats(self, optimizer: ImageOptimizer) -> None:
+        """
+        Add a finished directory's stats to the run totals.
         
-        # Update total stats
+        Args:
+            optimizer (ImageOptimizer): Optimizer that processed the directory
+        """
         with self.lock:
             self.total_stats['processed'] += optimizer.stats['processed']
+            self.total_stats['cached'] += optimizer.stats['cached']
             self.total_stats['skipped'] += optimizer.stats['skipped']
+            self.total_stats['quarantined'] += optimizer.stats['quarantined']
             self.total_stats['errors'] += optimizer.stats['errors']
             self.total_stats['total_size_before'] += optimizer.stats['total_size_before']
             self.total_stats['total_size_after'] += optimizer.stats['total_size_after']
             self.total_stats['directories_processed'] += 1
+            self.file_durations.extend(optimizer.file_durations)
+    
+    def process_directories_async(self, directories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Process every directory through one asyncio conversion pipeline.
         
-        return {
-            'success': True,
-            'directory': str(input_dir),
-            'stats': optimizer.stats,
-            'duration': end_time - start_time
-        }
+        Files from all directories stream through the same stages, with at
+        most async_concurrency encodes running at once.
+        
+        Args:
+            directories (List[Dict[str, Any]]): Directory configurations
+            
+        Returns:
+            List[Dict[str, Any]]: Processing results, one per directory
+        """
+        results = []
+        jobs = []
+        for dir_config in directories:
+            optimizer = self.create_directory_optimizer(dir_config)
+            if optimizer is None:
+                results.append({'success': False, 'directory': dir_config['input'],
+                                'error': 'Directory not found'})
+                continue
+            output_dir = Path(dir_config['output'])
+            output_dir.mkdir(parents=True, exist_ok=True)
+            jobs.append(DirectoryJob(optimizer, Path(dir_config['input']), output_dir,
+                                     self.config['recursive'], self.get_output_dirs()))
+        
+        concurrency = self.config.get('async_concurrency') or self.get_file_threads()
+        print(f"\n⚡ Asyncio pipeline: {concurrency} concurrent encodes")
+        pipeline = AsyncConversionPipeline(self.supervisor, concurrency, self.tracer)
+        start_time = time.time()
+        pipeline.run(jobs)
+        self.supervisor.check_cancelled()
+        duration = time.time() - start_time
+        
+        for job in jobs:
+            self.add_directory_stats(job.optimizer)
+            results.append({
+                'success': True,
+                'directory': str(job.input_dir),
+                'stats': job.optimizer.stats,
+                'duration': duration
+            })
+            print(f"✅ Completed: {job.input_dir}")
+        self.file_durations.extend(pipeline.file_durations)
+        
+        # Written once duplicates are materialized, so they are listed too
+        if self.config.get('manifest_file'):
+            self.manifest_entries = pipeline.manifest
+        return results
+    
+    def save_manifest(self, manifest_path: Path, entries: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Write the run manifest: status and outputs of every source image.
+        
+        Args:
+            manifest_path (Path): Manifest file
+            entries (Dict[str, Dict[str, Any]]): Entries keyed by source path
+        """
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = manifest_path.with_name(f".{manifest_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump({'generated_at': time.time(),
+                       'config_fingerprint': self.config.fingerprint(*ENCODER_KEYS),
+                       'images': entries}, f, indent=2, sort_keys=True)
+        os.replace(temp_path, manifest_path)
+        print(f"📝 Manifest written to {manifest_path} ({len(entries)} images)")
+    
+    def plan_dedup(self, directories: List[Dict[str, Any]]) -> None:
+        """
+        Hash every source image and find the copies to encode only once.
+        
+        Images are grouped across all directories; only copies whose encoder
+        settings (directory quality, profile, formats) match share outputs.
+        
+        Args:
+            directories (List[Dict[str, Any]]): Directory configurations
+        """
+        try:
+            self.dedup = DedupIndex.from_config(self.config.get('dedup'))
+        except ValueError as e:
+            print(f"❌ Invalid dedup settings: {e}")
+            sys.exit(1)
+        if self.dedup is None:
+            return
+        
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.get_file_workers(),
+                                thread_name_prefix='dedup-hash') as executor:
+            futures = []
+            for dir_config in directories:
+                input_dir = Path(dir_config['input'])
+                output_dir = Path(dir_config['output'])
+                if not input_dir.exists():
+                    continue
+                optimizer = ImageOptimizer.from_config(
+                    self.config, dir_config,
+                    profiles=self.profile_matcher if dir_config.get('use_profiles', True) else None)
+                for scanned in scan_images(input_dir, ImageOptimizer.SUPPORTED_FORMATS,
+                                           optimizer.exclude_matcher, recursive=self.config['recursive'],
+                                           skip_dirs=[output_dir, *self.get_output_dirs()]):
+                    output_path = optimizer.get_output_path(scanned.path, output_dir, True, input_dir)
+                    outputs = optimizer.get_format_outputs(scanned.path, output_path)
+                    futures.append(executor.submit(
+                        self.add_dedup_entry, scanned, input_dir, output_dir, outputs,
+                        optimizer.get_encoder_settings(scanned.path, outputs, input_dir)))
+            for future in as_completed(futures):
+                future.result()
+        
+        duplicates = self.dedup.plan()
+        print(f"🔗 Dedup ({self.dedup.mode}{', perceptual' if self.dedup.perceptual else ''}): "
+              f"{duplicates} duplicates of {len(self.dedup.entries)} images "
+              f"({time.time() - start_time:.2f}s)")
+    
+    def add_dedup_entry(self, scanned: ScannedFile, input_dir: Path, output_dir: Path,
+                        outputs: List[Path], settings: str) -> None:
+        """Add a source to the dedup index, reusing the build state's hash while the file is unchanged."""
+        content_hash = self.state.hash_source(scanned.path, scanned.stat) if self.state is not None else None
+        self.dedup.add(scanned.path, input_dir, output_dir, outputs, settings, content_hash)
+    
+    def materialize_duplicates(self) -> None:
+        """Give duplicates their canonical outputs and add them to the totals and manifest."""
+        summary = self.dedup.materialize(self.results)
+        self.total_stats['deduplicated'] += summary['deduplicated']
+        self.total_stats['dedup_bytes_saved'] += summary['bytes_saved']
+        self.total_stats['dedup_source_bytes'] += summary['source_bytes']
+        self.total_stats['errors'] += summary['failed']
+        if self.manifest_entries is not None:
+            for path, (canonical, outputs) in summary['duplicates'].items():
+                self.manifest_entries[str(path)] = {
+                    'status': 'deduplicated',
+                    'alias_of': str(canonical),
+                    'outputs': {
+                        SUFFIX_FORMATS[output.suffix.lower()]: {'path': str(output), 'bytes': output.stat().st_size}
+                        for output in outputs
+                    }
+                }
+                placeholder = self.placeholders.get(canonical) if self.placeholders is not None else None
+                if placeholder is not None:
+                    self.manifest_entries[str(path)]['placeholder'] = placeholder
     
     def process_all_directories(self) -> None:
         """Process all directories in configuration."""
@@ -177,19 +408,213 @@ class BatchImageOptimizer:
         print("=" * 60)
         print(f"📊 Processing {len(directories)} directories")
         print(f"🧵 Max workers: {self.config['max_workers']}")
+        print(f"🧵 File workers: {self.get_file_workers()}")
+        print(f"⚙️  Engine: {self.config.get('engine', 'ffmpeg')}")
+        print(f"🔀 Execution: {self.config.get('execution', 'threads')}")
+        print(f"🖼️  Formats: {', '.join(self.config.get('output_formats', ['webp']))}")
+        print(f"🔑 Encoder settings: {self.config.fingerprint(*ENCODER_KEYS)}")
         print("=" * 60)
         
-        # Check FFmpeg availability
-        optimizer = ImageOptimizer()
-        if not optimizer.check_ffmpeg():
-            sys.exit(1)
+        # One supervisor bounds every encoder job in the run, unless one was
+        # handed in (e.g. by BuildOptimizer)
+        if self.supervisor is None:
+            try:
+                self.supervisor = JobSupervisor.from_config(self.config.get('supervisor'))
+            except ValueError as e:
+                print(f"❌ Invalid supervisor settings: {e}")
+                sys.exit(1)
+        
+        budget = self.supervisor.memory.budget
+        print(f"🧠 Memory budget: {'unlimited' if budget is None else f'{budget / MB:,.0f} MB'}")
+        
+        optimizer = self.prepare_encoders()
+        
+        # Open the build state unless one was handed in (e.g. by BuildOptimizer)
+        owns_state = self.open_state()
+        
+        # Placeholders are collected for every directory into one store
+        placeholder_config = self.config['placeholders']
+        self.placeholders = PlaceholderStore.from_config(placeholder_config)
+        if self.placeholders is not None:
+            print(f"🌫️  Placeholders: {self.placeholders.size}px previews and dominant colours")
+        elif placeholder_config.get('enabled', False) and not PLACEHOLDERS_AVAILABLE:
+            print("⚠️  Placeholders need Pillow (with WebP) and NumPy; none will be made")
+        
+        # Small FFmpeg encodes share processes, at most file_workers at once
+        if not optimizer.uses_pillow():
+            self.batcher = FFmpegBatcher.from_config(self.config['ffmpeg_batch'], self.supervisor,
+                                                     self.get_file_workers())
+            if self.batcher is not None:
+                limits = self.batcher.limits
+                print(f"📦 FFmpeg batching: up to {limits.max_inputs} images or "
+                      f"{limits.max_pixels / 1_000_000:g} MP per process")
+        
+        # Find duplicate sources before any encode is scheduled
+        self.plan_dedup(directories)
+        
+        # Pillow encodes run in a shared process pool, created before any threads
+        if optimizer.uses_pillow():
+            self.process_pool = WorkerPool(max_workers=self.get_file_workers())
+        
+        # Open the persistent cache unless one was handed in (e.g. by BuildOptimizer)
+        owns_cache = False
+        cache_config = self.config.get('cache', {})
+        if self.cache is None and cache_config.get('enabled', False):
+            self.cache = OptimizationCache(Path(cache_config.get('cache_dir', '.image_cache')),
+                                           max_age_days=cache_config.get('max_age_days', 30),
+                                           max_size_mb=cache_config.get('max_size_mb'))
+            owns_cache = True
         
         start_time = time.time()
         
-        # Process directories with threading
+        # Process directories with threading; every directory feeds its files
+        # into one shared file-level pool so idle cores pick up work from any folder.
+        # The asyncio mode streams every directory through one pipeline instead
         max_workers = min(self.config['max_workers'], len(directories))
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # A cancelled run (SIGINT/SIGTERM) unwinds from here; the pools and the
+        # cache are still shut down on the way out
+        try:
+            if self.config['execution'] == 'asyncio':
+                results = self.process_directories_async(directories)
+            else:
+                results = self.process_directories_threaded(directories, max_workers)
+            if self.dedup is not None:
+                self.materialize_duplicates()
+        finally:
+            self.file_executor = None
+            
+            if owns_state:
+                self.state.save()
+                self.state = None
+            
+            if self.process_pool is not None:
+                self.process_pool.shutdown(cancel_futures=self.supervisor.cancelled.is_set())
+                self.process_pool = None
+            
+            if owns_cache:
+                evicted = self.cache.evict()
+                if evicted:
+                    print(f"🧹 Evicted {evicted} cache entries")
+                self.cache.close()
+                self.cache = None
+        
+        end_time = time.time()
+        
+        if self.manifest_entries is not None:
+            self.save_manifest(Path(self.config['manifest_file']), self.manifest_entries)
+        
+        # Print final summary
+        self.directory_results = results
+        self.print_final_summary(end_time - start_time, results)
+    
+    def prepare_encoders(self) -> ImageOptimizer:
+        """
+        Resolve the encoder engine and compile the profile rules shared by every directory.
+        
+        Exits if no encoder is available or the profile rules are invalid.
+        
+        Returns:
+            ImageOptimizer: Optimizer with the global settings and resolved engine
+        """
+        # Check encoder availability (auto degrades to ffmpeg without Pillow)
+        try:
+            optimizer = ImageOptimizer.from_config(self.config)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if not optimizer.check_engine():
+            sys.exit(1)
+        self.config = self.config.merge({'engine': optimizer.engine,
+                                         'output_formats': list(optimizer.output_formats)})
+        
+        # Profile rules are compiled once and shared by every directory
+        try:
+            self.profile_matcher = create_profile_matcher(self.config)
+        except ValueError as e:
+            print(f"❌ Invalid profile rules: {e}")
+            sys.exit(1)
+        if self.profile_matcher is not None:
+            print(f"🏷️  Profiles: {', '.join(sorted({rule.profile for rule in self.profile_matcher.rules}))}")
+        return optimizer
+    
+    def open_state(self) -> bool:
+        """
+        Load the configured build state, unless one was handed in.
+        
+        Returns:
+            bool: True if the state was opened here and must be saved by the caller
+        """
+        state_file = self.config.get('state_file')
+        if self.state is not None or not state_file:
+            return False
+        self.state = BuildState(Path(state_file))
+        print(f"🗂️  Build state: {state_file} ({len(self.state.entries)} images recorded)")
+        return True
+    
+    def list_stale(self) -> int:
+        """
+        Report every image whose outputs would be rebuilt, and why, without encoding.
+        
+        Returns:
+            int: Number of stale images
+        """
+        directories = self.config.get('directories', [])
+        self.prepare_encoders()
+        owns_state = self.open_state()
+        try:
+            self.plan_dedup(directories)
+            stale = 0
+            for dir_config in directories:
+                input_dir = Path(dir_config['input'])
+                output_dir = Path(dir_config['output'])
+                if not input_dir.exists():
+                    continue
+                optimizer = ImageOptimizer.from_config(
+                    self.config, dir_config,
+                    profiles=self.profile_matcher if dir_config.get('use_profiles', True) else None,
+                    state=self.state)
+                for scanned in scan_images(input_dir, ImageOptimizer.SUPPORTED_FORMATS,
+                                           optimizer.exclude_matcher, recursive=self.config['recursive'],
+                                           skip_dirs=[output_dir, *self.get_output_dirs()]):
+                    if self.dedup is not None and self.dedup.is_duplicate(scanned.path):
+                        continue
+                    if optimizer.size_limits.is_too_large(scanned.stat.st_size):
+                        continue
+                    profile_optimizer = optimizer.get_profile_optimizer(scanned.path, input_dir, announce=False)
+                    output_path = optimizer.get_output_path(scanned.path, output_dir, True, input_dir)
+                    outputs = profile_optimizer.get_format_outputs(scanned.path, output_path)
+                    reason = optimizer.get_stale_reason(scanned.path, scanned.stat, outputs, input_dir)
+                    if reason is None:
+                        continue
+                    stale += 1
+                    print(f"🔸 {scanned.path} -> {', '.join(output.name for output in outputs)}: {reason}")
+                    self.results.emit({'type': 'stale', 'path': str(scanned.path),
+                                       'outputs': [str(output) for output in outputs], 'reason': reason})
+        finally:
+            if owns_state:
+                self.state.save()
+                self.state = None
+        print(f"📋 {stale} stale images")
+        return stale
+    
+    def process_directories_threaded(self, directories: List[Dict[str, Any]],
+                                     max_workers: int) -> List[Dict[str, Any]]:
+        """
+        Process directories in parallel, feeding one shared file-level thread pool.
+        
+        Args:
+            directories (List[Dict[str, Any]]): Directory configurations
+            max_workers (int): Directories processed at once
+            
+        Returns:
+            List[Dict[str, Any]]: Processing results, one per directory
+        """
+        results = []
+        with ThreadPoolExecutor(max_workers=self.get_file_threads(),
+                                thread_name_prefix='image-worker') as file_executor, \
+                ThreadPoolExecutor(max_workers=max_workers) as executor:
+            self.file_executor = file_executor
             # Submit all directory processing tasks
             future_to_config = {
                 executor.submit(self.process_directory_batch, dir_config): dir_config
@@ -197,7 +622,6 @@ class BatchImageOptimizer:
             }
             
             # Process completed tasks
-            results = []
             for future in as_completed(future_to_config):
                 dir_config = future_to_config[future]
                 try:
@@ -209,6 +633,8 @@ class BatchImageOptimizer:
                     else:
                         print(f"❌ Failed: {dir_config['input']} - {result.get('error', 'Unknown error')}")
                         
+                except JobCancelled:
+                    continue
                 except Exception as e:
                     print(f"❌ Exception processing {dir_config['input']}: {str(e)}")
                     results.append({
@@ -216,11 +642,7 @@ class BatchImageOptimizer:
                         'directory': dir_config['input'],
                         'error': str(e)
                     })
-        
-        end_time = time.time()
-        
-        # Print final summary
-        self.print_final_summary(end_time - start_time, results)
+        return results
     
     def print_final_summary(self, total_duration: float, results: List[Dict[str, Any]]) -> None:
         """
@@ -241,11 +663,20 @@ class BatchImageOptimizer:
         print(f"✅ Successful: {successful}")
         print(f"❌ Failed: {failed}")
         print(f"⏱️  Total duration: {total_duration:.2f} seconds")
+        if self.supervisor is not None and self.supervisor.memory.peak:
+            print(f"🧠 Peak decode memory reserved: {self.supervisor.memory.peak / MB:,.0f} MB")
+        if self.batcher is not None:
+            self.batcher.print_summary()
         print()
         
         print("📈 IMAGE PROCESSING STATS:")
         print(f"✅ Images processed: {self.total_stats['processed']}")
+        print(f"♻️  Images from cache: {self.total_stats['cached']}")
         print(f"⏭️  Images skipped: {self.total_stats['skipped']}")
+        if self.total_stats['quarantined']:
+            print(f"⛔ Images quarantined: {self.total_stats['quarantined']}")
+        if self.dedup is not None:
+            print(f"🔗 Duplicates sharing outputs: {self.total_stats['deduplicated']}")
         print(f"❌ Processing errors: {self.total_stats['errors']}")
         
         if self.total_stats['total_size_before'] > 0:
@@ -259,6 +690,20 @@ class BatchImageOptimizer:
             print(f"📉 Total size reduction: {total_reduction:.1f}%")
             print(f"💰 Total space saved: {self.total_stats['total_size_before'] - self.total_stats['total_size_after']:,} bytes")
         
+        if self.total_stats['deduplicated']:
+            # Hardlinks share disk blocks, but the bundler still copies each
+            # path; aliases save the encodes, but the duplicate sources still
+            # ship wherever they are published as they are (e.g. public/)
+            saved = self.total_stats['dedup_bytes_saved']
+            print()
+            print("🔗 DEDUPLICATION:")
+            if self.dedup.mode == 'alias':
+                print(f"⚡ Encodes skipped: {self.total_stats['deduplicated']} duplicates "
+                      f"({self.total_stats['dedup_source_bytes']:,} source bytes not encoded), "
+                      f"served from their canonical outputs")
+            else:
+                print(f"💽 Disk bytes shared by hardlinks: {saved:,} (bundlers still copy each path)")
+        
         print("\n" + "=" * 60)
         print("🎉 Batch processing completed!")
     
@@ -304,16 +749,172 @@ def main():
         help='Override max worker threads'
     )
     
+    parser.add_argument(
+        '--file-workers',
+        type=int,
+        help='Override parallel file conversions shared by all directories (default: CPU count)'
+    )
+    
+    parser.add_argument(
+        '--engine',
+        choices=ENGINES,
+        help='Override encoder backend: ffmpeg, pillow or auto'
+    )
+    
+    parser.add_argument(
+        '--target-ssim',
+        type=float,
+        help='Enable adaptive quality, searching for the lowest quality reaching this SSIM'
+    )
+    
+    parser.add_argument(
+        '--max-bytes',
+        type=int,
+        help='Enable adaptive quality with a per-image byte budget'
+    )
+    
+    parser.add_argument(
+        '--formats',
+        type=str,
+        help='Override output formats, comma-separated (webp, avif, jpeg)'
+    )
+    
+    parser.add_argument(
+        '--no-profiles',
+        action='store_true',
+        help='Ignore optimization_settings profiles and use directory settings only'
+    )
+    
     parser.add_argument(
         '--lossless',
         action='store_true',
         help='Use lossless compression'
     )
     
+    parser.add_argument(
+        '--execution',
+        choices=EXECUTION_MODES,
+        help='Override execution mode: threads, or one asyncio pipeline for every directory'
+    )
+    
+    parser.add_argument(
+        '--async-concurrency',
+        type=int,
+        help='Override concurrent encodes in asyncio mode (default: file workers, times the '
+             f'FFmpeg batch input limit when batching, up to {MAX_BATCH_THREADS})'
+    )
+    
+    parser.add_argument(
+        '--ffmpeg-batch',
+        action='store_true',
+        help='Encode small images several to an FFmpeg process (FFmpeg engine)'
+    )
+    
+    parser.add_argument(
+        '--manifest',
+        type=str,
+        help='Write a JSON manifest of every source image and its outputs (asyncio mode)'
+    )
+    
+    parser.add_argument(
+        '--dedup',
+        choices=('off',) + DEDUP_MODES,
+        help='Override deduplication of identical sources: hardlink duplicate outputs, '
+             'alias them in the manifests, or off'
+    )
+    
+    parser.add_argument(
+        '--perceptual',
+        action='store_true',
+        help='Also deduplicate near-identical sources (same size, nearby perceptual hash)'
+    )
+    
+    parser.add_argument(
+        '--state-file',
+        type=str,
+        help='Override the build state file recording what each output was built from'
+    )
+    
+    parser.add_argument(
+        '--list-stale',
+        action='store_true',
+        help='List the images whose outputs are stale and why, without converting '
+             '(exit status 1 if any are stale)'
+    )
+    
+    parser.add_argument(
+        '--output',
+        choices=OUTPUT_MODES,
+        default='text',
+        help='Result output: text (human), json (one document at the end), ndjson '
+             '(one record per file as it finishes) or quiet (default: text)'
+    )
+    
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='With --output json/ndjson/quiet, keep the human output on stderr'
+    )
+    
+    parser.add_argument(
+        '--trace',
+        type=str,
+        help='Record per-stage spans to this Chrome trace file (plus a .jsonl log next to it)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        type=int,
+        nargs='?',
+        const=PROFILE_TOP,
+        metavar='N',
+        help=f'Run under cProfile and print the N hottest functions (default: {PROFILE_TOP})'
+    )
+    
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        help='Override seconds allowed per image attempt before its encoder is killed'
+    )
+    
+    parser.add_argument(
+        '--retries',
+        type=int,
+        help='Override extra attempts for a failed image'
+    )
+    
+    parser.add_argument(
+        '--retry-quarantined',
+        action='store_true',
+        help='Attempt images quarantined by earlier runs again'
+    )
+    
+    parser.add_argument(
+        '--memory-budget',
+        type=int,
+        metavar='MB',
+        help='Override estimated decode memory shared by concurrent encodes'
+    )
+    
     args = parser.parse_args()
+    results = ResultWriter(args.output)
+    
+    # In json/ndjson/quiet modes stdout carries only result records
+    with results.human_output(args.verbose):
+        run_batch(args, results)
+
+
+def run_batch(args: argparse.Namespace, results: ResultWriter) -> None:
+    """
+    Configure the batch optimizer from the command line and process every directory.
     
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        results (ResultWriter): Writer for machine-readable results
+    """
     # Initialize batch optimizer
     batch_optimizer = BatchImageOptimizer(args.config if not args.create_config else None)
+    batch_optimizer.results = results
     
     # Create default config if requested
     if args.create_config:
@@ -321,17 +922,108 @@ def main():
         return
     
     # Override config with command line arguments
+    overrides: Dict[str, Any] = {}
     if args.quality is not None:
-        batch_optimizer.config['quality'] = args.quality
+        overrides['quality'] = args.quality
     
     if args.max_workers is not None:
-        batch_optimizer.config['max_workers'] = args.max_workers
+        overrides['max_workers'] = args.max_workers
+    
+    if args.file_workers is not None:
+        overrides['file_workers'] = args.file_workers
+    
+    if args.engine is not None:
+        overrides['engine'] = args.engine
+    
+    if args.target_ssim is not None or args.max_bytes is not None:
+        overrides['adaptive_quality'] = {'enabled': True, 'target_ssim': args.target_ssim,
+                                         'max_bytes': args.max_bytes}
+    
+    if args.formats is not None:
+        overrides['output_formats'] = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    
+    if args.no_profiles:
+        overrides['use_profiles'] = False
     
     if args.lossless:
-        batch_optimizer.config['lossless'] = True
+        overrides['lossless'] = True
+    
+    if args.execution is not None:
+        overrides['execution'] = args.execution
+    
+    if args.async_concurrency is not None:
+        overrides['async_concurrency'] = args.async_concurrency
+    
+    if args.ffmpeg_batch:
+        overrides['ffmpeg_batch'] = {'enabled': True}
+    
+    if args.manifest is not None:
+        overrides['manifest_file'] = args.manifest
+    
+    if args.state_file is not None:
+        overrides['state_file'] = args.state_file
+    
+    if args.dedup is not None:
+        overrides['dedup'] = ({'enabled': False} if args.dedup == 'off'
+                              else {'enabled': True, 'mode': args.dedup})
+    
+    if args.perceptual:
+        overrides.setdefault('dedup', {}).update({'enabled': args.dedup != 'off', 'perceptual': True})
+    
+    supervisor_overrides: Dict[str, Any] = {}
+    if args.timeout is not None:
+        supervisor_overrides['timeout_seconds'] = args.timeout
+    if args.retries is not None:
+        supervisor_overrides['retries'] = args.retries
+    if args.retry_quarantined:
+        supervisor_overrides['retry_quarantined'] = True
+    if args.memory_budget is not None:
+        supervisor_overrides['memory_budget_mb'] = args.memory_budget
+    if supervisor_overrides:
+        overrides['supervisor'] = supervisor_overrides
+    
+    try:
+        batch_optimizer.config = batch_optimizer.config.merge(overrides)
+    except ValueError as e:
+        print(f"❌ Invalid configuration: {e}")
+        sys.exit(1)
+    
+    try:
+        batch_optimizer.supervisor = JobSupervisor.from_config(batch_optimizer.config['supervisor'])
+    except ValueError as e:
+        print(f"❌ Invalid supervisor settings: {e}")
+        sys.exit(1)
+    
+    if args.trace:
+        batch_optimizer.tracer = Tracer(enabled=True)
+    
+    if args.list_stale:
+        stale = batch_optimizer.list_stale()
+        results.close()
+        sys.exit(1 if stale else 0)
     
-    # Process all directories
-    batch_optimizer.process_all_directories()
+    # Process all directories; SIGINT/SIGTERM kill running encoders and
+    # discard their partial outputs
+    start_time = time.time()
+    try:
+        with handle_signals(batch_optimizer.supervisor):
+            if args.profile:
+                run_profiled(batch_optimizer.process_all_directories, args.profile)
+            else:
+                batch_optimizer.process_all_directories()
+    except (KeyboardInterrupt, JobCancelled):
+        print("🛑 Cancelled; existing outputs were left untouched")
+        sys.exit(130)
+    finally:
+        if batch_optimizer.tracer.enabled:
+            batch_optimizer.tracer.print_summary()
+            trace_path, jsonl_path = batch_optimizer.tracer.export(Path(args.trace))
+            print(f"📊 Trace written to {trace_path} and {jsonl_path}")
+        results.summary(batch_optimizer.total_stats, time.time() - start_time,
+                        cancelled=batch_optimizer.supervisor.cancelled.is_set(),
+                        directories=batch_optimizer.directory_results,
+                        config_fingerprint=batch_optimizer.config.fingerprint(*ENCODER_KEYS))
+        results.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Synthetic Benchmark Corpus for RadioFusion Image Optimizer
+Generates a fixed, reproducible set of PNG and JPEG images locally.
+"""
+
+import zlib
+import shutil
+import random
+import struct
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+try:
+    from PIL import Image
+    PILLOW_AVAILABLE = True
+except ImportError:
+    Image = None
+    PILLOW_AVAILABLE = False
+
+# (name, width, height, has_alpha, count) per size class
+CORPUS_SPEC: List[Tuple[str, int, int, bool, int]] = [
+    ('icon', 64, 64, True, 8),
+    ('thumb', 320, 240, False, 6),
+    ('photo', 1280, 720, False, 4),
+    ('hero', 1920, 1080, False, 2)
+]
+
+# Bump whenever the generated pixels change, so results are only compared
+# against baselines produced from the same corpus
+CORPUS_VERSION = 1
+
+
+def render_pixels(width: int, height: int, has_alpha: bool, rng: random.Random) -> bytes:
+    """
+    Render a gradient with a noisy band, roughly like a photo with a smooth sky.
+
+    Args:
+        width (int): Image width
+        height (int): Image height
+        has_alpha (bool): Emit RGBA instead of RGB
+        rng (random.Random): Seeded random source
+
+    Returns:
+        bytes: Raw pixel rows
+    """
+    channels = 4 if has_alpha else 3
+    rows = []
+    for y in range(height):
+        base = int(255 * y / max(1, height - 1))
+        row = bytearray(bytes((base, (base + 85) % 256, (255 - base)) + ((255,) if has_alpha else ())) * width)
+        if y % 4 < 2:
+            # Textured rows keep the encoder honest; smooth rows compress well
+            noise = rng.randbytes(width * channels)
+            row = bytearray(a ^ (b & 0x1F) for a, b in zip(row, noise))
+        if has_alpha:
+            row[3::4] = bytes(255 if abs(x - width // 2) < width // 3 else 0 for x in range(width))
+        rows.append(bytes(row))
+    return b''.join(rows)
+
+
+def write_png(path: Path, width: int, height: int, pixels: bytes, has_alpha: bool) -> None:
+    """Write raw RGB/RGBA rows as a PNG file using only the standard library."""
+    channels = 4 if has_alpha else 3
+    stride = width * channels
+    raw = b''.join(b'\x00' + pixels[y * stride:(y + 1) * stride] for y in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 6 if has_alpha else 2, 0, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr) +
+                chunk(b'IDAT', zlib.compress(raw, 6)) + chunk(b'IEND', b''))
+
+
+def png_to_jpeg(png_path: Path, jpeg_path: Path) -> bool:
+    """
+    Convert a PNG to JPEG with Pillow, falling back to FFmpeg.
+
+    Returns:
+        bool: True if the JPEG was written
+    """
+    if PILLOW_AVAILABLE:
+        with Image.open(png_path) as img:
+            img.convert('RGB').save(jpeg_path, 'JPEG', quality=92)
+        return True
+    if shutil.which('ffmpeg'):
+        result = subprocess.run(['ffmpeg', '-y', '-i', str(png_path), '-q:v', '2', str(jpeg_path)],
+                                capture_output=True)
+        return result.returncode == 0
+    return False
+
+
+def generate_corpus(output_dir: Path, seed: int = 1234) -> Dict[str, int]:
+    """
+    Generate the benchmark corpus into two sub-directories (a/ and b/).
+
+    Opaque images alternate between PNG and JPEG; icons are always PNG.
+
+    Args:
+        output_dir (Path): Corpus root (recreated)
+        seed (int): Random seed for reproducible pixels
+
+    Returns:
+        Dict[str, int]: Number of files written per format
+    """
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    rng = random.Random(seed)
+    counts = {'png': 0, 'jpeg': 0}
+
+    for name, width, height, has_alpha, count in CORPUS_SPEC:
+        for i in range(count):
+            target_dir = output_dir / ('a' if i % 2 == 0 else 'b') / name
+            target_dir.mkdir(parents=True, exist_ok=True)
+            pixels = render_pixels(width, height, has_alpha, rng)
+            png_path = target_dir / f"{name}_{i}.png"
+            write_png(png_path, width, height, pixels, has_alpha)
+
+            if not has_alpha and i % 2 == 1:
+                if png_to_jpeg(png_path, png_path.with_suffix('.jpg')):
+                    png_path.unlink()
+                    counts['jpeg'] += 1
+                    continue
+            counts['png'] += 1
+
+    return counts
+
+
+def main():
+    """Main function to handle command line arguments."""
+    parser = argparse.ArgumentParser(description="Generate the synthetic image benchmark corpus")
+    parser.add_argument('output_dir', type=str, help='Corpus directory (recreated)')
+    parser.add_argument('--seed', type=int, default=1234, help='Random seed (default: 1234)')
+    args = parser.parse_args()
+
+    counts = generate_corpus(Path(args.output_dir), args.seed)
+    print(f"✅ Generated {counts['png']} PNG and {counts['jpeg']} JPEG images in {args.output_dir}")
+    if not counts['jpeg']:
+        print("⚠️  Neither Pillow nor FFmpeg is available, JPEG inputs were written as PNG")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Encoding Benchmark Suite for RadioFusion Image Optimizer
+Runs each optimizer entry point on a synthetic corpus and checks for regressions.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import resource
+import contextlib
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from corpus import CORPUS_VERSION, generate_corpus  # noqa: E402
+from image_optimizer import ENGINES, ImageOptimizer  # noqa: E402
+from batch_image_optimizer import BatchImageOptimizer  # noqa: E402
+from build_optimizer import BuildOptimizer  # noqa: E402
+
+ENTRY_POINTS = ('image', 'batch', 'build')
+
+# Metrics checked against the baseline and whether higher values are better
+REGRESSION_METRICS = {
+    'images_per_sec': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'peak_rss_mb': False,
+    'bytes_saved': True
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile, 0 for an empty sample."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_image(corpus_dir: Path, output_dir: Path, engine: str, workers: int) -> Dict[str, Any]:
+    """Benchmark ImageOptimizer.process_directory over the whole corpus."""
+    optimizer = ImageOptimizer(engine=engine, max_workers=workers)
+    optimizer.process_directory(corpus_dir, output_dir)
+    optimizer.close()
+    return {
+        'images': optimizer.stats['processed'],
+        'errors': optimizer.stats['errors'],
+        'bytes_saved': optimizer.stats['total_size_before'] - optimizer.stats['total_size_after'],
+        'durations': optimizer.file_durations
+    }
+
+
+def run_batch(corpus_dir: Path, output_dir: Path, engine: str, workers: int) -> Dict[str, Any]:
+    """Benchmark BatchImageOptimizer.process_all_directories over corpus a/ and b/."""
+    batch = BatchImageOptimizer()
+    batch.config.update({
+        'engine': engine,
+        'file_workers': workers,
+        'cache': {'enabled': False},
+        'directories': [
+            {'input': str(corpus_dir / name), 'output': str(output_dir / name)}
+            for name in ('a', 'b')
+        ]
+    })
+    batch.process_all_directories()
+    return {
+        'images': batch.total_stats['processed'],
+        'errors': batch.total_stats['errors'],
+        'bytes_saved': batch.total_stats['total_size_before'] - batch.total_stats['total_size_after'],
+        'durations': batch.file_durations
+    }
+
+
+def run_build(corpus_dir: Path, output_dir: Path, engine: str, workers: int,
+              environment: str = 'production') -> Dict[str, Any]:
+    """Benchmark BuildOptimizer.optimize_images_for_environment in a scratch project."""
+    project_root = output_dir / 'project'
+    project_root.mkdir(parents=True)
+    build_config = {
+        'image_directories': [
+            {'source': str(corpus_dir / name), 'output': str(output_dir / name), 'watch': False}
+            for name in ('a', 'b')
+        ],
+        'environments': {
+            environment: {'optimize_images': True, 'quality': 90, 'file_workers': workers,
+                          'generate_responsive': environment == 'production'}
+        },
+        'optimization_cache': {'enabled': False}
+    }
+    with open(project_root / 'build_config.json', 'w') as f:
+        json.dump(build_config, f)
+
+    build = BuildOptimizer(str(project_root), engine=engine)
+    build.optimize_images_for_environment(environment)
+    return {
+        'images': build.stats['images_optimized'],
+        'errors': 0,
+        'bytes_saved': build.stats['space_saved'],
+        'responsive_variants': build.stats['responsive_variants'],
+        'durations': build.file_durations
+    }
+
+
+def run_worker(entry: str, corpus_dir: Path, engine: str, workers: int) -> Dict[str, Any]:
+    """
+    Run one entry point in this (fresh) process and measure it.
+
+    Args:
+        entry (str): image, batch or build
+        corpus_dir (Path): Generated corpus
+        engine (str): Encoder engine
+        workers (int): File-level workers
+
+    Returns:
+        Dict[str, Any]: Benchmark metrics for the entry point
+    """
+    runner = {'image': run_image, 'batch': run_batch, 'build': run_build}[entry]
+
+    with tempfile.TemporaryDirectory(prefix=f'bench_{entry}_') as temp_dir:
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = runner(corpus_dir, Path(temp_dir), engine, workers)
+        wall = time.perf_counter() - start
+
+    durations_ms = [d * 1000 for d in result.pop('durations')]
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss_unit = 1 if sys.platform == 'darwin' else 1024
+
+    return {
+        **result,
+        'wall_s': round(wall, 3),
+        'images_per_sec': round(result['images'] / wall, 2) if wall > 0 else 0.0,
+        'p50_ms': round(percentile(durations_ms, 50), 2),
+        'p95_ms': round(percentile(durations_ms, 95), 2),
+        'peak_rss_mb': round(max(self_rss, child_rss) * rss_unit / (1024 * 1024), 1),
+        'peak_rss_self_mb': round(self_rss * rss_unit / (1024 * 1024), 1),
+        'peak_rss_children_mb': round(child_rss * rss_unit / (1024 * 1024), 1)
+    }
+
+
+def find_regressions(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare results against a baseline run.
+
+    Args:
+        current (Dict[str, Any]): Current results file contents
+        baseline (Dict[str, Any]): Baseline results file contents
+        threshold (float): Allowed relative change, e.g. 0.10 for 10%
+
+    Returns:
+        List[str]: Human-readable regression descriptions
+    """
+    regressions = []
+    if baseline.get('corpus_version') != current.get('corpus_version'):
+        print("⚠️  Baseline was produced from a different corpus version; comparison skipped")
+        return regressions
+
+    for entry, metrics in current['results'].items():
+        base_metrics = baseline.get('results', {}).get(entry)
+        if not base_metrics:
+            continue
+        for metric, higher_is_better in REGRESSION_METRICS.items():
+            base_value, value = base_metrics.get(metric), metrics.get(metric)
+            if not base_value or value is None:
+                continue
+            change = (value - base_value) / base_value
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append(f"{entry}.{metric}: {base_value} -> {value} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    """Main function to handle command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the image optimizer entry points on a synthetic corpus"
+    )
+    parser.add_argument('--entry', choices=ENTRY_POINTS, action='append',
+                        help='Entry point to run (repeatable, default: all)')
+    parser.add_argument('--engine', choices=ENGINES, default='ffmpeg',
+                        help='Encoder engine (default: ffmpeg)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='File-level workers (default: CPU count)')
+    parser.add_argument('--corpus-dir', type=str,
+                        help='Reuse or create the corpus here instead of a temporary directory')
+    parser.add_argument('-o', '--output', type=str, default='bench_results.json',
+                        help='Results JSON file (default: bench_results.json)')
+    parser.add_argument('--baseline', type=str,
+                        help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Allowed relative regression before failing (default: 0.10)')
+    parser.add_argument('--worker', choices=ENTRY_POINTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Internal: measure a single entry point in this fresh process
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, Path(args.corpus_dir), args.engine, args.workers)))
+        return
+
+    if not ImageOptimizer(engine=args.engine).check_engine():
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix='bench_corpus_') as temp_corpus:
+        corpus_dir = Path(args.corpus_dir) if args.corpus_dir else Path(temp_corpus)
+        if not corpus_dir.exists() or not any(corpus_dir.iterdir()):
+            print(f"🧪 Generating corpus in {corpus_dir}...")
+            generate_corpus(corpus_dir)
+
+        results = {}
+        for entry in args.entry or ENTRY_POINTS:
+            print(f"⏱️  Running {entry}...")
+            # Each entry point gets its own process so peak RSS is not shared
+            completed = subprocess.run(
+                [sys.executable, __file__, '--worker', entry, '--corpus-dir', str(corpus_dir),
+                 '--engine', args.engine, '--workers', str(args.workers)],
+                capture_output=True, text=True
+            )
+            if completed.returncode != 0:
+                print(f"❌ {entry} failed:\n{completed.stderr}")
+                sys.exit(1)
+            results[entry] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    report = {
+        'corpus_version': CORPUS_VERSION,
+        'engine': args.engine,
+        'workers': args.workers,
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'generated_at': time.time(),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print()
+    print(f"{'Entry':<8}{'Images':>8}{'img/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'RSS MB':>9}{'Saved':>14}")
+    for entry, metrics in results.items():
+        print(f"{entry:<8}{metrics['images']:>8}{metrics['images_per_sec']:>9.2f}"
+              f"{metrics['p50_ms']:>9.1f}{metrics['p95_ms']:>9.1f}"
+              f"{metrics['peak_rss_mb']:>9.1f}{metrics['bytes_saved']:>14,}")
+    print(f"\n📄 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
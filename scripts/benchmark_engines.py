@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Encoder Engine Benchmark for RadioFusion Website
+Compares per-image WebP encoding latency of the FFmpeg and Pillow engines.
+"""
+
+import sys
+import tempfile
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, List
+from image_optimizer import PILLOW_AVAILABLE, ImageOptimizer
+
+# Default benchmark corpus
+DEFAULT_IMAGE_DIR = Path(__file__).resolve().parent.parent / 'frontend' / 'public' / 'assets' / 'images'
+
+# Extensions both engines can decode (the shipped assets are already WebP)
+BENCHMARK_FORMATS = ImageOptimizer.SUPPORTED_FORMATS | {'.webp'}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Get a nearest-rank percentile.
+
+    Args:
+        values (List[float]): Sample values
+        pct (float): Percentile (0-100)
+
+    Returns:
+        float: Percentile value, or 0 for an empty sample
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def benchmark_engine(engine: str, images: List[Path], quality: int, runs: int) -> Dict[str, float]:
+    """
+    Encode every image sequentially and record per-image latency.
+
+    Args:
+        engine (str): Engine to benchmark (ffmpeg or pillow)
+        images (List[Path]): Input images
+        quality (int): WebP quality
+        runs (int): Number of passes over the corpus
+
+    Returns:
+        Dict[str, float]: Latency statistics in milliseconds
+    """
+    optimizer = ImageOptimizer(quality=quality, engine=engine, max_workers=1)
+    latencies = []
+    failures = 0
+
+    with tempfile.TemporaryDirectory(prefix=f'bench_{engine}_') as temp_dir:
+        # Warm up the worker process so pool startup is not billed to the first image
+        optimizer.start_process_pool()
+        optimizer.convert_to_webp(images[0], Path(temp_dir) / 'warmup.webp')
+
+        for _ in range(runs):
+            for i, image_path in enumerate(images):
+                output_path = Path(temp_dir) / f"{i}.webp"
+                start = time.perf_counter()
+                if not optimizer.convert_to_webp(image_path, output_path):
+                    failures += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    optimizer.close()
+
+    return {
+        'images': len(latencies),
+        'failures': failures,
+        'mean_ms': sum(latencies) / len(latencies),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'total_s': sum(latencies) / 1000
+    }
+
+
+def main():
+    """Main function to handle command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Compare per-image latency of the ffmpeg and pillow WebP engines"
+    )
+
+    parser.add_argument(
+        'image_dir',
+        type=str,
+        nargs='?',
+        default=str(DEFAULT_IMAGE_DIR),
+        help=f'Directory of benchmark images (default: {DEFAULT_IMAGE_DIR})'
+    )
+
+    parser.add_argument(
+        '-q', '--quality',
+        type=int,
+        default=85,
+        help='WebP quality (0-100, default: 85)'
+    )
+
+    parser.add_argument(
+        '--runs',
+        type=int,
+        default=3,
+        help='Passes over the image set per engine (default: 3)'
+    )
+
+    args = parser.parse_args()
+
+    image_dir = Path(args.image_dir)
+    images = sorted(p for p in image_dir.rglob('*')
+                    if p.is_file() and p.suffix.lower() in BENCHMARK_FORMATS)
+
+    if not images:
+        print(f"❌ No benchmark images found in {image_dir}")
+        sys.exit(1)
+
+    engines = []
+    if ImageOptimizer().check_ffmpeg():
+        engines.append('ffmpeg')
+    if PILLOW_AVAILABLE:
+        engines.append('pillow')
+    else:
+        print("⚠️  Pillow with WebP support is not installed, skipping pillow engine")
+
+    if not engines:
+        sys.exit(1)
+
+    print("🏁 RadioFusion Encoder Benchmark")
+    print("=" * 60)
+    print(f"📁 {len(images)} images from {image_dir}, {args.runs} runs, quality {args.quality}")
+    print("=" * 60)
+
+    results = {}
+    for engine in engines:
+        print(f"⏱️  Benchmarking {engine}...")
+        results[engine] = benchmark_engine(engine, images, args.quality, args.runs)
+
+    print()
+    print(f"{'Engine':<10}{'Images':>8}{'Fail':>6}{'Mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'Total s':>10}")
+    for engine, result in results.items():
+        print(f"{engine:<10}{result['images']:>8}{result['failures']:>6}"
+              f"{result['mean_ms']:>10.1f}{result['p50_ms']:>10.1f}"
+              f"{result['p95_ms']:>10.1f}{result['total_s']:>10.2f}")
+
+    if len(results) == 2 and results['pillow']['mean_ms'] > 0:
+        speedup = results['ffmpeg']['mean_ms'] / results['pillow']['mean_ms']
+        print(f"\n🚀 Pillow mean latency speedup over FFmpeg: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,31 +10,68 @@ import json
 import time
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import argparse
+from asset_emitter import DEFAULT_HASH_LENGTH, DEFAULT_KEEP_BUILDS, HashedAssetEmitter
 from batch_image_optimizer import BatchImageOptimizer
+from build_state import DEFAULT_BUILD_STATE_FILE
+from image_dedup import DEFAULT_MAX_DISTANCE, DedupEntry
+from image_placeholders import DEFAULT_PLACEHOLDER_SIZE, PlaceholderStore
+from image_optimizer import ENGINES, OUTPUT_FORMATS, SUFFIX_FORMATS, ImageOptimizer
+from optimization_cache import OptimizationCache
+from optimizer_config import OptimizerConfig, deep_merge
+from route_preloads import BUNDLED_PREFIX, RoutePreloader, find_imported_images
+from size_budget import DEFAULT_BASELINE_FILE, DEFAULT_GROWTH_BYTES, DEFAULT_GROWTH_PERCENT, SizeBudgets, SizedImage
+from image_probe import probe_image
+from image_profiles import create_profile_matcher
+from image_scanner import scan_images
+from memory_budget import DEFAULT_DOWNSCALE_DIMENSION, DEFAULT_MEMORY_BUDGET_MB
+from job_supervisor import DEFAULT_BACKOFF, DEFAULT_RETRIES, DEFAULT_TIMEOUT, JobCancelled, JobSupervisor, handle_signals
+from tracing import PROFILE_TOP, Tracer, run_profiled
+from webp_recompress import DEFAULT_MAX_PIXEL_DIFF, DEFAULT_STATE_FILE, WebPRecompressor
+import image_watcher
 
 class BuildOptimizer:
     """
     Build process optimizer that handles image optimization during builds.
     """
     
-    def __init__(self, project_root: str = None):
+    # Sources that get responsive variants and manifest entries; existing
+    # WebPs are served as-is but can still be downsized per breakpoint
+    RESPONSIVE_FORMATS = ImageOptimizer.SUPPORTED_FORMATS | {'.webp'}
+    
+    def __init__(self, project_root: str = None, engine: str = None):
         """
         Initialize the BuildOptimizer.
         
         Args:
             project_root (str): Root directory of the project
+            engine (str): Encoder backend override (ffmpeg, pillow or auto)
         """
         self.project_root = Path(project_root) if project_root else Path.cwd()
+        self.engine = engine
         self.build_config = self.load_build_config()
         self.stats = {
             'images_optimized': 0,
             'space_saved': 0,
             'build_time': 0,
-            'optimization_time': 0
+            'optimization_time': 0,
+            'responsive_variants': 0
         }
+        self.file_durations: List[float] = []
+        self.cache = None
+        self.supervisor = None
+        self.tracer = Tracer()
+        # Aliased duplicate source -> canonical copy, from the last batch run
+        self.dedup_aliases: Dict[Path, DedupEntry] = {}
+        # Placeholders collected by the last batch run
+        self.placeholders: Optional[PlaceholderStore] = None
+        # Publishes manifest outputs under content-hashed names, when enabled
+        self.emitter: Optional[HashedAssetEmitter] = None
+        # Set when a size budget check fails; the build exits non-zero
+        self.budget_failed = False
     
     def load_build_config(self) -> Dict[str, Any]:
         """
@@ -60,7 +97,14 @@ class BuildOptimizer:
                     "lossless": False,
                     "watch_mode": False,
                     "incremental": False,
-                    "generate_responsive": True
+                    "generate_responsive": True,
+                    "adaptive_quality": {
+                        "enabled": True,
+                        "target_ssim": 0.98,
+                        "max_bytes": None,
+                        "min_quality": 50,
+                        "probe_width": 512
+                    }
                 },
                 "testing": {
                     "optimize_images": False,
@@ -74,20 +118,95 @@ class BuildOptimizer:
                     "watch": True
                 },
                 {
-                    "source": "frontend/public/images",
-                    "output": "frontend/public/images/optimized",
+                    "source": "frontend/public/assets/images",
+                    "output": "frontend/public/assets/images/optimized",
                     "watch": True
                 }
             ],
             "build_hooks": {
                 "pre_build": ["optimize_images"],
-                "post_build": ["generate_manifest", "cleanup_temp"],
+                "post_build": ["generate_manifest", "generate_preloads", "check_budgets", "cleanup_temp"],
                 "watch": ["optimize_new_images"]
             },
             "optimization_cache": {
                 "enabled": True,
                 "cache_dir": ".image_cache",
-                "max_age_days": 30
+                "max_age_days": 30,
+                "max_size_mb": 512
+            },
+            "supervisor": {
+                "timeout_seconds": DEFAULT_TIMEOUT,
+                "retries": DEFAULT_RETRIES,
+                "backoff_seconds": DEFAULT_BACKOFF,
+                "quarantine_file": ".image_quarantine.json",
+                "memory_budget_mb": DEFAULT_MEMORY_BUDGET_MB
+            },
+            "file_size_limits": {
+                "max_file_size_mb": 10,
+                "warn_file_size_mb": 2,
+                "compress_above_mb": 1,
+                "downscale_max_dimension": DEFAULT_DOWNSCALE_DIMENSION
+            },
+            "placeholders": {
+                "enabled": True,
+                "size": DEFAULT_PLACEHOLDER_SIZE
+            },
+            "hashed_assets": {
+                "enabled": True,
+                "dir": ".hashed_images",
+                "url": "/assets/img",
+                "hash_length": DEFAULT_HASH_LENGTH,
+                "keep_builds": DEFAULT_KEEP_BUILDS
+            },
+            "build_state": {
+                "path": DEFAULT_BUILD_STATE_FILE
+            },
+            "size_budgets": {
+                "enabled": False,
+                "baseline": DEFAULT_BASELINE_FILE,
+                "max_growth_percent": DEFAULT_GROWTH_PERCENT,
+                "min_growth_bytes": DEFAULT_GROWTH_BYTES,
+                "directories": {},
+                "profiles": {},
+                "routes": {}
+            },
+            "route_preloads": {
+                "enabled": True,
+                "sitemap": "frontend/scripts/generate-sitemap.cjs",
+                "app": "frontend/src/App.jsx",
+                "headers_file": "frontend/public/_headers"
+            },
+            "dedup": {
+                "enabled": True,
+                "mode": "alias",
+                "perceptual": False,
+                "max_distance": DEFAULT_MAX_DISTANCE
+            },
+            "responsive_breakpoints": {
+                "mobile": {"max_width": 768, "quality": 80, "suffix": "_mobile"},
+                "tablet": {"max_width": 1024, "quality": 85, "suffix": "_tablet"},
+                "desktop": {"max_width": 1920, "quality": 90, "suffix": "_desktop"}
+            },
+            "webp_recompress": {
+                "roots": ["frontend/public", "frontend/src/assets/images"],
+                "lossy": False,
+                "quality": None,
+                "max_pixel_diff": DEFAULT_MAX_PIXEL_DIFF,
+                "engine": "auto",
+                "state_file": DEFAULT_STATE_FILE
+            },
+            "watch_settings": {
+                "debounce_ms": 300,
+                "poll_interval_ms": 1000
+            },
+            "image_manifest": {
+                "path": "image_manifest.json",
+                "module_path": "frontend/.image-manifest.json",
+                "module_dir": "frontend/src",
+                "web_roots": [
+                    {"dir": "frontend/public", "url": "/"},
+                    {"dir": "frontend", "url": "/"}
+                ]
             }
         }
         
@@ -95,12 +214,9 @@ class BuildOptimizer:
             try:
                 with open(config_path, 'r') as f:
                     user_config = json.load(f)
-                    # Merge configurations
-                    for key, value in user_config.items():
-                        if isinstance(value, dict) and key in default_config:
-                            default_config[key].update(value)
-                        else:
-                            default_config[key] = value
+                # Nested blocks (e.g. one environment's adaptive_quality)
+                # merge key by key instead of replacing the default block
+                default_config = deep_merge(default_config, user_config)
                 print(f"✅ Loaded build configuration from {config_path}")
             except Exception as e:
                 print(f"⚠️  Error loading build config: {e}")
@@ -118,84 +234,84 @@ class BuildOptimizer:
         except Exception as e:
             print(f"❌ Error saving build configuration: {e}")
     
-    def get_cache_path(self, file_path: Path) -> Path:
+    def get_cache(self) -> Optional[OptimizationCache]:
         """
-        Get cache path for a file.
+        Get the persistent optimization cache shared by all builds.
+        
+        Entries are keyed on source content hash and encoder settings, so they
+        stay valid across fresh checkouts where modification times are lost.
         
-        Args:
-            file_path (Path): Original file path
-            
         Returns:
-            Path: Cache file path
+            Optional[OptimizationCache]: The cache, or None if disabled
         """
-        cache_dir = self.project_root / self.build_config['optimization_cache']['cache_dir']
-        cache_dir.mkdir(exist_ok=True)
+        cache_config = self.build_config['optimization_cache']
+        if not cache_config.get('enabled', True):
+            return None
         
-        # Create a unique cache filename based on file path and modification time
-        relative_path = file_path.relative_to(self.project_root)
-        cache_name = str(relative_path).replace('/', '_').replace('\\', '_')
-        return cache_dir / f"{cache_name}.cache"
+        if self.cache is None:
+            self.cache = OptimizationCache(self.project_root / cache_config['cache_dir'],
+                                           max_age_days=cache_config.get('max_age_days', 30),
+                                           max_size_mb=cache_config.get('max_size_mb'))
+        return self.cache
     
-    def is_cached(self, file_path: Path) -> bool:
+    def get_supervisor(self) -> JobSupervisor:
         """
-        Check if file optimization is cached and still valid.
+        Get the job supervisor shared by every optimizer in the build.
         
-        Args:
-            file_path (Path): File to check
-            
-        Returns:
-            bool: True if cached and valid
-        """
-        if not self.build_config['optimization_cache']['enabled']:
-            return False
+        The quarantine file is kept relative to the project root.
         
-        cache_path = self.get_cache_path(file_path)
-        if not cache_path.exists():
-            return False
-        
-        try:
-            with open(cache_path, 'r') as f:
-                cache_data = json.load(f)
-            
-            # Check if source file has been modified
-            source_mtime = file_path.stat().st_mtime
-            cached_mtime = cache_data.get('source_mtime', 0)
-            
-            # Check cache age
-            cache_age_days = (time.time() - cache_data.get('cached_at', 0)) / (24 * 3600)
-            max_age = self.build_config['optimization_cache']['max_age_days']
+        Returns:
+            JobSupervisor: The supervisor
             
-            return (source_mtime <= cached_mtime and 
-                   cache_age_days <= max_age and
-                   Path(cache_data.get('output_path', '')).exists())
-        
-        except Exception:
-            return False
+        Raises:
+            ValueError: If the supervisor settings are invalid
+        """
+        if self.supervisor is None:
+            self.supervisor = JobSupervisor.from_config(self.build_config.get('supervisor'), self.project_root)
+        return self.supervisor
     
-    def update_cache(self, file_path: Path, output_path: Path) -> None:
+    def get_optimizer_config(self, environment: str) -> OptimizerConfig:
         """
-        Update cache for a file.
+        Get the optimizer configuration of an environment.
+        
+        Shared by the batch, responsive and watch optimizers, so every layer
+        encodes with the same validated settings.
         
         Args:
-            file_path (Path): Source file path
-            output_path (Path): Output file path
+            environment (str): Target environment (development, production, testing)
+            
+        Returns:
+            OptimizerConfig: Environment settings over the batch defaults,
+            without directories
+            
+        Raises:
+            ValueError: If a setting is invalid
         """
-        if not self.build_config['optimization_cache']['enabled']:
-            return
-        
-        cache_path = self.get_cache_path(file_path)
-        cache_data = {
-            'source_path': str(file_path),
-            'output_path': str(output_path),
-            'source_mtime': file_path.stat().st_mtime,
-            'cached_at': time.time()
+        env_config = self.build_config['environments'].get(environment, {})
+        settings = {
+            'quality': env_config.get('quality', 85),
+            'lossless': env_config.get('lossless', False),
+            'file_workers': env_config.get('file_workers'),
+            'engine': self.engine or env_config.get('engine', 'ffmpeg'),
+            'adaptive_quality': env_config.get('adaptive_quality', {'enabled': False}),
+            'use_profiles': env_config.get('use_profiles', True),
+            'output_formats': self.get_output_formats(),
+            'recursive': True,
+            'directories': []
         }
         
-        try:
-            with open(cache_path, 'w') as f:
-                json.dump(cache_data, f)
-        except Exception as e:
-            print(f"⚠️  Failed to update cache for {file_path}: {e}")
+        # Incremental environments skip images whose recorded outputs are intact
+        if env_config.get('incremental', True):
+            state_path = self.build_config.get('build_state', {}).get('path', DEFAULT_BUILD_STATE_FILE)
+            settings['state_file'] = str(self.project_root / state_path)
+        
+        # Project-specific profiles, dedup, placeholder, size limit and FFmpeg batch settings
+        # replace the batch defaults
+        for key in ('optimization_settings', 'profile_rules', 'dedup', 'placeholders', 'file_size_limits',
+                    'ffmpeg_batch'):
+            if key in self.build_config:
+                settings[key] = self.build_config[key]
+        return OptimizerConfig(settings)
     
     def optimize_images_for_environment(self, environment: str = 'development') -> None:
         """
@@ -215,16 +331,14 @@ class BuildOptimizer:
         
         start_time = time.time()
         
-        # Create batch optimizer configuration
-        batch_config = {
-            'quality': env_config.get('quality', 85),
-            'lossless': env_config.get('lossless', False),
-            'max_workers': 4,
-            'recursive': True,
-            'directories': []
-        }
+        try:
+            config = self.get_optimizer_config(environment)
+        except ValueError as e:
+            print(f"❌ Invalid optimizer configuration: {e}")
+            return
         
         # Process each image directory
+        directories = []
         for dir_config in self.build_config['image_directories']:
             source_dir = self.project_root / dir_config['source']
             output_dir = self.project_root / dir_config['output']
@@ -233,72 +347,505 @@ class BuildOptimizer:
                 print(f"⚠️  Source directory not found: {source_dir}")
                 continue
             
-            # Add to batch configuration
-            batch_config['directories'].append({
+            directories.append({
                 'input': str(source_dir),
                 'output': str(output_dir),
-                'quality': batch_config['quality']
+                'quality': config['quality']
             })
         
-        # Run batch optimization
-        if batch_config['directories']:
-            # Save temporary config
-            temp_config_path = self.project_root / 'temp_build_config.json'
-            with open(temp_config_path, 'w') as f:
-                json.dump(batch_config, f, indent=2)
+        # Run batch optimization on the same in-memory configuration
+        if directories:
+            batch_optimizer = BatchImageOptimizer(config=config.merge({'directories': directories}))
+            batch_optimizer.cache = self.get_cache()
+            batch_optimizer.supervisor = self.get_supervisor()
+            batch_optimizer.tracer = self.tracer
+            batch_optimizer.process_all_directories()
             
-            try:
-                # Run batch optimizer
-                batch_optimizer = BatchImageOptimizer(str(temp_config_path))
-                batch_optimizer.process_all_directories()
-                
-                # Update stats
-                self.stats['images_optimized'] = batch_optimizer.total_stats['processed']
-                self.stats['space_saved'] = (batch_optimizer.total_stats['total_size_before'] - 
-                                           batch_optimizer.total_stats['total_size_after'])
-                
-            finally:
-                # Clean up temporary config
-                if temp_config_path.exists():
-                    temp_config_path.unlink()
+            # Update stats
+            self.stats['images_optimized'] = batch_optimizer.total_stats['processed']
+            self.stats['space_saved'] = (batch_optimizer.total_stats['total_size_before'] - 
+                                       batch_optimizer.total_stats['total_size_after'])
+            self.file_durations.extend(batch_optimizer.file_durations)
+            dedup = batch_optimizer.dedup
+            if dedup is not None and dedup.mode == 'alias':
+                self.dedup_aliases = dict(dedup.canonical)
+            self.placeholders = batch_optimizer.placeholders
         
         self.stats['optimization_time'] = time.time() - start_time
         
         # Generate responsive images for production
         if environment == 'production' and env_config.get('generate_responsive', False):
-            self.generate_responsive_images()
+            self.generate_responsive_images(environment)
         
         print(f"✅ Image optimization completed in {self.stats['optimization_time']:.2f} seconds")
     
-    def generate_responsive_images(self) -> None:
-        """Generate responsive image variants for production."""
-        print("📱 Generating responsive image variants...")
+    def get_output_formats(self) -> List[str]:
+        """
+        Get the output format names from supported_formats.output.
+        
+        Returns:
+            List[str]: Format names, e.g. ['webp', 'avif']
+        """
+        suffixes = self.build_config.get('supported_formats', {}).get('output', ['.webp'])
+        formats = []
+        for suffix in suffixes:
+            fmt = SUFFIX_FORMATS.get('.jpg' if suffix.lower() == '.jpeg' else suffix.lower())
+            if fmt is None:
+                print(f"⚠️  Unsupported output format {suffix}, ignoring it")
+            elif fmt not in formats:
+                formats.append(fmt)
+        return formats or ['webp']
+    
+    def get_variant_path(self, source_path: Path, source_dir: Path, output_dir: Path, suffix: str) -> Path:
+        """
+        Get the output path of a responsive variant.
         
-        # Define responsive breakpoints
-        breakpoints = [
-            {'suffix': '@1x', 'scale': 1.0},
-            {'suffix': '@2x', 'scale': 2.0},
-            {'suffix': '@3x', 'scale': 3.0}
+        Args:
+            source_path (Path): Source image
+            source_dir (Path): Configured source directory
+            output_dir (Path): Configured output directory
+            suffix (str): Breakpoint suffix, e.g. _mobile
+            
+        Returns:
+            Path: Variant path mirroring the source tree under output_dir
+        """
+        relative_path = source_path.relative_to(source_dir)
+        return output_dir / relative_path.parent / f"{source_path.stem}{suffix}.webp"
+    
+    def get_responsive_variants(self, source_path: Path, source_dir: Path, output_dir: Path,
+                                default_quality: int) -> List[Dict[str, Any]]:
+        """
+        Get the configured responsive variants of a source image.
+        
+        Args:
+            source_path (Path): Source image
+            source_dir (Path): Configured source directory
+            output_dir (Path): Configured output directory
+            default_quality (int): Quality for breakpoints without their own
+            
+        Returns:
+            List[Dict[str, Any]]: Variants with 'name', 'output', 'max_width' and 'quality'
+        """
+        return [
+            {
+                'name': name,
+                'output': self.get_variant_path(source_path, source_dir, output_dir,
+                                                breakpoint.get('suffix', f"_{name}")),
+                'max_width': breakpoint['max_width'],
+                'quality': breakpoint.get('quality', default_quality)
+            }
+            for name, breakpoint in self.build_config.get('responsive_breakpoints', {}).items()
         ]
+    
+    def generate_responsive_images(self, environment: str = 'production') -> None:
+        """
+        Generate responsive image variants for every configured breakpoint.
+        
+        Each source is decoded once and every breakpoint width is written from
+        that frame; breakpoints wider than the source are collapsed so nothing
+        is upscaled.
+        
+        Args:
+            environment (str): Environment whose quality/engine settings apply
+        """
+        print("📱 Generating responsive image variants...")
+        
+        breakpoints = self.build_config.get('responsive_breakpoints', {})
+        if not breakpoints:
+            print("⚠️  No responsive breakpoints configured")
+            return
+        
+        # WebP sources get variants too, so keep the optimizer's own excludes
+        optimizer = ImageOptimizer.from_config(self.get_optimizer_config(environment),
+                                               exclude_patterns=ImageOptimizer.DEFAULT_EXCLUDE_PATTERNS,
+                                               cache=self.get_cache(),
+                                               supervisor=self.get_supervisor(),
+                                               tracer=self.tracer)
+        if not optimizer.check_engine():
+            return
+        
+        # Collect (source, variants) jobs for every image directory
+        jobs = []
+        for dir_config in self.build_config['image_directories']:
+            source_dir = self.project_root / dir_config['source']
+            output_dir = self.project_root / dir_config['output']
+            if not source_dir.exists():
+                continue
+            
+            for scanned in scan_images(source_dir, self.RESPONSIVE_FORMATS,
+                                       optimizer.exclude_matcher, skip_dirs=[output_dir]):
+                # Aliased duplicates are served from their canonical copy's variants
+                if scanned.path in self.dedup_aliases:
+                    continue
+                jobs.append((scanned.path, self.get_responsive_variants(
+                    scanned.path, source_dir, output_dir, optimizer.quality)))
+        
+        optimizer.start_process_pool()
+        variant_count = 0
+        with ThreadPoolExecutor(max_workers=optimizer.max_workers,
+                                thread_name_prefix='image-worker') as executor:
+            futures = {executor.submit(optimizer.generate_variants, source_path, variants): source_path
+                       for source_path, variants in jobs}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        written = future.result()
+                    except JobCancelled:
+                        continue
+                    if written:
+                        variant_count += len(written)
+                        widths = ', '.join(f"{v['name']}={v['width'] or v['max_width']}px"
+                                           for v in written if v['format'] == 'webp')
+                        formats = ', '.join(dict.fromkeys(v['format'] for v in written))
+                        print(f"✅ {futures[future].name}: {widths} ({formats})")
+            except BaseException:
+                # Interrupted: drop queued sources so only running ones are waited for
+                for future in futures:
+                    future.cancel()
+                raise
+            finally:
+                optimizer.close()
+        
+        self.stats['responsive_variants'] = variant_count
+        print(f"✅ Responsive image generation completed ({variant_count} variants "
+              f"from {len(jobs)} images)")
+    
+    def remove_outputs(self, source_path: Path, source_dir: Path, output_dir: Path) -> None:
+        """
+        Remove the outputs and responsive variants, in every format, of a deleted source.
+        
+        Args:
+            source_path (Path): Deleted source image
+            source_dir (Path): Configured source directory
+            output_dir (Path): Configured output directory
+        """
+        outputs = [ImageOptimizer.get_output_path(source_path, output_dir, input_root=source_dir)]
+        outputs.extend(variant['output'] for variant in
+                       self.get_responsive_variants(source_path, source_dir, output_dir, 0))
+        
+        for webp_path in outputs:
+            for suffix in OUTPUT_FORMATS.values():
+                output_path = webp_path.with_suffix(suffix)
+                if output_path.exists():
+                    output_path.unlink()
+                    print(f"🗑️  Removed {output_path.relative_to(self.project_root)}")
+    
+    def apply_watch_changes(self, changes: Dict[Path, str], watched: List[Dict[str, Path]],
+                            optimizer: ImageOptimizer, responsive: bool) -> None:
+        """
+        Re-encode changed sources and remove outputs of deleted ones.
+        
+        Args:
+            changes (Dict[Path, str]): Event kind per path from the watcher
+            watched (List[Dict[str, Path]]): Watched 'source'/'output' directory pairs
+            optimizer (ImageOptimizer): Optimizer used for re-encoding
+            responsive (bool): Also regenerate responsive variants
+        """
+        for path, kind in sorted(changes.items()):
+            dir_config = next((d for d in watched if d['source'] in path.parents or d['source'] == path), None)
+            if dir_config is None:
+                continue
+            source_dir, output_dir = dir_config['source'], dir_config['output']
+            
+            if kind == image_watcher.RESCAN:
+                # Events were dropped; fall back to an incremental pass over the tree
+                optimizer.process_directory(source_dir, output_dir)
+                continue
+            
+            if kind == image_watcher.DELETED_DIR:
+                output_subtree = output_dir / path.relative_to(source_dir)
+                if output_subtree.is_dir():
+                    shutil.rmtree(output_subtree)
+                    print(f"🗑️  Removed {output_subtree.relative_to(self.project_root)}")
+                continue
+            
+            if path.suffix.lower() not in ImageOptimizer.SUPPORTED_FORMATS:
+                continue
+            
+            if kind == image_watcher.DELETED or not path.exists():
+                self.remove_outputs(path, source_dir, output_dir)
+                continue
+            
+            optimizer.process_image(path, output_dir, input_root=source_dir)
+            if responsive:
+                optimizer.generate_variants(path, self.get_responsive_variants(
+                    path, source_dir, output_dir, optimizer.quality))
+    
+    def watch_images(self, environment: str = 'development', force_polling: bool = False) -> None:
+        """
+        Watch image directories and incrementally re-encode changed files.
+        
+        Only directories marked watch: true are watched. Bursts of events are
+        debounced, then added/changed files are re-encoded and outputs of
+        deleted files removed. Runs until interrupted.
+        
+        Args:
+            environment (str): Environment whose quality/engine settings apply
+            force_polling (bool): Use the polling watcher even if inotify works
+        """
+        env_config = self.build_config['environments'].get(environment, {})
+        watch_settings = self.build_config.get('watch_settings', {})
+        debounce = watch_settings.get('debounce_ms', 300) / 1000
+        poll_interval = watch_settings.get('poll_interval_ms', 1000) / 1000
+        
+        watched = []
+        for dir_config in self.build_config['image_directories']:
+            source_dir = self.project_root / dir_config['source']
+            if dir_config.get('watch', False) and source_dir.exists():
+                watched.append({'source': source_dir, 'output': self.project_root / dir_config['output']})
+        
+        if not watched:
+            print("⚠️  No existing image directories are marked for watching")
+            return
+        
+        optimizer = ImageOptimizer.from_config(self.get_optimizer_config(environment),
+                                               cache=self.get_cache(),
+                                               supervisor=self.get_supervisor(),
+                                               tracer=self.tracer)
+        if not optimizer.check_engine():
+            return
+        optimizer.start_process_pool()
+        
+        watcher = image_watcher.create_watcher([d['source'] for d in watched],
+                                               [d['output'] for d in watched],
+                                               poll_interval=poll_interval,
+                                               force_polling=force_polling)
+        
+        print(f"👀 Watching {len(watched)} directories ({type(watcher).__name__}), press Ctrl+C to stop")
+        for dir_config in watched:
+            print(f"   {dir_config['source'].relative_to(self.project_root)}")
+        
+        try:
+            while True:
+                changes = image_watcher.wait_for_changes(watcher, debounce)
+                print(f"\n🔔 {len(changes)} change(s) detected")
+                self.apply_watch_changes(changes, watched, optimizer,
+                                         env_config.get('generate_responsive', False))
+        except (KeyboardInterrupt, JobCancelled):
+            print("\n👋 Stopped watching")
+        finally:
+            watcher.close()
+            optimizer.close()
+    
+    def get_public_url(self, path: Path) -> Optional[str]:
+        """
+        Map a file to the URL the frontend requests it by.
+        
+        Args:
+            path (Path): File inside the project
+            
+        Returns:
+            Optional[str]: URL, or None if the file is not under a web root
+        """
+        for web_root in self.build_config['image_manifest'].get('web_roots', []):
+            root_dir = self.project_root / web_root['dir']
+            if root_dir in path.parents:
+                return web_root['url'].rstrip('/') + '/' + path.relative_to(root_dir).as_posix()
+        return None
+    
+    def get_asset_url(self, path: Path) -> Optional[str]:
+        """
+        Get the URL the frontend loads an optimized file from.
+        
+        With hashed assets the file is staged under its content-hashed name
+        instead, which the frontend build publishes, so the URL changes
+        whenever the bytes do.
+        
+        Args:
+            path (Path): Optimized file inside the project
+            
+        Returns:
+            Optional[str]: URL, or None if the file is not under a web root
+        """
+        if self.emitter is not None:
+            return self.emitter.get_url(self.emitter.emit(path))
+        return self.get_public_url(path)
+    
+    def get_emitter(self) -> Optional[HashedAssetEmitter]:
+        """
+        Create the hashed asset emitter from the hashed_assets settings.
+        
+        Returns:
+            Optional[HashedAssetEmitter]: None when disabled or misconfigured
+        """
+        try:
+            emitter = HashedAssetEmitter.from_config(self.build_config.get('hashed_assets'), self.project_root)
+        except ValueError as e:
+            print(f"❌ Invalid hashed_assets settings: {e}")
+            return None
+        if emitter is None:
+            return None
+        # Staged files are published by the frontend build; inside a web root
+        # they would ship a second time under their own path
+        if self.get_public_url(emitter.emit_dir / 'asset') is not None:
+            print(f"❌ hashed_assets.dir must not be inside an image_manifest web root: {emitter.emit_dir}")
+            return None
+        for dir_config in self.build_config['image_directories']:
+            source_dir = self.project_root / dir_config['source']
+            if emitter.emit_dir == source_dir or source_dir in emitter.emit_dir.parents:
+                print(f"❌ hashed_assets.dir must not be inside the image directory {source_dir}")
+                return None
+        return emitter
+    
+    def describe_variants(self, variant_paths: List[Path]) -> List[Dict[str, Any]]:
+        """
+        Describe existing responsive variant files for the manifest.
         
-        # This would integrate with the image optimizer to create different sizes
-        # Implementation would depend on specific requirements
-        print("✅ Responsive image generation completed")
+        Args:
+            variant_paths (List[Path]): Variant files, possibly missing
+            
+        Returns:
+            List[Dict[str, Any]]: {'src', 'width', 'bytes'} per variant, narrowest first
+        """
+        variants = []
+        for variant_path in variant_paths:
+            variant_info = probe_image(variant_path) if variant_path.exists() else None
+            variant_url = self.get_asset_url(variant_path) if variant_info else None
+            if variant_url:
+                variants.append({
+                    'src': variant_url,
+                    'width': variant_info['width'],
+                    'bytes': variant_path.stat().st_size
+                })
+        return sorted(variants, key=lambda v: v['width'])
+    
+    def build_image_entry(self, source_path: Path, source_dir: Path, output_dir: Path) -> Optional[Dict[str, Any]]:
+        """
+        Describe the optimized form of a source image for the frontend.
+        
+        Args:
+            source_path (Path): Source image
+            source_dir (Path): Configured source directory
+            output_dir (Path): Configured output directory
+            
+        Returns:
+            Optional[Dict[str, Any]]: {'webp', 'width', 'height', 'bytes', 'variants',
+            'formats', 'placeholder'}, or None if no servable WebP exists.
+            'formats' maps extra formats (avif, jpeg) to their own {'src',
+            'bytes', 'variants'}; 'placeholder' ({'lqip', 'color'}) is only
+            present when placeholders are enabled.
+        """
+        webp_path = ImageOptimizer.get_output_path(source_path, output_dir, input_root=source_dir)
+        has_output = webp_path.exists()
+        if not has_output:
+            if source_path.suffix.lower() != '.webp':
+                return None
+            webp_path = source_path
+        
+        info = probe_image(webp_path)
+        webp_url = self.get_asset_url(webp_path) if info is not None else None
+        if webp_url is None:
+            return None
+        
+        variant_paths = [variant['output'] for variant in
+                         self.get_responsive_variants(source_path, source_dir, output_dir, 0)]
+        variants = self.describe_variants(variant_paths)
+        
+        formats = {}
+        for fmt, suffix in OUTPUT_FORMATS.items():
+            if fmt == 'webp':
+                continue
+            format_variants = self.describe_variants([path.with_suffix(suffix) for path in variant_paths])
+            format_path = webp_path.with_suffix(suffix)
+            format_url = self.get_asset_url(format_path) if has_output and format_path.exists() else None
+            if format_url is not None:
+                full_size = {'src': format_url, 'bytes': format_path.stat().st_size}
+            elif not has_output and format_variants and format_variants[-1]['width'] == info['width']:
+                # WebP sources have no full-size output, but a breakpoint at the
+                # source width serves the same purpose
+                full_size = {'src': format_variants[-1]['src'], 'bytes': format_variants[-1]['bytes']}
+            else:
+                continue
+            formats[fmt] = {**full_size, 'variants': format_variants}
+        
+        entry = {
+            'webp': webp_url,
+            'width': info['width'],
+            'height': info['height'],
+            'bytes': webp_path.stat().st_size,
+            'variants': variants,
+            'formats': formats
+        }
+        
+        # Made during the batch run; images it did not see (e.g. a manifest-only
+        # run) are previewed from their WebP
+        if self.placeholders is not None:
+            placeholder = self.placeholders.get(source_path) or self.placeholders.add_file(source_path, webp_path)
+            if placeholder is not None:
+                entry['placeholder'] = placeholder
+        return entry
+    
+    def build_image_map(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Build the source URL -> optimized image map for every image directory.
+        
+        Images Vite bundles (those under /src/) are only listed when a
+        module imports them: the manifest imports every one it lists, which
+        would bundle the unused ones too.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Manifest entries keyed by source URL
+        """
+        if self.placeholders is None:
+            try:
+                self.placeholders = PlaceholderStore.from_config(self.build_config.get('placeholders'))
+            except ValueError as e:
+                print(f"❌ Invalid placeholder settings: {e}")
+        
+        module_dir = self.build_config['image_manifest'].get('module_dir')
+        imported = find_imported_images(self.project_root / module_dir) if module_dir else set()
+        
+        images = {}
+        for dir_config in self.build_config['image_directories']:
+            source_dir = self.project_root / dir_config['source']
+            output_dir = self.project_root / dir_config['output']
+            if not source_dir.exists():
+                continue
+            
+            for scanned in scan_images(source_dir, self.RESPONSIVE_FORMATS, skip_dirs=[output_dir]):
+                source_url = self.get_public_url(scanned.path)
+                if source_url and source_url.startswith(BUNDLED_PREFIX) and scanned.path not in imported:
+                    continue
+                canonical = self.dedup_aliases.get(scanned.path)
+                if canonical is not None:
+                    entry = self.build_image_entry(canonical.path, canonical.input_dir, canonical.output_dir)
+                else:
+                    entry = self.build_image_entry(scanned.path, source_dir, output_dir)
+                if source_url and entry:
+                    images[source_url] = entry
+        return images
     
     def generate_image_manifest(self) -> None:
-        """Generate a manifest of optimized images."""
-        manifest_path = self.project_root / 'image_manifest.json'
+        """
+        Generate a manifest of optimized images.
+        
+        Besides the build report, a compact source URL -> {webp, width, height,
+        bytes, variants, formats, placeholder} map is written for the Vite
+        plugin that serves it as virtual:image-manifest, so the frontend resolves optimized URLs without
+        probing the network, can offer every format in a <picture> and shows
+        the inline placeholder while the image loads.
+        
+        With hashed_assets enabled, the map points at content-hashed copies of
+        the outputs, which are safe to cache immutably; hashed files no recent
+        manifest references are removed once the new one is written.
+        """
+        manifest_config = self.build_config['image_manifest']
+        manifest_path = self.project_root / manifest_config.get('path', 'image_manifest.json')
+        self.emitter = self.get_emitter()
+        images = self.build_image_map()
         manifest = {
             'generated_at': time.time(),
             'build_stats': self.stats,
-            'optimized_images': []
+            'optimized_images': [],
+            'images': images
         }
         
         # Scan optimized directories
         for dir_config in self.build_config['image_directories']:
             output_dir = self.project_root / dir_config['output']
             if output_dir.exists():
-                for img_file in output_dir.rglob('*.webp'):
+                for img_file in sorted(path for suffix in OUTPUT_FORMATS.values()
+                                       for path in output_dir.rglob(f'*{suffix}')):
                     relative_path = img_file.relative_to(self.project_root)
                     manifest['optimized_images'].append({
                         'path': str(relative_path),
@@ -310,44 +857,271 @@ class BuildOptimizer:
             with open(manifest_path, 'w') as f:
                 json.dump(manifest, f, indent=2)
             print(f"📋 Image manifest generated: {manifest_path}")
+            
+            module_path = manifest_config.get('module_path')
+            if module_path:
+                with open(self.project_root / module_path, 'w') as f:
+                    json.dump({'version': 1, 'images': images}, f, sort_keys=True, separators=(',', ':'))
+                    f.write('\n')
+                print(f"📋 Frontend image manifest generated: {module_path} ({len(images)} images)")
+            
+            if self.emitter is not None:
+                removed, freed = self.emitter.collect_garbage()
+                print(f"🔒 Hashed assets: {len(self.emitter.emitted)} referenced ({self.emitter.created} new) "
+                      f"in {self.emitter.emit_dir.relative_to(self.project_root)}, "
+                      f"{removed} unreferenced removed ({freed:,} bytes)")
         except Exception as e:
             print(f"❌ Failed to generate image manifest: {e}")
     
+    def load_frontend_manifest(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read the image map of the frontend manifest written by generate_image_manifest().
+        
+        Returns:
+            Optional[Dict[str, Dict[str, Any]]]: Entries keyed by source URL,
+            or None if there is no readable manifest
+        """
+        module_path = self.build_config['image_manifest'].get('module_path')
+        if not module_path:
+            print("⚠️  image_manifest.module_path is not set")
+            return None
+        try:
+            with open(self.project_root / module_path, 'r') as f:
+                return json.load(f)['images']
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️  Cannot read the frontend image manifest {module_path}: {e}")
+            return None
+    
+    def generate_route_preloads(self) -> None:
+        """
+        Preload the hero image of every sitemap route through Netlify Link headers.
+        
+        The rules are built from the frontend image manifest, so the preloaded
+        URL, srcset and sizes are exactly what ImageUpload renders and the
+        browser reuses the preloaded response. They are written to a
+        generated block of the _headers file, which Vite copies into dist.
+        """
+        try:
+            preloader = RoutePreloader.from_config(self.build_config.get('route_preloads'), self.project_root,
+                                                   public_url=self.get_public_url)
+        except ValueError as e:
+            print(f"❌ Invalid route_preloads settings: {e}")
+            return
+        if preloader is None:
+            return
+        
+        images = self.load_frontend_manifest()
+        if images is None:
+            print("⚠️  Skipping route preloads")
+            return
+        
+        try:
+            rules = preloader.build_rules(images)
+            changed = preloader.write_headers(rules)
+        except OSError as e:
+            print(f"❌ Failed to generate route preloads: {e}")
+            return
+        for route, links in rules.items():
+            print(f"   {route}: {len(links)} hero preload{'s' if len(links) != 1 else ''}")
+        print(f"⚡ Route preloads {'written to' if changed else 'unchanged in'} "
+              f"{preloader.headers_path.relative_to(self.project_root)} ({len(rules)} routes)")
+    
+    def measure_image_sizes(self, budgets: SizeBudgets,
+                            images: Dict[str, Dict[str, Any]]) -> Tuple[List[SizedImage], Dict[str, List[Tuple[str, int]]]]:
+        """
+        Measure every shipped image and the images each sitemap route references.
+        
+        Images in the budgeted and configured image directories are sized as
+        stored, except for generated outputs and hashed copies, which only
+        count as their source's served size; source images are also
+        classified into their optimization
+        profile and sized as served, i.e. as the manifest WebP when they have
+        one. The smallest manifest output, downsized to the widest breakpoint
+        when the source is wider, estimates what each file could cost instead.
+        
+        Args:
+            budgets (SizeBudgets): Budgets naming the directories to measure
+            images (Dict[str, Dict[str, Any]]): Frontend manifest entries keyed by source URL
+            
+        Returns:
+            Tuple[List[SizedImage], Dict[str, List[Tuple[str, int]]]]: The
+            images, and route -> (URL, served bytes) of the images its page uses
+        """
+        try:
+            profiles = create_profile_matcher({key: self.build_config[key] for key in
+                                               ('optimization_settings', 'profile_rules') if key in self.build_config})
+        except ValueError as e:
+            print(f"⚠️  Invalid profile rules, profile budgets skipped: {e}")
+            profiles = None
+        source_dirs = {self.project_root / d['source']: self.project_root / d['output']
+                       for d in self.build_config['image_directories']}
+        roots = list(source_dirs) + [self.project_root / budget.name for budget in budgets.budgets_for('directory')]
+        skip_dirs = list(source_dirs.values())
+        hashed_dir = self.build_config.get('hashed_assets', {}).get('dir')
+        if hashed_dir:
+            skip_dirs.append(self.project_root / hashed_dir)
+        widest = max((bp['max_width'] for bp in self.build_config.get('responsive_breakpoints', {}).values()),
+                     default=None)
+        extensions = self.RESPONSIVE_FORMATS | set(OUTPUT_FORMATS.values())
+        
+        sized: Dict[Path, SizedImage] = {}
+        served_by_url: Dict[str, int] = {}
+        for root in dict.fromkeys(roots):
+            if not root.exists():
+                continue
+            for scanned in scan_images(root, extensions, skip_dirs=skip_dirs):
+                if scanned.path in sized:
+                    continue
+                size = scanned.stat.st_size
+                url = self.get_public_url(scanned.path)
+                entry = images.get(url) if url else None
+                served, best = size, None
+                if entry is not None:
+                    served = entry['bytes']
+                    best = min([entry['bytes']] + [output['bytes'] for output in entry.get('formats', {}).values()])
+                    if widest and entry['width'] > widest:
+                        best = int(best * (widest / entry['width']) ** 2)
+                    served_by_url[url] = served
+                elif url:
+                    served_by_url.setdefault(url, size)
+                
+                profile = None
+                for source_dir in source_dirs:
+                    if profiles is not None and source_dir in scanned.path.parents:
+                        profile = profiles.classify(scanned.path.relative_to(source_dir).as_posix(), scanned.path)
+                        break
+                sized[scanned.path] = SizedImage(scanned.path.relative_to(self.project_root).as_posix(),
+                                                 size, served, best, profile)
+        
+        routes: Dict[str, List[Tuple[str, int]]] = {}
+        preload_config = self.build_config.get('route_preloads')
+        if budgets.budgets_for('route') and preload_config:
+            try:
+                preloader = RoutePreloader.from_config({**preload_config, 'enabled': True}, self.project_root,
+                                                       public_url=self.get_public_url)
+                for route, page_path in preloader.find_routes().items():
+                    if page_path is not None:
+                        routes[route] = [(url, served_by_url[url]) for url in preloader.find_page_images(page_path)
+                                         if url in served_by_url]
+            except (ValueError, OSError) as e:
+                print(f"⚠️  Cannot map routes to their images, route budgets skipped: {e}")
+        return list(sized.values()), routes
+    
+    def check_size_budgets(self, update_baseline: bool = False) -> bool:
+        """
+        Check image sizes against the size_budgets and the stored baseline.
+        
+        Over-budget images and totals, and files or totals that grew past
+        the allowed growth since the baseline, fail the check; the report
+        ends with the files that would save the most if optimized.
+        
+        Args:
+            update_baseline (bool): Store the current sizes as the new baseline
+                instead of failing on regressions against the old one
+            
+        Returns:
+            bool: Whether the budgets are met
+        """
+        try:
+            budgets = SizeBudgets.from_config(self.build_config.get('size_budgets'), self.project_root)
+        except ValueError as e:
+            print(f"❌ Invalid size_budgets settings: {e}")
+            self.budget_failed = True
+            return False
+        if budgets is None:
+            return True
+        images = self.load_frontend_manifest()
+        if images is None:
+            images = {}
+        
+        sized, routes = self.measure_image_sizes(budgets, images)
+        report = budgets.check(sized, routes)
+        if update_baseline:
+            report = report._replace(regressions=[])
+        budgets.print_report(report, sized)
+        if update_baseline and budgets.baseline_path is not None:
+            try:
+                budgets.save_baseline(report.snapshot)
+                print(f"💾 Size baseline saved to {budgets.baseline_path.relative_to(self.project_root)}")
+            except OSError as e:
+                print(f"❌ Failed to save the size baseline: {e}")
+        if report.failed:
+            self.budget_failed = True
+        return not report.failed
+    
+    def recompress_webp_assets(self) -> None:
+        """
+        Recompress the WebPs already committed under webp_recompress.roots, in place.
+        
+        Generated output folders are left alone; they are rewritten by the
+        optimizer anyway.
+        """
+        recompress_config = self.build_config.get('webp_recompress', {})
+        try:
+            recompressor = WebPRecompressor.from_config(recompress_config, self.project_root,
+                                                        supervisor=self.get_supervisor(), tracer=self.tracer)
+        except ValueError as e:
+            print(f"❌ Invalid webp_recompress settings: {e}")
+            return
+        if not recompressor.check_engine():
+            return
+        
+        # Hashed assets are never rewritten: their names promise their contents
+        output_dirs = [self.project_root / d['output'] for d in self.build_config['image_directories']]
+        hashed_dir = self.build_config.get('hashed_assets', {}).get('dir')
+        if hashed_dir:
+            output_dirs.append(self.project_root / hashed_dir)
+        start_time = time.time()
+        try:
+            for root in recompress_config.get('roots', []):
+                recompressor.recompress_tree(self.project_root / root, skip_dirs=output_dirs)
+        finally:
+            recompressor.close()
+        recompressor.print_summary(time.time() - start_time)
+        self.stats['space_saved'] += (recompressor.stats['total_size_before'] -
+                                      recompressor.stats['total_size_after'])
+    
     def cleanup_temp_files(self) -> None:
         """Clean up temporary files and old cache entries."""
         print("🧹 Cleaning up temporary files...")
         
-        # Clean old cache entries
-        cache_dir = self.project_root / self.build_config['optimization_cache']['cache_dir']
-        if cache_dir.exists():
-            max_age = self.build_config['optimization_cache']['max_age_days'] * 24 * 3600
-            current_time = time.time()
+        # Evict expired and least recently used cache entries
+        cache = self.get_cache()
+        if cache is not None:
+            evicted = cache.evict()
+            print(f"🗑️  Evicted {evicted} cache entries ({cache.get_size():,} bytes cached)")
             
-            for cache_file in cache_dir.glob('*.cache'):
-                if current_time - cache_file.stat().st_mtime > max_age:
-                    cache_file.unlink()
+            # Remove per-image JSON entries left by the old mtime-based cache
+            for legacy_file in cache.cache_dir.glob('*.cache'):
+                legacy_file.unlink()
         
         print("✅ Cleanup completed")
     
-    def run_build_hooks(self, hook_type: str) -> None:
+    def run_build_hooks(self, hook_type: str, environment: str = 'development') -> None:
         """
         Run build hooks for a specific type.
         
         Args:
             hook_type (str): Type of hook (pre_build, post_build, watch)
+            environment (str): Environment the optimizing hooks build for
         """
         hooks = self.build_config['build_hooks'].get(hook_type, [])
         
         for hook in hooks:
             if hook == 'optimize_images':
-                self.optimize_images_for_environment()
+                self.optimize_images_for_environment(environment)
             elif hook == 'generate_manifest':
                 self.generate_image_manifest()
+            elif hook == 'generate_preloads':
+                self.generate_route_preloads()
+            elif hook == 'check_budgets':
+                self.check_size_budgets()
             elif hook == 'cleanup_temp':
                 self.cleanup_temp_files()
             elif hook == 'optimize_new_images':
-                # This would be implemented for watch mode
-                pass
+                self.watch_images(environment)
+            elif hook == 'recompress_webp':
+                self.recompress_webp_assets()
     
     def integrate_with_npm_scripts(self) -> None:
         """Generate npm scripts for image optimization."""
@@ -365,14 +1139,21 @@ class BuildOptimizer:
             if 'scripts' not in package_data:
                 package_data['scripts'] = {}
             
+            # Optimization is opt-in: a plain build needs neither Python nor
+            # FFmpeg and serves the images unoptimized
+            optimizer = 'python3 ../scripts/build_optimizer.py --project-root ..'
             optimization_scripts = {
-                'optimize:images': 'python ../scripts/build_optimizer.py --environment development',
-                'optimize:images:prod': 'python ../scripts/build_optimizer.py --environment production',
+                'optimize:images': f'{optimizer} --environment development',
+                'optimize:images:prod': f'{optimizer} --environment production',
+                'optimize:images:watch': f'{optimizer} --environment development --watch',
+                'optimize:webp': 'python3 ../scripts/webp_recompress.py public src/assets/images',
                 'build:optimized': 'npm run optimize:images:prod && npm run build',
                 'dev:optimized': 'npm run optimize:images && npm run dev'
             }
             
             package_data['scripts'].update(optimization_scripts)
+            if package_data['scripts'].get('prebuild') == 'npm run optimize:images:prod':
+                del package_data['scripts']['prebuild']
             
             with open(package_json_path, 'w') as f:
                 json.dump(package_data, f, indent=2)
@@ -389,6 +1170,8 @@ class BuildOptimizer:
         print("=" * 60)
         print(f"🖼️  Images optimized: {self.stats['images_optimized']}")
         print(f"💾 Space saved: {self.stats['space_saved']:,} bytes")
+        if self.stats['responsive_variants']:
+            print(f"📱 Responsive variants: {self.stats['responsive_variants']}")
         print(f"⏱️  Optimization time: {self.stats['optimization_time']:.2f} seconds")
         print("=" * 60)
 
@@ -411,6 +1194,12 @@ def main():
         help='Project root directory'
     )
     
+    parser.add_argument(
+        '--engine',
+        choices=ENGINES,
+        help='Encoder backend: ffmpeg, pillow or auto (default: per environment, ffmpeg)'
+    )
+    
     parser.add_argument(
         '--create-config',
         action='store_true',
@@ -423,6 +1212,63 @@ def main():
         help='Integrate with npm scripts'
     )
     
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Watch image directories and re-encode changed files until interrupted'
+    )
+    
+    parser.add_argument(
+        '--poll',
+        action='store_true',
+        help='Use the polling watcher instead of inotify'
+    )
+    
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        help='Override seconds allowed per image attempt before its encoder is killed'
+    )
+    
+    parser.add_argument(
+        '--retries',
+        type=int,
+        help='Override extra attempts for a failed image'
+    )
+    
+    parser.add_argument(
+        '--retry-quarantined',
+        action='store_true',
+        help='Attempt images quarantined by earlier builds again'
+    )
+    
+    parser.add_argument(
+        '--trace',
+        type=str,
+        help='Record per-stage spans to this Chrome trace file (plus a .jsonl log next to it)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        type=int,
+        nargs='?',
+        const=PROFILE_TOP,
+        metavar='N',
+        help=f'Run under cProfile and print the N hottest functions (default: {PROFILE_TOP})'
+    )
+    
+    parser.add_argument(
+        '--check-budgets',
+        action='store_true',
+        help='Only check image sizes against size_budgets and the baseline; exit 1 if they are not met'
+    )
+    
+    parser.add_argument(
+        '--update-baseline',
+        action='store_true',
+        help='Store the current image sizes as the size budget baseline'
+    )
+    
     parser.add_argument(
         '--hooks',
         choices=['pre_build', 'post_build', 'watch'],
@@ -432,7 +1278,15 @@ def main():
     args = parser.parse_args()
     
     # Initialize build optimizer
-    build_optimizer = BuildOptimizer(args.project_root)
+    build_optimizer = BuildOptimizer(args.project_root, engine=args.engine)
+    
+    supervisor_config = build_optimizer.build_config.setdefault('supervisor', {})
+    if args.timeout is not None:
+        supervisor_config['timeout_seconds'] = args.timeout
+    if args.retries is not None:
+        supervisor_config['retries'] = args.retries
+    if args.retry_quarantined:
+        supervisor_config['retry_quarantined'] = True
     
     # Create configuration if requested
     if args.create_config:
@@ -444,9 +1298,56 @@ def main():
         build_optimizer.integrate_with_npm_scripts()
         return
     
+    try:
+        supervisor = build_optimizer.get_supervisor()
+    except ValueError as e:
+        print(f"❌ Invalid supervisor settings: {e}")
+        sys.exit(1)
+    
+    if args.trace:
+        build_optimizer.tracer = Tracer(enabled=True)
+    
+    # SIGINT/SIGTERM kill running encoders and discard their partial outputs
+    try:
+        with handle_signals(supervisor):
+            if args.profile:
+                run_profiled(lambda: run_build(build_optimizer, args), args.profile)
+            else:
+                run_build(build_optimizer, args)
+    except (KeyboardInterrupt, JobCancelled):
+        print("🛑 Cancelled; existing outputs were left untouched")
+        sys.exit(130)
+    finally:
+        if build_optimizer.tracer.enabled:
+            build_optimizer.tracer.print_summary()
+            trace_path, jsonl_path = build_optimizer.tracer.export(Path(args.trace))
+            print(f"📊 Trace written to {trace_path} and {jsonl_path}")
+
+
+def run_build(build_optimizer: BuildOptimizer, args: argparse.Namespace) -> None:
+    """
+    Run the watch mode, hooks or full build selected on the command line.
+    
+    Args:
+        build_optimizer (BuildOptimizer): Configured build optimizer
+        args (argparse.Namespace): Parsed command line arguments
+    """
+    # Watch mode
+    if args.watch:
+        build_optimizer.watch_images(args.environment, force_polling=args.poll)
+        return
+    
+    # Size budget gate only
+    if args.check_budgets or args.update_baseline:
+        if not build_optimizer.check_size_budgets(update_baseline=args.update_baseline):
+            sys.exit(1)
+        return
+    
     # Run specific hooks if requested
     if args.hooks:
-        build_optimizer.run_build_hooks(args.hooks)
+        build_optimizer.run_build_hooks(args.hooks, args.environment)
+        if build_optimizer.budget_failed:
+            sys.exit(1)
         return
     
     # Run full optimization process
@@ -454,20 +1355,29 @@ def main():
     print("=" * 60)
     
     start_time = time.time()
+    tracer = build_optimizer.tracer
     
     # Pre-build hooks
-    build_optimizer.run_build_hooks('pre_build')
+    with tracer.span('pre_build', worker='build'):
+        build_optimizer.run_build_hooks('pre_build', args.environment)
     
-    # Main optimization
-    build_optimizer.optimize_images_for_environment(args.environment)
+    # Main optimization, unless the optimize_images hook just ran it
+    if 'optimize_images' not in build_optimizer.build_config['build_hooks'].get('pre_build', []):
+        with tracer.span('optimize', worker='build', environment=args.environment):
+            build_optimizer.optimize_images_for_environment(args.environment)
     
     # Post-build hooks
-    build_optimizer.run_build_hooks('post_build')
+    with tracer.span('post_build', worker='build'):
+        build_optimizer.run_build_hooks('post_build')
     
     build_optimizer.stats['build_time'] = time.time() - start_time
     
     # Print summary
     build_optimizer.print_build_summary()
+    
+    # Fail the build on size regressions once everything else has run
+    if build_optimizer.budget_failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
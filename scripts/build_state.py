@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Incremental Build State for RadioFusion Image Optimizer
+Remembers what every output was built from, so unchanged images are skipped
+without hashing and stale ones are reported with the reason.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from optimization_cache import OptimizationCache
+
+# Bump when the entry layout changes; older files are ignored
+STATE_VERSION = 1
+
+DEFAULT_BUILD_STATE_FILE = '.image_build_state.json'
+
+# Encoder settings of the outputs in a directory, kept there by runs without a build state
+OUTPUT_SETTINGS_FILE = '.image_settings.json'
+
+
+class FileStamp(NamedTuple):
+    """Cheap identity of a file's contents: equal stamps mean the bytes were not rewritten."""
+    size: int
+    mtime_ns: int
+    inode: int
+
+    @classmethod
+    def of(cls, stat: os.stat_result) -> 'FileStamp':
+        """Get the stamp of a stat result."""
+        return cls(stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def settings_digest(settings: str) -> str:
+    """Get the short digest of an encoder settings description."""
+    return hashlib.sha256(settings.encode()).hexdigest()[:16]
+
+
+class OutputSettings:
+    """
+    Encoder settings digests of outputs, in a small file beside them.
+
+    Runs without a build state skip an image whose outputs are newer than
+    its source; the digests make them rebuild it anyway when the outputs
+    were encoded with other settings (another environment's quality, say).
+    Each directory's file is rewritten as soon as an output is recorded.
+    """
+
+    def __init__(self):
+        """Initialize the OutputSettings."""
+        self.digests: Dict[Path, Dict[str, str]] = {}
+        self.lock = threading.Lock()
+
+    def load(self, directory: Path) -> Dict[str, str]:
+        """Get the digests recorded in a directory, by file name (caller holds the lock)."""
+        if directory not in self.digests:
+            try:
+                with open(directory / OUTPUT_SETTINGS_FILE, 'r') as f:
+                    digests = json.load(f)
+                self.digests[directory] = digests if isinstance(digests, dict) else {}
+            except (OSError, ValueError):
+                self.digests[directory] = {}
+        return self.digests[directory]
+
+    def matches(self, outputs: List[Path], settings: str) -> bool:
+        """
+        Check whether every output was recorded with these settings.
+
+        Args:
+            outputs (List[Path]): Outputs of one image
+            settings (str): Description of the current encoder settings
+
+        Returns:
+            bool: False if any output has no record or another one
+        """
+        digest = settings_digest(settings)
+        with self.lock:
+            return all(self.load(output.parent).get(output.name) == digest for output in outputs)
+
+    def record(self, outputs: List[Path], settings: str) -> None:
+        """
+        Record the settings outputs were just written with.
+
+        Args:
+            outputs (List[Path]): Outputs written; missing ones are left out
+            settings (str): Description of the encoder settings used
+        """
+        digest = settings_digest(settings)
+        with self.lock:
+            for directory in dict.fromkeys(output.parent for output in outputs if output.exists()):
+                digests = self.load(directory)
+                digests.update({output.name: digest for output in outputs
+                                if output.parent == directory and output.exists()})
+                path = directory / OUTPUT_SETTINGS_FILE
+                temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+                with open(temp_path, 'w') as f:
+                    json.dump(digests, f, sort_keys=True, separators=(',', ':'))
+                os.replace(temp_path, path)
+
+
+class BuildState:
+    """
+    Source and output records of the last build, persisted as JSON.
+
+    Each source entry holds the source's stamp and content hash, the digest
+    of the encoder settings it was built with, and the stamp and hash of
+    every output, plus the image's placeholder when placeholders are made.
+    A file whose (size, mtime_ns, inode) stamp is unchanged is
+    trusted without reading it; a changed stamp costs one hash, and if the
+    contents turn out equal (e.g. after git checkout rewrote mtimes) only
+    the stamp is refreshed.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Initialize the BuildState.
+
+        Args:
+            path (Path): State file, loaded if it exists (default: in memory only)
+        """
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hashes: Dict[str, Tuple[FileStamp, str]] = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        if path is not None and path.exists():
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == STATE_VERSION:
+                    self.entries = data.get('sources', {})
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"⚠️  Ignoring unreadable build state {path}: {e}")
+
+    def hash_source(self, path: Path, stat: os.stat_result) -> str:
+        """
+        Get a source's content hash, reusing the recorded one while its stamp is unchanged.
+
+        Args:
+            path (Path): Source image
+            stat (os.stat_result): Current stat of the source
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        key = str(path)
+        stamp = FileStamp.of(stat)
+        with self.lock:
+            known = self.hashes.get(key)
+            entry = self.entries.get(key)
+        if known is not None and known[0] == stamp:
+            return known[1]
+        if entry is not None and FileStamp(*entry['stamp']) == stamp:
+            digest = entry['hash']
+        else:
+            digest = OptimizationCache.hash_file(path)
+        with self.lock:
+            self.hashes[key] = (stamp, digest)
+        return digest
+
+    def check_output(self, output: Path, record: Dict[str, Any]) -> Optional[str]:
+        """
+        Check one output against its record, refreshing the stamp if only it changed.
+
+        Returns:
+            Optional[str]: Why the output is stale, or None if it is intact
+        """
+        try:
+            stamp = FileStamp.of(output.stat())
+        except OSError:
+            return f"{output.name} is missing"
+        if stamp == FileStamp(*record['stamp']):
+            return None
+        if OptimizationCache.hash_file(output) != record['hash']:
+            return f"{output.name} was modified"
+        with self.lock:
+            record['stamp'] = list(stamp)
+            self.dirty = True
+        return None
+
+    def check(self, path: Path, stat: os.stat_result, settings: str, outputs: List[Path]) -> Optional[str]:
+        """
+        Check whether a source's outputs are up to date.
+
+        Args:
+            path (Path): Source image
+            stat (os.stat_result): Current stat of the source
+            settings (str): Description of the encoder settings for the source
+            outputs (List[Path]): Outputs the source should have
+
+        Returns:
+            Optional[str]: Why the outputs are stale, or None if they can be kept
+        """
+        with self.lock:
+            entry = self.entries.get(str(path))
+        if entry is None:
+            return "not built before"
+        if entry['settings'] != settings_digest(settings):
+            return "encoder settings changed"
+        if sorted(entry['outputs']) != sorted(str(output) for output in outputs):
+            return "output formats changed"
+
+        stamp = FileStamp.of(stat)
+        if stamp != FileStamp(*entry['stamp']):
+            if self.hash_source(path, stat) != entry['hash']:
+                return "source changed"
+            with self.lock:
+                entry['stamp'] = list(stamp)
+                self.dirty = True
+
+        for output in outputs:
+            reason = self.check_output(output, entry['outputs'][str(output)])
+            if reason is not None:
+                return reason
+        return None
+
+    def record(self, path: Path, stat: os.stat_result, settings: str, outputs: List[Path]) -> None:
+        """
+        Record a source whose outputs were just written or restored.
+
+        Args:
+            path (Path): Source image
+            stat (os.stat_result): Stat of the source the outputs were built from
+            settings (str): Description of the encoder settings used
+            outputs (List[Path]): Outputs written; missing ones are left out
+        """
+        output_records = {}
+        for output in outputs:
+            try:
+                output_stat = output.stat()
+            except OSError:
+                continue
+            output_records[str(output)] = {'stamp': list(FileStamp.of(output_stat)),
+                                           'hash': OptimizationCache.hash_file(output)}
+        entry = {
+            'stamp': list(FileStamp.of(stat)),
+            'hash': self.hash_source(path, stat),
+            'settings': settings_digest(settings),
+            'outputs': output_records
+        }
+        with self.lock:
+            self.entries[str(path)] = entry
+            self.dirty = True
+
+    def get_placeholder(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Get the placeholder recorded for a source, if any."""
+        with self.lock:
+            entry = self.entries.get(str(path))
+            return entry.get('placeholder') if entry is not None else None
+
+    def set_placeholder(self, path: Path, placeholder: Dict[str, Any]) -> None:
+        """Record the placeholder of a recorded source."""
+        with self.lock:
+            entry = self.entries.get(str(path))
+            if entry is not None and entry.get('placeholder') != placeholder:
+                entry['placeholder'] = placeholder
+                self.dirty = True
+
+    def forget(self, path: Path) -> None:
+        """Drop a source's record, so it is rebuilt next time (e.g. after a failure)."""
+        with self.lock:
+            if self.entries.pop(str(path), None) is not None:
+                self.dirty = True
+
+    def save(self) -> None:
+        """Write the state file if anything changed, atomically."""
+        with self.lock:
+            if self.path is None or not self.dirty:
+                return
+            data = json.dumps({'version': STATE_VERSION, 'sources': self.entries},
+                              sort_keys=True, separators=(',', ':'))
+            self.dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w') as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
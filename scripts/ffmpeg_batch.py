@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Batched FFmpeg Encodes for RadioFusion Image Optimizer
+Runs the encodes of many small images through one FFmpeg process per chunk,
+so process startup stops dominating runs over icons and thumbnails.
+"""
+
+import contextlib
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set
+
+from image_probe import probe_image
+from job_supervisor import JobSupervisor
+
+# Decoded pixels per chunk: enough for hundreds of icons, while a chunk of
+# photos still finishes in about the time of one large image
+DEFAULT_CHUNK_PIXELS = 16_000_000
+
+# Inputs per chunk, whatever their size; bounds the command line and the
+# work repeated when a chunk has to be split
+DEFAULT_CHUNK_INPUTS = 32
+
+# Threads that may block on batched encodes at once, whatever the worker
+# count: each waiting encode holds a thread, so filling every process slot
+# with a whole chunk would cost hundreds of threads on large machines
+MAX_BATCH_THREADS = 64
+
+# How long a new chunk waits for more encodes to join before it starts
+DEFAULT_LINGER_MS = 20
+
+# How often a chunk waiting for a free process checks for cancellation
+SLOT_POLL_SECONDS = 0.1
+
+
+class ChunkLimits(NamedTuple):
+    """How large a chunk may grow and how long it waits to fill."""
+    max_pixels: int
+    max_inputs: int
+    linger: float
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'ChunkLimits':
+        """
+        Build limits from an 'ffmpeg_batch' configuration block.
+
+        Args:
+            config (Optional[Dict[str, Any]]): Block with 'max_pixels',
+                'max_inputs' and 'linger_ms' (all optional)
+
+        Returns:
+            ChunkLimits: Limits, defaults filled in
+
+        Raises:
+            ValueError: If a limit is out of range
+        """
+        config = config or {}
+        max_pixels = config.get('max_pixels', DEFAULT_CHUNK_PIXELS)
+        max_inputs = config.get('max_inputs', DEFAULT_CHUNK_INPUTS)
+        linger_ms = config.get('linger_ms', DEFAULT_LINGER_MS)
+        for key, value, minimum in (('max_pixels', max_pixels, 1), ('max_inputs', max_inputs, 1),
+                                    ('linger_ms', linger_ms, 0)):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+                raise ValueError(f"'ffmpeg_batch.{key}' must be at least {minimum}, got {value!r}")
+        return cls(int(max_pixels), int(max_inputs), linger_ms / 1000)
+
+
+class BatchJob:
+    """One image's encode waiting in a chunk, and its outcome."""
+
+    def __init__(self, input_path: Path, output_args: List[List[str]], pixels: int):
+        """
+        Initialize the BatchJob.
+
+        Args:
+            input_path (Path): Image to decode
+            output_args (List[List[str]]): Per output: its options, ending with its path
+            pixels (int): Decoded pixels of the image
+        """
+        self.input_path = input_path
+        self.output_args = output_args
+        self.pixels = pixels
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Record the outcome and wake the thread waiting for it."""
+        self.error = error
+        self.done.set()
+
+
+class Chunk:
+    """Jobs that will share one FFmpeg process."""
+
+    def __init__(self):
+        """Initialize the Chunk."""
+        self.jobs: List[BatchJob] = []
+        self.pixels = 0
+
+
+class FFmpegBatcher:
+    """
+    Coalesces concurrent single-image FFmpeg encodes into multi-input runs.
+
+    Worker threads hand in their encode and block until it is done. The
+    first encode of a chunk leads it: it waits for a free process slot and
+    the linger window while others join, up to the pixel and input limits,
+    then runs every input through one FFmpeg command, each output mapped
+    to its own input. A failed chunk is split in halves and each retried,
+    so a bad file ends up failing alone while the rest are written.
+    A chunk's timeout is its share of the supervisor timeout, so the halves
+    of a hung chunk time out sooner and sooner; only a lone input gets the
+    full timeout. An input that times out alone runs on its own from then
+    on, so its retries hold up no other images. Images at or above the
+    chunk pixel limit run on their own.
+    """
+
+    def __init__(self, supervisor: JobSupervisor, processes: int, limits: Optional[ChunkLimits] = None):
+        """
+        Initialize the FFmpegBatcher.
+
+        Args:
+            supervisor (JobSupervisor): Runs (and on cancellation kills) the processes
+            processes (int): FFmpeg processes running at once
+            limits (Optional[ChunkLimits]): Chunk size limits (default: the DEFAULT_CHUNK_* values)
+
+        Raises:
+            ValueError: If processes is less than 1
+        """
+        if processes < 1:
+            raise ValueError(f"FFmpeg batch processes must be at least 1, got {processes}")
+        self.supervisor = supervisor
+        self.processes = processes
+        self.limits = limits if limits is not None else ChunkLimits(DEFAULT_CHUNK_PIXELS, DEFAULT_CHUNK_INPUTS,
+                                                                    DEFAULT_LINGER_MS / 1000)
+        self.slots = threading.Semaphore(processes)
+        self.condition = threading.Condition()
+        self.forming: Optional[Chunk] = None
+        self.lock = threading.Lock()
+        self.isolated: Set[Path] = set()
+        self.stats = {'runs': 0, 'inputs': 0, 'splits': 0, 'largest': 0, 'isolated': 0}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], supervisor: JobSupervisor,
+                    processes: int) -> Optional['FFmpegBatcher']:
+        """
+        Build a batcher from an 'ffmpeg_batch' configuration block.
+
+        Args:
+            config (Optional[Dict[str, Any]]): Block with 'enabled' plus the ChunkLimits keys
+            supervisor (JobSupervisor): Runs the processes
+            processes (int): FFmpeg processes running at once
+
+        Returns:
+            Optional[FFmpegBatcher]: None when disabled
+
+        Raises:
+            ValueError: If a limit is out of range
+        """
+        if not config or not config.get('enabled', False):
+            return None
+        return cls(supervisor, processes, ChunkLimits.from_config(config))
+
+    @staticmethod
+    def count_pixels(input_path: Path) -> Optional[int]:
+        """Get an image's pixel count from its header, None if it cannot be read."""
+        info = probe_image(input_path)
+        return info['width'] * info['height'] if info else None
+
+    @staticmethod
+    def build_command(jobs: List[BatchJob]) -> List[str]:
+        """
+        Build one FFmpeg command encoding every job.
+
+        Args:
+            jobs (List[BatchJob]): Jobs of the chunk
+
+        Returns:
+            List[str]: FFmpeg command with one input per job and its outputs mapped to it
+        """
+        cmd = ['ffmpeg', '-y']
+        for job in jobs:
+            cmd.extend(['-i', str(job.input_path)])
+        for index, job in enumerate(jobs):
+            for args in job.output_args:
+                cmd.extend(['-map', f'{index}:v:0', *args])
+        return cmd
+
+    def encode(self, input_path: Path, output_args: List[List[str]]) -> None:
+        """
+        Encode one image, sharing an FFmpeg process with concurrent encodes.
+
+        Args:
+            input_path (Path): Image to decode
+            output_args (List[List[str]]): Per output: its options, ending with its path
+
+        Raises:
+            subprocess.CalledProcessError: If FFmpeg fails on this image
+            subprocess.TimeoutExpired: If encoding this image alone timed out
+            JobCancelled: If the run is cancelled
+        """
+        pixels = self.count_pixels(input_path)
+        with self.lock:
+            isolated = input_path in self.isolated
+        if pixels is None or pixels >= self.limits.max_pixels or isolated:
+            # Nothing to share: decoding dominates, and a chunk would only wait
+            # on it; an input that hung before would hold the chunk up again
+            with self.hold_slot():
+                self.supervisor.run(self.build_command([BatchJob(input_path, output_args, 0)]))
+            self.count_run(1)
+            return
+
+        job = BatchJob(input_path, output_args, pixels)
+        with self.condition:
+            chunk = self.forming
+            leads = chunk is None
+            if leads:
+                chunk = self.forming = Chunk()
+            chunk.jobs.append(job)
+            chunk.pixels += pixels
+            if self.is_full(chunk):
+                self.forming = None
+                self.condition.notify_all()
+
+        if leads:
+            self.lead(chunk)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+
+    def is_full(self, chunk: Chunk) -> bool:
+        """Whether a chunk has reached its pixel or input limit."""
+        return chunk.pixels >= self.limits.max_pixels or len(chunk.jobs) >= self.limits.max_inputs
+
+    @contextlib.contextmanager
+    def hold_slot(self) -> Iterator[None]:
+        """
+        Wait for a free process slot and hold it.
+
+        Raises:
+            JobCancelled: If the run is cancelled while waiting
+        """
+        # Poll, so a cancelled run does not wait for busy processes to finish
+        while not self.slots.acquire(timeout=SLOT_POLL_SECONDS):
+            self.supervisor.check_cancelled()
+        try:
+            yield
+        finally:
+            self.slots.release()
+
+    def lead(self, chunk: Chunk) -> None:
+        """
+        Let a chunk fill while a process slot frees up and the linger window
+        passes, then run it. Every job in the chunk is finished on return.
+        """
+        try:
+            with self.hold_slot():
+                # Busy processes keep the chunk open, so it grows under load
+                deadline = time.monotonic() + self.limits.linger
+                with self.condition:
+                    while self.forming is chunk:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self.condition.wait(remaining)
+                    if self.forming is chunk:
+                        self.forming = None
+                self.run_chunk(chunk.jobs)
+        except BaseException as e:
+            # Cancelled while waiting for a slot, or interrupted; nobody may be left waiting
+            with self.condition:
+                if self.forming is chunk:
+                    self.forming = None
+            for job in chunk.jobs:
+                if not job.done.is_set():
+                    job.finish(e)
+
+    def get_timeout(self, jobs: List[BatchJob]) -> Optional[float]:
+        """
+        Seconds a chunk may run: its share of the supervisor timeout.
+
+        The share is the larger of the chunk's fill of the pixel and input
+        limits, so a full chunk gets a whole attempt's time and each half of
+        a split one about half of it. A lone input gets the full timeout.
+
+        Args:
+            jobs (List[BatchJob]): Jobs of the chunk
+
+        Returns:
+            Optional[float]: Timeout, None when unlimited
+        """
+        timeout = self.supervisor.timeout
+        if timeout is None or len(jobs) == 1:
+            return timeout
+        share = max(sum(job.pixels for job in jobs) / self.limits.max_pixels,
+                    len(jobs) / self.limits.max_inputs)
+        return timeout * min(1.0, share)
+
+    def run_chunk(self, jobs: List[BatchJob]) -> None:
+        """
+        Run a chunk, splitting it and retrying the halves when it fails.
+
+        Args:
+            jobs (List[BatchJob]): Jobs to run; each is finished on return
+        """
+        try:
+            # Each chunk gets its own share of an attempt, not what is left of the leader's
+            self.supervisor.run(self.build_command(jobs), timeout=self.get_timeout(jobs))
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            if len(jobs) == 1:
+                if isinstance(e, subprocess.TimeoutExpired):
+                    with self.lock:
+                        self.isolated.add(jobs[0].input_path)
+                        self.stats['isolated'] += 1
+                jobs[0].finish(e)
+                return
+            with self.lock:
+                self.stats['splits'] += 1
+            middle = len(jobs) // 2
+            self.run_chunk(jobs[:middle])
+            self.run_chunk(jobs[middle:])
+            return
+        except Exception as e:
+            # Cancelled, or FFmpeg could not be started: no retry can help
+            for job in jobs:
+                job.finish(e)
+            return
+        self.count_run(len(jobs))
+        for job in jobs:
+            job.finish()
+
+    def count_run(self, inputs: int) -> None:
+        """Count a successful FFmpeg run and the images it encoded."""
+        with self.lock:
+            self.stats['runs'] += 1
+            self.stats['inputs'] += inputs
+            self.stats['largest'] = max(self.stats['largest'], inputs)
+
+    def print_summary(self) -> None:
+        """Print how many processes the batched encodes took."""
+        if not self.stats['runs']:
+            return
+        print(f"📦 FFmpeg batches: {self.stats['inputs']} images in {self.stats['runs']} processes "
+              f"(up to {self.stats['largest']} per process, {self.stats['splits']} failed chunks split)")
+        if self.stats['isolated']:
+            print(f"⏱️  Timed out in a batch and encoded alone since: {self.stats['isolated']} images")
+
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Source Deduplication for RadioFusion Image Optimizer
+Groups identical (or, optionally, perceptually near-identical) source images
+so each is encoded once and its outputs are shared by every copy.
+"""
+
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from job_supervisor import temp_output_path
+from optimization_cache import OptimizationCache
+from result_writer import DEDUPLICATED, FAILED, ResultWriter
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    PIL_AVAILABLE = False
+
+# How duplicates get their outputs: hardlinks to the canonical copy's files,
+# or manifest aliases pointing at them (no files of their own)
+DEDUP_MODES = ('hardlink', 'alias')
+
+# Differing bits (of 64) up to which two same-sized images count as the same
+# picture under the perceptual hash
+DEFAULT_MAX_DISTANCE = 4
+
+# Side of the difference hash grid; one bit per horizontal neighbour pair
+DHASH_SIZE = 8
+
+
+class DedupEntry(NamedTuple):
+    """A source image, the outputs it would get and what identifies its encoded bytes."""
+    path: Path
+    input_dir: Path
+    output_dir: Path
+    outputs: Tuple[Path, ...]
+    settings: str
+    content_hash: str
+    # (width, height, difference hash) when perceptual matching is on
+    fingerprint: Optional[Tuple[int, int, int]]
+
+
+def difference_hash(file_path: Path) -> Optional[Tuple[int, int, int]]:
+    """
+    Compute a perceptual difference hash (dHash) of an image.
+
+    The image is shrunk to a 9x8 grayscale grid and each bit records whether
+    a cell is brighter than its right neighbour, so re-encodes and small
+    edits of the same picture land within a few bits of each other.
+
+    Args:
+        file_path (Path): Image file
+
+    Returns:
+        Optional[Tuple[int, int, int]]: (width, height, 64-bit hash), or None
+        if Pillow is missing or cannot decode the file
+    """
+    if not PIL_AVAILABLE:
+        return None
+    try:
+        with Image.open(file_path) as img:
+            width, height = img.size
+            # JPEG decodes at a reduced scale when asked first
+            img.draft('L', (DHASH_SIZE * 8, DHASH_SIZE * 8))
+            grid = img.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.LANCZOS)
+    except Exception:
+        return None
+    pixels = list(grid.getdata())
+    bits = 0
+    for row in range(DHASH_SIZE):
+        for col in range(DHASH_SIZE):
+            offset = row * (DHASH_SIZE + 1) + col
+            bits = (bits << 1) | (pixels[offset] > pixels[offset + 1])
+    return width, height, bits
+
+
+class DedupIndex:
+    """
+    Content-addressed index of the source images in a run.
+
+    Entries are added from worker threads, then plan() groups them: images
+    with the same content hash (or, with perceptual matching, the same size
+    and a nearby difference hash) and the same encoder settings form a
+    group. The entry with the smallest path is canonical and encoded as
+    usual; the others are skipped during the run and get the canonical
+    outputs in materialize(). Choosing by path keeps the canonical copy
+    stable across runs.
+    """
+
+    def __init__(self, mode: str = 'hardlink', perceptual: bool = False,
+                 max_distance: int = DEFAULT_MAX_DISTANCE):
+        """
+        Initialize the DedupIndex.
+
+        Args:
+            mode (str): One of DEDUP_MODES (default: hardlink)
+            perceptual (bool): Also group near-identical images by dHash
+            max_distance (int): Differing dHash bits still counted as the same image
+
+        Raises:
+            ValueError: If the mode is unknown or max_distance is out of range
+        """
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode '{mode}', expected one of {', '.join(DEDUP_MODES)}")
+        if not 0 <= max_distance <= DHASH_SIZE * DHASH_SIZE:
+            raise ValueError(f"Perceptual distance must be between 0 and {DHASH_SIZE * DHASH_SIZE}, "
+                             f"got {max_distance}")
+        self.mode = mode
+        self.perceptual = perceptual and PIL_AVAILABLE
+        self.max_distance = max_distance
+        self.entries: List[DedupEntry] = []
+        self.canonical: Dict[Path, DedupEntry] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional['DedupIndex']:
+        """
+        Build an index from a 'dedup' configuration block.
+
+        Args:
+            config (Optional[Dict[str, Any]]): Block with 'enabled', 'mode',
+                'perceptual' and 'max_distance'
+
+        Returns:
+            Optional[DedupIndex]: None when disabled
+
+        Raises:
+            ValueError: If a setting is out of range
+        """
+        if not config or not config.get('enabled', False):
+            return None
+        return cls(mode=config.get('mode', 'hardlink'), perceptual=config.get('perceptual', False),
+                   max_distance=config.get('max_distance', DEFAULT_MAX_DISTANCE))
+
+    def add(self, path: Path, input_dir: Path, output_dir: Path, outputs: List[Path], settings: str,
+            content_hash: Optional[str] = None) -> None:
+        """
+        Hash a source image and add it to the index (thread-safe).
+
+        Args:
+            path (Path): Source image
+            input_dir (Path): Configured directory the image was found in
+            output_dir (Path): Output directory of that directory
+            outputs (List[Path]): Outputs the image would get, WebP first
+            settings (str): Canonical description of every encoder setting
+                affecting the outputs; only images with equal settings share
+            content_hash (str): Known SHA-256 of the image (default: hash it)
+        """
+        entry = DedupEntry(path, input_dir, output_dir, tuple(outputs), settings,
+                           content_hash or OptimizationCache.hash_file(path),
+                           difference_hash(path) if self.perceptual else None)
+        with self.lock:
+            self.entries.append(entry)
+
+    def is_near(self, a: Tuple[int, int, int], b: Tuple[int, int, int]) -> bool:
+        """Check whether two fingerprints are the same size and within max_distance bits."""
+        return a[:2] == b[:2] and bin(a[2] ^ b[2]).count('1') <= self.max_distance
+
+    def plan(self) -> int:
+        """
+        Group the added entries and pick each group's canonical image.
+
+        Returns:
+            int: Number of duplicates (images that will not be encoded)
+        """
+        groups: Dict[Tuple[str, str], List[DedupEntry]] = {}
+        for entry in sorted(self.entries, key=lambda entry: str(entry.path)):
+            groups.setdefault((entry.settings, entry.content_hash), []).append(entry)
+
+        # Exact groups in path order; a later group joins the first earlier
+        # representative it perceptually matches
+        representatives: List[List[DedupEntry]] = []
+        for (settings, _), members in groups.items():
+            head = members[0]
+            if self.perceptual and head.fingerprint is not None:
+                match = next((group for group in representatives
+                              if group[0].settings == settings and group[0].fingerprint is not None
+                              and self.is_near(group[0].fingerprint, head.fingerprint)), None)
+                if match is not None:
+                    match.extend(members)
+                    continue
+            representatives.append(list(members))
+
+        self.canonical = {duplicate.path: group[0] for group in representatives for duplicate in group[1:]}
+        return len(self.canonical)
+
+    def is_duplicate(self, path: Path) -> bool:
+        """Check whether an image is a duplicate whose encode is skipped."""
+        return path in self.canonical
+
+    @staticmethod
+    def link_output(source: Path, output: Path) -> None:
+        """
+        Replace output with a hardlink to source, copying if linking fails.
+
+        The link is made under a temporary name and renamed into place, so
+        an existing output is never missing or partial.
+        """
+        if output.exists() and os.path.samefile(source, output):
+            return
+        output.parent.mkdir(parents=True, exist_ok=True)
+        temp = temp_output_path(output)
+        try:
+            try:
+                os.link(source, temp)
+            except OSError:
+                shutil.copyfile(source, temp)
+            os.replace(temp, output)
+        finally:
+            if temp.exists():
+                temp.unlink()
+
+    def materialize(self, results: Optional[ResultWriter] = None) -> Dict[str, Any]:
+        """
+        Give every duplicate the outputs of its canonical image.
+
+        In hardlink mode each output is linked to the canonical file; in alias
+        mode stale outputs of the duplicate are removed and the duplicate is
+        served from the canonical outputs through the manifests.
+
+        Args:
+            results (ResultWriter): Writer for per-file result records
+
+        Returns:
+            Dict[str, Any]: {'deduplicated', 'bytes_saved', 'source_bytes',
+            'failed', 'duplicates'}; bytes_saved counts the canonical output
+            bytes each duplicate shares, source_bytes the duplicate sources
+            that were not encoded, and duplicates maps each materialized
+            duplicate to (canonical source, outputs it is served from)
+        """
+        results = results if results is not None else ResultWriter()
+        summary: Dict[str, Any] = {'deduplicated': 0, 'bytes_saved': 0, 'source_bytes': 0, 'failed': 0,
+                                   'duplicates': {}}
+        entries = {entry.path: entry for entry in self.entries}
+        for path, canonical in sorted(self.canonical.items()):
+            duplicate = entries[path]
+            available = [output for output in canonical.outputs if output.exists()]
+            if not available or available[0] != canonical.outputs[0]:
+                print(f"⚠️  {path.name}: duplicate of {canonical.path.name}, which has no WebP")
+                summary['failed'] += 1
+                results.file_result(path, FAILED, 0.0, error=f"duplicate of failed {canonical.path}")
+                continue
+
+            shared = sum(output.stat().st_size for output in available)
+            by_suffix = {output.suffix: output for output in available}
+            if self.mode == 'hardlink':
+                outputs = []
+                for output in duplicate.outputs:
+                    if output.suffix in by_suffix:
+                        self.link_output(by_suffix[output.suffix], output)
+                        outputs.append(output)
+                    elif output.exists():
+                        output.unlink()
+            else:
+                for output in duplicate.outputs:
+                    if output.exists():
+                        output.unlink()
+                outputs = available
+
+            if self.mode == 'hardlink':
+                print(f"🔗 {path.name}: hardlinked to {canonical.path} ({shared:,} bytes shared)")
+            else:
+                print(f"🔗 {path.name}: aliased to {canonical.path} (encode skipped)")
+            summary['deduplicated'] += 1
+            summary['bytes_saved'] += shared
+            summary['source_bytes'] += path.stat().st_size
+            summary['duplicates'][path] = (canonical.path, outputs)
+            results.file_result(path, DEDUPLICATED, 0.0, path.stat().st_size, available[0].stat().st_size,
+                                outputs)
+        return summary
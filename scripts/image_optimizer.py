@@ -1,43 +1,354 @@
 #!/usr/bin/env python3
 """
 Image Optimizer Script for RadioFusion Website
-Converts images to WebP format using FFmpeg for faster loading times.
+Converts images to WebP format using FFmpeg (or Pillow/libwebp in-process)
+for faster loading times.
 """
 
 import os
 import sys
+import copy
 import subprocess
 import argparse
+import threading
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, Iterable, List, Mapping, Tuple, Optional
 import json
 import time
+from image_probe import probe_image
+from image_profiles import ProfileMatcher, create_profile_matcher
+from image_scanner import ExcludeMatcher, ScannedFile, scan_images
+from memory_budget import DEFAULT_MEMORY_BUDGET_MB, MB, FileSizeLimits, MemoryBudget, estimate_decode_bytes
+from job_supervisor import (DEFAULT_RETRIES, DEFAULT_TIMEOUT, AtomicOutputs, JobCancelled, JobSupervisor,
+                            Quarantine, WorkerPool, handle_signals)
+from optimization_cache import OptimizationCache
+from image_dedup import DedupIndex
+from build_state import BuildState, OutputSettings
+from ffmpeg_batch import FFmpegBatcher
+from image_placeholders import PlaceholderStore, make_placeholder
+from optimizer_config import OptimizerConfig
+from quality_search import NUMPY_AVAILABLE, QualityTarget, SearchResult, search_webp_ffmpeg, search_webp_pillow
+from result_writer import CACHED, CONVERTED, FAILED, OUTPUT_MODES, QUARANTINED, SKIPPED, ResultWriter
+from tracing import PROFILE_TOP, Tracer, run_profiled
+
+try:
+    from PIL import Image, UnidentifiedImageError, features
+    PILLOW_AVAILABLE = bool(features.check('webp'))
+    PILLOW_AVIF = PILLOW_AVAILABLE and bool(features.check('avif'))
+except ImportError:
+    Image = None
+    PILLOW_AVAILABLE = False
+    PILLOW_AVIF = False
+
+# Available encoder backends
+ENGINES = ('ffmpeg', 'pillow', 'auto')
+
+# Output formats and their file suffixes; WebP is always the primary output
+OUTPUT_FORMATS = {'webp': '.webp', 'avif': '.avif', 'jpeg': '.jpg'}
+
+# Output format name per file suffix
+SUFFIX_FORMATS = {suffix: fmt for fmt, suffix in OUTPUT_FORMATS.items()}
+
+# Pillow format name per output suffix
+PILLOW_FORMATS = {'.webp': 'WEBP', '.avif': 'AVIF', '.jpg': 'JPEG'}
+
+# Quality scale per format relative to the WebP setting; AVIF matches WebP's
+# SSIM at a much lower setting (q55 AVIF ~ q90 WebP on photos, at half the bytes)
+FORMAT_QUALITY_SCALE = {'webp': 1.0, 'avif': 0.65, 'jpeg': 1.0}
+
+# FFmpeg AV1 encoders able to write AVIF stills, in order of preference
+FFMPEG_AVIF_ENCODERS = ('libaom-av1', 'libsvtav1')
+
+
+def get_format_quality(output_path: Path, quality: int) -> int:
+    """
+    Translate the configured (WebP) quality to the output's format.
+    
+    Args:
+        output_path (Path): Output path; its suffix selects the format
+        quality (int): WebP quality (0-100)
+        
+    Returns:
+        int: Quality for the output's encoder
+    """
+    return round(quality * FORMAT_QUALITY_SCALE[SUFFIX_FORMATS[Path(output_path).suffix.lower()]])
+
+
+@functools.lru_cache(maxsize=None)
+def find_ffmpeg_avif_encoder() -> Optional[str]:
+    """
+    Find an AV1 encoder in the local FFmpeg build.
+    
+    Returns:
+        Optional[str]: Encoder name, or None if FFmpeg cannot write AVIF
+    """
+    try:
+        result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
+                                capture_output=True, text=True, check=True)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    available = {line.split()[1] for line in result.stdout.splitlines() if len(line.split()) > 1}
+    return next((encoder for encoder in FFMPEG_AVIF_ENCODERS if encoder in available), None)
+
+
+def get_pillow_save_args(output_path: str, quality: int, lossless: bool) -> Tuple[str, Dict[str, Any]]:
+    """
+    Get the Pillow format and save arguments for an output file.
+    
+    Args:
+        output_path (str): Output path; its suffix selects the format
+        quality (int): WebP quality (0-100), scaled for other formats
+        lossless (bool): Use lossless compression (WebP only)
+        
+    Returns:
+        Tuple[str, Dict[str, Any]]: (Pillow format, save arguments)
+    """
+    fmt = PILLOW_FORMATS[Path(output_path).suffix.lower()]
+    quality = get_format_quality(output_path, quality)
+    if fmt == 'AVIF':
+        return fmt, {'quality': quality, 'speed': 6}
+    if fmt == 'JPEG':
+        return fmt, {'quality': quality, 'optimize': True, 'progressive': True}
+    return fmt, {'quality': quality, 'lossless': lossless, 'method': 6}
+
+
+def encode_variants_pillow(input_path: str, variants: List[Tuple[str, Optional[int], int]],
+                           lossless: bool, placeholder_size: int = 0
+                           ) -> Tuple[bool, bool, str, List[Tuple[str, float, float, int, int, int]],
+                                      Optional[Dict[str, str]]]:
+    """
+    Decode an image once and encode every requested size and format from that frame.
+    
+    Runs inside a ProcessPoolExecutor worker, so it only takes picklable
+    arguments and never raises.
+    
+    Args:
+        input_path (str): Path to input image
+        variants (List[Tuple[str, Optional[int], int]]): (output path, max width
+            or None for the source width, quality) per output; the output
+            suffix selects WebP, AVIF or JPEG
+        lossless (bool): Use lossless compression (WebP only)
+        placeholder_size (int): Also make a placeholder of this long edge from
+            the decoded frame (default: 0, none)
+        
+    Returns:
+        Tuple[bool, bool, str, List[Tuple[str, float, float, int, int, int]], Optional[Dict[str, str]]]:
+        (success, decoded, error message, spans, placeholder); decoded is False
+        when Pillow could not read the input at all, and spans are (name,
+        start, duration, pid, bytes in, bytes out) of the decode and each
+        encode, for Tracer.add_worker_spans
+    """
+    spans = []
+    pid = os.getpid()
+    start = time.perf_counter()
+    try:
+        img = Image.open(input_path)
+        img.load()
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        return False, False, str(e), spans, None
+    
+    try:
+        with img:
+            animated = getattr(img, 'is_animated', False)
+            frame = img
+            if img.mode not in ('RGB', 'RGBA') and not animated:
+                has_alpha = 'A' in img.getbands() or 'transparency' in img.info
+                frame = img.convert('RGBA' if has_alpha else 'RGB')
+            spans.append(('decode', start, time.perf_counter() - start, pid, os.path.getsize(input_path), 0))
+            
+            resized = {}
+            for output_path, max_width, quality in variants:
+                start = time.perf_counter()
+                fmt, save_args = get_pillow_save_args(output_path, quality, lossless)
+                if max_width and frame.width > max_width:
+                    # Resizing keeps only the first frame of an animation; each
+                    # width is resized once and shared by every format
+                    if max_width not in resized:
+                        height = max(1, round(frame.height * max_width / frame.width))
+                        source = frame.convert('RGBA') if animated else frame
+                        resized[max_width] = source.resize((max_width, height), Image.LANCZOS)
+                    image, save_all = resized[max_width], False
+                else:
+                    image, save_all = frame, animated
+                if fmt == 'JPEG':
+                    # JPEG has neither alpha nor animation
+                    image, save_all = image.convert('RGB'), False
+                image.save(output_path, fmt, save_all=save_all, **save_args)
+                spans.append(('encode', start, time.perf_counter() - start, pid, 0, os.path.getsize(output_path)))
+            
+            placeholder = None
+            if placeholder_size:
+                start = time.perf_counter()
+                placeholder = make_placeholder(frame, placeholder_size)
+                spans.append(('placeholder', start, time.perf_counter() - start, pid, 0, len(placeholder['lqip'])))
+        return True, True, '', spans, placeholder
+    except Exception as e:
+        return False, True, str(e), spans, None
+
 
 class ImageOptimizer:
     """
-    A class to optimize images by converting them to WebP format using FFmpeg.
+    A class to optimize images by converting them to WebP format using FFmpeg
+    or Pillow.
     """
     
     # Supported input formats
     SUPPORTED_FORMATS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.gif'}
     
-    def __init__(self, quality: int = 85, lossless: bool = False):
+    # Bump when encoder arguments change so cached outputs are invalidated
+    ENCODER_VERSION = 1
+    
+    # Directories never worth walking
+    DEFAULT_EXCLUDE_PATTERNS = ['**/node_modules/**', '**/.git/**', '**/dist/**', '**/build/**']
+    
+    def __init__(self, quality: int = 85, lossless: bool = False,
+                 max_workers: Optional[int] = None, executor: Optional[Executor] = None,
+                 engine: str = 'ffmpeg', process_pool: Optional[Executor] = None,
+                 cache: Optional[OptimizationCache] = None,
+                 exclude_patterns: Optional[List[str]] = None,
+                 quality_target: Optional[QualityTarget] = None,
+                 profiles: Optional[ProfileMatcher] = None,
+                 output_formats: Iterable[str] = ('webp',),
+                 supervisor: Optional[JobSupervisor] = None,
+                 tracer: Optional[Tracer] = None,
+                 results: Optional[ResultWriter] = None,
+                 dedup: Optional[DedupIndex] = None,
+                 size_limits: Optional[FileSizeLimits] = None,
+                 state: Optional[BuildState] = None,
+                 placeholders: Optional[PlaceholderStore] = None,
+                 batcher: Optional[FFmpegBatcher] = None):
         """
         Initialize the ImageOptimizer.
         
         Args:
             quality (int): WebP quality (0-100, default: 85)
             lossless (bool): Use lossless compression (default: False)
+            max_workers (int): Parallel file conversions (default: CPU count)
+            executor (Executor): Shared file-level executor; when given, files are
+                submitted to it instead of a private pool
+            engine (str): Encoder backend: ffmpeg, pillow or auto (default: ffmpeg)
+            process_pool (Executor): Shared process pool for Pillow encodes; a
+                private one is created on demand when not given
+            cache (OptimizationCache): Persistent output cache checked before encoding
+            exclude_patterns (List[str]): Paths to skip during directory scans
+                (default: DEFAULT_EXCLUDE_PATTERNS)
+            quality_target (QualityTarget): Search each image for the lowest quality
+                meeting this target, with quality as the upper bound (lossy only)
+            profiles (ProfileMatcher): Per-file profile rules whose quality and
+                lossless settings override the ones above for matching files
+            output_formats (Iterable[str]): Formats written per image from one
+                decode: webp (always), avif and jpeg (default: webp only)
+            supervisor (JobSupervisor): Timeouts, retries, quarantine and
+                cancellation for encoder jobs (default: a private one)
+            tracer (Tracer): Per-stage span recorder (default: disabled)
+            results (ResultWriter): Machine-readable per-file results (default:
+                none, human output only)
+            dedup (DedupIndex): Planned duplicate groups; duplicates are left
+                out of directory runs and materialized afterwards
+            size_limits (FileSizeLimits): Sources skipped, warned about or
+                downscaled by file size (default: no limits)
+            state (BuildState): Records of the last build; when given, files
+                are skipped by their recorded stamps and hashes instead of
+                by comparing mtimes
+            placeholders (PlaceholderStore): Collects an inline preview and
+                dominant colour per image, made from the encode's decode
+                when Pillow encodes (default: none)
+            batcher (FFmpegBatcher): Shares FFmpeg processes between concurrent
+                single-image encodes (default: one process per image)
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+        unknown_formats = set(output_formats) - OUTPUT_FORMATS.keys()
+        if unknown_formats:
+            raise ValueError(f"Unknown output format(s) {', '.join(sorted(unknown_formats))}, "
+                             f"expected {', '.join(OUTPUT_FORMATS)}")
+        
         self.quality = quality
         self.lossless = lossless
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = executor
+        self.engine = engine
+        self.process_pool = process_pool
+        self.owns_process_pool = False
+        self.cache = cache
+        self.quality_target = None if lossless else quality_target
+        self.profiles = profiles
+        self.profile_optimizers: Dict[str, 'ImageOptimizer'] = {}
+        self.output_formats = ('webp',) + tuple(fmt for fmt in OUTPUT_FORMATS
+                                                if fmt != 'webp' and fmt in set(output_formats))
+        self.supervisor = supervisor if supervisor is not None else JobSupervisor()
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.results = results if results is not None else ResultWriter()
+        self.dedup = dedup
+        self.size_limits = size_limits if size_limits is not None else FileSizeLimits()
+        self.state = state
+        # Settings the outputs were encoded with, for skips without a build state
+        self.output_settings = OutputSettings()
+        self.placeholders = placeholders
+        self.batcher = batcher
+        # Width every output is downscaled to; set on per-file copies only
+        self.max_width: Optional[int] = None
+        self.exclude_matcher = ExcludeMatcher(self.DEFAULT_EXCLUDE_PATTERNS if exclude_patterns is None
+                                              else exclude_patterns)
+        self.lock = threading.Lock()
         self.stats = {
             'processed': 0,
+            'cached': 0,
             'skipped': 0,
+            'quarantined': 0,
             'errors': 0,
             'total_size_before': 0,
             'total_size_after': 0
         }
+        self.file_durations: List[float] = []
+    
+    @classmethod
+    def from_config(cls, config: OptimizerConfig, directory_config: Optional[Mapping[str, Any]] = None,
+                    **shared: Any) -> 'ImageOptimizer':
+        """
+        Create an optimizer from a shared configuration.
+        
+        Args:
+            config (OptimizerConfig): Run configuration
+            directory_config (Mapping[str, Any]): Directory entry whose quality,
+                lossless and adaptive_quality settings take precedence
+            **shared (Any): Objects shared across optimizers (executor,
+                process_pool, cache, profiles, supervisor, tracer, results),
+                or constructor arguments replacing the configured ones
+            
+        Returns:
+            ImageOptimizer: Configured optimizer
+            
+        Raises:
+            ValueError: If the engine, an output format or a size limit is invalid
+        """
+        directory_config = directory_config or {}
+        settings = {
+            'quality': directory_config.get('quality', config['quality']),
+            'lossless': directory_config.get('lossless', config['lossless']),
+            'max_workers': config['file_workers'],
+            'engine': config['engine'],
+            'exclude_patterns': list(config['exclude_patterns']),
+            'quality_target': QualityTarget.from_config(
+                directory_config.get('adaptive_quality', config['adaptive_quality'])),
+            'output_formats': config['output_formats'],
+            'size_limits': FileSizeLimits.from_config(config['file_size_limits'])
+        }
+        settings.update(shared)
+        return cls(**settings)
+    
+    def update_stats(self, **deltas: int) -> None:
+        """
+        Add deltas to the processing stats (thread-safe).
+        
+        Args:
+            **deltas (int): Amount to add per stats key
+        """
+        with self.lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
     
     def check_ffmpeg(self) -> bool:
         """
@@ -56,6 +367,241 @@ class ImageOptimizer:
             print("Please install FFmpeg from: https://ffmpeg.org/download.html")
             return False
     
+    def check_engine(self) -> bool:
+        """
+        Check that the selected encoder backend and output formats are available.
+        
+        Output formats no available encoder can write are dropped with a warning.
+        
+        Returns:
+            bool: True if images can be encoded with the selected engine
+        """
+        if not self.check_backend():
+            return False
+        self.check_output_formats()
+        return True
+    
+    def check_backend(self) -> bool:
+        """
+        Check that the selected encoder backend is available.
+        
+        Returns:
+            bool: True if images can be encoded with the selected engine
+        """
+        if self.engine == 'ffmpeg':
+            return self.check_ffmpeg()
+        
+        if not PILLOW_AVAILABLE:
+            print("❌ Pillow with WebP support is not installed")
+            print("Please install it with: pip install Pillow")
+            if self.engine == 'pillow':
+                return False
+            print("↪️  Falling back to FFmpeg for all images")
+            self.engine = 'ffmpeg'
+            return self.check_ffmpeg()
+        
+        print("✅ Pillow (libwebp) is available")
+        if self.quality_target and self.quality_target.min_ssim is not None and not NUMPY_AVAILABLE:
+            print("⚠️  SSIM targets need numpy with Pillow (pip install numpy)")
+            if self.engine == 'pillow':
+                return False
+            print("↪️  Searching quality with FFmpeg's ssim filter instead")
+        if self.engine == 'auto' and not self.check_ffmpeg():
+            print("⚠️  Formats Pillow cannot decode will fail without FFmpeg")
+        return True
+    
+    def check_output_formats(self) -> None:
+        """Drop extra output formats that neither Pillow nor FFmpeg can encode here."""
+        if 'avif' not in self.output_formats:
+            return
+        
+        pillow_avif = self.uses_pillow() and PILLOW_AVIF
+        ffmpeg_avif = self.engine != 'pillow' and find_ffmpeg_avif_encoder() is not None
+        if pillow_avif or ffmpeg_avif:
+            print(f"✅ AVIF encoder is available ({'Pillow' if pillow_avif else find_ffmpeg_avif_encoder()})")
+            return
+        
+        print("⚠️  No AVIF encoder available (Pillow with AVIF, or FFmpeg with "
+              f"{' or '.join(FFMPEG_AVIF_ENCODERS)}); skipping AVIF output")
+        self.output_formats = tuple(fmt for fmt in self.output_formats if fmt != 'avif')
+    
+    def uses_pillow(self) -> bool:
+        """Return True if the selected engine may encode with Pillow."""
+        return self.engine != 'ffmpeg' and PILLOW_AVAILABLE
+    
+    def can_decode_with_pillow(self, input_path: Path) -> bool:
+        """
+        Check whether Pillow has a decoder registered for a file extension.
+        
+        Args:
+            input_path (Path): Path to input image
+            
+        Returns:
+            bool: True if Pillow should be able to open the file
+        """
+        return self.uses_pillow() and input_path.suffix.lower() in Image.registered_extensions()
+    
+    def start_process_pool(self) -> None:
+        """Create a private process pool for Pillow encodes if none was shared."""
+        with self.lock:
+            if self.process_pool is None and self.uses_pillow():
+                self.process_pool = WorkerPool(max_workers=self.max_workers)
+                self.owns_process_pool = True
+    
+    def close(self) -> None:
+        """Shut down the private process pool, if one was created."""
+        with self.lock:
+            if self.owns_process_pool and self.process_pool is not None:
+                self.process_pool.shutdown(cancel_futures=self.supervisor.cancelled.is_set())
+                self.process_pool = None
+                self.owns_process_pool = False
+    
+    def get_profile_match(self, input_path: Path,
+                          input_root: Optional[Path] = None) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Get the profile rule matching a file.
+        
+        Args:
+            input_path (Path): Path to input image
+            input_root (Path): Directory the rule patterns are relative to
+            
+        Returns:
+            Optional[Tuple[str, Dict[str, Any]]]: (profile name, settings), or
+            None if no profile applies
+        """
+        if self.profiles is None:
+            return None
+        relative_path = (input_path.relative_to(input_root).as_posix() if input_root is not None
+                         else input_path.name)
+        return self.profiles.match(relative_path, input_path)
+    
+    def get_encoder_settings(self, input_path: Path, outputs: List[Path],
+                             input_root: Optional[Path] = None) -> str:
+        """
+        Describe every setting that shapes a file's outputs.
+        
+        Two copies of an image share outputs only if these match, so copies
+        under directories or profiles with different qualities are encoded
+        separately; the build state rebuilds a file when they change.
+        
+        Args:
+            input_path (Path): Path to input image
+            outputs (List[Path]): Outputs of the image, WebP first
+            input_root (Path): Directory the profile patterns are relative to
+            
+        Returns:
+            str: Canonical JSON of the settings
+        """
+        quality, lossless = self.quality, self.lossless
+        match = self.get_profile_match(input_path, input_root)
+        if match is not None:
+            quality = match[1].get('quality', quality)
+            lossless = match[1].get('lossless', lossless)
+        return json.dumps({
+            'encoder': self.engine,
+            'version': self.ENCODER_VERSION,
+            'quality': quality,
+            'lossless': lossless,
+            'quality_target': None if lossless or self.quality_target is None else self.quality_target._asdict(),
+            'size_limits': self.size_limits._asdict(),
+            'formats': [output.suffix for output in outputs]
+        }, sort_keys=True)
+    
+    def get_profile_optimizer(self, input_path: Path, input_root: Optional[Path] = None,
+                              announce: bool = True) -> 'ImageOptimizer':
+        """
+        Get the optimizer whose settings apply to a file under the profile rules.
+        
+        Each profile gets one shallow copy of this optimizer with the profile's
+        quality and lossless settings; copies share stats, pools and cache.
+        
+        Args:
+            input_path (Path): Path to input image
+            input_root (Path): Directory the rule patterns are relative to
+            announce (bool): Print the matched profile
+            
+        Returns:
+            ImageOptimizer: This optimizer, or the copy for the matching profile
+        """
+        match = self.get_profile_match(input_path, input_root)
+        if match is None:
+            return self
+        name, settings = match
+        
+        # Start the shared pool first so copies never create their own
+        self.start_process_pool()
+        with self.lock:
+            optimizer = self.profile_optimizers.get(name)
+            if optimizer is None:
+                optimizer = copy.copy(self)
+                optimizer.quality = settings.get('quality', self.quality)
+                optimizer.lossless = settings.get('lossless', self.lossless)
+                optimizer.quality_target = None if optimizer.lossless else self.quality_target
+                optimizer.profiles = None
+                optimizer.profile_optimizers = {}
+                optimizer.owns_process_pool = False
+                self.profile_optimizers[name] = optimizer
+        if announce:
+            print(f"🏷️  {input_path.name}: {name} profile (quality {optimizer.quality}, "
+                  f"lossless {optimizer.lossless})")
+        return optimizer
+    
+    def apply_size_limits(self, input_path: Path, file_size: int) -> Optional['ImageOptimizer']:
+        """
+        Apply the source size limits to a file.
+        
+        Files over max_file_size_mb are refused, files over warn_file_size_mb
+        are reported, and files over compress_above_mb whose long edge exceeds
+        the downscale dimension get a copy of this optimizer that downscales
+        them. Downscaled images skip the adaptive quality search, whose SSIM
+        compares against the full-size source.
+        
+        Args:
+            input_path (Path): Path to input image
+            file_size (int): Size of the input in bytes
+            
+        Returns:
+            Optional[ImageOptimizer]: Optimizer to encode the file with, or
+            None if the file is too large to process
+        """
+        limits = self.size_limits
+        if limits.is_too_large(file_size):
+            print(f"🚫 Skipping {input_path.name} ({file_size / MB:.1f} MB exceeds the "
+                  f"{limits.max_bytes / MB:.0f} MB limit)")
+            return None
+        if limits.is_large(file_size):
+            print(f"⚠️  {input_path.name} is large ({file_size / MB:.1f} MB)")
+        
+        info = probe_image(input_path)
+        width = limits.get_downscale_width(file_size, info)
+        if width is None:
+            return self
+        
+        print(f"📐 Downscaling {input_path.name} from {info['width']}x{info['height']} "
+              f"to fit {limits.max_dimension}px")
+        optimizer = copy.copy(self)
+        optimizer.max_width = width
+        optimizer.profile_optimizers = {}
+        optimizer.owns_process_pool = False
+        return optimizer
+    
+    def searches_quality(self) -> bool:
+        """Whether encodes search for the quality meeting quality_target (never when downscaling)."""
+        return self.quality_target is not None and self.max_width is None
+    
+    def estimate_memory(self, input_path: Path, file_size: int) -> int:
+        """
+        Estimate the decode memory of encoding a file, from its header.
+        
+        Args:
+            input_path (Path): Path to input image
+            file_size (int): Size of the input in bytes
+            
+        Returns:
+            int: Estimated bytes
+        """
+        return estimate_decode_bytes(probe_image(input_path), file_size)
+    
     def get_file_size(self, file_path: Path) -> int:
         """Get file size in bytes."""
         try:
@@ -63,45 +609,608 @@ class ImageOptimizer:
         except OSError:
             return 0
     
-    def convert_to_webp(self, input_path: Path, output_path: Path) -> bool:
+    def get_extra_formats(self, has_alpha: bool) -> List[str]:
+        """
+        Get the formats written next to WebP for an image.
+        
+        Lossless encodes are WebP only, and JPEG is skipped for images with
+        transparency.
+        
+        Args:
+            has_alpha (bool): Whether the source has transparency
+            
+        Returns:
+            List[str]: Extra output format names
+        """
+        if self.lossless:
+            return []
+        return [fmt for fmt in self.output_formats[1:] if not (fmt == 'jpeg' and has_alpha)]
+    
+    def get_format_outputs(self, input_path: Path, output_path: Path) -> List[Path]:
         """
-        Convert an image to WebP format using FFmpeg.
+        Get every file written for an image: the WebP output plus its siblings.
+        
+        Args:
+            input_path (Path): Path to input image
+            output_path (Path): WebP output path
+            
+        Returns:
+            List[Path]: Output paths, WebP first
+        """
+        if len(self.output_formats) == 1 or self.lossless:
+            return [output_path]
+        # An unreadable header is treated as transparent, so no JPEG is attempted
+        info = probe_image(input_path)
+        has_alpha = info['has_alpha'] if info else True
+        return [output_path] + [output_path.with_suffix(OUTPUT_FORMATS[fmt])
+                                for fmt in self.get_extra_formats(has_alpha)]
+    
+    def get_cache_params(self, quality: Optional[int] = None, output_format: str = 'webp',
+                         **resize: Any) -> Dict[str, Any]:
+        """
+        Get the encoder settings that make up a cache key.
+        
+        Args:
+            quality (int): Quality override (default: the optimizer quality)
+            output_format (str): Output format name
+            **resize (Any): Resize parameters, e.g. max_width
+            
+        Returns:
+            Dict[str, Any]: Cache key parameters
+        """
+        params = {
+            'encoder': self.engine,
+            'version': self.ENCODER_VERSION,
+            'quality': self.quality if quality is None else quality,
+            'lossless': self.lossless,
+            'resize': resize or None
+        }
+        if output_format != 'webp':
+            params['format'] = output_format
+        if self.quality_target is not None and not resize:
+            params['quality_target'] = self.quality_target._asdict()
+        return params
+    
+    def convert_to_webp(self, input_path: Path, output_path: Path,
+                        outputs: Optional[List[Path]] = None) -> bool:
+        """
+        Convert an image to WebP, plus any extra output formats, with the selected engine.
+        
+        Every output is encoded to a temporary file and renamed into place only
+        once all of them succeeded, so a failed or interrupted encode never
+        replaces a good output.
         
         Args:
             input_path (Path): Path to input image
             output_path (Path): Path to output WebP image
+            outputs (List[Path]): Every output to write, WebP first
+                (default: get_format_outputs)
             
         Returns:
             bool: True if conversion successful, False otherwise
         """
+        if outputs is None:
+            outputs = self.get_format_outputs(input_path, output_path)
+        
+        with AtomicOutputs(outputs) as staged:
+            with self.tracer.span('convert', input_path, engine=self.engine) as span:
+                success = self.write_outputs(input_path, staged.temps)
+                if self.tracer.enabled:
+                    span.set(bytes_in=self.get_file_size(input_path),
+                             bytes_out=sum(self.get_file_size(temp) for temp in staged.temps))
+            if success:
+                with self.tracer.span('write', input_path) as span:
+                    committed = staged.commit()
+                    if self.tracer.enabled:
+                        span.set(bytes_out=sum(self.get_file_size(output) for output in committed))
+        return success
+    
+    def write_outputs(self, input_path: Path, outputs: List[Path]) -> bool:
+        """
+        Encode every output of an image in place, searching the quality first
+        when a quality target is set.
+        
+        Args:
+            input_path (Path): Path to input image
+            outputs (List[Path]): Output paths, WebP first
+            
+        Returns:
+            bool: True if every output was written
+        """
+        if not self.searches_quality():
+            return self.encode_outputs(input_path, outputs)
+        
+        # Extra formats reuse the quality the WebP search settled on, at the
+        # cost of a second decode
+        quality = self.convert_adaptive(input_path, outputs[0])
+        return quality is not None and (len(outputs) == 1 or
+                                        self.encode_outputs(input_path, outputs[1:], quality))
+    
+    def encode_outputs(self, input_path: Path, outputs: List[Path], quality: Optional[int] = None) -> bool:
+        """
+        Decode an image once and write every output with the selected engine.
+        
+        With the auto engine, Pillow is tried first and FFmpeg is used for
+        formats Pillow cannot decode.
+        
+        Args:
+            input_path (Path): Path to input image
+            outputs (List[Path]): Output paths; suffixes select the formats
+            quality (int): Quality override (default: the optimizer quality)
+            
+        Returns:
+            bool: True if every output was written, False otherwise
+        """
+        if self.can_decode_with_pillow(input_path):
+            success, decoded = self.convert_with_pillow(input_path, outputs, quality)
+            if success or decoded or self.engine == 'pillow':
+                return success
+            print(f"↪️  Pillow cannot decode {input_path.name}, falling back to FFmpeg")
+        elif self.engine == 'pillow':
+            print(f"❌ Pillow cannot decode {input_path.name}")
+            return False
+        
+        return self.convert_with_ffmpeg(input_path, outputs, quality)
+    
+    def convert_with_pillow(self, input_path: Path, outputs: List[Path],
+                            quality: Optional[int] = None) -> Tuple[bool, bool]:
+        """
+        Convert an image in a Pillow worker process.
+        
+        Args:
+            input_path (Path): Path to input image
+            outputs (List[Path]): Output paths; suffixes select the formats
+            quality (int): Quality override (default: the optimizer quality)
+            
+        Returns:
+            Tuple[bool, bool]: (success, decoded)
+        """
+        quality = self.quality if quality is None else quality
+        self.start_process_pool()
+        try:
+            success, decoded, error, spans, placeholder = self.supervisor.submit(
+                self.process_pool, encode_variants_pillow, str(input_path),
+                [(str(output), self.max_width, quality) for output in outputs], self.lossless,
+                self.placeholders.size if self.placeholders is not None else 0)
+        except subprocess.TimeoutExpired as e:
+            print(f"⏱️  Timed out converting {input_path.name} after {e.timeout:.0f}s")
+            return False, True
+        self.tracer.add_worker_spans(spans, input_path)
+        if placeholder is not None:
+            self.placeholders.add(input_path, placeholder)
+        if not success and (decoded or self.engine == 'pillow'):
+            print(f"❌ Error converting {input_path.name}: {error}")
+        return success, decoded
+    
+    def convert_adaptive(self, input_path: Path, output_path: Path) -> Optional[int]:
+        """
+        Convert an image to WebP at the lowest quality meeting quality_target.
+        
+        Pillow searches in a worker process (SSIM needs numpy there); FFmpeg
+        searches with trial encodes and its ssim filter.
+        
+        Args:
+            input_path (Path): Path to input image
+            output_path (Path): Path to output WebP image
+            
+        Returns:
+            Optional[int]: Quality used, or None if conversion failed
+        """
+        target = self.quality_target
+        if self.can_decode_with_pillow(input_path) and (target.min_ssim is None or NUMPY_AVAILABLE):
+            self.start_process_pool()
+            try:
+                success, decoded, result, error = self.supervisor.submit(
+                    self.process_pool, search_webp_pillow, str(input_path), str(output_path), target, self.quality)
+            except subprocess.TimeoutExpired as e:
+                print(f"⏱️  Timed out converting {input_path.name} after {e.timeout:.0f}s")
+                return None
+            if success:
+                self.report_search(input_path, result)
+                return self.quality if result is None else result.quality
+            if decoded or self.engine == 'pillow':
+                print(f"❌ Error converting {input_path.name}: {error}")
+                return None
+            print(f"↪️  Pillow cannot decode {input_path.name}, falling back to FFmpeg")
+        elif self.engine == 'pillow':
+            print(f"❌ Pillow cannot search {input_path.name}")
+            return None
+        
         try:
-            # Build FFmpeg command
-            cmd = ['ffmpeg', '-i', str(input_path), '-y']  # -y to overwrite
+            result = search_webp_ffmpeg(input_path, output_path, target, self.quality, self.get_webp_args,
+                                        run=self.supervisor.run)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Error converting {input_path.name}: {e.stderr}")
+            return None
+        except subprocess.TimeoutExpired as e:
+            print(f"⏱️  Timed out converting {input_path.name} after {e.timeout:.0f}s")
+            return None
+        except JobCancelled:
+            raise
+        except Exception as e:
+            print(f"❌ Unexpected error converting {input_path.name}: {str(e)}")
+            return None
+        
+        self.report_search(input_path, result)
+        return result.quality
+    
+    def report_search(self, input_path: Path, result: Optional[SearchResult]) -> None:
+        """Print the quality an adaptive search settled on."""
+        if result is None:
+            print(f"🎚️  {input_path.name}: animated, encoded at quality {self.quality}")
+            return
+        
+        ssim = f", SSIM {result.ssim:.4f}" if result.ssim is not None else ""
+        missed = "" if result.met else " (target not met)"
+        print(f"🎚️  {input_path.name}: quality {result.quality}{ssim}, "
+              f"{result.size:,} bytes after {result.attempts} trial encodes{missed}")
+    
+    def get_webp_args(self, quality: Optional[int] = None) -> List[str]:
+        """
+        Get FFmpeg WebP encoder arguments.
+        
+        Args:
+            quality (int): Quality override (default: the optimizer quality)
             
-            if self.lossless:
-                cmd.extend(['-lossless', '1'])
-            else:
-                cmd.extend(['-quality', str(self.quality)])
+        Returns:
+            List[str]: Encoder arguments
+        """
+        if self.lossless:
+            args = ['-lossless', '1']
+        else:
+            args = ['-quality', str(self.quality if quality is None else quality)]
+        
+        # Add WebP specific options
+        args.extend([
+            '-compression_level', '6',  # Compression effort (0-6)
+            '-preset', 'default'        # Encoding preset
+        ])
+        return args
+    
+    def get_encoder_args(self, output_path: Path, quality: Optional[int] = None) -> List[str]:
+        """
+        Get FFmpeg encoder arguments for an output, chosen by its suffix.
+        
+        Args:
+            output_path (Path): Output path (.webp, .avif or .jpg)
+            quality (int): Quality override (default: the optimizer quality)
+            
+        Returns:
+            List[str]: Encoder arguments
+        """
+        suffix = output_path.suffix.lower()
+        quality = get_format_quality(output_path, self.quality if quality is None else quality)
+        
+        if suffix == '.avif':
+            encoder = find_ffmpeg_avif_encoder()
+            # Same quality -> quantizer mapping as libavif
+            args = ['-c:v', encoder, '-crf', str(((100 - quality) * 63 + 50) // 100), '-b:v', '0']
+            if encoder == 'libaom-av1':
+                args.extend(['-still-picture', '1'])
+            return args + ['-frames:v', '1']
+        
+        if suffix == '.jpg':
+            # MJPEG qscale runs from 2 (best) to 31
+            return ['-q:v', str(round(2 + (100 - quality) * 29 / 100)), '-frames:v', '1']
+        
+        return self.get_webp_args(quality)
+    
+    def get_ffmpeg_outputs(self, input_path: Path, outputs: List[Path]) -> List[Path]:
+        """
+        Drop AVIF outputs when FFmpeg has no AV1 encoder (possible with the auto engine).
+        
+        Args:
+            input_path (Path): Path to input image
+            outputs (List[Path]): Requested outputs
             
-            # Add WebP specific options
-            cmd.extend([
-                '-compression_level', '6',  # Compression effort (0-6)
-                '-preset', 'default',       # Encoding preset
-                str(output_path)
-            ])
+        Returns:
+            List[Path]: Outputs FFmpeg can write
+        """
+        if find_ffmpeg_avif_encoder() is not None:
+            return outputs
+        kept = [output for output in outputs if output.suffix.lower() != '.avif']
+        if len(kept) < len(outputs):
+            print(f"⚠️  FFmpeg cannot write AVIF, skipping it for {input_path.name}")
+        return kept
+    
+    def get_output_args(self, input_path: Path, outputs: List[Path],
+                        quality: Optional[int] = None) -> List[List[str]]:
+        """
+        Get the FFmpeg output options of every output of an image.
+        
+        Args:
+            input_path (Path): Path to input image
+            outputs (List[Path]): Output paths; suffixes select the encoders
+            quality (int): Quality override (default: the optimizer quality)
+            
+        Returns:
+            List[List[str]]: Per output: its options, ending with its path
+        """
+        output_args = []
+        for output in self.get_ffmpeg_outputs(input_path, outputs):
+            args = []
+            if self.max_width:
+                # Output options: every output needs its own scale filter
+                args.extend(['-vf', f"scale=w='min({self.max_width},iw)':h=-1:flags=lanczos"])
+            args.extend(self.get_encoder_args(output, quality))
+            args.append(str(output))
+            output_args.append(args)
+        return output_args
+    
+    def build_convert_command(self, input_path: Path, outputs: List[Path],
+                              quality: Optional[int] = None) -> List[str]:
+        """
+        Build one FFmpeg command that decodes an image once and writes every output.
+        
+        Args:
+            input_path (Path): Path to input image
+            outputs (List[Path]): Output paths; suffixes select the encoders
+            quality (int): Quality override (default: the optimizer quality)
+            
+        Returns:
+            List[str]: FFmpeg command
+        """
+        # Every output reuses the same decoded frame
+        cmd = ['ffmpeg', '-i', str(input_path), '-y']  # -y to overwrite
+        for args in self.get_output_args(input_path, outputs, quality):
+            cmd.extend(args)
+        return cmd
+    
+    def convert_with_ffmpeg(self, input_path: Path, outputs: List[Path],
+                            quality: Optional[int] = None) -> bool:
+        """
+        Convert an image with FFmpeg, decoding it once for every output.
+        
+        Args:
+            input_path (Path): Path to input image
+            outputs (List[Path]): Output paths; suffixes select the encoders
+            quality (int): Quality override (default: the optimizer quality)
             
-            # Run FFmpeg
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        Returns:
+            bool: True if conversion successful, False otherwise
+        """
+        try:
+            # Run FFmpeg, in a process shared with other small images when batching
+            if self.batcher is not None:
+                self.batcher.encode(input_path, self.get_output_args(input_path, outputs, quality))
+            else:
+                self.supervisor.run(self.build_convert_command(input_path, outputs, quality))
             return True
             
         except subprocess.CalledProcessError as e:
             print(f"❌ Error converting {input_path.name}: {e.stderr}")
             return False
+        except subprocess.TimeoutExpired as e:
+            print(f"⏱️  Timed out converting {input_path.name} after {e.timeout:.0f}s")
+            return False
+        except JobCancelled:
+            raise
         except Exception as e:
             print(f"❌ Unexpected error converting {input_path.name}: {str(e)}")
             return False
     
-    def process_image(self, input_path: Path, output_dir: Path, preserve_structure: bool = True) -> bool:
+    @staticmethod
+    def select_variants(variants: List[Dict[str, Any]], source_width: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        Drop size variants that would upscale the source.
+        
+        Every variant narrower than the source is kept, plus the narrowest one
+        at or above the source width, which is written at the source width.
+        
+        Args:
+            variants (List[Dict[str, Any]]): Variants with 'max_width'
+            source_width (Optional[int]): Source width, None if unknown
+            
+        Returns:
+            List[Dict[str, Any]]: Variants to encode, each with its output 'width'
+        """
+        selected = []
+        for variant in sorted(variants, key=lambda v: v['max_width']):
+            if source_width is None:
+                selected.append({**variant, 'width': None})
+            elif variant['max_width'] < source_width:
+                selected.append({**variant, 'width': variant['max_width']})
+            else:
+                selected.append({**variant, 'width': source_width})
+                break
+        return selected
+    
+    def build_fanout_command(self, input_path: Path, variants: List[Dict[str, Any]]) -> List[str]:
+        """
+        Build one FFmpeg command that decodes once and writes every variant.
+        
+        The decoded frame is split in a filter graph and each branch is scaled
+        to its width; scale expressions clamp to the input width so nothing is
+        upscaled even when the source width is unknown. The encoder for each
+        branch follows its output suffix.
+        
+        Args:
+            input_path (Path): Path to input image
+            variants (List[Dict[str, Any]]): Variants with 'output', 'max_width'
+                and 'quality'
+            
+        Returns:
+            List[str]: FFmpeg command
+        """
+        branches = ''.join(f"[s{i}]" for i in range(len(variants)))
+        graph = [f"[0:v]split={len(variants)}{branches}"]
+        for i, variant in enumerate(variants):
+            graph.append(f"[s{i}]scale=w='min({variant['max_width']},iw)':h=-1:flags=lanczos[o{i}]")
+        
+        cmd = ['ffmpeg', '-i', str(input_path), '-y', '-filter_complex', ';'.join(graph)]
+        for i, variant in enumerate(variants):
+            cmd.extend(['-map', f"[o{i}]"])
+            cmd.extend(self.get_encoder_args(variant['output'], variant['quality']))
+            cmd.append(str(variant['output']))
+        return cmd
+    
+    def generate_variants(self, input_path: Path, variants: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Write resized variants of an image, in every output format, from a single decode.
+        
+        Variants are encoded to temporary files, retried under the supervisor
+        and renamed into place together once encoding succeeded.
+        
+        Args:
+            input_path (Path): Path to input image
+            variants (List[Dict[str, Any]]): Variants with 'output' (WebP Path),
+                'max_width' and 'quality'
+            
+        Returns:
+            List[Dict[str, Any]]: Variants written (or restored from cache), one
+            per size and format with its 'format'; empty on failure
+            
+        Raises:
+            JobCancelled: If the run is cancelled
+        """
+        self.supervisor.check_cancelled()
+        try:
+            with self.tracer.span('stat', input_path):
+                source_stat = input_path.stat()
+        except OSError as e:
+            print(f"❌ Cannot read {input_path.name}: {e}")
+            self.update_stats(errors=1)
+            return []
+        if self.supervisor.is_quarantined(input_path, source_stat):
+            print(f"⛔ Skipping variants of {input_path.name} (quarantined)")
+            self.update_stats(quarantined=1)
+            return []
+        if self.size_limits.is_too_large(source_stat.st_size):
+            print(f"🚫 Skipping variants of {input_path.name} ({source_stat.st_size / MB:.1f} MB exceeds "
+                  f"the {self.size_limits.max_bytes / MB:.0f} MB limit)")
+            self.update_stats(skipped=1)
+            return []
+        
+        info = probe_image(input_path)
+        extra_formats = self.get_extra_formats(info['has_alpha'] if info else True)
+        selected = [
+            {**variant, 'output': variant['output'].with_suffix(OUTPUT_FORMATS[fmt]), 'format': fmt}
+            for variant in self.select_variants(variants, info['width'] if info else None)
+            for fmt in ['webp', *extra_formats]
+        ]
+        
+        # Restore what we can from the cache; only encode the rest
+        pending = []
+        with self.tracer.span('cache', input_path, bytes_in=source_stat.st_size) as span:
+            source_hash = OptimizationCache.hash_file(input_path) if self.cache is not None else None
+            for variant in selected:
+                variant['output'].parent.mkdir(parents=True, exist_ok=True)
+                if self.cache is not None:
+                    variant['cache_params'] = self.get_cache_params(variant['quality'], variant['format'],
+                                                                    max_width=variant['width'])
+                    variant['cache_key'] = OptimizationCache.make_key(source_hash, **variant['cache_params'])
+                    if self.cache.fetch(variant['cache_key'], variant['output']):
+                        continue
+                pending.append(variant)
+            span.set(hits=len(selected) - len(pending))
+        
+        if not pending:
+            return selected
+        
+        with AtomicOutputs([variant['output'] for variant in pending]) as staged:
+            staged_variants = [{**variant, 'output': temp} for variant, temp in zip(pending, staged.temps)]
+            with self.tracer.span('convert', input_path, engine=self.engine,
+                                  bytes_in=source_stat.st_size) as span:
+                with self.supervisor.reserve_memory(estimate_decode_bytes(info, source_stat.st_size)):
+                    success = self.supervisor.attempt(input_path.name,
+                                                      lambda: self.encode_variants(input_path, staged_variants))
+                if self.tracer.enabled:
+                    span.set(bytes_out=sum(self.get_file_size(temp) for temp in staged.temps))
+            if success:
+                with self.tracer.span('write', input_path) as span:
+                    committed = staged.commit()
+                    if self.tracer.enabled:
+                        span.set(bytes_out=sum(self.get_file_size(output) for output in committed))
+        
+        if not success:
+            self.supervisor.quarantine.add(input_path, source_stat, self.supervisor.retries + 1)
+            print(f"⛔ Quarantined {input_path.name} after {self.supervisor.retries + 1} failed attempts")
+            self.update_stats(errors=1)
+            return []
+        
+        # Outputs FFmpeg had no encoder for are left out
+        written = [variant for variant in selected if variant['output'].exists()]
+        if self.cache is not None:
+            for variant in pending:
+                if variant in written:
+                    self.cache.store(variant['cache_key'], source_hash, variant['output'], variant['cache_params'])
+        
+        return written
+    
+    def encode_variants(self, input_path: Path, variants: List[Dict[str, Any]]) -> bool:
+        """
+        Encode size variants with Pillow, or with one FFmpeg fan-out command.
+        
+        Args:
+            input_path (Path): Path to input image
+            variants (List[Dict[str, Any]]): Variants with 'output', 'width',
+                'max_width' and 'quality'
+            
+        Returns:
+            bool: True if the variants were written
+        """
+        if self.can_decode_with_pillow(input_path):
+            self.start_process_pool()
+            jobs = [(str(v['output']), v['width'] or v['max_width'], v['quality']) for v in variants]
+            try:
+                success, decoded, error, spans, _ = self.supervisor.submit(
+                    self.process_pool, encode_variants_pillow, str(input_path), jobs, self.lossless)
+            except subprocess.TimeoutExpired as e:
+                print(f"⏱️  Timed out generating variants of {input_path.name} after {e.timeout:.0f}s")
+                return False
+            self.tracer.add_worker_spans(spans, input_path)
+            if success or decoded or self.engine == 'pillow':
+                if not success:
+                    print(f"❌ Error generating variants of {input_path.name}: {error}")
+                return success
+        elif self.engine == 'pillow':
+            print(f"❌ Pillow cannot decode {input_path.name}")
+            return False
+        
+        writable = set(self.get_ffmpeg_outputs(input_path, [v['output'] for v in variants]))
+        try:
+            self.supervisor.run(self.build_fanout_command(input_path,
+                                                          [v for v in variants if v['output'] in writable]))
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Error generating variants of {input_path.name}: {e.stderr}")
+        except subprocess.TimeoutExpired as e:
+            print(f"⏱️  Timed out generating variants of {input_path.name} after {e.timeout:.0f}s")
+        except JobCancelled:
+            raise
+        except Exception as e:
+            print(f"❌ Unexpected error generating variants of {input_path.name}: {str(e)}")
+        return False
+    
+    @staticmethod
+    def get_output_path(input_path: Path, output_dir: Path, preserve_structure: bool = True,
+                        input_root: Optional[Path] = None) -> Path:
+        """
+        Calculate the WebP output path for an input image.
+        
+        Args:
+            input_path (Path): Path to input image
+            output_dir (Path): Output directory
+            preserve_structure (bool): Preserve directory structure
+            input_root (Path): Directory the structure is preserved relative to;
+                defaults to the filesystem anchor of input_path
+            
+        Returns:
+            Path: Output WebP path
+        """
+        if not preserve_structure:
+            # Flat structure
+            return output_dir / f"{input_path.stem}.webp"
+        
+        # Preserve relative path structure
+        if input_root is None:
+            input_root = input_path.parents[len(input_path.parents)-1]
+        rel_path = input_path.relative_to(input_root)
+        return output_dir / rel_path.with_suffix('.webp')
+    
+    def process_image(self, input_path: Path, output_dir: Path, preserve_structure: bool = True,
+                      input_root: Optional[Path] = None,
+                      source_stat: Optional[os.stat_result] = None) -> bool:
         """
         Process a single image file.
         
@@ -109,63 +1218,293 @@ class ImageOptimizer:
             input_path (Path): Path to input image
             output_dir (Path): Output directory
             preserve_structure (bool): Preserve directory structure
+            input_root (Path): Directory the structure is preserved relative to
+            source_stat (os.stat_result): Stat of the input taken during the
+                directory scan, reused instead of stat-ing again
             
         Returns:
             bool: True if processing successful, False otherwise
         """
+        started = time.perf_counter()
         if input_path.suffix.lower() not in self.SUPPORTED_FORMATS:
             print(f"⚠️  Skipping unsupported format: {input_path.name}")
-            self.stats['skipped'] += 1
+            self.update_stats(skipped=1)
+            self.results.file_result(input_path, SKIPPED, time.perf_counter() - started,
+                                     error='unsupported format')
             return False
         
+        # Hand the file to the optimizer configured for its profile
+        optimizer = self.get_profile_optimizer(input_path, input_root)
+        if optimizer is not self:
+            return optimizer.process_image(input_path, output_dir, preserve_structure, input_root, source_stat)
+        
         # Calculate output path
-        if preserve_structure:
-            # Preserve relative path structure
-            rel_path = input_path.relative_to(input_path.parents[len(input_path.parents)-1])
-            output_path = output_dir / rel_path.with_suffix('.webp')
-        else:
-            # Flat structure
-            output_path = output_dir / f"{input_path.stem}.webp"
+        output_path = self.get_output_path(input_path, output_dir, preserve_structure, input_root)
+        
+        with self.tracer.span('stat', input_path) as span:
+            if source_stat is None:
+                try:
+                    source_stat = input_path.stat()
+                except OSError as e:
+                    print(f"❌ Cannot read {input_path.name}: {e}")
+                    self.update_stats(errors=1)
+                    self.results.file_result(input_path, FAILED, time.perf_counter() - started, error=str(e))
+                    return False
+            
+            # Skip if WebP (and every extra format) is up to date
+            outputs = self.get_format_outputs(input_path, output_path)
+            stale_reason = self.get_stale_reason(input_path, source_stat, outputs, input_root)
+            span.set(bytes_in=source_stat.st_size, up_to_date=stale_reason is None)
+        if stale_reason is None:
+            print(f"⏭️  Skipping {input_path.name} ({self.describe_up_to_date()})")
+            self.collect_placeholder(input_path, output_path)
+            self.update_stats(skipped=1)
+            self.results.file_result(input_path, SKIPPED, time.perf_counter() - started,
+                                     source_stat.st_size, self.get_file_size(output_path), outputs)
+            return True
         
-        # Create output directory if it doesn't exist
+        # A placeholder left by an earlier pass (watch mode) no longer matches
+        if self.placeholders is not None:
+            self.placeholders.discard(input_path)
+        
+        # Inputs that failed every attempt before stay skipped until they change
+        if self.supervisor.is_quarantined(input_path, source_stat):
+            print(f"⛔ Skipping {input_path.name} (quarantined after repeated failures)")
+            self.update_stats(quarantined=1)
+            self.results.file_result(input_path, QUARANTINED, time.perf_counter() - started,
+                                     source_stat.st_size, error='quarantined after repeated failures')
+            return False
+        
+        # Get original file size
+        original_size = source_stat.st_size
+        
+        # Refuse, report or downscale the source by size before anything decodes it
+        optimizer = self.apply_size_limits(input_path, original_size)
+        if optimizer is None:
+            self.update_stats(skipped=1)
+            self.results.file_result(input_path, SKIPPED, time.perf_counter() - started, original_size,
+                                     error='exceeds max_file_size_mb')
+            return False
+        
+        # Output directories are only created for files that get written
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Skip if WebP already exists and is newer
-        if output_path.exists():
-            input_mtime = input_path.stat().st_mtime
-            output_mtime = output_path.stat().st_mtime
-            if output_mtime > input_mtime:
-                print(f"⏭️  Skipping {input_path.name} (WebP is newer)")
-                self.stats['skipped'] += 1
+        # Check the persistent cache before running any encoder; every output
+        # format is cached separately and all of them must hit
+        cache_entries = []
+        source_hash = None
+        if self.cache is not None:
+            with self.tracer.span('cache', input_path, bytes_in=original_size) as span:
+                source_hash = (self.state.hash_source(input_path, source_stat) if self.state is not None
+                               else OptimizationCache.hash_file(input_path))
+                cache_entries = optimizer.get_cache_entries(source_hash, outputs)
+                hit = all(self.cache.fetch(cache_key, output) for output, cache_key, _ in cache_entries)
+                span.set(hit=hit)
+            if hit:
+                self.record_build(input_path, source_stat, outputs, input_root)
+                new_size = self.get_file_size(output_path)
+                print(f"♻️  {input_path.name} -> {output_path.name} (cached)")
+                self.update_stats(cached=1, total_size_before=original_size,
+                                  total_size_after=new_size)
+                self.results.file_result(input_path, CACHED, time.perf_counter() - started,
+                                         original_size, new_size, outputs)
                 return True
         
-        # Get original file size
-        original_size = self.get_file_size(input_path)
+        print(f"🔄 Converting {input_path.name} ({stale_reason})...")
         
-        print(f"🔄 Converting {input_path.name}...")
+        # Convert to WebP (and any extra formats); outputs are renamed into
+        # place, so hardlinks from earlier cache hits are replaced, never written through.
+        # The encode waits until its decode memory fits the run's budget
+        with self.supervisor.reserve_memory(self.estimate_memory(input_path, original_size)):
+            converted = self.supervisor.attempt(input_path.name,
+                                                lambda: optimizer.convert_to_webp(input_path, output_path, outputs))
         
-        # Convert to WebP
-        if self.convert_to_webp(input_path, output_path):
+        if converted:
+            self.supervisor.quarantine.release(input_path)
+            self.record_build(input_path, source_stat, outputs, input_root)
+            
             # Get new file size
             new_size = self.get_file_size(output_path)
             
-            # Calculate compression ratio
-            if original_size > 0:
-                compression_ratio = ((original_size - new_size) / original_size) * 100
-                print(f"✅ {input_path.name} -> {output_path.name}")
-                print(f"   Size: {original_size:,} bytes -> {new_size:,} bytes ({compression_ratio:.1f}% reduction)")
+            with self.tracer.span('cache_store', input_path):
+                for output, cache_key, cache_params in cache_entries:
+                    if output.exists():
+                        self.cache.store(cache_key, source_hash, output, cache_params)
+            
+            self.report_conversion(input_path, outputs, original_size, new_size)
             
             # Update stats
-            self.stats['processed'] += 1
-            self.stats['total_size_before'] += original_size
-            self.stats['total_size_after'] += new_size
+            self.update_stats(processed=1, total_size_before=original_size,
+                              total_size_after=new_size)
+            self.results.file_result(input_path, CONVERTED, time.perf_counter() - started, original_size,
+                                     new_size, [output for output in outputs if output.exists()])
             
             return True
         else:
-            self.stats['errors'] += 1
+            self.supervisor.quarantine.add(input_path, source_stat, self.supervisor.retries + 1)
+            if self.state is not None:
+                self.state.forget(input_path)
+            print(f"⛔ Quarantined {input_path.name} after {self.supervisor.retries + 1} failed attempts")
+            self.update_stats(errors=1)
+            self.results.file_result(input_path, FAILED, time.perf_counter() - started, original_size,
+                                     error=f"failed after {self.supervisor.retries + 1} attempts")
+            return False
+    
+    def get_stale_reason(self, input_path: Path, source_stat: os.stat_result, outputs: List[Path],
+                         input_root: Optional[Path] = None) -> Optional[str]:
+        """
+        Check whether a file's outputs need to be (re)built, and why.
+        
+        With a build state, the recorded stamps, hashes and encoder settings
+        decide; otherwise outputs must exist, be newer than the source and
+        have been encoded with the current settings.
+        
+        Args:
+            input_path (Path): Path to input image
+            source_stat (os.stat_result): Stat of the input
+            outputs (List[Path]): Outputs of the image, WebP first
+            input_root (Path): Directory the profile patterns are relative to
+            
+        Returns:
+            Optional[str]: Why the outputs are stale, or None if they are up to date
+        """
+        settings = self.get_encoder_settings(input_path, outputs, input_root)
+        if self.state is not None:
+            return self.state.check(input_path, source_stat, settings, outputs)
+        if not self.is_up_to_date(outputs, source_stat):
+            return "outputs missing or older than the source"
+        if not self.output_settings.matches(outputs, settings):
+            return "encoder settings changed"
+        return None
+    
+    def describe_up_to_date(self) -> str:
+        """Say why an up-to-date file is skipped, for the skip message."""
+        return 'unchanged since last build' if self.state is not None else 'WebP is newer, same settings'
+    
+    def record_build(self, input_path: Path, source_stat: os.stat_result, outputs: List[Path],
+                     input_root: Optional[Path] = None) -> None:
+        """
+        Record freshly written or restored outputs in the build state, if there
+        is one, along with the image's placeholder; otherwise record the
+        settings they were encoded with beside them.
+        
+        Args:
+            input_path (Path): Path to input image
+            source_stat (os.stat_result): Stat of the input the outputs were built from
+            outputs (List[Path]): Outputs of the image, WebP first
+            input_root (Path): Directory the profile patterns are relative to
+        """
+        settings = self.get_encoder_settings(input_path, outputs, input_root)
+        if self.state is not None:
+            self.state.record(input_path, source_stat, settings, outputs)
+        else:
+            self.output_settings.record(outputs, settings)
+        self.collect_placeholder(input_path, outputs[0])
+    
+    def collect_placeholder(self, input_path: Path, webp_path: Path) -> None:
+        """
+        Make sure the run has a placeholder for an image, and record it in the build state.
+        
+        The placeholder made by a Pillow encode is kept; otherwise the one
+        recorded by an earlier build is reused, or one is made from the
+        WebP output, which is far smaller to decode than the source.
+        
+        Args:
+            input_path (Path): Path to input image
+            webp_path (Path): WebP output of the image
+        """
+        if self.placeholders is None:
+            return
+        placeholder = self.placeholders.get(input_path)
+        if placeholder is None and self.state is not None:
+            placeholder = self.placeholders.adopt(input_path, self.state.get_placeholder(input_path))
+        if placeholder is None:
+            placeholder = self.placeholders.add_file(input_path, webp_path)
+        if placeholder is not None and self.state is not None:
+            self.state.set_placeholder(input_path, self.placeholders.to_record(placeholder))
+    
+    @staticmethod
+    def is_up_to_date(outputs: List[Path], source_stat: os.stat_result) -> bool:
+        """
+        Check whether every output exists and is newer than its source.
+        
+        Args:
+            outputs (List[Path]): Outputs of one image, WebP first
+            source_stat (os.stat_result): Stat of the source image
+            
+        Returns:
+            bool: True if the image can be skipped
+        """
+        try:
+            return min(output.stat().st_mtime for output in outputs) > source_stat.st_mtime
+        except OSError:
             return False
     
-    def process_directory(self, input_dir: Path, output_dir: Path, recursive: bool = True) -> None:
+    def get_cache_entries(self, source_hash: str, outputs: List[Path]) -> List[Tuple[Path, str, Dict[str, Any]]]:
+        """
+        Get the cache key and parameters of every output of an image.
+        
+        Args:
+            source_hash (str): Content hash of the source image
+            outputs (List[Path]): Outputs of the image, WebP first
+            
+        Returns:
+            List[Tuple[Path, str, Dict[str, Any]]]: (output, cache key, cache params) per output
+        """
+        entries = []
+        resize = {'max_width': self.max_width} if self.max_width else {}
+        for output in outputs:
+            cache_params = self.get_cache_params(output_format=SUFFIX_FORMATS[output.suffix.lower()],
+                                                 **resize)
+            entries.append((output, OptimizationCache.make_key(source_hash, **cache_params), cache_params))
+        return entries
+    
+    @staticmethod
+    def report_conversion(input_path: Path, outputs: List[Path], original_size: int, new_size: int) -> None:
+        """
+        Print the size reduction of a converted image and the size of each extra format.
+        
+        Args:
+            input_path (Path): Path to input image
+            outputs (List[Path]): Outputs of the image, WebP first
+            original_size (int): Source size in bytes
+            new_size (int): WebP size in bytes
+        """
+        if original_size <= 0:
+            return
+        compression_ratio = ((original_size - new_size) / original_size) * 100
+        print(f"✅ {input_path.name} -> {outputs[0].name}")
+        print(f"   Size: {original_size:,} bytes -> {new_size:,} bytes ({compression_ratio:.1f}% reduction)")
+        for output in outputs[1:]:
+            if output.exists() and new_size > 0:
+                extra_size = output.stat().st_size
+                print(f"   {SUFFIX_FORMATS[output.suffix.lower()].upper()}: {extra_size:,} bytes "
+                      f"({(extra_size - new_size) / new_size * 100:+.1f}% vs WebP)")
+    
+    def process_image_timed(self, *args: Any) -> bool:
+        """
+        Run process_image and record its wall-clock duration in file_durations.
+        
+        Args:
+            *args (Any): Arguments for process_image
+            
+        Returns:
+            bool: Result of process_image
+            
+        Raises:
+            JobCancelled: If the run was cancelled before the file started
+        """
+        self.supervisor.check_cancelled()
+        start = time.perf_counter()
+        try:
+            return self.process_image(*args)
+        finally:
+            duration = time.perf_counter() - start
+            with self.lock:
+                self.file_durations.append(duration)
+    
+    def process_directory(self, input_dir: Path, output_dir: Path, recursive: bool = True,
+                          skip_dirs: Iterable[Path] = ()) -> None:
         """
         Process all images in a directory.
         
@@ -173,6 +1512,11 @@ class ImageOptimizer:
             input_dir (Path): Input directory
             output_dir (Path): Output directory
             recursive (bool): Process subdirectories recursively
+            skip_dirs (Iterable[Path]): Extra directories to prune (the output
+                directory is always pruned)
+            
+        Raises:
+            JobCancelled: If the run was cancelled while files were processed
         """
         if not input_dir.exists():
             print(f"❌ Input directory does not exist: {input_dir}")
@@ -181,40 +1525,92 @@ class ImageOptimizer:
         # Create output directory
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Find all image files
-        pattern = "**/*" if recursive else "*"
-        image_files = []
-        
-        for file_path in input_dir.glob(pattern):
-            if file_path.is_file() and file_path.suffix.lower() in self.SUPPORTED_FORMATS:
-                image_files.append(file_path)
-        
-        if not image_files:
-            print(f"⚠️  No supported image files found in {input_dir}")
-            return
-        
-        print(f"📁 Found {len(image_files)} image files to process")
-        print(f"🎯 Quality: {self.quality}%, Lossless: {self.lossless}")
+        print(f"📁 Scanning {input_dir}")
+        print(f"🎯 Quality: {self.quality}%, Lossless: {self.lossless}, Engine: {self.engine}")
+        print(f"🧵 File workers: {self.max_workers if self.executor is None else 'shared'}")
         print("-" * 50)
         
-        # Process each image
+        # Stream files to the workers while the tree is still being walked; the
+        # Pillow pool is started before any worker threads so that it never
+        # forks a multi-threaded process
         start_time = time.time()
+        self.start_process_pool()
+        scanned = self.tracer.trace_iter('discover', scan_images(input_dir, self.SUPPORTED_FORMATS,
+                                                                 self.exclude_matcher, recursive=recursive,
+                                                                 skip_dirs=[output_dir, *skip_dirs]))
         
-        for i, image_path in enumerate(image_files, 1):
-            print(f"[{i}/{len(image_files)}] ", end="")
-            self.process_image(image_path, output_dir)
+        if self.executor is not None:
+            total = self.run_parallel(self.executor, scanned, output_dir, input_dir)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers,
+                                    thread_name_prefix='image-worker') as executor:
+                total = self.run_parallel(executor, scanned, output_dir, input_dir)
+        self.supervisor.check_cancelled()
+        
+        if not total:
+            print(f"⚠️  No supported image files found in {input_dir}")
+            return
         
         # Print summary
         end_time = time.time()
         self.print_summary(end_time - start_time)
     
+    def run_parallel(self, executor: Executor, image_files: Iterable[ScannedFile], output_dir: Path,
+                     input_dir: Path) -> int:
+        """
+        Submit image files to an executor as they are discovered and wait for all of them.
+        
+        Args:
+            executor (Executor): File-level executor
+            image_files (Iterable[ScannedFile]): Images to process, with their stat results
+            output_dir (Path): Output directory
+            input_dir (Path): Input directory the output tree mirrors
+            
+        Returns:
+            int: Number of files submitted
+        """
+        future_to_path = {}
+        try:
+            for scanned in image_files:
+                # Stop feeding the pool once the run is cancelled
+                if self.supervisor.cancelled.is_set():
+                    break
+                # Duplicates get their canonical copy's outputs after the run
+                if self.dedup is not None and self.dedup.is_duplicate(scanned.path):
+                    continue
+                future = executor.submit(self.process_image_timed, scanned.path, output_dir, True,
+                                         input_dir, scanned.stat)
+                future_to_path[future] = scanned.path
+            
+            for i, future in enumerate(as_completed(future_to_path), 1):
+                image_path = future_to_path[future]
+                try:
+                    future.result()
+                except JobCancelled:
+                    continue
+                except Exception as e:
+                    print(f"❌ Unexpected error processing {image_path.name}: {str(e)}")
+                    self.update_stats(errors=1)
+                    self.results.file_result(image_path, FAILED, 0.0, error=str(e))
+                print(f"[{i}/{len(future_to_path)}] Finished {image_path.name}")
+        except BaseException:
+            # Interrupted: drop queued files so the pool only waits for running ones
+            for future in future_to_path:
+                future.cancel()
+            raise
+        
+        return len(future_to_path)
+    
     def print_summary(self, duration: float) -> None:
         """Print processing summary."""
         print("\n" + "=" * 50)
         print("📊 PROCESSING SUMMARY")
         print("=" * 50)
         print(f"✅ Processed: {self.stats['processed']} files")
+        print(f"♻️  Cached: {self.stats['cached']} files")
         print(f"⏭️  Skipped: {self.stats['skipped']} files")
+        if self.stats['quarantined']:
+            print(f"⛔ Quarantined: {self.stats['quarantined']} files")
         print(f"❌ Errors: {self.stats['errors']} files")
         print(f"⏱️  Duration: {duration:.2f} seconds")
         
@@ -258,6 +1654,143 @@ def main():
         help='Use lossless compression'
     )
     
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        help='Parallel file conversions (default: CPU count)'
+    )
+    
+    parser.add_argument(
+        '--engine',
+        choices=ENGINES,
+        default='ffmpeg',
+        help='Encoder backend: ffmpeg, pillow (in-process libwebp) or auto (default: ffmpeg)'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        help='Enable the persistent optimization cache in this directory'
+    )
+    
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        help='Exclude pattern relative to the input directory (repeatable, '
+             'default: node_modules, .git, dist, build)'
+    )
+    
+    parser.add_argument(
+        '--target-ssim',
+        type=float,
+        help='Search each image for the lowest quality reaching this SSIM (e.g. 0.98); '
+             '--quality becomes the upper bound'
+    )
+    
+    parser.add_argument(
+        '--max-bytes',
+        type=int,
+        help='Search each image for the highest quality that fits this many bytes'
+    )
+    
+    parser.add_argument(
+        '--min-quality',
+        type=int,
+        default=40,
+        help='Lowest quality the adaptive search may choose (default: 40)'
+    )
+    
+    parser.add_argument(
+        '--formats',
+        type=str,
+        default='webp',
+        help=f"Comma-separated output formats written from one decode ({', '.join(OUTPUT_FORMATS)}; "
+             "default: webp)"
+    )
+    
+    parser.add_argument(
+        '--profiles',
+        action='store_true',
+        help='Apply the built-in hero/thumbnail/icon profile rules per file'
+    )
+    
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help=f'Seconds allowed per image attempt before its encoder is killed (default: {DEFAULT_TIMEOUT:.0f})'
+    )
+    
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f'Extra attempts for a failed image, with exponential backoff (default: {DEFAULT_RETRIES})'
+    )
+    
+    parser.add_argument(
+        '--quarantine-file',
+        type=str,
+        help='Remember images that failed every attempt in this JSON file and skip them until they change'
+    )
+    
+    parser.add_argument(
+        '--retry-quarantined',
+        action='store_true',
+        help='Attempt quarantined images again'
+    )
+    
+    parser.add_argument(
+        '--memory-budget',
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        metavar='MB',
+        help=f'Estimated decode memory shared by concurrent encodes (default: {DEFAULT_MEMORY_BUDGET_MB})'
+    )
+    
+    parser.add_argument(
+        '--max-file-size',
+        type=float,
+        metavar='MB',
+        help='Skip source images larger than this'
+    )
+    
+    parser.add_argument(
+        '--downscale-above',
+        type=float,
+        metavar='MB',
+        help='Downscale source images larger than this whose long edge exceeds 4096px'
+    )
+    
+    parser.add_argument(
+        '--trace',
+        type=str,
+        help='Record per-stage spans to this Chrome trace file (plus a .jsonl log next to it)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        type=int,
+        nargs='?',
+        const=PROFILE_TOP,
+        metavar='N',
+        help=f'Run under cProfile and print the N hottest functions (default: {PROFILE_TOP})'
+    )
+    
+    parser.add_argument(
+        '--output',
+        choices=OUTPUT_MODES,
+        default='text',
+        help='Result output: text (human), json (one document at the end), ndjson '
+             '(one record per file as it finishes) or quiet (default: text)'
+    )
+    
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='With --output json/ndjson/quiet, keep the human output on stderr'
+    )
+    
     parser.add_argument(
         '-r', '--recursive',
         action='store_true',
@@ -272,28 +1805,86 @@ def main():
     output_path = Path(args.output_path)
     
     # Initialize optimizer
-    optimizer = ImageOptimizer(quality=args.quality, lossless=args.lossless)
-    
-    # Check FFmpeg availability
-    if not optimizer.check_ffmpeg():
+    cache = OptimizationCache(Path(args.cache_dir)) if args.cache_dir else None
+    tracer = Tracer(enabled=bool(args.trace))
+    results = ResultWriter(args.output)
+    try:
+        config = OptimizerConfig({
+            'quality': args.quality,
+            'lossless': args.lossless,
+            'file_workers': args.workers,
+            'engine': args.engine,
+            'output_formats': [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()],
+            'use_profiles': args.profiles,
+            'adaptive_quality': {
+                'enabled': args.target_ssim is not None or args.max_bytes is not None,
+                'target_ssim': args.target_ssim,
+                'max_bytes': args.max_bytes,
+                'min_quality': args.min_quality
+            },
+            'file_size_limits': {
+                'max_file_size_mb': args.max_file_size,
+                'compress_above_mb': args.downscale_above
+            }
+        })
+        supervisor = JobSupervisor(timeout=args.timeout, retries=args.retries,
+                                   quarantine=Quarantine(Path(args.quarantine_file)) if args.quarantine_file else None,
+                                   retry_quarantined=args.retry_quarantined,
+                                   memory=MemoryBudget(args.memory_budget * MB))
+        # --exclude replaces the single-file defaults, as before
+        optimizer = ImageOptimizer.from_config(config, exclude_patterns=args.exclude, cache=cache,
+                                               profiles=create_profile_matcher(config),
+                                               supervisor=supervisor, tracer=tracer, results=results)
+    except ValueError as e:
+        print(f"❌ {e}")
         sys.exit(1)
     
-    print("🚀 RadioFusion Image Optimizer")
-    print("=" * 50)
-    
-    # Process input
-    if input_path.is_file():
-        # Single file
-        print(f"📄 Processing single file: {input_path.name}")
-        optimizer.process_image(input_path, output_path, preserve_structure=False)
-        optimizer.print_summary(0)
-    elif input_path.is_dir():
-        # Directory
-        print(f"📁 Processing directory: {input_path}")
-        optimizer.process_directory(input_path, output_path, recursive=args.recursive)
-    else:
-        print(f"❌ Input path does not exist: {input_path}")
-        sys.exit(1)
+    # In json/ndjson/quiet modes stdout carries only result records
+    with results.human_output(args.verbose):
+        # Check encoder availability
+        if not optimizer.check_engine():
+            sys.exit(1)
+        
+        print("🚀 RadioFusion Image Optimizer")
+        print("=" * 50)
+        
+        start_time = time.time()
+        
+        def run() -> None:
+            if input_path.is_file():
+                # Single file
+                print(f"📄 Processing single file: {input_path.name}")
+                optimizer.process_image(input_path, output_path, preserve_structure=False)
+                optimizer.print_summary(0)
+            elif input_path.is_dir():
+                # Directory
+                print(f"📁 Processing directory: {input_path}")
+                optimizer.process_directory(input_path, output_path, recursive=args.recursive)
+            else:
+                print(f"❌ Input path does not exist: {input_path}")
+                sys.exit(1)
+        
+        # Process input; SIGINT/SIGTERM kill running encoders and discard their partial outputs
+        try:
+            with handle_signals(supervisor):
+                if args.profile:
+                    run_profiled(run, args.profile)
+                else:
+                    run()
+        except (KeyboardInterrupt, JobCancelled):
+            print("🛑 Cancelled; existing outputs were left untouched")
+            sys.exit(130)
+        finally:
+            optimizer.close()
+            if cache is not None:
+                cache.evict()
+                cache.close()
+            if tracer.enabled:
+                tracer.print_summary()
+                trace_path, jsonl_path = tracer.export(Path(args.trace))
+                print(f"📊 Trace written to {trace_path} and {jsonl_path}")
+            results.summary(optimizer.stats, time.time() - start_time, cancelled=supervisor.cancelled.is_set())
+            results.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Image Placeholders for RadioFusion Image Optimizer
+Tiny inline WebP previews (LQIP) and dominant colours, shown by the frontend
+while the full image loads.
+"""
+
+import io
+import base64
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    from PIL import Image, features
+    PIL_AVAILABLE = bool(features.check('webp'))
+except ImportError:
+    Image = None
+    PIL_AVAILABLE = False
+
+PLACEHOLDERS_AVAILABLE = NUMPY_AVAILABLE and PIL_AVAILABLE
+
+# Long edge of the inline preview in pixels; the browser scales it up,
+# which blurs it for free
+DEFAULT_PLACEHOLDER_SIZE = 16
+MAX_PLACEHOLDER_SIZE = 64
+
+# WebP quality of the preview; at this size every byte ends up in the bundle
+PLACEHOLDER_QUALITY = 40
+
+# The dominant colour is voted on a grid this many times the preview size
+COLOR_GRID_SCALE = 4
+
+# Bits kept per channel when binning colours for the vote
+COLOR_BITS = 4
+
+# Pixels at least this opaque take part in the vote
+OPAQUE_ALPHA = 128
+
+
+def downsample(pixels: 'np.ndarray', width: int, height: int) -> 'np.ndarray':
+    """
+    Shrink an image by averaging the source pixels under each target pixel.
+
+    The full frame is summed in whole blocks first, one axis at a time on a
+    reshaped view, so it is read once without per-pixel Python work; edge
+    rows and columns that do not fill a block are dropped. The small block
+    grid is then averaged to the exact size with segment sums.
+
+    Args:
+        pixels (np.ndarray): (H, W, C) uint8 image
+        width (int): Target width, at most W
+        height (int): Target height, at most H
+
+    Returns:
+        np.ndarray: (height, width, C) uint8 image
+    """
+    source_height, source_width, channels = pixels.shape
+    block_y, block_x = source_height // height, source_width // width
+    rows, cols = source_height // block_y, source_width // block_x
+    sums = pixels[:rows * block_y].reshape(rows, block_y, source_width, channels).sum(axis=1, dtype=np.uint32)
+    sums = sums[:, :cols * block_x].reshape(rows, cols, block_x, channels).sum(axis=2)
+    means = sums / (block_y * block_x)
+
+    row_edges = np.linspace(0, rows, height + 1).astype(np.intp)
+    col_edges = np.linspace(0, cols, width + 1).astype(np.intp)
+    means = np.add.reduceat(np.add.reduceat(means, row_edges[:-1], axis=0), col_edges[:-1], axis=1)
+    counts = np.outer(np.diff(row_edges), np.diff(col_edges))[..., np.newaxis]
+    return np.rint(means / counts).astype(np.uint8)
+
+
+def dominant_color(pixels: 'np.ndarray') -> str:
+    """
+    Get the most common colour of an image.
+
+    Colours are binned to COLOR_BITS per channel; the winning bin's pixels
+    are averaged, so the result is a real colour of the image rather than
+    the muddy mean of all of them. Transparent pixels do not vote.
+
+    Args:
+        pixels (np.ndarray): (H, W, 3) or (H, W, 4) uint8 image
+
+    Returns:
+        str: CSS colour, e.g. '#1a2b3c'
+    """
+    flat = pixels.reshape(-1, pixels.shape[-1])
+    if flat.shape[1] == 4:
+        opaque = flat[flat[:, 3] >= OPAQUE_ALPHA]
+        flat = opaque if len(opaque) else flat
+    rgb = flat[:, :3].astype(np.intp)
+    binned = rgb >> (8 - COLOR_BITS)
+    bins = (binned[:, 0] << (2 * COLOR_BITS)) | (binned[:, 1] << COLOR_BITS) | binned[:, 2]
+    winner = np.bincount(bins).argmax()
+    red, green, blue = np.rint(rgb[bins == winner].mean(axis=0)).astype(int)
+    return f"#{red:02x}{green:02x}{blue:02x}"
+
+
+def make_placeholder(image: 'Image.Image', size: int = DEFAULT_PLACEHOLDER_SIZE) -> Dict[str, str]:
+    """
+    Make the placeholder of a decoded image.
+
+    Args:
+        image (Image.Image): Decoded image (the first frame of an animation is used)
+        size (int): Long edge of the preview in pixels
+
+    Returns:
+        Dict[str, str]: {'lqip': base64 WebP data URI, 'color': dominant CSS colour}
+    """
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    if image.mode not in ('RGB', 'RGBA') or (image.mode == 'RGBA') != has_alpha:
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    pixels = np.asarray(image)
+
+    # One pass over the full frame down to the voting grid, then a cheap
+    # second pass over the grid down to the preview
+    source_height, source_width = pixels.shape[:2]
+    scale = min(1.0, size * COLOR_GRID_SCALE / max(source_width, source_height))
+    grid = downsample(pixels, max(1, round(source_width * scale)), max(1, round(source_height * scale)))
+    scale = min(1.0, size / max(grid.shape[1], grid.shape[0]))
+    preview = downsample(grid, max(1, round(grid.shape[1] * scale)), max(1, round(grid.shape[0] * scale)))
+
+    buffer = io.BytesIO()
+    Image.fromarray(preview).save(buffer, 'WEBP', quality=PLACEHOLDER_QUALITY, method=6)
+    return {
+        'lqip': 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii'),
+        'color': dominant_color(grid)
+    }
+
+
+class PlaceholderStore:
+    """
+    Placeholders of the images in a run, keyed by source path (thread-safe).
+
+    Encoders add the placeholder made from the frame they decoded anyway;
+    images that were not decoded in the run (skipped or restored from the
+    cache) get theirs from the build state or from their WebP output.
+    """
+
+    def __init__(self, size: int = DEFAULT_PLACEHOLDER_SIZE):
+        """
+        Initialize the PlaceholderStore.
+
+        Args:
+            size (int): Long edge of the previews in pixels
+
+        Raises:
+            ValueError: If the size is out of range
+        """
+        if not 1 <= size <= MAX_PLACEHOLDER_SIZE:
+            raise ValueError(f"Placeholder size must be between 1 and {MAX_PLACEHOLDER_SIZE}, got {size}")
+        self.size = size
+        self.placeholders: Dict[str, Dict[str, str]] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional['PlaceholderStore']:
+        """
+        Build a store from a 'placeholders' configuration block.
+
+        Args:
+            config (Optional[Dict[str, Any]]): Block with 'enabled' and 'size'
+
+        Returns:
+            Optional[PlaceholderStore]: None when disabled, or when Pillow or
+            NumPy is missing
+
+        Raises:
+            ValueError: If the size is out of range
+        """
+        if not config or not config.get('enabled', False) or not PLACEHOLDERS_AVAILABLE:
+            return None
+        return cls(size=config.get('size', DEFAULT_PLACEHOLDER_SIZE))
+
+    def get(self, path: Path) -> Optional[Dict[str, str]]:
+        """Get the placeholder of a source image, if the run has one."""
+        with self.lock:
+            return self.placeholders.get(str(path))
+
+    def add(self, path: Path, placeholder: Dict[str, str]) -> None:
+        """Set the placeholder of a source image."""
+        with self.lock:
+            self.placeholders[str(path)] = placeholder
+
+    def discard(self, path: Path) -> None:
+        """Drop the placeholder of a source image that is about to be rebuilt."""
+        with self.lock:
+            self.placeholders.pop(str(path), None)
+
+    def add_file(self, path: Path, image_path: Path) -> Optional[Dict[str, str]]:
+        """
+        Decode an image file and set the placeholder of a source image from it.
+
+        Args:
+            path (Path): Source image the placeholder belongs to
+            image_path (Path): File to decode, e.g. the source's WebP output
+
+        Returns:
+            Optional[Dict[str, str]]: The placeholder, or None if the file cannot be decoded
+        """
+        try:
+            with Image.open(image_path) as image:
+                # JPEG decodes at a reduced scale when asked first
+                image.draft('RGB', (self.size * COLOR_GRID_SCALE, self.size * COLOR_GRID_SCALE))
+                placeholder = make_placeholder(image, self.size)
+        except Exception:
+            return None
+        self.add(path, placeholder)
+        return placeholder
+
+    def adopt(self, path: Path, record: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        """
+        Reuse a placeholder recorded by an earlier build, if it was made at this size.
+
+        Args:
+            path (Path): Source image
+            record (Optional[Dict[str, Any]]): Recorded placeholder (see to_record)
+
+        Returns:
+            Optional[Dict[str, str]]: The placeholder, or None if the record does not fit
+        """
+        if not record or record.get('size') != self.size:
+            return None
+        placeholder = {'lqip': record['lqip'], 'color': record['color']}
+        self.add(path, placeholder)
+        return placeholder
+
+    def to_record(self, placeholder: Dict[str, str]) -> Dict[str, Any]:
+        """Get the form a placeholder is recorded in, with the size it was made at."""
+        return {'size': self.size, **placeholder}
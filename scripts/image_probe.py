@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Image Header Probe for RadioFusion Website
+Reads image dimensions and alpha presence from file headers without decoding pixels.
+"""
+
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Bytes read from the start of a file; enough for every format except JPEG,
+# whose SOF marker may follow large EXIF/ICC segments
+HEADER_SIZE = 64 * 1024
+
+# JPEG start-of-frame markers carrying the image size
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# HEIF brands identifying an AVIF still image or sequence
+AVIF_BRANDS = (b'avif', b'avis')
+
+# auxC type marking an AV1 auxiliary image as an alpha plane
+AVIF_ALPHA_URN = b'urn:mpeg:mpegB:cicp:systems:auxiliary:alpha'
+
+
+def probe_image(file_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read basic image information from a file header.
+
+    Args:
+        file_path (Path): Image file
+
+    Returns:
+        Optional[Dict[str, Any]]: {'format', 'width', 'height', 'has_alpha'},
+        or None if the format is unknown or the header is malformed
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+            if header[:3] == b'\xff\xd8\xff':
+                return probe_jpeg(f)
+    except OSError:
+        return None
+
+    try:
+        if header[:8] == b'\x89PNG\r\n\x1a\n':
+            return probe_png(header)
+        if header[:6] in (b'GIF87a', b'GIF89a'):
+            return probe_gif(header)
+        if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+            return probe_webp(header)
+        if header[:2] == b'BM':
+            return probe_bmp(header)
+        if header[:4] in (b'II*\x00', b'MM\x00*'):
+            return probe_tiff(header)
+        if header[4:8] == b'ftyp' and header[8:12] in AVIF_BRANDS:
+            return probe_avif(header)
+    except (struct.error, IndexError, ValueError):
+        return None
+    return None
+
+
+def image_info(fmt: str, width: int, height: int, has_alpha: bool) -> Optional[Dict[str, Any]]:
+    """Build a probe result, rejecting empty dimensions."""
+    if width <= 0 or height <= 0:
+        return None
+    return {'format': fmt, 'width': width, 'height': height, 'has_alpha': has_alpha}
+
+
+def probe_png(header: bytes) -> Optional[Dict[str, Any]]:
+    """Parse the PNG IHDR chunk (and look for a tRNS chunk before IDAT)."""
+    width, height, _, color_type = struct.unpack('>IIBB', header[16:26])
+    has_alpha = color_type in (4, 6) or b'tRNS' in header[:header.find(b'IDAT')]
+    return image_info('png', width, height, has_alpha)
+
+
+def probe_gif(header: bytes) -> Optional[Dict[str, Any]]:
+    """Parse the GIF logical screen descriptor."""
+    width, height = struct.unpack('<HH', header[6:10])
+    # A graphic control extension with the transparency flag set
+    gce = header.find(b'\x21\xf9\x04')
+    has_alpha = gce != -1 and bool(header[gce + 3] & 0x01)
+    return image_info('gif', width, height, has_alpha)
+
+
+def probe_webp(header: bytes) -> Optional[Dict[str, Any]]:
+    """Parse a WebP VP8, VP8L or VP8X chunk header."""
+    chunk = header[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', header[26:30])
+        return image_info('webp', width & 0x3FFF, height & 0x3FFF, False)
+    if chunk == b'VP8L':
+        bits = struct.unpack('<I', header[21:25])[0]
+        width = (bits & 0x3FFF) + 1
+        height = ((bits >> 14) & 0x3FFF) + 1
+        return image_info('webp', width, height, bool((bits >> 28) & 0x1))
+    if chunk == b'VP8X':
+        flags = header[20]
+        width = int.from_bytes(header[24:27], 'little') + 1
+        height = int.from_bytes(header[27:30], 'little') + 1
+        return image_info('webp', width, height, bool(flags & 0x10))
+    return None
+
+
+def webp_chunks(file_path: Path) -> Optional[List[bytes]]:
+    """
+    List the chunk FourCCs of a WebP file, seeking past chunk payloads.
+
+    'VP8L' marks a lossless bitstream, 'VP8 ' a lossy one, 'ANIM' an
+    animation and 'EXIF'/'XMP ' metadata.
+
+    Args:
+        file_path (Path): WebP file
+
+    Returns:
+        Optional[List[bytes]]: FourCCs in file order, or None if the file is
+        not a well-formed WebP
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WEBP':
+                return None
+            end = 8 + struct.unpack('<I', header[4:8])[0]
+            chunks = []
+            offset = 12
+            while offset + 8 <= end:
+                chunk_header = f.read(8)
+                if len(chunk_header) < 8:
+                    return None
+                size = struct.unpack('<I', chunk_header[4:8])[0]
+                chunks.append(chunk_header[:4])
+                # Payloads are padded to an even size
+                offset += 8 + size + (size & 1)
+                f.seek(offset)
+            return chunks or None
+    except OSError:
+        return None
+
+
+def probe_bmp(header: bytes) -> Optional[Dict[str, Any]]:
+    """Parse a BMP info header."""
+    width, height = struct.unpack('<ii', header[18:26])
+    bits_per_pixel = struct.unpack('<H', header[28:30])[0]
+    return image_info('bmp', width, abs(height), bits_per_pixel == 32)
+
+
+def probe_tiff(header: bytes) -> Optional[Dict[str, Any]]:
+    """Parse the first TIFF image file directory."""
+    endian = '<' if header[:2] == b'II' else '>'
+    offset = struct.unpack(endian + 'I', header[4:8])[0]
+    count = struct.unpack(endian + 'H', header[offset:offset + 2])[0]
+    width = height = 0
+    has_alpha = False
+
+    for i in range(count):
+        entry = header[offset + 2 + i * 12:offset + 14 + i * 12]
+        tag, field_type = struct.unpack(endian + 'HH', entry[:4])
+        value = (struct.unpack(endian + 'H', entry[8:10])[0] if field_type == 3
+                 else struct.unpack(endian + 'I', entry[8:12])[0])
+        if tag == 256:
+            width = value
+        elif tag == 257:
+            height = value
+        elif tag == 338:
+            has_alpha = True
+
+    return image_info('tiff', width, height, has_alpha)
+
+
+def iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (type, payload start, payload end) for each ISOBMFF box in a range."""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack('>I4s', data[offset:offset + 8])
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', data[offset + 8:offset + 16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            return
+        yield box_type, offset + header_size, min(offset + size, end)
+        offset += size
+
+
+def find_box(data: bytes, box_type: bytes, start: int, end: int) -> Optional[Tuple[int, int]]:
+    """Find the first child box of a type, returning its payload range."""
+    for child_type, child_start, child_end in iter_boxes(data, start, end):
+        if child_type == box_type:
+            return child_start, child_end
+    return None
+
+
+def probe_avif(header: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Parse the AVIF item properties (meta/iprp/ipco).
+
+    The largest 'ispe' property is the primary image size; an 'auxC' alpha
+    property means the file carries an alpha plane.
+    """
+    meta = find_box(header, b'meta', 0, len(header))
+    # meta is a full box: skip its version and flags
+    iprp = meta and find_box(header, b'iprp', meta[0] + 4, meta[1])
+    ipco = iprp and find_box(header, b'ipco', *iprp)
+    if not ipco:
+        return None
+
+    width = height = 0
+    has_alpha = False
+    for box_type, start, end in iter_boxes(header, *ipco):
+        if box_type == b'ispe':
+            box_width, box_height = struct.unpack('>II', header[start + 4:start + 12])
+            if box_width * box_height > width * height:
+                width, height = box_width, box_height
+        elif box_type == b'auxC' and header[start + 4:end].startswith(AVIF_ALPHA_URN):
+            has_alpha = True
+
+    return image_info('avif', width, height, has_alpha)
+
+
+def probe_jpeg(f) -> Optional[Dict[str, Any]]:
+    """
+    Walk JPEG segments up to the first start-of-frame marker.
+
+    Args:
+        f: Binary file object positioned anywhere; it is rewound past SOI
+
+    Returns:
+        Optional[Dict[str, Any]]: Probe result
+    """
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        # Skip fill bytes
+        while marker[1] == 0xFF:
+            marker = marker[1:] + f.read(1)
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if marker[1] in JPEG_SOF_MARKERS:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack('>HH', data[1:5])
+            return image_info('jpeg', width, height, False)
+        f.seek(length - 2, 1)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Image Profile Rules for RadioFusion Website
+Assigns optimization profiles (hero, thumbnail, icon) to files by path, size and alpha.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from image_probe import probe_image
+from image_scanner import ExcludeMatcher
+
+# Encoder settings per profile
+DEFAULT_PROFILES: Dict[str, Dict[str, Any]] = {
+    "hero_images": {
+        "quality": 95,
+        "lossless": False,
+        "description": "High quality for hero/banner images"
+    },
+    "thumbnails": {
+        "quality": 75,
+        "lossless": False,
+        "description": "Lower quality for thumbnail images"
+    },
+    "icons": {
+        "quality": 90,
+        "lossless": True,
+        "description": "Lossless for icons and logos"
+    }
+}
+
+# Classification rules, first match wins; files matching none keep the
+# directory settings
+DEFAULT_PROFILE_RULES: List[Dict[str, Any]] = [
+    {"profile": "icons", "patterns": ["*/logo*", "*/icon*", "*/favicon*"]},
+    {"profile": "icons", "max_width": 256, "max_height": 256, "has_alpha": True},
+    {"profile": "hero_images", "patterns": ["*/banner*.{png,jpg,jpeg}", "*/hero*.{png,jpg,jpeg}"]},
+    {"profile": "hero_images", "min_width": 1600},
+    {"profile": "thumbnails", "patterns": ["*/thumb*", "*/thumbnails/*"]},
+    {"profile": "thumbnails", "max_width": 480, "max_height": 480}
+]
+
+# Rule keys checked against the probed image header
+DIMENSION_KEYS = ('min_width', 'max_width', 'min_height', 'max_height')
+
+
+class ProfileRule(NamedTuple):
+    """A compiled classification rule."""
+    profile: str
+    patterns: Optional[ExcludeMatcher]
+    min_width: Optional[int]
+    max_width: Optional[int]
+    min_height: Optional[int]
+    max_height: Optional[int]
+    has_alpha: Optional[bool]
+
+    @property
+    def needs_probe(self) -> bool:
+        """Whether the rule looks at the image header."""
+        return self.has_alpha is not None or any(getattr(self, key) is not None for key in DIMENSION_KEYS)
+
+    def matches_info(self, info: Dict[str, Any]) -> bool:
+        """
+        Check probed image information against the rule's size and alpha limits.
+
+        Args:
+            info (Dict[str, Any]): probe_image result
+
+        Returns:
+            bool: True if every limit holds
+        """
+        width, height = info['width'], info['height']
+        return ((self.min_width is None or width >= self.min_width) and
+                (self.max_width is None or width <= self.max_width) and
+                (self.min_height is None or height >= self.min_height) and
+                (self.max_height is None or height <= self.max_height) and
+                (self.has_alpha is None or info['has_alpha'] == self.has_alpha))
+
+
+class ProfileMatcher:
+    """
+    Profile rules compiled once per run and applied to every file.
+    """
+
+    def __init__(self, profiles: Dict[str, Dict[str, Any]], rules: List[Dict[str, Any]]):
+        """
+        Initialize the ProfileMatcher.
+
+        Args:
+            profiles (Dict[str, Dict[str, Any]]): Settings per profile name
+                ('quality', 'lossless')
+            rules (List[Dict[str, Any]]): Rules with 'profile' plus any of
+                'patterns', 'min_width', 'max_width', 'min_height',
+                'max_height' and 'has_alpha'
+
+        Raises:
+            ValueError: If a rule names an unknown profile or has no conditions
+        """
+        self.profiles = profiles
+        self.rules: List[ProfileRule] = []
+        for rule in rules:
+            profile = rule.get('profile')
+            if profile not in profiles:
+                raise ValueError(f"Profile rule refers to unknown profile '{profile}'")
+            compiled = ProfileRule(
+                profile=profile,
+                patterns=ExcludeMatcher(rule['patterns']) if rule.get('patterns') else None,
+                has_alpha=rule.get('has_alpha'),
+                **{key: rule.get(key) for key in DIMENSION_KEYS}
+            )
+            if compiled.patterns is None and not compiled.needs_probe:
+                raise ValueError(f"Profile rule for '{profile}' has no conditions")
+            self.rules.append(compiled)
+
+    def classify(self, relative_path: str, file_path: Path) -> Optional[str]:
+        """
+        Find the first rule matching a file.
+
+        The header is probed at most once, and only when a rule whose patterns
+        matched also has size or alpha conditions.
+
+        Args:
+            relative_path (str): POSIX path relative to the scanned directory
+            file_path (Path): Path to the image
+
+        Returns:
+            Optional[str]: Profile name, or None if no rule matches
+        """
+        info = None
+        for rule in self.rules:
+            if rule.patterns is not None and not rule.patterns.matches(relative_path):
+                continue
+            if rule.needs_probe:
+                if info is None:
+                    info = probe_image(file_path) or {}
+                if not info or not rule.matches_info(info):
+                    continue
+            return rule.profile
+        return None
+
+    def match(self, relative_path: str, file_path: Path) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Classify a file and return its profile settings.
+
+        Args:
+            relative_path (str): POSIX path relative to the scanned directory
+            file_path (Path): Path to the image
+
+        Returns:
+            Optional[Tuple[str, Dict[str, Any]]]: (profile name, settings), or None
+        """
+        profile = self.classify(relative_path, file_path)
+        return None if profile is None else (profile, self.profiles[profile])
+
+
+def create_profile_matcher(config: Dict[str, Any]) -> Optional[ProfileMatcher]:
+    """
+    Build a profile matcher from an optimizer configuration.
+
+    Args:
+        config (Dict[str, Any]): Configuration with 'optimization_settings'
+            and 'profile_rules' (both default to the built-in profiles)
+
+    Returns:
+        Optional[ProfileMatcher]: None when profiles are disabled or no rules exist
+
+    Raises:
+        ValueError: If the rules are invalid
+    """
+    if not config.get('use_profiles', True):
+        return None
+    rules = config.get('profile_rules', DEFAULT_PROFILE_RULES)
+    if not rules:
+        return None
+    return ProfileMatcher(config.get('optimization_settings', DEFAULT_PROFILES), rules)
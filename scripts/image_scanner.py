@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Image Directory Scanner for RadioFusion Website
+Single-pass os.scandir walker that prunes excluded directories before descending.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+# Innermost {a,b} alternative group in a pattern
+BRACE_PATTERN = re.compile(r'\{([^{}]*)\}')
+
+
+class ScannedFile(NamedTuple):
+    """A discovered image and the stat result taken during the walk."""
+    path: Path
+    stat: os.stat_result
+
+
+def expand_braces(pattern: str) -> List[str]:
+    """
+    Expand shell-style {a,b} alternatives, which glob syntax does not support.
+
+    Args:
+        pattern (str): Pattern such as "*/banner*.{png,jpg}"
+        
+    Returns:
+        List[str]: One pattern per alternative
+    """
+    match = BRACE_PATTERN.search(pattern)
+    if not match:
+        return [pattern]
+    head, tail = pattern[:match.start()], pattern[match.end():]
+    return [expanded for alternative in match.group(1).split(',')
+            for expanded in expand_braces(head + alternative + tail)]
+
+
+def translate_segment(segment: str) -> str:
+    """
+    Translate one path segment of a glob into a regular expression.
+
+    ``*`` and ``?`` stay within the segment; [...] classes follow fnmatch,
+    with [!...] for negation.
+
+    Args:
+        segment (str): Segment without slashes, e.g. "icon*.png"
+
+    Returns:
+        str: Regular expression for the segment
+    """
+    parts = []
+    index = 0
+    while index < len(segment):
+        char = segment[index]
+        index += 1
+        if char == '*':
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            end = index + (segment[index:index + 1] == '!')
+            end += segment[end:end + 1] == ']'
+            end = segment.find(']', end)
+            if end < 0:
+                parts.append(re.escape(char))
+                continue
+            members = segment[index:end].replace('\\', '\\\\')
+            if members.startswith('!'):
+                members = '^' + members[1:]
+            elif members.startswith('^'):
+                members = '\\' + members
+            parts.append(f'(?!/)[{members}]')
+            index = end + 1
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts)
+
+
+def translate_pattern(pattern: str) -> str:
+    """
+    Translate a path glob into a regular expression over "/"-prefixed paths.
+
+    A pattern starting with "/" is anchored at the scan root; any other
+    pattern matches the trailing segments of a path, so "*.webp" matches
+    webp files at any depth and "*/icon*" files named icon* in any folder.
+    A "**" segment matches any number of folders.
+
+    Args:
+        pattern (str): Glob without {a,b} alternatives
+
+    Returns:
+        str: Regular expression matching the whole path
+    """
+    anchored = pattern.startswith('/')
+    segments = pattern.lstrip('/').split('/')
+    parts = ['/' if anchored else '(?:[^/]*/)*']
+    for index, segment in enumerate(segments):
+        last = index == len(segments) - 1
+        if segment == '**':
+            parts.append('.*' if last else '(?:[^/]*/)*')
+        else:
+            parts.append(translate_segment(segment) + ('' if last else '/'))
+    return ''.join(parts) + r'\Z'
+
+
+class ExcludeMatcher:
+    """
+    Exclude patterns compiled once into regular expressions.
+
+    Patterns are globs matched segment by segment against the path relative
+    to the scan root ("*.webp", "**/node_modules/**"): ``*`` never crosses
+    a "/", "**" spans folders and {a,b} lists alternatives.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Initialize the ExcludeMatcher.
+
+        Args:
+            patterns (Iterable[str]): Exclude patterns
+        """
+        self.patterns = list(patterns)
+        self.regexes = [re.compile(translate_pattern(expanded)) for pattern in self.patterns
+                        for expanded in expand_braces(pattern)]
+
+    def matches(self, relative_path: str, is_dir: bool = False) -> bool:
+        """
+        Check a root-relative POSIX path against every pattern.
+
+        Directories are tested with a trailing slash so that "**/dist/**"
+        prunes a dist folder before anything below it is listed.
+
+        Args:
+            relative_path (str): Path relative to the scan root
+            is_dir (bool): Whether the path is a directory
+
+        Returns:
+            bool: True if the path is excluded
+        """
+        candidate = f"/{relative_path}/" if is_dir else f"/{relative_path}"
+        return any(regex.match(candidate) for regex in self.regexes)
+
+
+def scan_images(root: Path, extensions: Iterable[str], matcher: Optional[ExcludeMatcher] = None,
+                recursive: bool = True, skip_dirs: Iterable[Path] = ()) -> Iterator[ScannedFile]:
+    """
+    Walk a directory tree with os.scandir and yield matching image files.
+
+    Excluded and skipped directories are never listed. Files are yielded as
+    soon as they are found, with the stat result taken during the walk.
+
+    Args:
+        root (Path): Directory to scan
+        extensions (Iterable[str]): Lower-case suffixes to accept, e.g. '.png'
+        matcher (ExcludeMatcher): Exclude patterns (default: none)
+        recursive (bool): Descend into subdirectories
+        skip_dirs (Iterable[Path]): Directories to prune, e.g. output folders
+            nested inside the root
+
+    Yields:
+        ScannedFile: Each matching image
+    """
+    extensions = {ext.lower() for ext in extensions}
+    skip = {os.path.abspath(d) for d in skip_dirs}
+    root_str = os.path.abspath(root)
+    stack: List[str] = [root_str]
+
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+
+                relative_path = os.path.relpath(entry.path, root_str).replace(os.sep, '/')
+
+                if is_dir:
+                    if (recursive and entry.path not in skip and
+                            not (matcher and matcher.matches(relative_path, is_dir=True))):
+                        stack.append(entry.path)
+                    continue
+
+                if os.path.splitext(entry.name)[1].lower() not in extensions:
+                    continue
+                if matcher and matcher.matches(relative_path):
+                    continue
+
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                # Keep the caller's form of the root (relative or absolute)
+                yield ScannedFile(Path(root) / relative_path, stat)
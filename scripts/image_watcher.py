@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Image Directory Watcher for RadioFusion Website
+Reports added, changed and deleted files using inotify, with a polling fallback.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Event kinds reported by watchers
+CHANGED = 'changed'
+DELETED = 'deleted'
+DELETED_DIR = 'deleted_dir'
+RESCAN = 'rescan'
+
+# inotify constants (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+Event = Tuple[str, Path]
+
+
+def is_excluded(path: Path, exclude_dirs: Set[Path]) -> bool:
+    """Check whether path is, or lies inside, an excluded directory."""
+    return path in exclude_dirs or any(parent in exclude_dirs for parent in path.parents)
+
+
+class InotifyWatcher:
+    """
+    Recursive directory watcher built on the Linux inotify API via ctypes.
+    """
+
+    def __init__(self, roots: Iterable[Path], exclude_dirs: Iterable[Path] = ()):
+        """
+        Initialize the InotifyWatcher.
+
+        Args:
+            roots (Iterable[Path]): Directories to watch recursively
+            exclude_dirs (Iterable[Path]): Directories never watched (e.g. outputs)
+
+        Raises:
+            OSError: If inotify is unavailable on this platform
+        """
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        self.exclude_dirs = {Path(d) for d in exclude_dirs}
+        self.watches: Dict[int, Path] = {}
+        for root in roots:
+            self.add_tree(Path(root))
+
+    def add_watch(self, directory: Path) -> None:
+        """Add a single directory watch."""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+        self.watches[wd] = directory
+
+    def add_tree(self, root: Path) -> List[Event]:
+        """
+        Watch a directory and all subdirectories.
+
+        Args:
+            root (Path): Directory to watch
+
+        Returns:
+            List[Event]: Files already present, which may have been written
+            before the watch existed
+        """
+        events = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            current = Path(dirpath)
+            if is_excluded(current, self.exclude_dirs):
+                dirnames[:] = []
+                continue
+            dirnames[:] = [d for d in dirnames if not is_excluded(current / d, self.exclude_dirs)]
+            self.add_watch(current)
+            events.extend((CHANGED, current / name) for name in filenames)
+        return events
+
+    def read_events(self, timeout: float) -> List[Event]:
+        """
+        Wait up to timeout seconds for file events.
+
+        Args:
+            timeout (float): Seconds to wait
+
+        Returns:
+            List[Event]: (kind, path) pairs, empty on timeout
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            raw_name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length]
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                events.extend((RESCAN, root) for root in set(self.watches.values()))
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                continue
+
+            path = directory / os.fsdecode(raw_name.rstrip(b'\0'))
+            if is_excluded(path, self.exclude_dirs):
+                continue
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    events.extend(self.add_tree(path))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    events.append((DELETED_DIR, path))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                events.append((CHANGED, path))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append((DELETED, path))
+
+        return events
+
+    def close(self) -> None:
+        """Release the inotify file descriptor."""
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Portable directory watcher that diffs periodic (mtime, size) snapshots.
+    """
+
+    def __init__(self, roots: Iterable[Path], exclude_dirs: Iterable[Path] = (),
+                 poll_interval: float = 1.0):
+        """
+        Initialize the PollingWatcher.
+
+        Args:
+            roots (Iterable[Path]): Directories to watch recursively
+            exclude_dirs (Iterable[Path]): Directories never scanned (e.g. outputs)
+            poll_interval (float): Seconds between snapshots (default: 1.0)
+        """
+        self.roots = [Path(r) for r in roots]
+        self.exclude_dirs = {Path(d) for d in exclude_dirs}
+        self.poll_interval = poll_interval
+        self.snapshot = self.take_snapshot()
+        self.next_poll = time.monotonic() + poll_interval
+
+    def take_snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        """Stat every file under the watched roots."""
+        snapshot = {}
+        for root in self.roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                current = Path(dirpath)
+                dirnames[:] = [d for d in dirnames if not is_excluded(current / d, self.exclude_dirs)]
+                for name in filenames:
+                    try:
+                        stat = os.stat(current / name)
+                    except OSError:
+                        continue
+                    snapshot[current / name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read_events(self, timeout: float) -> List[Event]:
+        """
+        Wait up to timeout seconds and report differences since the last poll.
+
+        Args:
+            timeout (float): Seconds to wait
+
+        Returns:
+            List[Event]: (kind, path) pairs, empty if nothing changed
+        """
+        delay = max(0.0, min(timeout, self.next_poll - time.monotonic()))
+        time.sleep(delay)
+        if time.monotonic() < self.next_poll:
+            return []
+
+        self.next_poll = time.monotonic() + self.poll_interval
+        current = self.take_snapshot()
+        events = [(CHANGED, path) for path, state in current.items() if self.snapshot.get(path) != state]
+        events.extend((DELETED, path) for path in self.snapshot.keys() - current.keys())
+        self.snapshot = current
+        return events
+
+    def close(self) -> None:
+        """Nothing to release for polling."""
+
+
+def create_watcher(roots: Iterable[Path], exclude_dirs: Iterable[Path] = (),
+                   poll_interval: float = 1.0, force_polling: bool = False):
+    """
+    Create an inotify watcher, falling back to polling where unavailable.
+
+    Args:
+        roots (Iterable[Path]): Directories to watch recursively
+        exclude_dirs (Iterable[Path]): Directories to ignore
+        poll_interval (float): Polling interval for the fallback
+        force_polling (bool): Skip inotify entirely
+
+    Returns:
+        InotifyWatcher or PollingWatcher
+    """
+    roots = list(roots)
+    exclude_dirs = list(exclude_dirs)
+    if not force_polling:
+        try:
+            return InotifyWatcher(roots, exclude_dirs)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️  inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(roots, exclude_dirs, poll_interval)
+
+
+def wait_for_changes(watcher, debounce: float, max_wait: Optional[float] = None) -> Dict[Path, str]:
+    """
+    Block until events arrive, then collect them until debounce seconds of quiet.
+
+    Args:
+        watcher: InotifyWatcher or PollingWatcher
+        debounce (float): Quiet period that ends a batch
+        max_wait (float): Upper bound on batch collection once started
+
+    Returns:
+        Dict[Path, str]: Latest event kind per path
+    """
+    pending: Dict[Path, str] = {}
+    started = None
+    while True:
+        events = watcher.read_events(debounce if pending else 3600)
+        for kind, path in events:
+            pending[path] = kind
+        if pending and started is None:
+            started = time.monotonic()
+        if pending and (not events or (max_wait and time.monotonic() - started >= max_wait)):
+            return pending
@@ -0,0 +1,610 @@
+#!/usr/bin/env python3
+"""
+Encoder Job Supervisor for RadioFusion Image Optimizer
+Bounds encoder jobs with timeouts, retries, quarantine, atomic outputs and clean cancellation.
+"""
+
+import os
+import json
+import time
+import signal
+import threading
+import contextlib
+import subprocess
+from concurrent.futures import CancelledError, Executor, Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from memory_budget import DEFAULT_MEMORY_BUDGET_MB, MB, MemoryBudget
+
+# Wall-clock budget for one attempt at one image, covering every encoder
+# process it starts
+DEFAULT_TIMEOUT = 120.0
+
+# Extra attempts after a failure, and the delay before the first of them
+# (doubled for each further attempt)
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 1.0
+
+# Seconds a cancelled or timed-out encoder gets to exit after SIGTERM; also
+# how long a pool job may outlive its deadline to report the timeout itself
+KILL_GRACE = 2.0
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once the supervisor has been cancelled."""
+
+
+class JobTimeout(Exception):
+    """Raised inside a Pillow worker when its job runs past the deadline."""
+
+
+def ignore_interrupts() -> None:
+    """
+    Process pool initializer: leave SIGINT to the parent process.
+
+    A Ctrl+C otherwise reaches every pool worker at once and breaks the pool
+    mid-encode; the parent cancels queued work itself.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def raise_timeout(signum: int, frame: Any) -> None:
+    """SIGALRM handler for call_with_timeout."""
+    raise JobTimeout("timed out")
+
+
+def call_with_timeout(timeout: Optional[float], func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a function in a pool worker, interrupting it with SIGALRM after timeout seconds.
+
+    A timeout usually surfaces as the worker function's own failure result;
+    if it strikes outside the function's handlers JobTimeout propagates.
+    Without setitimer (Windows) no limit applies.
+
+    Args:
+        timeout (Optional[float]): Seconds allowed, None for no limit
+        func (Callable[..., Any]): Picklable module-level function
+        *args (Any): Arguments for func
+
+    Returns:
+        Any: Result of func
+    """
+    if not timeout or not hasattr(signal, 'setitimer'):
+        return func(*args)
+    previous = signal.signal(signal.SIGALRM, raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return func(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def temp_output_path(output_path: Path) -> Path:
+    """
+    Get the hidden temporary path an output is encoded to before it is renamed into place.
+
+    The suffix is kept last so encoders still pick the format from it.
+
+    Args:
+        output_path (Path): Final output path
+
+    Returns:
+        Path: Temporary path next to the output, unique per process and thread
+    """
+    return output_path.with_name(f".{output_path.stem}.{os.getpid()}.{threading.get_ident()}.tmp"
+                                 f"{output_path.suffix}")
+
+
+class AtomicOutputs:
+    """
+    Temporary paths for a set of outputs, renamed over the real ones only on commit.
+
+    A failed, timed-out or cancelled encode therefore never replaces a good
+    output with a partial one. Leftover temporary files are removed on exit.
+    """
+
+    def __init__(self, outputs: Iterable[Path]):
+        """
+        Initialize the AtomicOutputs.
+
+        Args:
+            outputs (Iterable[Path]): Final output paths
+        """
+        self.outputs = list(outputs)
+        self.temps = [temp_output_path(output) for output in self.outputs]
+
+    def __enter__(self) -> 'AtomicOutputs':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.discard()
+
+    def commit(self) -> List[Path]:
+        """
+        Rename every written temporary file over its output.
+
+        Outputs whose temporary file was not written (a format the encoder
+        could not produce) are removed, so they never outlive their source.
+
+        Returns:
+            List[Path]: Outputs now in place
+        """
+        committed = []
+        for output, temp in zip(self.outputs, self.temps):
+            if temp.exists():
+                os.replace(temp, output)
+                committed.append(output)
+            elif output.exists():
+                output.unlink()
+        return committed
+
+    def discard(self) -> None:
+        """Remove temporary files that were not committed."""
+        for temp in self.temps:
+            try:
+                temp.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class Quarantine:
+    """
+    Inputs that failed every attempt, skipped until they change on disk.
+
+    Entries are keyed on the resolved path and remember the size and
+    modification time at failure; editing or replacing the file releases it.
+    With a file path the quarantine persists across runs as JSON.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Initialize the Quarantine.
+
+        Args:
+            path (Path): JSON file to load and save, None to keep it in memory
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if path is not None and path.exists():
+            try:
+                with open(path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable quarantine file {path}: {e}")
+
+    @staticmethod
+    def get_key(input_path: Path) -> str:
+        """Quarantine key for an input."""
+        return str(input_path.resolve())
+
+    def contains(self, input_path: Path, source_stat: os.stat_result) -> bool:
+        """
+        Check whether an input is quarantined in its current state.
+
+        Args:
+            input_path (Path): Input image
+            source_stat (os.stat_result): Current stat of the input
+
+        Returns:
+            bool: True if the input failed before and has not changed since
+        """
+        with self.lock:
+            entry = self.entries.get(self.get_key(input_path))
+        return (entry is not None and entry['size'] == source_stat.st_size and
+                entry['mtime_ns'] == source_stat.st_mtime_ns)
+
+    def add(self, input_path: Path, source_stat: os.stat_result, attempts: int) -> None:
+        """
+        Quarantine an input after its final failed attempt.
+
+        Args:
+            input_path (Path): Input image
+            source_stat (os.stat_result): Stat of the input that failed
+            attempts (int): Attempts made
+        """
+        with self.lock:
+            self.entries[self.get_key(input_path)] = {
+                'size': source_stat.st_size,
+                'mtime_ns': source_stat.st_mtime_ns,
+                'attempts': attempts,
+                'quarantined_at': time.time()
+            }
+            self.save()
+
+    def release(self, input_path: Path) -> None:
+        """
+        Drop an input from the quarantine (e.g. after it converted successfully).
+
+        Args:
+            input_path (Path): Input image
+        """
+        with self.lock:
+            if self.entries.pop(self.get_key(input_path), None) is not None:
+                self.save()
+
+    def save(self) -> None:
+        """Write the quarantine file atomically (caller holds the lock)."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+class JobSupervisor:
+    """
+    Runs encoder jobs with a wall-clock deadline per attempt, retries with
+    exponential backoff, quarantine of repeat failures and cancellation.
+
+    One supervisor is shared by every optimizer in a run. Encoder processes
+    are started in their own session so a terminal Ctrl+C reaches only this
+    process, which then terminates them in order. Its memory budget admits
+    encodes by their estimated decode memory.
+    """
+
+    def __init__(self, timeout: Optional[float] = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF, quarantine: Optional[Quarantine] = None,
+                 retry_quarantined: bool = False, memory: Optional[MemoryBudget] = None):
+        """
+        Initialize the JobSupervisor.
+
+        Args:
+            timeout (Optional[float]): Seconds per attempt, None for no limit
+                (default: DEFAULT_TIMEOUT)
+            retries (int): Extra attempts after a failure (default: DEFAULT_RETRIES)
+            backoff (float): Seconds before the first retry, doubled for each
+                further one (default: DEFAULT_BACKOFF)
+            quarantine (Quarantine): Where failed inputs are recorded
+                (default: an in-memory quarantine)
+            retry_quarantined (bool): Attempt quarantined inputs again
+            memory (MemoryBudget): Decode memory shared by running encodes
+                (default: DEFAULT_MEMORY_BUDGET_MB)
+
+        Raises:
+            ValueError: If a setting is out of range
+        """
+        if timeout is not None and timeout <= 0:
+            raise ValueError(f"Job timeout must be positive, got {timeout}")
+        if retries < 0 or backoff < 0:
+            raise ValueError("Job retries and backoff must not be negative")
+
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.quarantine = quarantine if quarantine is not None else Quarantine()
+        self.retry_quarantined = retry_quarantined
+        self.memory = memory if memory is not None else MemoryBudget()
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.processes: set = set()
+        self.local = threading.local()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], root: Path = Path('.')) -> 'JobSupervisor':
+        """
+        Build a supervisor from a 'supervisor' configuration block.
+
+        Args:
+            config (Optional[Dict[str, Any]]): Block with 'timeout_seconds',
+                'retries', 'backoff_seconds', 'quarantine_file',
+                'retry_quarantined' and 'memory_budget_mb' (all optional;
+                a null memory budget means no limit)
+            root (Path): Directory a relative quarantine_file is resolved against
+
+        Returns:
+            JobSupervisor: Configured supervisor
+
+        Raises:
+            ValueError: If a setting is out of range
+        """
+        config = config or {}
+        quarantine_file = config.get('quarantine_file')
+        memory_budget_mb = config.get('memory_budget_mb', DEFAULT_MEMORY_BUDGET_MB)
+        return cls(timeout=config.get('timeout_seconds', DEFAULT_TIMEOUT),
+                   retries=config.get('retries', DEFAULT_RETRIES),
+                   backoff=config.get('backoff_seconds', DEFAULT_BACKOFF),
+                   quarantine=Quarantine(root / quarantine_file) if quarantine_file else None,
+                   retry_quarantined=config.get('retry_quarantined', False),
+                   memory=MemoryBudget(None if memory_budget_mb is None else int(memory_budget_mb * MB)))
+
+    def is_quarantined(self, input_path: Path, source_stat: os.stat_result) -> bool:
+        """
+        Check whether an input should be skipped this run.
+
+        Args:
+            input_path (Path): Input image
+            source_stat (os.stat_result): Current stat of the input
+
+        Returns:
+            bool: True if the input is quarantined and retries are not forced
+        """
+        return not self.retry_quarantined and self.quarantine.contains(input_path, source_stat)
+
+    def check_cancelled(self) -> None:
+        """
+        Raise JobCancelled if the run has been cancelled.
+
+        Raises:
+            JobCancelled: If cancel() was called
+        """
+        if self.cancelled.is_set():
+            raise JobCancelled()
+
+    def reserve_memory(self, nbytes: int) -> contextlib.AbstractContextManager:
+        """
+        Wait until a job's estimated decode memory fits the budget, and hold it.
+
+        Args:
+            nbytes (int): Estimated bytes of the job
+
+        Returns:
+            contextlib.AbstractContextManager: Reservation released on exit
+
+        Raises:
+            JobCancelled: If the run is cancelled while waiting
+        """
+        return self.memory.reserve(nbytes, self.check_cancelled)
+
+    def remaining(self) -> Optional[float]:
+        """
+        Seconds left in the calling thread's current attempt.
+
+        Returns:
+            Optional[float]: Remaining time (at least a moment), or the full
+            timeout outside an attempt; None when unlimited
+        """
+        deadline = getattr(self.local, 'deadline', None)
+        if deadline is None:
+            return self.timeout
+        return max(0.01, deadline - time.monotonic())
+
+    def attempt(self, name: str, job: Callable[[], bool]) -> bool:
+        """
+        Run a job until it succeeds, retrying failures with exponential backoff.
+
+        Each attempt gets a fresh deadline, which bounds every encoder run
+        through run() and submit() inside it.
+
+        Args:
+            name (str): Job name for messages, e.g. the input file name
+            job (Callable[[], bool]): Job returning True on success
+
+        Returns:
+            bool: True if an attempt succeeded
+
+        Raises:
+            JobCancelled: If the run is cancelled before or during an attempt
+        """
+        for attempt in range(self.retries + 1):
+            self.check_cancelled()
+            self.local.deadline = None if self.timeout is None else time.monotonic() + self.timeout
+            try:
+                if job():
+                    return True
+            finally:
+                self.local.deadline = None
+            self.check_cancelled()
+
+            if attempt < self.retries:
+                delay = self.backoff * 2 ** attempt
+                print(f"🔁 Retrying {name} in {delay:.1f}s (attempt {attempt + 2}/{self.retries + 1})")
+                if self.cancelled.wait(delay):
+                    raise JobCancelled()
+        return False
+
+    def run(self, cmd: List[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """
+        Run an encoder command within the current attempt's deadline.
+
+        Args:
+            cmd (List[str]): Command to run
+            timeout (Optional[float]): Seconds allowed instead of what is left
+                of the attempt, e.g. for a batch shared by several attempts
+
+        Returns:
+            subprocess.CompletedProcess: Finished process with captured text output
+
+        Raises:
+            subprocess.CalledProcessError: If the command exits non-zero
+            subprocess.TimeoutExpired: If the deadline passes; the process is killed
+            JobCancelled: If the run is cancelled; the process is killed
+        """
+        self.check_cancelled()
+        if timeout is None:
+            timeout = self.remaining()
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, start_new_session=True)
+        with self.lock:
+            self.processes.add(process)
+        try:
+            # cancel() may have run between the check above and registering
+            if self.cancelled.is_set():
+                self.terminate(process)
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self.terminate(process)
+                process.communicate()
+                raise subprocess.TimeoutExpired(cmd, timeout)
+        finally:
+            with self.lock:
+                self.processes.discard(process)
+
+        self.check_cancelled()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+    def submit(self, pool: Executor, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a Pillow worker function in a process pool within the current deadline.
+
+        The worker is interrupted by SIGALRM when the deadline passes, so it
+        can report the failure itself. A decode or encode stuck in C code
+        never sees the signal, so the caller also stops waiting KILL_GRACE
+        later; a WorkerPool then kills its workers and starts fresh ones.
+        Jobs that were running beside the hung one are submitted again
+        within their own deadlines. A job already running in the pool is
+        allowed to finish on cancellation; its outputs are still staged, so
+        nothing partial is published.
+
+        Args:
+            pool (Executor): Process pool, a WorkerPool to recover from hung jobs
+            func (Callable[..., Any]): Picklable module-level worker function
+            *args (Any): Arguments for func
+
+        Returns:
+            Any: Result of func
+
+        Raises:
+            subprocess.TimeoutExpired: If the deadline passed before func could
+                report the failure itself
+            JobCancelled: If the run was cancelled before the job started
+        """
+        while True:
+            self.check_cancelled()
+            timeout = self.remaining()
+            if isinstance(pool, WorkerPool):
+                generation, future = pool.start(call_with_timeout, timeout, func, *args)
+            else:
+                generation, future = None, pool.submit(call_with_timeout, timeout, func, *args)
+            try:
+                return future.result(timeout=None if timeout is None else timeout + KILL_GRACE)
+            except JobTimeout:
+                raise subprocess.TimeoutExpired(func.__name__, timeout)
+            except FutureTimeout:
+                if generation is not None:
+                    pool.recycle(generation)
+                raise subprocess.TimeoutExpired(func.__name__, timeout)
+            except (BrokenProcessPool, CancelledError):
+                # Killed or dropped with another job's hung worker: run again on the new pool
+                if generation is None or pool.generation == generation:
+                    raise
+
+    @staticmethod
+    def terminate(process: subprocess.Popen) -> None:
+        """Terminate an encoder process, killing it if it ignores SIGTERM."""
+        if process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(KILL_GRACE)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    def cancel(self) -> None:
+        """Cancel the run: refuse new jobs and terminate every running encoder process."""
+        self.cancelled.set()
+        with self.lock:
+            processes = list(self.processes)
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+
+
+class WorkerPool(Executor):
+    """
+    Process pool for Pillow jobs that starts over when a job hangs.
+
+    JobSupervisor.submit() recycles it when a job outlives its deadline:
+    the workers are killed and a new pool takes their place. Every pool
+    gets a generation number, so a job knows whether the pool it ran in
+    was replaced.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize the WorkerPool.
+
+        Args:
+            max_workers (Optional[int]): Worker processes (default: CPU count)
+        """
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.executor = self.create_executor()
+
+    def create_executor(self) -> ProcessPoolExecutor:
+        """Start a pool whose workers leave SIGINT to the parent."""
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=ignore_interrupts)
+
+    def start(self, func: Callable[..., Any], *args: Any) -> Tuple[int, Future]:
+        """
+        Submit a job to the current pool.
+
+        Returns:
+            Tuple[int, Future]: Generation of the pool the job went to, and its future
+        """
+        with self.lock:
+            return self.generation, self.executor.submit(func, *args)
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Submit a job to the current pool."""
+        with self.lock:
+            return self.executor.submit(func, *args, **kwargs)
+
+    def recycle(self, generation: int) -> None:
+        """
+        Kill the workers of a pool with a hung job and start a new pool.
+
+        Args:
+            generation (int): Generation the hung job ran in; a pool that was
+                already replaced is left alone
+        """
+        with self.lock:
+            if generation != self.generation:
+                return
+            hung = self.executor
+            self.executor = self.create_executor()
+            self.generation += 1
+        print("♻️  Restarting the Pillow worker pool after a hung job")
+        # ProcessPoolExecutor cannot cancel a running job; killing its
+        # workers fails the running futures with BrokenProcessPool
+        for process in list((getattr(hung, '_processes', None) or {}).values()):
+            process.kill()
+        hung.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """Shut down the current pool."""
+        with self.lock:
+            executor = self.executor
+        executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+@contextlib.contextmanager
+def handle_signals(supervisor: JobSupervisor) -> Iterator[None]:
+    """
+    Cancel in-flight jobs on SIGINT/SIGTERM, then raise KeyboardInterrupt in the main thread.
+
+    A second signal while cancelling falls through to the default handler.
+    Outside the main thread this is a no-op.
+
+    Args:
+        supervisor (JobSupervisor): Supervisor whose jobs are cancelled
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def handler(signum: int, frame: Any) -> None:
+        if supervisor.cancelled.is_set():
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+            return
+        print(f"\n🛑 {signal.Signals(signum).name} received, cancelling in-flight jobs...")
+        supervisor.cancel()
+        raise KeyboardInterrupt
+
+    signals = [signal.SIGINT, signal.SIGTERM]
+    previous = {signum: signal.signal(signum, handler) for signum in signals}
+    try:
+        yield
+    finally:
+        for signum, old_handler in previous.items():
+            signal.signal(signum, old_handler)
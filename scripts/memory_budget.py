@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Memory Budget for RadioFusion Image Optimizer
+Estimates decode memory from image headers, admits encodes against a global
+budget and applies the configured source file size limits.
+"""
+
+import threading
+import contextlib
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, NamedTuple, Optional
+
+# Decode memory allowed across every running encode in a run
+DEFAULT_MEMORY_BUDGET_MB = 2048
+
+# Long edge that sources above compress_above_mb are downscaled to
+DEFAULT_DOWNSCALE_DIMENSION = 4096
+
+# Bytes per decoded pixel (RGBA), and the full-size copies alive during an
+# encode: the decoded frame, its mode conversion and the encoder's buffers
+BYTES_PER_PIXEL = 4
+WORKING_COPIES = 3
+
+# Assumed decoded/compressed size ratio when the header cannot be read
+UNKNOWN_EXPANSION = 10
+
+# Seconds between cancellation checks while waiting for memory
+WAIT_INTERVAL = 0.2
+
+MB = 1024 * 1024
+
+
+def estimate_decode_bytes(info: Optional[Dict[str, Any]], file_size: int) -> int:
+    """
+    Estimate the peak memory of decoding and encoding one image.
+
+    Args:
+        info (Optional[Dict[str, Any]]): probe_image result, or None if the
+            header could not be read
+        file_size (int): Size of the source file in bytes
+
+    Returns:
+        int: Estimated bytes
+    """
+    if info is None or info['width'] <= 0 or info['height'] <= 0:
+        return file_size * UNKNOWN_EXPANSION
+    return info['width'] * info['height'] * BYTES_PER_PIXEL * WORKING_COPIES
+
+
+class FileSizeLimits(NamedTuple):
+    """Source file size limits; None disables a limit."""
+    max_bytes: Optional[int] = None
+    warn_bytes: Optional[int] = None
+    compress_bytes: Optional[int] = None
+    max_dimension: int = DEFAULT_DOWNSCALE_DIMENSION
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'FileSizeLimits':
+        """
+        Build limits from a 'file_size_limits' configuration block.
+
+        Args:
+            config (Optional[Dict[str, Any]]): Block with 'max_file_size_mb',
+                'warn_file_size_mb', 'compress_above_mb' and
+                'downscale_max_dimension' (all optional)
+
+        Returns:
+            FileSizeLimits: Configured limits
+
+        Raises:
+            ValueError: If a limit is not positive
+        """
+        config = config or {}
+        limits = {}
+        for key, field in (('max_file_size_mb', 'max_bytes'), ('warn_file_size_mb', 'warn_bytes'),
+                           ('compress_above_mb', 'compress_bytes')):
+            value = config.get(key)
+            if value is not None and value <= 0:
+                raise ValueError(f"'{key}' must be positive, got {value}")
+            limits[field] = None if value is None else int(value * MB)
+        max_dimension = config.get('downscale_max_dimension', DEFAULT_DOWNSCALE_DIMENSION)
+        if max_dimension < 1:
+            raise ValueError(f"'downscale_max_dimension' must be at least 1, got {max_dimension}")
+        return cls(max_dimension=max_dimension, **limits)
+
+    def is_too_large(self, file_size: int) -> bool:
+        """Check whether a source is over max_file_size_mb and must be skipped."""
+        return self.max_bytes is not None and file_size > self.max_bytes
+
+    def is_large(self, file_size: int) -> bool:
+        """Check whether a source is over warn_file_size_mb."""
+        return self.warn_bytes is not None and file_size > self.warn_bytes
+
+    def get_downscale_width(self, file_size: int, info: Optional[Dict[str, Any]]) -> Optional[int]:
+        """
+        Get the width a source is downscaled to before encoding.
+
+        Only sources over compress_above_mb whose long edge exceeds
+        max_dimension are downscaled; the aspect ratio is kept.
+
+        Args:
+            file_size (int): Size of the source file in bytes
+            info (Optional[Dict[str, Any]]): probe_image result
+
+        Returns:
+            Optional[int]: Target width, or None to encode at full size
+        """
+        if self.compress_bytes is None or file_size <= self.compress_bytes or info is None:
+            return None
+        long_edge = max(info['width'], info['height'])
+        if long_edge <= self.max_dimension:
+            return None
+        return max(1, info['width'] * self.max_dimension // long_edge)
+
+
+class MemoryBudget:
+    """
+    Admits encodes while their estimated decode memory fits a global budget.
+
+    Jobs are admitted in arrival order, so a large image waiting for room is
+    not starved by small ones behind it; large images therefore run with
+    fewer neighbours. A job larger than the whole budget runs alone.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = DEFAULT_MEMORY_BUDGET_MB * MB):
+        """
+        Initialize the MemoryBudget.
+
+        Args:
+            budget_bytes (Optional[int]): Bytes shared by running jobs, None
+                for no limit (default: DEFAULT_MEMORY_BUDGET_MB)
+
+        Raises:
+            ValueError: If the budget is not positive
+        """
+        if budget_bytes is not None and budget_bytes <= 0:
+            raise ValueError(f"Memory budget must be positive, got {budget_bytes}")
+        self.budget = budget_bytes
+        self.in_use = 0
+        self.peak = 0
+        self.waiting: Deque[object] = deque()
+        self.condition = threading.Condition()
+
+    def acquire(self, nbytes: int, check_cancelled: Optional[Callable[[], None]] = None) -> int:
+        """
+        Block until a job's memory fits the budget and reserve it.
+
+        Args:
+            nbytes (int): Estimated bytes of the job
+            check_cancelled (Callable[[], None]): Called while waiting; raises
+                to abandon the wait (e.g. JobSupervisor.check_cancelled)
+
+        Returns:
+            int: Bytes reserved, to be passed to release()
+        """
+        if self.budget is None:
+            return 0
+        nbytes = min(nbytes, self.budget)
+        ticket = object()
+        with self.condition:
+            self.waiting.append(ticket)
+            try:
+                while (self.waiting[0] is not ticket or
+                       (self.in_use > 0 and self.in_use + nbytes > self.budget)):
+                    if check_cancelled is not None:
+                        check_cancelled()
+                    self.condition.wait(WAIT_INTERVAL)
+                self.in_use += nbytes
+                self.peak = max(self.peak, self.in_use)
+            finally:
+                self.waiting.remove(ticket)
+                self.condition.notify_all()
+        return nbytes
+
+    def release(self, nbytes: int) -> None:
+        """Return bytes reserved by acquire()."""
+        if not nbytes:
+            return
+        with self.condition:
+            self.in_use -= nbytes
+            self.condition.notify_all()
+
+    @contextlib.contextmanager
+    def reserve(self, nbytes: int, check_cancelled: Optional[Callable[[], None]] = None) -> Iterator[int]:
+        """Hold a reservation for the duration of a block."""
+        reserved = self.acquire(nbytes, check_cancelled)
+        try:
+            yield reserved
+        finally:
+            self.release(reserved)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Optimization Cache for RadioFusion Website
+Content-addressed store of encoded images, indexed in a single SQLite database.
+"""
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class OptimizationCache:
+    """
+    Persistent cache of encoder outputs keyed on source content and encoder settings.
+
+    Entries survive fresh CI checkouts because they never depend on file
+    modification times. Stored outputs live under ``objects/`` and are
+    materialized by hardlink (or copy across filesystems) on a cache hit.
+    """
+
+    INDEX_NAME = 'index.sqlite3'
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, cache_dir: Path, max_age_days: float = 30, max_size_mb: Optional[float] = None):
+        """
+        Initialize the OptimizationCache.
+
+        Args:
+            cache_dir (Path): Cache directory
+            max_age_days (float): Entries older than this are evicted (default: 30)
+            max_size_mb (float): Size bound for stored outputs; least recently
+                used entries are evicted beyond it (default: unbounded)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / 'objects'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age_days = max_age_days
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        self.db = sqlite3.connect(str(self.cache_dir / self.INDEX_NAME),
+                                  timeout=30, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                source_hash TEXT NOT NULL,
+                params TEXT NOT NULL,
+                object TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        self.db.commit()
+
+    @classmethod
+    def hash_file(cls, file_path: Path) -> str:
+        """
+        Get the SHA-256 content hash of a file.
+
+        Args:
+            file_path (Path): File to hash
+
+        Returns:
+            str: Hex digest
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(cls.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(source_hash: str, **params: Any) -> str:
+        """
+        Build a cache key from a source hash and encoder parameters.
+
+        Args:
+            source_hash (str): Content hash of the source image
+            **params (Any): Encoder, quality, lossless, resize and any other
+                setting that affects the output bytes
+
+        Returns:
+            str: Hex cache key
+        """
+        payload = json.dumps({'source': source_hash, **params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_object_path(self, key: str, suffix: str) -> Path:
+        """Get the storage path for a cache key."""
+        return self.objects_dir / key[:2] / f"{key}{suffix}"
+
+    def resolve_object(self, stored: str) -> Path:
+        """
+        Get the path of an object as stored in the index.
+
+        Objects are indexed relative to the cache directory, so the index stays
+        valid wherever the cache is opened from; absolute paths from older
+        indexes are used as they are.
+        """
+        return self.cache_dir / stored
+
+    def fetch(self, key: str, output_path: Path) -> bool:
+        """
+        Materialize a cached output at output_path.
+
+        Args:
+            key (str): Cache key
+            output_path (Path): Where the output should appear
+
+        Returns:
+            bool: True on a cache hit
+        """
+        with self.lock:
+            row = self.db.execute('SELECT object, created_at FROM entries WHERE key = ?',
+                                  (key,)).fetchone()
+            object_path = self.resolve_object(row[0]) if row else None
+
+            if row is None or self.is_expired(row[1]) or not object_path.exists():
+                if row is not None:
+                    self.remove_entry(key, object_path)
+                self.stats['misses'] += 1
+                return False
+
+            self.db.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+            self.db.commit()
+            self.stats['hits'] += 1
+
+        self.materialize(object_path, output_path)
+        return True
+
+    def store(self, key: str, source_hash: str, output_path: Path, params: Dict[str, Any] = None) -> None:
+        """
+        Store an encoder output under a cache key.
+
+        Args:
+            key (str): Cache key
+            source_hash (str): Content hash of the source image
+            output_path (Path): Freshly encoded output to store
+            params (Dict[str, Any]): Encoder parameters, kept for inspection
+        """
+        object_path = self.get_object_path(key, output_path.suffix)
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Copy (not link) into the store so later in-place writes to the output
+        # can never corrupt the cached bytes, then publish atomically
+        temp_path = object_path.with_name(f".{object_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copyfile(output_path, temp_path)
+        os.replace(temp_path, object_path)
+
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, source_hash, json.dumps(params or {}, sort_keys=True, default=str),
+                 object_path.relative_to(self.cache_dir).as_posix(), object_path.stat().st_size, now, now)
+            )
+            self.db.commit()
+            self.stats['stores'] += 1
+
+    def materialize(self, object_path: Path, output_path: Path) -> None:
+        """
+        Hardlink a stored object to output_path, copying if linking fails.
+
+        Args:
+            object_path (Path): Stored object
+            output_path (Path): Destination path
+        """
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if output_path.exists() or output_path.is_symlink():
+            output_path.unlink()
+        try:
+            os.link(object_path, output_path)
+        except OSError:
+            shutil.copyfile(object_path, output_path)
+        # Mark the output as fresh so mtime-based skips see it as up to date
+        os.utime(output_path)
+
+    def is_expired(self, created_at: float) -> bool:
+        """Check whether an entry is older than max_age_days."""
+        return (time.time() - created_at) > self.max_age_days * 24 * 3600
+
+    def remove_entry(self, key: str, object_path: Path) -> None:
+        """Delete an entry and its stored object (caller holds the lock)."""
+        self.db.execute('DELETE FROM entries WHERE key = ?', (key,))
+        self.db.commit()
+        try:
+            object_path.unlink()
+        except OSError:
+            pass
+        self.stats['evictions'] += 1
+
+    def evict(self) -> int:
+        """
+        Evict expired entries, then least recently used ones above the size bound.
+
+        Returns:
+            int: Number of evicted entries
+        """
+        evicted = 0
+        cutoff = time.time() - self.max_age_days * 24 * 3600
+
+        with self.lock:
+            for key, obj in self.db.execute('SELECT key, object FROM entries WHERE created_at < ?',
+                                            (cutoff,)).fetchall():
+                self.remove_entry(key, self.resolve_object(obj))
+                evicted += 1
+
+            if self.max_size_bytes is not None:
+                total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+                if total > self.max_size_bytes:
+                    rows = self.db.execute(
+                        'SELECT key, object, size FROM entries ORDER BY last_access ASC'
+                    ).fetchall()
+                    for key, obj, size in rows:
+                        if total <= self.max_size_bytes:
+                            break
+                        self.remove_entry(key, self.resolve_object(obj))
+                        total -= size
+                        evicted += 1
+
+        return evicted
+
+    def get_size(self) -> int:
+        """Get the total size of stored outputs in bytes."""
+        with self.lock:
+            return self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def close(self) -> None:
+        """Close the index database."""
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Optimizer Configuration for RadioFusion Image Optimizer
+Validated, immutable configuration shared in memory by the build, batch and
+single-file optimizers.
+"""
+
+import copy
+import json
+import hashlib
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from ffmpeg_batch import DEFAULT_CHUNK_INPUTS, DEFAULT_CHUNK_PIXELS, DEFAULT_LINGER_MS, ChunkLimits
+from image_dedup import DEDUP_MODES, DEFAULT_MAX_DISTANCE
+from image_placeholders import DEFAULT_PLACEHOLDER_SIZE, MAX_PLACEHOLDER_SIZE
+from image_profiles import DEFAULT_PROFILE_RULES, DEFAULT_PROFILES
+from job_supervisor import DEFAULT_BACKOFF, DEFAULT_RETRIES, DEFAULT_TIMEOUT
+from memory_budget import DEFAULT_DOWNSCALE_DIMENSION, DEFAULT_MEMORY_BUDGET_MB, FileSizeLimits
+
+# How directories are processed: a file-level thread pool, or one asyncio
+# pipeline streaming files from every directory
+EXECUTION_MODES = ('threads', 'asyncio')
+
+# Paths never worth scanning; user patterns are added to these, not swapped in
+DEFAULT_EXCLUDE_PATTERNS = [
+    "*.webp",
+    "**/node_modules/**",
+    "**/venv/**",
+    "**/.git/**",
+    "**/dist/**",
+    "**/build/**"
+]
+
+# Keys whose lists extend the defaults instead of replacing them
+ADDITIVE_KEYS = ('exclude_patterns',)
+
+# Settings that change encoded bytes; their fingerprint identifies outputs
+ENCODER_KEYS = ('quality', 'lossless', 'engine', 'output_formats', 'adaptive_quality',
+                'use_profiles', 'optimization_settings', 'profile_rules', 'file_size_limits')
+
+DEFAULT_CONFIG = {
+    "quality": 85,
+    "lossless": False,
+    "max_workers": 4,
+    "file_workers": None,
+    "execution": "threads",
+    "async_concurrency": None,
+    "manifest_file": None,
+    "state_file": None,
+    "engine": "ffmpeg",
+    "output_formats": ["webp"],
+    "recursive": True,
+    "preserve_structure": True,
+    "create_backup": False,
+    "directories": [
+        {
+            "input": "frontend/src/assets/images",
+            "output": "frontend/src/assets/images/webp",
+            "quality": 85
+        },
+        {
+            "input": "frontend/public/images",
+            "output": "frontend/public/images/webp",
+            "quality": 90
+        }
+    ],
+    "exclude_patterns": DEFAULT_EXCLUDE_PATTERNS,
+    "use_profiles": True,
+    "optimization_settings": DEFAULT_PROFILES,
+    "profile_rules": DEFAULT_PROFILE_RULES,
+    "adaptive_quality": {
+        "enabled": False,
+        "target_ssim": 0.98,
+        "max_bytes": None,
+        "min_quality": 40,
+        "probe_width": 512
+    },
+    "cache": {
+        "enabled": False,
+        "cache_dir": ".image_cache",
+        "max_age_days": 30,
+        "max_size_mb": 512
+    },
+    "dedup": {
+        "enabled": False,
+        "mode": "hardlink",
+        "perceptual": False,
+        "max_distance": DEFAULT_MAX_DISTANCE
+    },
+    "placeholders": {
+        "enabled": False,
+        "size": DEFAULT_PLACEHOLDER_SIZE
+    },
+    "file_size_limits": {
+        "max_file_size_mb": None,
+        "warn_file_size_mb": None,
+        "compress_above_mb": None,
+        "downscale_max_dimension": DEFAULT_DOWNSCALE_DIMENSION
+    },
+    "supervisor": {
+        "timeout_seconds": DEFAULT_TIMEOUT,
+        "retries": DEFAULT_RETRIES,
+        "backoff_seconds": DEFAULT_BACKOFF,
+        "quarantine_file": ".image_quarantine.json",
+        "memory_budget_mb": DEFAULT_MEMORY_BUDGET_MB
+    },
+    "ffmpeg_batch": {
+        "enabled": False,
+        "max_pixels": DEFAULT_CHUNK_PIXELS,
+        "max_inputs": DEFAULT_CHUNK_INPUTS,
+        "linger_ms": DEFAULT_LINGER_MS
+    }
+}
+
+# Accepted value types per top-level key (None: the key may be null)
+CONFIG_TYPES = {
+    'quality': (int,),
+    'lossless': (bool,),
+    'max_workers': (int,),
+    'file_workers': (int, None),
+    'execution': (str,),
+    'async_concurrency': (int, None),
+    'manifest_file': (str, None),
+    'state_file': (str, None),
+    'engine': (str,),
+    'output_formats': (list,),
+    'recursive': (bool,),
+    'preserve_structure': (bool,),
+    'create_backup': (bool,),
+    'directories': (list,),
+    'exclude_patterns': (list,),
+    'use_profiles': (bool,),
+    'optimization_settings': (dict,),
+    'profile_rules': (list,),
+    'adaptive_quality': (dict, None),
+    'cache': (dict,),
+    'dedup': (dict,),
+    'placeholders': (dict,),
+    'file_size_limits': (dict,),
+    'supervisor': (dict,),
+    'ffmpeg_batch': (dict,)
+}
+
+
+def deep_merge(base: Mapping[str, Any], override: Mapping[str, Any],
+               additive: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """
+    Merge an override into a base configuration, recursing into nested blocks.
+
+    Nested dicts merge key by key; lists and scalars in the override replace
+    the base value, except for top-level additive keys, whose lists are
+    appended to the base list without duplicates.
+
+    Args:
+        base (Mapping[str, Any]): Base configuration (left unchanged)
+        override (Mapping[str, Any]): Values taking precedence
+        additive (Tuple[str, ...]): Top-level keys whose lists extend the base
+
+    Returns:
+        Dict[str, Any]: Merged configuration
+    """
+    merged = thaw(base)
+    for key, value in override.items():
+        current = merged.get(key)
+        if isinstance(current, dict) and isinstance(value, Mapping):
+            merged[key] = deep_merge(current, value)
+        elif key in additive and isinstance(current, list) and isinstance(value, (list, tuple)):
+            merged[key] = current + [item for item in thaw(value) if item not in current]
+        else:
+            merged[key] = thaw(value)
+    return merged
+
+
+def freeze(value: Any) -> Any:
+    """Turn nested dicts and lists into read-only mappings and tuples."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Turn frozen mappings and tuples back into plain (deep-copied) dicts and lists."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return copy.copy(value)
+
+
+class OptimizerConfig(Mapping):
+    """
+    Batch optimizer configuration: merged over the defaults, validated once
+    and then read-only.
+
+    Reads work like the plain dict it replaces (config['quality'],
+    config.get('cache')), with nested blocks returned as read-only mappings
+    and tuples. Changes make a new config through merge(). Equal configs
+    hash equally, and fingerprint() gives a stable digest for cache keys.
+    """
+
+    def __init__(self, values: Optional[Mapping[str, Any]] = None):
+        """
+        Initialize the OptimizerConfig.
+
+        Args:
+            values (Mapping[str, Any]): User settings, deep-merged over
+                DEFAULT_CONFIG (default: the defaults alone)
+
+        Raises:
+            ValueError: If a setting has the wrong type or is out of range
+        """
+        self.set_values(deep_merge(DEFAULT_CONFIG, values or {}, ADDITIVE_KEYS))
+
+    @classmethod
+    def load(cls, config_file: Path) -> 'OptimizerConfig':
+        """
+        Load a JSON configuration file.
+
+        Args:
+            config_file (Path): File holding user settings
+
+        Returns:
+            OptimizerConfig: Settings merged over the defaults
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If the file is not valid JSON or a setting is invalid
+        """
+        with open(config_file, 'r') as f:
+            user_config = json.load(f)
+        if not isinstance(user_config, dict):
+            raise ValueError("configuration must be a JSON object")
+        return cls(user_config)
+
+    @staticmethod
+    def validate(config: Dict[str, Any]) -> None:
+        """
+        Check setting types and ranges.
+
+        Args:
+            config (Dict[str, Any]): Merged configuration
+
+        Raises:
+            ValueError: If a setting is invalid
+        """
+        for key, types in CONFIG_TYPES.items():
+            value = config.get(key)
+            if value is None and None in types:
+                continue
+            accepted = tuple(t for t in types if t is not None)
+            # bool is an int subclass; never accept it for numeric settings
+            if not isinstance(value, accepted) or (isinstance(value, bool) and bool not in accepted):
+                expected = ' or '.join('null' if t is None else t.__name__ for t in types)
+                raise ValueError(f"'{key}' must be {expected}, got {value!r}")
+
+        if not 0 <= config['quality'] <= 100:
+            raise ValueError(f"'quality' must be between 0 and 100, got {config['quality']}")
+        for key in ('max_workers', 'file_workers', 'async_concurrency'):
+            if config[key] is not None and config[key] < 1:
+                raise ValueError(f"'{key}' must be at least 1, got {config[key]}")
+        if config['execution'] not in EXECUTION_MODES:
+            raise ValueError(f"'execution' must be {' or '.join(EXECUTION_MODES)}, got {config['execution']!r}")
+        if config['dedup']['mode'] not in DEDUP_MODES:
+            raise ValueError(f"'dedup.mode' must be {' or '.join(DEDUP_MODES)}, got {config['dedup']['mode']!r}")
+        placeholder_size = config['placeholders'].get('size', DEFAULT_PLACEHOLDER_SIZE)
+        if (isinstance(placeholder_size, bool) or not isinstance(placeholder_size, int)
+                or not 1 <= placeholder_size <= MAX_PLACEHOLDER_SIZE):
+            raise ValueError(f"'placeholders.size' must be between 1 and {MAX_PLACEHOLDER_SIZE}, "
+                             f"got {placeholder_size!r}")
+        FileSizeLimits.from_config(config['file_size_limits'])
+        ChunkLimits.from_config(config['ffmpeg_batch'])
+        for directory in config['directories']:
+            if not isinstance(directory, dict) or not all(isinstance(directory.get(key), str)
+                                                          for key in ('input', 'output')):
+                raise ValueError(f"each directory needs 'input' and 'output' paths, got {directory!r}")
+            quality = directory.get('quality', config['quality'])
+            if isinstance(quality, bool) or not isinstance(quality, int) or not 0 <= quality <= 100:
+                raise ValueError(f"directory quality must be between 0 and 100, got {quality!r}")
+
+    def merge(self, overrides: Mapping[str, Any]) -> 'OptimizerConfig':
+        """
+        Make a new config with overrides deep-merged over this one.
+
+        Args:
+            overrides (Mapping[str, Any]): Settings taking precedence, e.g.
+                {'quality': 90, 'supervisor': {'retries': 0}}
+
+        Returns:
+            OptimizerConfig: Validated new config
+        """
+        config = OptimizerConfig.__new__(OptimizerConfig)
+        config.set_values(deep_merge(self.values, overrides))
+        return config
+
+    def set_values(self, merged: Dict[str, Any]) -> None:
+        """Validate and freeze fully merged settings (construction only)."""
+        self.validate(merged)
+        self.values = freeze(merged)
+        self.digest = hashlib.sha256(self.to_json().encode()).hexdigest()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a plain, mutable copy of the settings (e.g. for saving)."""
+        return thaw(self.values)
+
+    def to_json(self, *keys: str) -> str:
+        """Serialize settings canonically (sorted keys, no whitespace)."""
+        values = self.to_dict()
+        if keys:
+            values = {key: values.get(key) for key in keys}
+        return json.dumps(values, sort_keys=True, separators=(',', ':'))
+
+    def fingerprint(self, *keys: str) -> str:
+        """
+        Get a short stable digest of the settings.
+
+        Args:
+            *keys (str): Top-level keys to include (default: every setting);
+                ENCODER_KEYS covers the settings that change output bytes
+
+        Returns:
+            str: 16 hex digits, equal for equal settings across runs
+        """
+        if not keys:
+            return self.digest[:16]
+        return hashlib.sha256(self.to_json(*keys).encode()).hexdigest()[:16]
+
+    def __getitem__(self, key: str) -> Any:
+        return self.values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, OptimizerConfig):
+            return self.digest == other.digest
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        return f"OptimizerConfig({self.fingerprint()})"
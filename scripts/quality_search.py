@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Adaptive Quality Search for RadioFusion Image Optimizer
+Finds the lowest WebP quality that meets an SSIM target or a byte budget.
+"""
+
+import io
+import os
+import re
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from image_probe import probe_image
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    from PIL import Image, UnidentifiedImageError
+except ImportError:
+    Image = None
+
+# Qualities either side of the probe's answer tried first at full size
+PROBE_MARGIN = 5
+
+# Side of the square SSIM window in pixels
+SSIM_WINDOW = 8
+
+SSIM_PATTERN = re.compile(r'All:([\d.]+)')
+
+
+def run_command(cmd: List[str]) -> subprocess.CompletedProcess:
+    """Run a command, capturing text output and raising CalledProcessError on failure."""
+    return subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+class QualityTarget(NamedTuple):
+    """
+    What the adaptive search aims for; the optimizer quality is the upper bound.
+
+    With both targets set, the lowest quality meeting min_ssim is used unless
+    it exceeds max_bytes, in which case the budget wins.
+    """
+    min_ssim: Optional[float] = None
+    max_bytes: Optional[int] = None
+    min_quality: int = 40
+    probe_width: int = 512
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional['QualityTarget']:
+        """
+        Build a target from an adaptive_quality config block.
+
+        Args:
+            config (Dict[str, Any]): {'enabled', 'target_ssim', 'max_bytes',
+                'min_quality', 'probe_width'}
+
+        Returns:
+            Optional[QualityTarget]: None when disabled or without any target
+        """
+        if not config or not config.get('enabled', False):
+            return None
+        if config.get('target_ssim') is None and config.get('max_bytes') is None:
+            return None
+        return cls(min_ssim=config.get('target_ssim'), max_bytes=config.get('max_bytes'),
+                   min_quality=config.get('min_quality', 40),
+                   probe_width=config.get('probe_width', 512))
+
+
+class Evaluation(NamedTuple):
+    """Encoded size and (optionally) SSIM of one quality setting."""
+    size: int
+    ssim: Optional[float]
+
+
+class SearchResult(NamedTuple):
+    """Outcome of a quality search."""
+    quality: int
+    size: int
+    ssim: Optional[float]
+    met: bool
+    attempts: int
+
+
+def lowest_passing(lo: int, hi: int, passes: Callable[[int], bool]) -> Optional[int]:
+    """
+    Binary-search the lowest quality in [lo, hi] for which passes() holds.
+
+    passes() must be monotone: once true, true for every higher quality.
+
+    Returns:
+        Optional[int]: Lowest passing quality, None if hi does not pass
+    """
+    if lo > hi or not passes(hi):
+        return None
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if passes(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def choose_quality(evaluate: Callable[[int], Evaluation], target: QualityTarget,
+                   lo: int, hi: int) -> Tuple[int, bool]:
+    """
+    Pick the quality in [lo, hi] that best satisfies a target.
+
+    Args:
+        evaluate (Callable[[int], Evaluation]): Memoized encoder/measurer
+        target (QualityTarget): Search target
+        lo (int): Lowest quality to consider
+        hi (int): Highest quality to consider
+
+    Returns:
+        Tuple[int, bool]: (quality, whether every target was met)
+    """
+    quality, met = hi, True
+    if target.min_ssim is not None:
+        found = lowest_passing(lo, hi, lambda q: evaluate(q).ssim >= target.min_ssim)
+        quality, met = (hi, False) if found is None else (found, True)
+
+    if target.max_bytes is not None and evaluate(quality).size > target.max_bytes:
+        first_over = lowest_passing(lo, quality, lambda q: evaluate(q).size > target.max_bytes)
+        if first_over == lo:
+            return lo, False
+        # Dropping below the SSIM answer to fit the budget misses the SSIM target
+        return first_over - 1, target.min_ssim is None
+
+    return quality, met
+
+
+def search_quality(evaluate_full: Callable[[int], Evaluation],
+                   evaluate_probe: Optional[Callable[[int], Evaluation]],
+                   target: QualityTarget, max_quality: int, probe_scale: float = 1.0) -> Tuple[int, bool]:
+    """
+    Search on a downscaled probe first, then confirm around its answer at full size.
+
+    Args:
+        evaluate_full (Callable[[int], Evaluation]): Full-size evaluator
+        evaluate_probe (Callable[[int], Evaluation]): Probe evaluator, or None
+            to search at full size only
+        target (QualityTarget): Search target
+        max_quality (int): Highest quality allowed
+        probe_scale (float): Probe pixels / full pixels, used to scale the byte budget
+
+    Returns:
+        Tuple[int, bool]: (quality, whether every target was met)
+    """
+    lo, hi = min(target.min_quality, max_quality), max_quality
+    if evaluate_probe is None:
+        return choose_quality(evaluate_full, target, lo, hi)
+
+    probe_target = target
+    if target.max_bytes is not None:
+        probe_target = target._replace(max_bytes=max(1, int(target.max_bytes * probe_scale)))
+    hint, _ = choose_quality(evaluate_probe, probe_target, lo, hi)
+
+    window_lo, window_hi = max(lo, hint - PROBE_MARGIN), min(hi, hint + PROBE_MARGIN)
+    quality, met = choose_quality(evaluate_full, target, window_lo, window_hi)
+
+    # The probe is only a hint; widen when the answer sits on a window edge
+    wide_lo = lo if quality == window_lo else window_lo
+    wide_hi = hi if quality == window_hi else window_hi
+    if (wide_lo, wide_hi) != (window_lo, window_hi):
+        quality, met = choose_quality(evaluate_full, target, wide_lo, wide_hi)
+    return quality, met
+
+
+def luma(img) -> 'np.ndarray':
+    """
+    Get the luma plane of a Pillow image as float64.
+
+    Transparent images are composited over white first, since encoders are
+    free to change the colour of fully transparent pixels.
+    """
+    if img.mode in ('RGBA', 'LA') or 'transparency' in img.info:
+        background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img.convert('RGBA'))
+    return np.asarray(img.convert('L'), dtype=np.float64)
+
+
+def compute_ssim(reference: 'np.ndarray', candidate: 'np.ndarray') -> float:
+    """
+    Mean SSIM over square windows of two equally sized luma planes.
+
+    Args:
+        reference (np.ndarray): Reference luma plane
+        candidate (np.ndarray): Candidate luma plane
+
+    Returns:
+        float: Mean SSIM (1.0 for identical planes)
+    """
+    window = min(SSIM_WINDOW, *reference.shape)
+
+    def box_mean(plane):
+        # Windowed means from a summed-area table
+        table = np.pad(plane.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        return (table[window:, window:] - table[:-window, window:] -
+                table[window:, :-window] + table[:-window, :-window]) / (window * window)
+
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_x, mu_y = box_mean(reference), box_mean(candidate)
+    var_x = box_mean(reference * reference) - mu_x * mu_x
+    var_y = box_mean(candidate * candidate) - mu_y * mu_y
+    covar = box_mean(reference * candidate) - mu_x * mu_y
+    ssim_map = (((2 * mu_x * mu_y + c1) * (2 * covar + c2)) /
+                ((mu_x * mu_x + mu_y * mu_y + c1) * (var_x + var_y + c2)))
+    return float(ssim_map.mean())
+
+
+class PillowEvaluator:
+    """Encodes a frame with Pillow at a given quality, remembering every result."""
+
+    def __init__(self, frame, measure_ssim: bool):
+        """
+        Initialize the PillowEvaluator.
+
+        Args:
+            frame: RGB or RGBA Pillow image
+            measure_ssim (bool): Compute SSIM against the frame for each encode
+        """
+        self.frame = frame
+        self.reference = luma(frame) if measure_ssim else None
+        self.encoded: Dict[int, bytes] = {}
+        self.results: Dict[int, Evaluation] = {}
+
+    def __call__(self, quality: int) -> Evaluation:
+        if quality not in self.results:
+            buffer = io.BytesIO()
+            self.frame.save(buffer, 'WEBP', quality=quality, method=6)
+            data = buffer.getvalue()
+            ssim = None
+            if self.reference is not None:
+                with Image.open(io.BytesIO(data)) as decoded:
+                    ssim = compute_ssim(self.reference, luma(decoded))
+            self.encoded[quality] = data
+            self.results[quality] = Evaluation(len(data), ssim)
+        return self.results[quality]
+
+
+def search_webp_pillow(input_path: str, output_path: str, target: QualityTarget,
+                       max_quality: int) -> Tuple[bool, bool, Optional[SearchResult], str]:
+    """
+    Decode an image once, search its quality with Pillow and write the chosen encode.
+
+    Runs inside a ProcessPoolExecutor worker, so it only takes picklable
+    arguments and never raises. Animations are encoded at max_quality.
+
+    Args:
+        input_path (str): Path to input image
+        output_path (str): Path to output WebP image
+        target (QualityTarget): Search target
+        max_quality (int): Highest quality allowed
+
+    Returns:
+        Tuple[bool, bool, Optional[SearchResult], str]: (success, decoded,
+        result, error message); decoded is False when Pillow could not read
+        the input at all
+    """
+    try:
+        img = Image.open(input_path)
+        img.load()
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        return False, False, None, str(e)
+
+    try:
+        with img:
+            if getattr(img, 'is_animated', False):
+                img.save(output_path, 'WEBP', save_all=True, quality=max_quality, method=6)
+                return True, True, None, ''
+
+            has_alpha = 'A' in img.getbands() or 'transparency' in img.info
+            frame = img if img.mode in ('RGB', 'RGBA') else img.convert('RGBA' if has_alpha else 'RGB')
+            measure_ssim = target.min_ssim is not None
+            evaluate_full = PillowEvaluator(frame, measure_ssim)
+
+            evaluate_probe, probe_scale = None, 1.0
+            if frame.width > target.probe_width * 1.5:
+                height = max(1, round(frame.height * target.probe_width / frame.width))
+                evaluate_probe = PillowEvaluator(
+                    frame.resize((target.probe_width, height), Image.LANCZOS), measure_ssim)
+                probe_scale = target.probe_width * height / (frame.width * frame.height)
+
+            quality, met = search_quality(evaluate_full, evaluate_probe, target, max_quality, probe_scale)
+            with open(output_path, 'wb') as f:
+                f.write(evaluate_full.encoded[quality])
+
+        evaluation = evaluate_full(quality)
+        attempts = len(evaluate_full.results) + (len(evaluate_probe.results) if evaluate_probe else 0)
+        return True, True, SearchResult(quality, evaluation.size, evaluation.ssim, met, attempts), ''
+    except Exception as e:
+        return False, True, None, str(e)
+
+
+class FFmpegEvaluator:
+    """Encodes a reference image with FFmpeg at a given quality and measures SSIM."""
+
+    def __init__(self, reference: Path, work_dir: Path, webp_args: Callable[[int], List[str]],
+                 measure_ssim: bool, name: str,
+                 run: Callable[[List[str]], subprocess.CompletedProcess] = run_command):
+        """
+        Initialize the FFmpegEvaluator.
+
+        Args:
+            reference (Path): Image every encode is made from and compared to
+            work_dir (Path): Directory for trial encodes
+            webp_args (Callable[[int], List[str]]): WebP encoder arguments per quality
+            measure_ssim (bool): Run the ssim filter after each encode
+            name (str): Prefix for trial encode file names
+            run (Callable): Runs an FFmpeg command (default: run_command)
+        """
+        self.reference = reference
+        self.work_dir = work_dir
+        self.webp_args = webp_args
+        self.measure_ssim = measure_ssim
+        self.name = name
+        self.run = run
+        self.results: Dict[int, Evaluation] = {}
+
+    def output_for(self, quality: int) -> Path:
+        """Path of the trial encode for a quality."""
+        return self.work_dir / f"{self.name}_q{quality}.webp"
+
+    def __call__(self, quality: int) -> Evaluation:
+        if quality not in self.results:
+            output = self.output_for(quality)
+            self.run(['ffmpeg', '-i', str(self.reference), '-y', *self.webp_args(quality), str(output)])
+            ssim = None
+            if self.measure_ssim:
+                result = self.run(['ffmpeg', '-i', str(output), '-i', str(self.reference),
+                                   '-lavfi', 'ssim', '-f', 'null', '-'])
+                match = SSIM_PATTERN.search(result.stderr)
+                ssim = float(match.group(1)) if match else 0.0
+            self.results[quality] = Evaluation(output.stat().st_size, ssim)
+        return self.results[quality]
+
+
+def search_webp_ffmpeg(input_path: Path, output_path: Path, target: QualityTarget, max_quality: int,
+                       webp_args: Callable[[int], List[str]],
+                       run: Callable[[List[str]], subprocess.CompletedProcess] = run_command) -> SearchResult:
+    """
+    Search an image's quality with FFmpeg's encoder and ssim filter.
+
+    The probe is a downscaled PNG written once; trial encodes live in a
+    temporary directory next to the output and the chosen one is moved into place.
+
+    Args:
+        input_path (Path): Path to input image
+        output_path (Path): Path to output WebP image
+        target (QualityTarget): Search target
+        max_quality (int): Highest quality allowed
+        webp_args (Callable[[int], List[str]]): WebP encoder arguments per quality
+        run (Callable): Runs an FFmpeg command, e.g. JobSupervisor.run for
+            timeouts and cancellation (default: run_command)
+
+    Returns:
+        SearchResult: Chosen quality and its measurements
+
+    Raises:
+        subprocess.CalledProcessError: If an FFmpeg run fails
+    """
+    info = probe_image(input_path)
+    measure_ssim = target.min_ssim is not None
+
+    with tempfile.TemporaryDirectory(prefix='.quality-', dir=output_path.parent) as work_dir:
+        work_dir = Path(work_dir)
+        evaluate_full = FFmpegEvaluator(input_path, work_dir, webp_args, measure_ssim, 'full', run)
+
+        evaluate_probe, probe_scale = None, 1.0
+        if info and info['width'] > target.probe_width * 1.5:
+            probe_path = work_dir / 'probe.png'
+            run(['ffmpeg', '-i', str(input_path), '-y',
+                 '-vf', f"scale={target.probe_width}:-2:flags=lanczos", str(probe_path)])
+            evaluate_probe = FFmpegEvaluator(probe_path, work_dir, webp_args, measure_ssim, 'probe', run)
+            probe_height = max(2, round(info['height'] * target.probe_width / info['width']))
+            probe_scale = target.probe_width * probe_height / (info['width'] * info['height'])
+
+        quality, met = search_quality(evaluate_full, evaluate_probe, target, max_quality, probe_scale)
+        os.replace(evaluate_full.output_for(quality), output_path)
+
+    evaluation = evaluate_full(quality)
+    attempts = len(evaluate_full.results) + (len(evaluate_probe.results) if evaluate_probe else 0)
+    return SearchResult(quality, evaluation.size, evaluation.ssim, met, attempts)
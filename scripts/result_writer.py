@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Machine-Readable Results for RadioFusion Image Optimizer
+Streams per-file result records and a final summary as JSON or NDJSON from a
+single writer thread.
+"""
+
+import os
+import sys
+import json
+import queue
+import threading
+import contextlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+# --output modes: human emoji output, one JSON document, one JSON record per
+# line, or nothing at all
+OUTPUT_MODES = ('text', 'json', 'ndjson', 'quiet')
+
+# Per-file result statuses
+SKIPPED, QUARANTINED, CACHED, CONVERTED, FAILED = 'skipped', 'quarantined', 'cached', 'converted', 'failed'
+
+# A copy of another source image, given that image's outputs instead of an encode
+DEDUPLICATED = 'deduplicated'
+
+
+class ResultWriter:
+    """
+    Result records written by one thread, in the order they were emitted.
+
+    Workers only put records on a queue, so they never contend for stdout
+    and records never interleave. In text mode records are dropped: the
+    human-readable prints are the output.
+    """
+
+    def __init__(self, mode: str = 'text', stream: Optional[TextIO] = None):
+        """
+        Initialize the ResultWriter.
+
+        Args:
+            mode (str): One of OUTPUT_MODES (default: text)
+            stream (TextIO): Where records go (default: stdout at creation time)
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode '{mode}', expected one of {', '.join(OUTPUT_MODES)}")
+        self.mode = mode
+        self.stream = stream if stream is not None else sys.stdout
+        self.enabled = mode in ('json', 'ndjson')
+        self.queue: queue.Queue = queue.Queue()
+        self.thread = None
+        if self.enabled:
+            self.thread = threading.Thread(target=self.write_records, name='result-writer', daemon=True)
+            self.thread.start()
+
+    @property
+    def machine_readable(self) -> bool:
+        """Whether stdout belongs to records (or to nothing) rather than human output."""
+        return self.mode != 'text'
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        """
+        Queue a record for the writer thread.
+
+        Args:
+            record (Dict[str, Any]): JSON-serializable record with a 'type'
+        """
+        if self.enabled:
+            self.queue.put(record)
+
+    def file_result(self, path: Path, status: str, duration: float, bytes_in: int = 0, bytes_out: int = 0,
+                    outputs: Iterable[Path] = (), error: Optional[str] = None) -> None:
+        """
+        Queue the result record of one image.
+
+        Args:
+            path (Path): Source image
+            status (str): skipped, quarantined, cached, converted, deduplicated or failed
+            duration (float): Seconds spent on the image
+            bytes_in (int): Source size
+            bytes_out (int): Primary (WebP) output size
+            outputs (Iterable[Path]): Outputs in place after processing
+            error (str): Reason the image was skipped or failed
+        """
+        if not self.enabled:
+            return
+        record = {
+            'type': 'file',
+            'path': str(path),
+            'status': status,
+            'bytes_in': bytes_in,
+            'bytes_out': bytes_out,
+            'duration': round(duration, 6),
+            'outputs': [str(output) for output in outputs]
+        }
+        if error is not None:
+            record['error'] = error
+        self.emit(record)
+
+    def summary(self, stats: Dict[str, Any], duration: float, **extra: Any) -> None:
+        """
+        Queue the final summary record.
+
+        Args:
+            stats (Dict[str, Any]): Processing stats
+            duration (float): Run duration in seconds
+            **extra (Any): Additional summary fields
+        """
+        self.emit({'type': 'summary', **stats, 'duration': round(duration, 6), **extra})
+
+    def write_records(self) -> None:
+        """Writer thread: stream NDJSON lines, or collect everything for one JSON document."""
+        files: List[Dict[str, Any]] = []
+        summary: Optional[Dict[str, Any]] = None
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            if self.mode == 'ndjson':
+                self.stream.write(json.dumps(record, default=str) + '\n')
+                self.stream.flush()
+            elif record['type'] == 'summary':
+                summary = record
+            else:
+                files.append(record)
+        if self.mode == 'json':
+            json.dump({'files': files, 'summary': summary}, self.stream, indent=2, default=str)
+            self.stream.write('\n')
+            self.stream.flush()
+
+    def close(self) -> None:
+        """Write out every queued record and stop the writer thread."""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    @contextlib.contextmanager
+    def human_output(self, verbose: bool = False) -> Iterator[None]:
+        """
+        Keep human-readable prints off stdout in machine-readable modes.
+
+        Prints from every thread go to stderr when verbose, and are dropped
+        otherwise; the writer keeps the original stdout.
+
+        Args:
+            verbose (bool): Keep human output, on stderr
+        """
+        if not self.machine_readable:
+            yield
+            return
+        if verbose:
+            with contextlib.redirect_stdout(sys.stderr):
+                yield
+            return
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            yield
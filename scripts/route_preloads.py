@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Route Hero Preloads for RadioFusion Image Optimizer
+Finds the above-the-fold hero image of every sitemap route in the page
+sources and preloads its optimized, responsive form through Netlify Link
+headers, so the browser fetches it before the JavaScript that renders it.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+
+# ImageUpload's <source media="(max-width: 768px)"> shows mobileImage up to this width
+MOBILE_MAX_WIDTH = 768
+
+# ImageUpload's default sizes; a preload must use the <img>'s value, or the
+# browser may pick a different srcset candidate and download both
+DEFAULT_SIZES = '100vw'
+
+# Every page renders its hero through this component, before anything else
+HERO_COMPONENT = 'ImageUpload'
+
+# Imports with these extensions are bundled by Vite under a build-time name
+IMAGE_EXTENSIONS = ('.webp', '.avif', '.png', '.jpg', '.jpeg', '.gif', '.svg')
+
+# URLs of files Vite serves from src/ in development only; a build renames
+# them, so they cannot be preloaded by a static header
+BUNDLED_PREFIX = '/src/'
+
+# Extensions tried when resolving an import path without one
+MODULE_EXTENSIONS = ('.jsx', '.js', '.tsx', '.ts')
+
+# Lines delimiting the generated rules in the _headers file; the rest of
+# the file is left as written
+BEGIN_MARKER = '# BEGIN route preloads (generated by scripts/build_optimizer.py)'
+END_MARKER = '# END route preloads'
+
+SITEMAP_ROUTE = re.compile(r"""\burl:\s*['"]([^'"]+)['"]""")
+LAZY_IMPORT = re.compile(r"""const\s+(\w+)\s*=\s*lazy\(\s*\(\)\s*=>\s*import\(\s*['"]([^'"]+)['"]\s*\)\s*\)""")
+STATIC_IMPORT = re.compile(r"""import\s+(\w+)\s+from\s+['"]([^'"]+)['"]""")
+ROUTE_ELEMENT = re.compile(r"""<Route\s+path=['"]([^'"]+)['"]\s+element=\{\s*<(\w+)""")
+STRING_CONSTANT = re.compile(r"""const\s+(\w+)\s*=\s*['"](/[^'"]+)['"]""")
+STATE_ALIAS = re.compile(r"""const\s*\[\s*(\w+)\s*,\s*\w+\s*\]\s*=\s*useState\(\s*(\w+)\s*\)""")
+
+
+def prop_pattern(name: str) -> 're.Pattern':
+    """Match a JSX prop given as {identifier} or as a string literal."""
+    return re.compile(rf"""\b{name}=(?:\{{\s*(\w+)\s*\}}|['"]([^'"]+)['"])""")
+
+
+def find_imported_images(module_dir: Path) -> Set[Path]:
+    """
+    Find the image files the modules under a directory import.
+
+    Only relative static imports count; those are the images Vite bundles.
+
+    Args:
+        module_dir (Path): Directory of the frontend modules, e.g. frontend/src
+
+    Returns:
+        Set[Path]: Imported image files, normalized but not checked for existence
+    """
+    imported = set()
+    for directory, _, filenames in os.walk(module_dir):
+        for filename in filenames:
+            if not filename.endswith(MODULE_EXTENSIONS):
+                continue
+            module_path = Path(directory) / filename
+            source = module_path.read_text(encoding='utf-8', errors='replace')
+            for _, specifier in STATIC_IMPORT.findall(source):
+                if specifier.startswith('.') and specifier.lower().endswith(IMAGE_EXTENSIONS):
+                    imported.add(Path(os.path.normpath(module_path.parent / specifier)))
+    return imported
+
+
+def build_srcset(src: str, width: int, variants: List[Dict[str, Any]]) -> str:
+    """
+    Build a width-descriptor srcset the way the frontend's buildSrcSet does.
+
+    Args:
+        src (str): Full-size image URL
+        width (int): Full-size width
+        variants (List[Dict[str, Any]]): {'src', 'width'} responsive variants
+
+    Returns:
+        str: srcset, empty when there is nothing but the full size
+    """
+    candidates = [variant for variant in variants if variant['width'] < width] + [{'src': src, 'width': width}]
+    if len(candidates) < 2:
+        return ''
+    return ', '.join(f"{candidate['src']} {candidate['width']}w" for candidate in candidates)
+
+
+def preload_link(url: str, entry: Optional[Dict[str, Any]], media: Optional[str] = None,
+                 sizes: str = DEFAULT_SIZES) -> str:
+    """
+    Build a Link header value preloading an image the way ImageUpload loads it.
+
+    Args:
+        url (str): Source URL the page uses
+        entry (Optional[Dict[str, Any]]): Its frontend manifest entry; without
+            one the page loads the source URL as-is
+        media (Optional[str]): Media query the image is shown at
+        sizes (str): sizes of the <img>
+
+    Returns:
+        str: e.g. '</a.webp>; rel=preload; as=image; imagesrcset="..."; ...'
+    """
+    parts = [f"<{entry['webp'] if entry else url}>", 'rel=preload', 'as=image']
+    if entry:
+        parts.append('type="image/webp"')
+        srcset = build_srcset(entry['webp'], entry['width'], entry.get('variants', []))
+        if srcset:
+            parts += [f'imagesrcset="{srcset}"', f'imagesizes="{sizes}"']
+    if media:
+        parts.append(f'media="{media}"')
+    parts.append('fetchpriority=high')
+    return '; '.join(parts)
+
+
+class HeroImage(NamedTuple):
+    """Images of a page's hero, as source URLs; None where it cannot be preloaded."""
+    image: Optional[str]
+    mobile_image: Optional[str]
+    sizes: str
+
+
+class RoutePreloader:
+    """
+    Maps sitemap routes to their hero images and writes preload headers.
+
+    Routes come from the sitemap generator, their page components from the
+    <Route> elements and lazy imports of the app, and the hero from the
+    page's first ImageUpload: its currentImage and mobileImage props are
+    followed through useState(), string constants and image imports to the
+    source URLs keyed in the image manifest. The page is a single-page app, so one
+    index.html serves every route; per-route Link headers are the only way
+    to preload a different image per route without prerendering.
+    """
+
+    def __init__(self, sitemap_path: Path, app_path: Path, headers_path: Path,
+                 public_url: Optional[Callable[[Path], Optional[str]]] = None):
+        """
+        Initialize the RoutePreloader.
+
+        Args:
+            sitemap_path (Path): Sitemap generator listing the routes
+            app_path (Path): App component declaring the <Route> elements
+            headers_path (Path): Netlify _headers file the rules are written to
+            public_url (Optional[Callable[[Path], Optional[str]]]): Maps an
+                imported image file to its manifest key (default: imported
+                images are not followed)
+        """
+        self.sitemap_path = sitemap_path
+        self.app_path = app_path
+        self.headers_path = headers_path
+        self.public_url = public_url
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], project_root: Path,
+                    public_url: Optional[Callable[[Path], Optional[str]]] = None) -> Optional['RoutePreloader']:
+        """
+        Build a preloader from a 'route_preloads' configuration block.
+
+        Args:
+            config (Optional[Dict[str, Any]]): Block with 'enabled', 'sitemap',
+                'app' and 'headers_file'
+            project_root (Path): Directory the paths are relative to
+            public_url (Optional[Callable[[Path], Optional[str]]]): Maps an
+                imported image file to its manifest key
+
+        Returns:
+            Optional[RoutePreloader]: None when disabled
+
+        Raises:
+            ValueError: If a path is missing
+        """
+        if not config or not config.get('enabled', False):
+            return None
+        for key in ('sitemap', 'app', 'headers_file'):
+            if not config.get(key):
+                raise ValueError(f"'{key}' is required")
+        return cls(project_root / config['sitemap'], project_root / config['app'],
+                   project_root / config['headers_file'], public_url)
+
+    @staticmethod
+    def resolve_module(base_dir: Path, specifier: str) -> Optional[Path]:
+        """Resolve a relative import to its source file, trying the usual extensions."""
+        target = base_dir / specifier
+        for candidate in [target] + [target.with_name(target.name + ext) for ext in MODULE_EXTENSIONS] + \
+                         [target / f'index{ext}' for ext in MODULE_EXTENSIONS]:
+            if candidate.is_file():
+                return candidate
+        return None
+
+    def find_image_imports(self, page_path: Path, source: str) -> Dict[str, str]:
+        """
+        Map the names of a page's image imports to their manifest keys.
+
+        Args:
+            page_path (Path): Page component source
+            source (str): Its contents
+
+        Returns:
+            Dict[str, str]: Imported name -> source URL, for images under a web root
+        """
+        if self.public_url is None:
+            return {}
+        imports = {}
+        for name, specifier in STATIC_IMPORT.findall(source):
+            if specifier.startswith('.') and specifier.lower().endswith(IMAGE_EXTENSIONS):
+                url = self.public_url(Path(os.path.normpath(page_path.parent / specifier)))
+                if url is not None:
+                    imports[name] = url
+        return imports
+
+    def find_routes(self) -> Dict[str, Optional[Path]]:
+        """
+        Map every sitemap route to the source file of its page component.
+
+        Returns:
+            Dict[str, Optional[Path]]: Route -> page file, None when the app
+            has no matching <Route>, in sitemap order
+
+        Raises:
+            OSError: If the sitemap generator or the app cannot be read
+        """
+        routes = SITEMAP_ROUTE.findall(self.sitemap_path.read_text(encoding='utf-8'))
+        app_source = self.app_path.read_text(encoding='utf-8')
+        components = {name: specifier for name, specifier in
+                      LAZY_IMPORT.findall(app_source) + STATIC_IMPORT.findall(app_source)}
+        pages = {}
+        for path, component in ROUTE_ELEMENT.findall(app_source):
+            specifier = components.get(component)
+            if specifier is not None and specifier.startswith('.'):
+                pages[path] = self.resolve_module(self.app_path.parent, specifier)
+        return {route: pages.get(route) for route in routes}
+
+    def find_hero(self, page_path: Path) -> Optional[HeroImage]:
+        """
+        Find the images a page's hero shows.
+
+        Args:
+            page_path (Path): Page component source
+
+        Returns:
+            Optional[HeroImage]: None when the page renders no ImageUpload
+
+        Raises:
+            OSError: If the page cannot be read
+        """
+        source = page_path.read_text(encoding='utf-8')
+        start = source.find(f'<{HERO_COMPONENT}')
+        if start < 0:
+            return None
+        end = source.find(f'<{HERO_COMPONENT}', start + 1)
+        element = source[start:end if end >= 0 else len(source)]
+
+        constants = {**dict(STRING_CONSTANT.findall(source)), **self.find_image_imports(page_path, source)}
+        aliases = dict(STATE_ALIAS.findall(source))
+
+        def resolve(prop: str) -> Optional[str]:
+            match = prop_pattern(prop).search(element)
+            if match is None:
+                return None
+            if match.group(2) is not None:
+                return match.group(2)
+            name = aliases.get(match.group(1), match.group(1))
+            # Computed values are unknown here; the page then loads them without a preload
+            return constants.get(name)
+
+        sizes = prop_pattern('sizes').search(element)
+        return HeroImage(resolve('currentImage'), resolve('mobileImage'),
+                         sizes.group(2) if sizes and sizes.group(2) else DEFAULT_SIZES)
+
+    def find_page_images(self, page_path: Path) -> List[str]:
+        """
+        List the images a page refers to by URL or imports, in source order.
+
+        Args:
+            page_path (Path): Page component source
+
+        Returns:
+            List[str]: Source URLs, without duplicates
+
+        Raises:
+            OSError: If the page cannot be read
+        """
+        source = page_path.read_text(encoding='utf-8')
+        urls = [url for _, url in STRING_CONSTANT.findall(source) if url.lower().endswith(IMAGE_EXTENSIONS)]
+        urls += [match.group(2) for match in prop_pattern('src').finditer(source)
+                 if match.group(2) and match.group(2).startswith('/')]
+        urls += self.find_image_imports(page_path, source).values()
+        return list(dict.fromkeys(urls))
+
+    def build_rules(self, images: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        Build the preload Link header values of every sitemap route.
+
+        Args:
+            images (Dict[str, Dict[str, Any]]): Frontend manifest entries keyed by source URL
+
+        Returns:
+            Dict[str, List[str]]: Route -> Link values; routes without a
+            preloadable hero are left out
+
+        Raises:
+            OSError: If a source cannot be read
+        """
+        rules = {}
+        for route, page_path in self.find_routes().items():
+            if page_path is None:
+                print(f"⚠️  No page component found for sitemap route {route}")
+                continue
+            hero = self.find_hero(page_path)
+            if hero is None or not (hero.image or hero.mobile_image):
+                print(f"⚠️  No preloadable hero image in {page_path.name} for {route}")
+                continue
+
+            links = []
+            if hero.mobile_image:
+                links.append(preload_link(hero.mobile_image, images.get(hero.mobile_image),
+                                          f'(max-width: {MOBILE_MAX_WIDTH}px)', hero.sizes))
+            if hero.image:
+                # Without mobile art the one image is shown at every width
+                media = f'(min-width: {MOBILE_MAX_WIDTH + 1}px)' if hero.mobile_image else None
+                links.append(preload_link(hero.image, images.get(hero.image), media, hero.sizes))
+            # An imported image without a hashed manifest output only gets its URL from Vite
+            links = [link for link in links if not link.startswith(f'<{BUNDLED_PREFIX}')]
+            if links:
+                rules[route] = links
+        return rules
+
+    def write_headers(self, rules: Dict[str, List[str]]) -> bool:
+        """
+        Replace the generated block of the _headers file, keeping everything else.
+
+        Args:
+            rules (Dict[str, List[str]]): Route -> Link header values
+
+        Returns:
+            bool: Whether the file changed
+        """
+        try:
+            current = self.headers_path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            current = ''
+        kept = current
+        begin, end = current.find(BEGIN_MARKER), current.find(END_MARKER)
+        if begin >= 0 and end > begin:
+            kept = current[:begin] + current[end + len(END_MARKER):].lstrip('\n')
+        kept = kept.rstrip('\n')
+
+        block = [BEGIN_MARKER]
+        for route, links in rules.items():
+            block.append(route)
+            block.extend(f"  Link: {link}" for link in links)
+        block.append(END_MARKER)
+        text = (kept + '\n\n' if kept else '') + '\n'.join(block) + '\n'
+        if text == current:
+            return False
+
+        self.headers_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.headers_path.with_name(f".{self.headers_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, self.headers_path)
+        return True
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Image Size Budgets for RadioFusion Image Optimizer
+Checks shipped image sizes against per-directory, per-profile and per-route
+budgets, diffs them against a stored baseline and ranks the files with the
+most to gain from optimization.
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Bump when the baseline layout changes; older files are ignored
+BASELINE_VERSION = 1
+
+DEFAULT_BASELINE_FILE = '.image_size_baseline.json'
+
+# A file or total regresses when it grows by more than this percentage
+# and by at least this many bytes, so small files can fluctuate freely
+DEFAULT_GROWTH_PERCENT = 10
+DEFAULT_GROWTH_BYTES = 10 * 1024
+
+DEFAULT_TOP_OFFENDERS = 10
+
+# Budget scope -> configuration key, in the order they are checked
+SCOPES = {'directory': 'directories', 'profile': 'profiles', 'route': 'routes'}
+
+
+def format_bytes(size: int) -> str:
+    """Format a byte count for the report, e.g. '1.2 MB'."""
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024 or unit == 'MB':
+            return f"{size:,} B" if unit == 'B' else f"{size:,.1f} {unit}"
+        size /= 1024
+
+
+class Budget(NamedTuple):
+    """Byte limits of one directory, profile or route; None means unlimited."""
+    scope: str
+    name: str
+    max_total: Optional[int]
+    max_image: Optional[int]
+
+    @property
+    def label(self) -> str:
+        """Name the budget in the report, e.g. 'route /about'."""
+        return f"{self.scope} {self.name}"
+
+
+class SizedImage(NamedTuple):
+    """A shipped image file and what the frontend could serve instead."""
+    path: str
+    bytes: int
+    served: int
+    best: Optional[int]
+    profile: Optional[str]
+
+    @property
+    def savings(self) -> int:
+        """Bytes saved by serving the smallest optimized alternative instead."""
+        return max(0, self.bytes - self.best) if self.best is not None else 0
+
+
+class Violation(NamedTuple):
+    """A total or an image over its budget."""
+    budget: str
+    subject: str
+    size: int
+    limit: int
+
+
+class Regression(NamedTuple):
+    """A file or total that grew past the allowed growth since the baseline."""
+    key: str
+    before: int
+    after: int
+
+
+class BudgetReport(NamedTuple):
+    """Outcome of a budget check."""
+    violations: List[Violation]
+    regressions: List[Regression]
+    snapshot: Dict[str, Dict[str, int]]
+    baseline: Optional[Dict[str, Dict[str, int]]]
+
+    @property
+    def failed(self) -> bool:
+        """Whether the build should fail."""
+        return bool(self.violations or self.regressions)
+
+
+class SizeBudgets:
+    """
+    Size budgets and the baseline they are diffed against.
+
+    Directory budgets measure every image file under the directory as
+    stored (everything there ships), while profile and route budgets
+    measure what the frontend serves for an image: its manifest WebP when
+    it has one. A snapshot of both is what the baseline stores, so each
+    check can report what grew since the baseline was accepted.
+    """
+
+    def __init__(self, budgets: List[Budget], baseline_path: Optional[Path] = None,
+                 growth_percent: float = DEFAULT_GROWTH_PERCENT, growth_bytes: int = DEFAULT_GROWTH_BYTES,
+                 top_offenders: int = DEFAULT_TOP_OFFENDERS):
+        """
+        Initialize the SizeBudgets.
+
+        Args:
+            budgets (List[Budget]): Limits to check
+            baseline_path (Optional[Path]): Baseline snapshot file (default: no diff)
+            growth_percent (float): Growth over the baseline, in percent, that counts as a regression
+            growth_bytes (int): Smallest growth in bytes that counts as a regression
+            top_offenders (int): Files listed in the savings report
+
+        Raises:
+            ValueError: If a threshold is negative
+        """
+        if growth_percent < 0 or growth_bytes < 0:
+            raise ValueError("Growth thresholds must not be negative")
+        if top_offenders < 0:
+            raise ValueError(f"top_offenders must not be negative, got {top_offenders}")
+        self.budgets = budgets
+        self.baseline_path = baseline_path
+        self.growth_percent = growth_percent
+        self.growth_bytes = growth_bytes
+        self.top_offenders = top_offenders
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], project_root: Path) -> Optional['SizeBudgets']:
+        """
+        Build budgets from a 'size_budgets' configuration block.
+
+        Args:
+            config (Optional[Dict[str, Any]]): Block with 'enabled', 'baseline',
+                'max_growth_percent', 'min_growth_bytes', 'top_offenders' and
+                'directories', 'profiles' and 'routes' mapping names to
+                {'max_total_kb', 'max_image_kb'} ('*' in routes applies to
+                every route without its own budget)
+            project_root (Path): Directory the baseline path is relative to
+
+        Returns:
+            Optional[SizeBudgets]: None when disabled
+
+        Raises:
+            ValueError: If a limit is not a positive number
+        """
+        if not config or not config.get('enabled', False):
+            return None
+        budgets = []
+        for scope, key in SCOPES.items():
+            for name, limits in (config.get(key) or {}).items():
+                values = []
+                for limit_key in ('max_total_kb', 'max_image_kb'):
+                    limit = limits.get(limit_key)
+                    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, (int, float))
+                                              or limit <= 0):
+                        raise ValueError(f"{scope} {name}: '{limit_key}' must be a positive number, got {limit!r}")
+                    values.append(int(limit * 1024) if limit is not None else None)
+                budgets.append(Budget(scope, name, *values))
+        baseline = config.get('baseline', DEFAULT_BASELINE_FILE)
+        return cls(budgets, project_root / baseline if baseline else None,
+                   growth_percent=config.get('max_growth_percent', DEFAULT_GROWTH_PERCENT),
+                   growth_bytes=config.get('min_growth_bytes', DEFAULT_GROWTH_BYTES),
+                   top_offenders=config.get('top_offenders', DEFAULT_TOP_OFFENDERS))
+
+    def budgets_for(self, scope: str) -> List[Budget]:
+        """Get the budgets of one scope."""
+        return [budget for budget in self.budgets if budget.scope == scope]
+
+    def route_budget(self, route: str) -> Optional[Budget]:
+        """Get the budget of a route, falling back to the '*' route budget."""
+        budgets = {budget.name: budget for budget in self.budgets_for('route')}
+        budget = budgets.get(route) or budgets.get('*')
+        return budget._replace(name=route) if budget is not None else None
+
+    def check_images(self, budget: Budget, images: List[Tuple[str, int]], violations: List[Violation]) -> int:
+        """
+        Check (name, bytes) images against a budget.
+
+        Returns:
+            int: Total bytes of the images
+        """
+        total = sum(size for _, size in images)
+        if budget.max_total is not None and total > budget.max_total:
+            violations.append(Violation(budget.label, 'total', total, budget.max_total))
+        if budget.max_image is not None:
+            violations.extend(Violation(budget.label, name, size, budget.max_image)
+                              for name, size in images if size > budget.max_image)
+        return total
+
+    def check(self, images: List[SizedImage], routes: Dict[str, List[Tuple[str, int]]]) -> BudgetReport:
+        """
+        Check measured images against the budgets and the baseline.
+
+        Args:
+            images (List[SizedImage]): Every shipped image file, with
+                project-relative POSIX paths
+            routes (Dict[str, List[Tuple[str, int]]]): Route -> (URL, served
+                bytes) of the images its page references
+
+        Returns:
+            BudgetReport: Violations, regressions and the snapshot to store as the next baseline
+        """
+        violations: List[Violation] = []
+        totals: Dict[str, int] = {}
+        for budget in self.budgets_for('directory'):
+            prefix = budget.name.rstrip('/') + '/'
+            in_dir = [(image.path, image.bytes) for image in images if image.path.startswith(prefix)]
+            totals[budget.label] = self.check_images(budget, in_dir, violations)
+        for budget in self.budgets_for('profile'):
+            in_profile = [(image.path, image.served) for image in images if image.profile == budget.name]
+            totals[budget.label] = self.check_images(budget, in_profile, violations)
+        for route, route_images in routes.items():
+            budget = self.route_budget(route) or Budget('route', route, None, None)
+            totals[budget.label] = self.check_images(budget, route_images, violations)
+
+        snapshot = {'files': {image.path: image.bytes for image in images}, 'totals': totals}
+        baseline = self.load_baseline()
+        regressions = []
+        if baseline is not None:
+            for section in ('files', 'totals'):
+                for key, after in snapshot[section].items():
+                    before = baseline[section].get(key)
+                    if before is not None and self.is_regression(before, after):
+                        regressions.append(Regression(key, before, after))
+        return BudgetReport(violations, regressions, snapshot, baseline)
+
+    def is_regression(self, before: int, after: int) -> bool:
+        """Whether a size grew past both growth thresholds."""
+        growth = after - before
+        return growth >= self.growth_bytes and growth > before * self.growth_percent / 100
+
+    def load_baseline(self) -> Optional[Dict[str, Dict[str, int]]]:
+        """Get the stored baseline snapshot, if there is a usable one."""
+        if self.baseline_path is None or not self.baseline_path.exists():
+            return None
+        try:
+            with open(self.baseline_path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == BASELINE_VERSION:
+                return {'files': data.get('files', {}), 'totals': data.get('totals', {})}
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"⚠️  Ignoring unreadable size baseline {self.baseline_path}: {e}")
+        return None
+
+    def save_baseline(self, snapshot: Dict[str, Dict[str, int]]) -> None:
+        """
+        Store a snapshot as the baseline later checks are diffed against, atomically.
+
+        Raises:
+            OSError: If the file cannot be written
+        """
+        self.baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.baseline_path.with_name(f".{self.baseline_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump({'version': BASELINE_VERSION, **snapshot}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        os.replace(temp_path, self.baseline_path)
+
+    def print_report(self, report: BudgetReport, images: List[SizedImage]) -> None:
+        """
+        Print violations, regressions, the baseline diff and the top offenders.
+
+        Args:
+            report (BudgetReport): Outcome of check()
+            images (List[SizedImage]): The images that were checked
+        """
+        print(f"💰 Size budgets: {len(report.snapshot['totals'])} totals over {len(images)} images")
+        for violation in report.violations:
+            print(f"❌ {violation.budget}: {violation.subject} is {format_bytes(violation.size)} "
+                  f"(budget {format_bytes(violation.limit)})")
+        for regression in report.regressions:
+            growth = (f"+{(regression.after - regression.before) / regression.before * 100:.0f}%"
+                      if regression.before else "was empty")
+            print(f"📈 {regression.key}: {format_bytes(regression.before)} -> "
+                  f"{format_bytes(regression.after)} ({growth})")
+
+        if report.baseline is None:
+            print("ℹ️  No size baseline to compare with; store one with --update-baseline")
+        else:
+            before, after = report.baseline['files'], report.snapshot['files']
+            added = [path for path in after if path not in before]
+            removed = [path for path in before if path not in after]
+            grown = [path for path in after if path in before and after[path] > before[path]]
+            shrunk = [path for path in after if path in before and after[path] < before[path]]
+            delta = sum(after.values()) - sum(before.values())
+            print(f"📊 Since baseline: {len(added)} added, {len(removed)} removed, {len(grown)} grown, "
+                  f"{len(shrunk)} shrunk, {'+' if delta >= 0 else '-'}{format_bytes(abs(delta))} in total")
+
+        over_budget = {violation.subject for violation in report.violations}
+        offenders = sorted((image for image in images if image.savings > 0 or image.path in over_budget),
+                           key=lambda image: (image.savings, image.bytes), reverse=True)[:self.top_offenders]
+        if offenders:
+            print("🏆 Top offenders by potential savings:")
+            for image in offenders:
+                flag = " [over budget]" if image.path in over_budget else ""
+                if image.savings:
+                    print(f"   {image.path}: {format_bytes(image.bytes)} -> ~{format_bytes(image.best)} "
+                          f"(save {format_bytes(image.savings)}){flag}")
+                else:
+                    print(f"   {image.path}: {format_bytes(image.bytes)}, no smaller output{flag}")
+
+        if report.failed:
+            print(f"❌ Size budget check failed: {len(report.violations)} over budget, "
+                  f"{len(report.regressions)} regressed")
+        else:
+            print("✅ Size budgets met")
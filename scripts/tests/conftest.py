@@ -0,0 +1,9 @@
+"""
+Shared setup of the optimizer tests: the scripts are modules on sys.path,
+as when they are run from the scripts directory.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,59 @@
+"""
+Environment selection of the build optimizer: the requested environment's
+settings reach the outputs, whatever an earlier build left behind.
+"""
+
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+BUILD_OPTIMIZER = Path(__file__).resolve().parent.parent / 'build_optimizer.py'
+
+IMAGE_DIR = Path('frontend/public/assets/images')
+
+
+def run_build(project: Path, environment: str) -> subprocess.CompletedProcess:
+    """Run a full build of the project for an environment."""
+    result = subprocess.run([sys.executable, str(BUILD_OPTIMIZER), '--project-root', str(project),
+                             '--engine', 'pillow', '--environment', environment],
+                            capture_output=True, text=True, timeout=600)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    """A project with one PNG and no build state for production."""
+    image_dir = tmp_path / IMAGE_DIR
+    image_dir.mkdir(parents=True)
+    (tmp_path / 'frontend/src').mkdir()
+    image = Image.new('RGB', (320, 240))
+    image.putdata([(x % 256, y % 256, 90) for y in range(240) for x in range(320)])
+    image.save(image_dir / 'hero.png')
+    config = {
+        'image_directories': [{'source': IMAGE_DIR.as_posix(), 'output': (IMAGE_DIR / 'optimized').as_posix()}],
+        'route_preloads': {'enabled': False}
+    }
+    (tmp_path / 'build_config.json').write_text(json.dumps(config))
+    return tmp_path
+
+
+def test_production_build_optimizes_once_for_production(project: Path):
+    result = run_build(project, 'production')
+    assert '🚀 Optimizing images for production environment' in result.stdout
+    assert 'development environment' not in result.stdout
+    assert result.stdout.count('Converting hero.png') == 1
+
+
+def test_production_rebuilds_outputs_of_another_environment(project: Path):
+    run_build(project, 'development')
+    result = run_build(project, 'production')
+    assert 'Converting hero.png (encoder settings changed)' in result.stdout
+
+    result = run_build(project, 'production')
+    assert 'Skipping hero.png (WebP is newer, same settings)' in result.stdout
@@ -0,0 +1,78 @@
+"""
+Incremental batch builds: the build state decides which images are rebuilt.
+"""
+
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+BATCH_OPTIMIZER = Path(__file__).resolve().parent.parent / 'batch_image_optimizer.py'
+
+
+def make_photo(path: Path, shade: int) -> None:
+    """Write a small PNG with a gradient of one shade."""
+    image = Image.new('RGB', (160, 100))
+    image.putdata([(x, y, shade) for y in range(100) for x in range(160)])
+    image.save(path)
+
+
+def optimize(project: Path, *args: str, status: int = 0) -> subprocess.CompletedProcess:
+    """Run the batch optimizer with the project's build state."""
+    result = subprocess.run([sys.executable, str(BATCH_OPTIMIZER), '--config', 'config.json',
+                             '--state-file', '.image_state.json', *args],
+                            cwd=project, capture_output=True, text=True, timeout=600)
+    assert result.returncode == status, result.stdout + result.stderr
+    return result
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    """A built project with two images."""
+    (tmp_path / 'images').mkdir()
+    make_photo(tmp_path / 'images/hero.png', 40)
+    make_photo(tmp_path / 'images/team.png', 200)
+    config = {
+        'engine': 'pillow',
+        'use_profiles': False,
+        'directories': [{'input': 'images', 'output': 'images/webp'}]
+    }
+    (tmp_path / 'config.json').write_text(json.dumps(config))
+    result = optimize(tmp_path)
+    assert result.stdout.count('Converting') == 2
+    return tmp_path
+
+
+def test_unchanged_images_are_skipped(project: Path):
+    result = optimize(project)
+    assert 'Converting' not in result.stdout
+    assert 'Skipping hero.png (unchanged since last build)' in result.stdout
+
+
+def test_touched_source_with_the_same_contents_is_kept(project: Path):
+    source = project / 'images/hero.png'
+    os.utime(source, ns=(source.stat().st_atime_ns, source.stat().st_mtime_ns + 5_000_000_000))
+
+    result = optimize(project, '--list-stale')
+    assert '📋 0 stale images' in result.stdout
+
+
+def test_changes_invalidate_only_the_affected_images(project: Path):
+    make_photo(project / 'images/hero.png', 120)
+    (project / 'images/webp/team.webp').write_bytes(b'not a webp')
+
+    result = optimize(project)
+    assert 'Converting hero.png (source changed)' in result.stdout
+    assert 'Converting team.png (team.webp was modified)' in result.stdout
+    assert Image.open(project / 'images/webp/team.webp').format == 'WEBP'
+
+
+def test_new_encoder_settings_make_every_image_stale(project: Path):
+    result = optimize(project, '--quality', '60', '--list-stale', status=1)
+    assert 'hero.webp: encoder settings changed' in result.stdout
+    assert '📋 2 stale images' in result.stdout
@@ -0,0 +1,118 @@
+"""
+Batched FFmpeg encodes, run through a stand-in ffmpeg that encodes with Pillow.
+"""
+
+import os
+import sys
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from ffmpeg_batch import ChunkLimits, FFmpegBatcher
+from job_supervisor import JobSupervisor
+
+# Encodes every mapped input with Pillow; an input named bad-* fails the
+# whole run, one named hung-* never finishes
+FAKE_FFMPEG = '''#!{python}
+import sys, time
+from PIL import Image
+
+args = sys.argv[1:]
+with open({log!r}, 'a') as log:
+    log.write(str(args.count('-i')) + '\\n')
+inputs = [args[i + 1] for i, arg in enumerate(args) if arg == '-i']
+if any('/bad-' in path for path in inputs):
+    sys.exit('cannot decode')
+if any('/hung-' in path for path in inputs):
+    time.sleep(600)
+maps = [i for i, arg in enumerate(args) if arg == '-map'] + [len(args)]
+for start, end in zip(maps, maps[1:]):
+    index = int(args[start + 1].split(':')[0])
+    Image.open(inputs[index]).save(args[end - 1], 'WEBP')
+'''
+
+CHUNK = 16
+
+
+@pytest.fixture
+def ffmpeg_log(tmp_path: Path, monkeypatch) -> Path:
+    """Put the stand-in ffmpeg first on PATH; returns the log of its input counts."""
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    log = tmp_path / 'ffmpeg.log'
+    script = bin_dir / 'ffmpeg'
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable, log=str(log)))
+    script.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return log
+
+
+def make_images(directory: Path, names: List[str]) -> List[Path]:
+    """Write small PNG icons."""
+    directory.mkdir()
+    paths = []
+    for name in names:
+        path = directory / f'{name}.png'
+        Image.new('RGB', (32, 32), (len(paths) * 20, 90, 160)).save(path)
+        paths.append(path)
+    return paths
+
+
+def encode_all(batcher: FFmpegBatcher, paths: List[Path]) -> Dict[str, BaseException]:
+    """Encode every image from its own thread, as the optimizers do; returns the failures."""
+    def encode(path: Path):
+        try:
+            batcher.encode(path, [['-c:v', 'libwebp', str(path.with_suffix('.webp'))]])
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            return e
+
+    with ThreadPoolExecutor(len(paths)) as pool:
+        errors = dict(zip((path.name for path in paths), pool.map(encode, paths)))
+    return {name: error for name, error in errors.items() if error is not None}
+
+
+def make_batcher(timeout: float) -> FFmpegBatcher:
+    """A batcher whose chunks fill up with the test's images."""
+    return FFmpegBatcher(JobSupervisor(timeout=timeout, retries=0), processes=2,
+                         limits=ChunkLimits(max_pixels=16_000_000, max_inputs=CHUNK, linger=5.0))
+
+
+def test_failed_chunk_is_split_until_the_bad_input_fails_alone(tmp_path: Path, ffmpeg_log: Path):
+    paths = make_images(tmp_path / 'icons', [f'icon-{index}' for index in range(CHUNK - 1)] + ['bad-icon'])
+    batcher = make_batcher(timeout=60)
+
+    errors = encode_all(batcher, paths)
+
+    assert list(errors) == ['bad-icon.png']
+    assert isinstance(errors['bad-icon.png'], subprocess.CalledProcessError)
+    assert all(path.with_suffix('.webp').exists() for path in paths[:-1])
+    assert batcher.stats['splits'] == 4
+    assert batcher.stats['inputs'] == CHUNK - 1
+
+
+def test_hung_input_costs_under_three_timeouts(tmp_path: Path, ffmpeg_log: Path):
+    timeout = 2.0
+    paths = make_images(tmp_path / 'icons', [f'icon-{index}' for index in range(CHUNK - 1)] + ['hung-icon'])
+    batcher = make_batcher(timeout)
+
+    started = time.monotonic()
+    errors = encode_all(batcher, paths)
+    elapsed = time.monotonic() - started
+
+    assert list(errors) == ['hung-icon.png']
+    assert isinstance(errors['hung-icon.png'], subprocess.TimeoutExpired)
+    assert all(path.with_suffix('.webp').exists() for path in paths[:-1])
+    # Halving timeouts take under three in all; a full timeout per split
+    # level would take five
+    assert elapsed < 4 * timeout
+
+    # Its retry runs alone, holding up no other image
+    ffmpeg_log.write_text('')
+    assert list(encode_all(batcher, [paths[0], paths[-1]])) == ['hung-icon.png']
+    assert sorted(ffmpeg_log.read_text().split()) == ['1', '1']
@@ -0,0 +1,89 @@
+"""
+Deduplication of identical sources: planning, and outputs shared through
+hardlinks or manifest aliases.
+"""
+
+import os
+import sys
+import json
+import shutil
+import subprocess
+from pathlib import Path
+from typing import List
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from image_dedup import DedupIndex
+
+BATCH_OPTIMIZER = Path(__file__).resolve().parent.parent / 'batch_image_optimizer.py'
+
+
+def make_photo(path: Path, shade: int) -> None:
+    """Write a small PNG with a gradient of one shade."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    image = Image.new('RGB', (160, 100))
+    image.putdata([(x, y, shade) for y in range(100) for x in range(160)])
+    image.save(path)
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    """Two image folders sharing one picture, plus a distinct one; blog/hero.png is canonical."""
+    make_photo(tmp_path / 'blog/hero.png', 40)
+    make_photo(tmp_path / 'home/team.png', 200)
+    shutil.copyfile(tmp_path / 'blog/hero.png', tmp_path / 'home/cover.png')
+    config = {
+        'engine': 'pillow',
+        'execution': 'asyncio',
+        'use_profiles': False,
+        'directories': [{'input': 'blog', 'output': 'blog/webp'}, {'input': 'home', 'output': 'home/webp'}]
+    }
+    (tmp_path / 'config.json').write_text(json.dumps(config))
+    return tmp_path
+
+
+def optimize(project: Path, *args: str) -> subprocess.CompletedProcess:
+    """Run the batch optimizer on the project."""
+    result = subprocess.run([sys.executable, str(BATCH_OPTIMIZER), '--config', 'config.json', *args],
+                            cwd=project, capture_output=True, text=True, timeout=600)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result
+
+
+def test_plan_picks_the_first_path_among_equal_settings(tmp_path: Path):
+    for name in ('b.png', 'a.png', 'c.png'):
+        make_photo(tmp_path / name, 90)
+    index = DedupIndex()
+    outputs: List[Path] = []
+    for name, settings in (('b.png', 'q85'), ('a.png', 'q85'), ('c.png', 'q70')):
+        index.add(tmp_path / name, tmp_path, tmp_path / 'webp', outputs, settings)
+
+    assert index.plan() == 1
+    assert index.canonical == {tmp_path / 'b.png': index.entries[1]}
+    assert not index.is_duplicate(tmp_path / 'a.png')
+    assert not index.is_duplicate(tmp_path / 'c.png')
+
+
+def test_hardlink_mode_links_the_canonical_outputs(project: Path):
+    result = optimize(project, '--dedup', 'hardlink')
+
+    assert result.stdout.count('Converting') == 2
+    assert 'cover.png: hardlinked to' in result.stdout
+    assert os.path.samefile(project / 'home/webp/cover.webp', project / 'blog/webp/hero.webp')
+
+
+def test_alias_mode_skips_the_encode_and_maps_the_duplicate(project: Path):
+    result = optimize(project, '--dedup', 'alias', '--manifest', 'manifest.json')
+
+    assert result.stdout.count('Converting') == 2
+    assert 'Converting cover.png' not in result.stdout
+    assert '⚡ Encodes skipped: 1 duplicates' in result.stdout
+    assert not (project / 'home/webp/cover.webp').exists()
+
+    manifest = json.loads((project / 'manifest.json').read_text())
+    entry = next(entry for path, entry in manifest['images'].items() if path.endswith('cover.png'))
+    assert entry['status'] == 'deduplicated'
+    assert entry['alias_of'].endswith('blog/hero.png')
+    assert entry['outputs']['webp']['path'].endswith('blog/webp/hero.webp')
@@ -0,0 +1,49 @@
+"""
+Path patterns of exclude lists and profile rules, matched segment by segment.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from image_profiles import create_profile_matcher
+from image_scanner import ExcludeMatcher, scan_images
+
+
+@pytest.mark.parametrize('pattern, path, excluded', [
+    ('*/icon*', 'icon.png', True),
+    ('*/icon*', 'ui/nav/icon-home.png', True),
+    ('*/icon*', 'icons/photo.png', False),
+    ('*.webp', 'gallery/2024/photo.webp', True),
+    ('*.webp', 'photo.webp.png', False),
+    ('*/thumbnails/*', 'thumbnails/a.png', True),
+    ('*/thumbnails/*', 'thumbnails/large/a.png', False),
+    ('*/banner*.{png,jpg}', 'home/banner-1.jpg', True),
+    ('/images/*.png', 'images/a.png', True),
+    ('/images/*.png', 'blog/images/a.png', False),
+    ('*/[!_]*.png', 'ui/_draft.png', False),
+])
+def test_star_stays_within_a_segment(pattern: str, path: str, excluded: bool):
+    assert ExcludeMatcher([pattern]).matches(path) is excluded
+
+
+def test_double_star_prunes_directories_at_any_depth(tmp_path: Path):
+    for relative in ('a.png', 'dist/b.png', 'site/dist/c.png', 'distant/d.png'):
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'')
+
+    found = scan_images(tmp_path, ['.png'], ExcludeMatcher(['**/dist/**']))
+
+    assert sorted(file.path.relative_to(tmp_path).as_posix() for file in found) == ['a.png', 'distant/d.png']
+
+
+def test_files_in_icon_folders_are_not_icons(tmp_path: Path):
+    Image = pytest.importorskip('PIL.Image')
+    (tmp_path / 'icons').mkdir()
+    Image.new('RGB', (800, 600)).save(tmp_path / 'icons/team-photo.png')
+    Image.new('RGB', (800, 600)).save(tmp_path / 'icons/logo.png')
+    matcher = create_profile_matcher({})
+
+    assert matcher.classify('icons/team-photo.png', tmp_path / 'icons/team-photo.png') is None
+    assert matcher.classify('icons/logo.png', tmp_path / 'icons/logo.png') == 'icons'
@@ -0,0 +1,75 @@
+"""
+Deadlines of Pillow jobs run through the supervisor's process pool.
+"""
+
+import time
+import signal
+import threading
+import subprocess
+
+import pytest
+
+import job_supervisor
+from job_supervisor import JobSupervisor, Quarantine, WorkerPool
+
+
+def hang(seconds: float) -> str:
+    """Block like a decoder stuck in C code, which SIGALRM cannot interrupt."""
+    signal.signal(signal.SIGALRM, signal.SIG_IGN)
+    time.sleep(seconds)
+    return 'finished'
+
+
+def work(seconds: float) -> str:
+    """Take a while, then succeed."""
+    time.sleep(seconds)
+    return 'done'
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(max_workers=2)
+    yield pool
+    pool.shutdown(cancel_futures=True)
+
+
+@pytest.fixture(autouse=True)
+def short_grace(monkeypatch):
+    monkeypatch.setattr(job_supervisor, 'KILL_GRACE', 0.2)
+
+
+def test_hung_job_times_out_and_recycles_the_pool(pool, tmp_path):
+    supervisor = JobSupervisor(timeout=0.5, retries=1, backoff=0,
+                               quarantine=Quarantine(tmp_path / 'quarantine.json'))
+
+    def job() -> bool:
+        try:
+            return supervisor.submit(pool, hang, 60) == 'finished'
+        except subprocess.TimeoutExpired:
+            return False
+
+    started = time.monotonic()
+    assert not supervisor.attempt('hung.png', job)
+    assert time.monotonic() - started < 10
+    # Every attempt timed out in its own pool
+    assert pool.generation == 2
+    assert supervisor.submit(pool, work, 0) == 'done'
+
+
+def test_jobs_beside_a_hung_one_run_again(pool):
+    supervisor = JobSupervisor(timeout=30, retries=0)
+    hung_supervisor = JobSupervisor(timeout=0.5, retries=0)
+    results = {}
+
+    def run_neighbour():
+        results['neighbour'] = supervisor.submit(pool, work, 1.5)
+
+    neighbour = threading.Thread(target=run_neighbour)
+    neighbour.start()
+    time.sleep(0.2)
+    with pytest.raises(subprocess.TimeoutExpired):
+        hung_supervisor.submit(pool, hang, 60)
+    neighbour.join(timeout=20)
+
+    assert pool.generation == 1
+    assert results['neighbour'] == 'done'
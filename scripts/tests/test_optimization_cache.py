@@ -0,0 +1,81 @@
+"""
+Persistent optimization cache, exercised through the image optimizer CLI.
+"""
+
+import sys
+import sqlite3
+import subprocess
+from pathlib import Path
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from optimization_cache import OptimizationCache
+
+IMAGE_OPTIMIZER = Path(__file__).resolve().parent.parent / 'image_optimizer.py'
+
+
+def optimize(cwd: Path, *args: str) -> subprocess.CompletedProcess:
+    """Run the image optimizer CLI from a working directory."""
+    result = subprocess.run([sys.executable, str(IMAGE_OPTIMIZER), *args, '--engine', 'pillow'],
+                            cwd=cwd, capture_output=True, text=True, timeout=600)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    """A project with two PNGs and a frontend folder to run from."""
+    (tmp_path / 'images').mkdir()
+    (tmp_path / 'frontend').mkdir()
+    for name, color in (('hero', (200, 40, 40)), ('team', (40, 40, 200))):
+        image = Image.new('RGB', (200, 120), color)
+        image.putpixel((10, 10), (255, 255, 255))
+        image.save(tmp_path / 'images' / f'{name}.png')
+    return tmp_path
+
+
+def test_outputs_are_restored_from_the_cache(project: Path):
+    result = optimize(project, 'images', 'out', '--cache-dir', '.image_cache')
+    assert 'Converting hero.png' in result.stdout
+    first = (project / 'out/hero.webp').read_bytes()
+
+    for output in (project / 'out').iterdir():
+        output.unlink()
+    result = optimize(project, 'images', 'out', '--cache-dir', '.image_cache')
+    assert 'hero.png -> hero.webp (cached)' in result.stdout
+    assert 'team.png -> team.webp (cached)' in result.stdout
+    assert (project / 'out/hero.webp').read_bytes() == first
+
+
+def test_cache_hits_from_another_working_directory(project: Path):
+    optimize(project, 'images', 'out', '--cache-dir', '.image_cache')
+    index = sqlite3.connect(str(project / '.image_cache' / OptimizationCache.INDEX_NAME))
+    objects = [row[0] for row in index.execute('SELECT object FROM entries')]
+    index.close()
+    assert objects and all(obj.startswith('objects/') for obj in objects)
+
+    for output in (project / 'out').iterdir():
+        output.unlink()
+    result = optimize(project / 'frontend', '../images', '../out', '--cache-dir', '../.image_cache')
+    assert 'hero.png -> hero.webp (cached)' in result.stdout
+    assert 'Converting' not in result.stdout
+
+
+def test_changed_settings_miss(tmp_path: Path):
+    source = tmp_path / 'hero.png'
+    Image.new('RGB', (64, 64), (90, 120, 30)).save(source)
+    output = tmp_path / 'hero.webp'
+    Image.open(source).save(output, 'WEBP', quality=80)
+
+    cache = OptimizationCache(tmp_path / 'cache')
+    source_hash = cache.hash_file(source)
+    cache.store(cache.make_key(source_hash, engine='pillow', quality=80), source_hash, output)
+    restored = tmp_path / 'restored.webp'
+
+    assert not cache.fetch(cache.make_key(source_hash, engine='pillow', quality=70), restored)
+    assert cache.fetch(cache.make_key(source_hash, engine='pillow', quality=80), restored)
+    assert restored.read_bytes() == output.read_bytes()
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+    cache.close()
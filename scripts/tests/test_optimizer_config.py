@@ -0,0 +1,84 @@
+"""
+Configuration merging and validation of the batch optimizer.
+"""
+
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from optimizer_config import ADDITIVE_KEYS, DEFAULT_EXCLUDE_PATTERNS, OptimizerConfig, deep_merge
+
+BATCH_OPTIMIZER = Path(__file__).resolve().parent.parent / 'batch_image_optimizer.py'
+
+
+def test_nested_blocks_merge_key_by_key():
+    config = OptimizerConfig({'supervisor': {'retries': 0}, 'cache': {'max_size_mb': 64}})
+    default = OptimizerConfig()
+
+    assert config['supervisor']['retries'] == 0
+    assert config['supervisor']['timeout_seconds'] == default['supervisor']['timeout_seconds']
+    assert config['cache']['max_size_mb'] == 64
+    assert config['cache']['cache_dir'] == default['cache']['cache_dir']
+
+
+def test_additive_lists_extend_the_defaults():
+    config = OptimizerConfig({'exclude_patterns': ['**/drafts/**', '*.webp'],
+                              'output_formats': ['avif']})
+
+    assert list(config['exclude_patterns']) == DEFAULT_EXCLUDE_PATTERNS + ['**/drafts/**']
+    # Other lists replace the default outright
+    assert list(config['output_formats']) == ['avif']
+
+
+def test_additive_keys_apply_at_the_top_level_only():
+    merged = deep_merge({'exclude_patterns': ['a'], 'block': {'exclude_patterns': ['a']}},
+                        {'exclude_patterns': ['b'], 'block': {'exclude_patterns': ['b']}},
+                        ADDITIVE_KEYS)
+
+    assert merged == {'exclude_patterns': ['a', 'b'], 'block': {'exclude_patterns': ['b']}}
+
+
+@pytest.mark.parametrize('values, message', [
+    ({'quality': 101}, "'quality' must be between 0 and 100"),
+    ({'max_workers': True}, "'max_workers' must be int"),
+    ({'execution': 'processes'}, "'execution' must be threads or asyncio"),
+    ({'directories': [{'input': 'images'}]}, "each directory needs 'input' and 'output' paths"),
+    ({'ffmpeg_batch': {'max_inputs': 0}}, "'ffmpeg_batch.max_inputs' must be at least 1"),
+])
+def test_invalid_settings_are_rejected(values, message):
+    with pytest.raises(ValueError, match=message):
+        OptimizerConfig(values)
+
+
+def test_config_file_extends_the_default_excludes(tmp_path: Path):
+    Image = pytest.importorskip('PIL.Image')
+    for relative in ('hero.png', 'drafts/wip.png', 'build/copy.png'):
+        path = tmp_path / 'images' / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Image.new('RGB', (120, 80), (30, 120, 200)).save(path)
+    config = {
+        'engine': 'pillow',
+        'directories': [{'input': 'images', 'output': 'images/webp'}],
+        'exclude_patterns': ['**/drafts/**'],
+        'supervisor': {'retries': 0}
+    }
+    (tmp_path / 'config.json').write_text(json.dumps(config))
+
+    result = subprocess.run([sys.executable, str(BATCH_OPTIMIZER), '--config', 'config.json'],
+                            cwd=tmp_path, capture_output=True, text=True, timeout=600)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    outputs = sorted(path.relative_to(tmp_path / 'images/webp').as_posix()
+                     for path in (tmp_path / 'images/webp').rglob('*.webp'))
+    assert outputs == ['hero.webp']
+
+
+def test_invalid_override_stops_the_run(tmp_path: Path):
+    result = subprocess.run([sys.executable, str(BATCH_OPTIMIZER), '--quality', '150'],
+                            cwd=tmp_path, capture_output=True, text=True, timeout=600)
+
+    assert result.returncode == 1
+    assert "❌ Invalid configuration: 'quality' must be between 0 and 100, got 150" in result.stdout
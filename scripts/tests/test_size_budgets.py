@@ -0,0 +1,82 @@
+"""
+Size budget gate of the build optimizer, run end to end on a small synthetic project.
+"""
+
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+BUILD_OPTIMIZER = Path(__file__).resolve().parent.parent / 'build_optimizer.py'
+
+IMAGE_DIR = Path('frontend/public/assets/images')
+OUTPUT_DIR = IMAGE_DIR / 'optimized'
+
+
+def make_gradient(path: Path, width: int = 1200, height: int = 800) -> None:
+    """Write a smooth PNG that the optimizer shrinks but still emits outputs for."""
+    image = Image.new('RGB', (width, height))
+    image.putdata([(x * 255 // width, y * 255 // height, 128) for y in range(height) for x in range(width)])
+    image.save(path)
+
+
+def make_noise(path: Path, width: int = 1200, height: int = 800) -> None:
+    """Write a PNG of random pixels, which no encoder can shrink much."""
+    Image.frombytes('RGB', (width, height), os.urandom(width * height * 3)).save(path)
+
+
+def run_build(project: Path, *args: str) -> subprocess.CompletedProcess:
+    """Run the build optimizer CLI on the project."""
+    return subprocess.run([sys.executable, str(BUILD_OPTIMIZER), '--project-root', str(project),
+                           '--engine', 'pillow', *args],
+                          capture_output=True, text=True, timeout=600)
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    """A project whose budget fits its sources, but not its sources plus their outputs."""
+    image_dir = tmp_path / IMAGE_DIR
+    image_dir.mkdir(parents=True)
+    (tmp_path / 'frontend/src').mkdir()
+    for name in ('hero', 'team', 'office'):
+        make_gradient(image_dir / f'{name}.png')
+    sources = sum(path.stat().st_size for path in image_dir.iterdir())
+
+    config = {
+        'image_directories': [{'source': IMAGE_DIR.as_posix(), 'output': OUTPUT_DIR.as_posix()}],
+        'route_preloads': {'enabled': False},
+        'size_budgets': {
+            'enabled': True,
+            'directories': {'frontend/public/assets': {'max_total_kb': sources * 1.1 / 1024}}
+        }
+    }
+    (tmp_path / 'build_config.json').write_text(json.dumps(config))
+    return tmp_path
+
+
+def test_clean_build_meets_budgets(project: Path):
+    result = run_build(project, '--environment', 'production')
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert '✅ Size budgets met' in result.stdout
+
+    # The outputs would not fit the budget if they were counted beside their sources
+    outputs = [path for path in (project / OUTPUT_DIR).rglob('*') if path.is_file()]
+    assert outputs
+    budget = json.loads((project / 'build_config.json').read_text())['size_budgets']['directories']
+    total = sum(path.stat().st_size for path in (project / IMAGE_DIR).rglob('*') if path.is_file())
+    assert total > budget['frontend/public/assets']['max_total_kb'] * 1024
+
+
+def test_regression_fails_the_check(project: Path):
+    assert run_build(project, '--environment', 'production').returncode == 0
+    assert run_build(project, '--update-baseline').returncode == 0
+
+    make_noise(project / IMAGE_DIR / 'team.png')
+    result = run_build(project, '--check-budgets')
+    assert result.returncode == 1, result.stdout + result.stderr
+    assert 'frontend/public/assets/images/team.png' in result.stdout
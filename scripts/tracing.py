@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Stage Tracing for RadioFusion Image Optimizer
+Records per-file spans (discover, stat, cache, convert, decode, encode, write)
+and exports them as JSON lines and a Chrome trace_event file.
+"""
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import contextlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Hot functions printed by --profile
+PROFILE_TOP = 25
+
+
+class Span:
+    """Arguments of an open span; stages add byte counts as they learn them."""
+
+    __slots__ = ('args',)
+
+    def __init__(self, args: Dict[str, Any]):
+        """
+        Initialize the Span.
+
+        Args:
+            args (Dict[str, Any]): Initial span arguments
+        """
+        self.args = args
+
+    def set(self, **args: Any) -> None:
+        """Add or replace span arguments (e.g. bytes_out)."""
+        self.args.update(args)
+
+
+class Tracer:
+    """
+    Thread-safe collector of timed spans.
+
+    A disabled tracer records nothing, and its spans cost one attribute
+    check, so every optimizer carries one. Stages that need extra work to
+    fill in arguments (stat calls for byte counts) check ``enabled`` first.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        Initialize the Tracer.
+
+        Args:
+            enabled (bool): Record spans
+        """
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_worker() -> str:
+        """Get the id of the calling worker: its thread name."""
+        return threading.current_thread().name
+
+    def add(self, name: str, start: float, duration: float, file: Optional[Path] = None,
+            worker: Optional[str] = None, pid: Optional[int] = None, **args: Any) -> None:
+        """
+        Record a finished span.
+
+        Args:
+            name (str): Stage name
+            start (float): time.perf_counter() at the start of the span
+            duration (float): Span length in seconds
+            file (Path): Image the span belongs to
+            worker (str): Worker id (default: the calling thread)
+            pid (int): Process the span ran in (default: this process)
+            **args (Any): Extra arguments, e.g. bytes_in and bytes_out
+        """
+        if not self.enabled:
+            return
+        span = {
+            'name': name,
+            'file': str(file) if file is not None else None,
+            'worker': worker or self.get_worker(),
+            'pid': pid or os.getpid(),
+            'start': start - self.origin,
+            'duration': duration
+        }
+        span.update(args)
+        with self.lock:
+            self.spans.append(span)
+
+    @contextlib.contextmanager
+    def span(self, name: str, file: Optional[Path] = None, worker: Optional[str] = None,
+             **args: Any) -> Iterator[Span]:
+        """
+        Time a block as a span.
+
+        Args:
+            name (str): Stage name
+            file (Path): Image the span belongs to
+            worker (str): Worker id (default: the calling thread)
+            **args (Any): Initial span arguments
+
+        Yields:
+            Span: Open span, for arguments known only at the end
+        """
+        span = Span(args)
+        if not self.enabled:
+            yield span
+            return
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            self.add(name, start, time.perf_counter() - start, file, worker, **span.args)
+
+    def add_worker_spans(self, spans: Iterable[Tuple[str, float, float, int, int, int]], file: Path,
+                         **args: Any) -> None:
+        """
+        Record spans timed inside a worker process.
+
+        perf_counter is system-wide on Linux and macOS, so worker timestamps
+        line up with this process's.
+
+        Args:
+            spans (Iterable[Tuple[str, float, float, int, int, int]]): (name, start,
+                duration, pid, bytes in, bytes out) per span
+            file (Path): Image the spans belong to
+            **args (Any): Arguments added to every span
+        """
+        for name, start, duration, pid, bytes_in, bytes_out in spans:
+            self.add(name, start, duration, file, worker=f"pillow-{pid}", pid=pid,
+                     bytes_in=bytes_in, bytes_out=bytes_out, **args)
+
+    def trace_iter(self, name: str, iterable: Iterable[Any], worker: Optional[str] = None) -> Iterator[Any]:
+        """
+        Yield from an iterable, recording the time spent producing each item.
+
+        Used for the directory walk: each item (a ScannedFile) gets a span
+        covering the scanning done to find it.
+
+        Args:
+            name (str): Stage name
+            iterable (Iterable[Any]): Items with ``path`` and ``stat`` attributes
+            worker (str): Worker id (default: the calling thread)
+
+        Yields:
+            Any: Each item
+        """
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.add(name, start, time.perf_counter() - start, item.path, worker,
+                     bytes_in=item.stat.st_size)
+            yield item
+
+    def summarize(self) -> Dict[str, Dict[str, float]]:
+        """
+        Total the spans per stage.
+
+        Returns:
+            Dict[str, Dict[str, float]]: {'count', 'seconds', 'bytes_in', 'bytes_out'} per stage
+        """
+        totals: Dict[str, Dict[str, float]] = {}
+        with self.lock:
+            spans = list(self.spans)
+        for span in spans:
+            stage = totals.setdefault(span['name'], {'count': 0, 'seconds': 0.0, 'bytes_in': 0, 'bytes_out': 0})
+            stage['count'] += 1
+            stage['seconds'] += span['duration']
+            stage['bytes_in'] += span.get('bytes_in') or 0
+            stage['bytes_out'] += span.get('bytes_out') or 0
+        return totals
+
+    def print_summary(self) -> None:
+        """Print time and bytes per stage, slowest first."""
+        totals = self.summarize()
+        if not totals:
+            return
+        print("\n⏱️  STAGE TIMINGS (summed across workers):")
+        for name, stage in sorted(totals.items(), key=lambda item: -item[1]['seconds']):
+            print(f"   {name:<12} {stage['count']:>6} spans  {stage['seconds']:>9.3f}s  "
+                  f"in {int(stage['bytes_in']):>13,} B  out {int(stage['bytes_out']):>13,} B")
+
+    def export(self, trace_path: Path) -> Tuple[Path, Path]:
+        """
+        Write the spans as a Chrome trace and as JSON lines next to it.
+
+        The Chrome trace opens in chrome://tracing or ui.perfetto.dev, with
+        one row per worker thread or process.
+
+        Args:
+            trace_path (Path): Chrome trace file; the JSON-lines log gets the
+                same name with a .jsonl suffix
+
+        Returns:
+            Tuple[Path, Path]: (Chrome trace path, JSON-lines path)
+        """
+        with self.lock:
+            spans = sorted(self.spans, key=lambda span: span['start'])
+        trace_path.parent.mkdir(parents=True, exist_ok=True)
+        jsonl_path = trace_path.with_suffix('.jsonl')
+
+        with open(jsonl_path, 'w') as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + '\n')
+
+        # trace_event wants integer thread ids; number the workers in order
+        # of first appearance and name the rows after them
+        thread_ids: Dict[Tuple[int, str], int] = {}
+        events = []
+        for span in spans:
+            key = (span['pid'], span['worker'])
+            if key not in thread_ids:
+                thread_ids[key] = len(thread_ids) + 1
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': span['pid'],
+                               'tid': thread_ids[key], 'args': {'name': span['worker']}})
+            events.append({
+                'name': span['name'],
+                'cat': 'image',
+                'ph': 'X',
+                'ts': round(span['start'] * 1e6, 3),
+                'dur': round(span['duration'] * 1e6, 3),
+                'pid': span['pid'],
+                'tid': thread_ids[key],
+                'args': {k: v for k, v in span.items()
+                         if k not in ('name', 'worker', 'pid', 'start', 'duration')}
+            })
+
+        with open(trace_path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+        return trace_path, jsonl_path
+
+
+def run_profiled(func: Callable[[], Any], top: int = PROFILE_TOP) -> Any:
+    """
+    Run a function under cProfile and print its hottest functions.
+
+    Threads started during the run (file workers) are profiled too and
+    merged into one report; time inside Pillow worker processes shows up as
+    waiting on their futures.
+
+    Args:
+        func (Callable[[], Any]): Function to run
+        top (int): Functions to print, by own (exclusive) time
+
+    Returns:
+        Any: Result of func
+    """
+    profiles = []
+    lock = threading.Lock()
+
+    def profile_thread(*_: Any) -> None:
+        # Installed by threading.setprofile as each new thread starts;
+        # replaces itself with a per-thread cProfile profiler
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with lock:
+            profiles.append(profile)
+        profile.enable()
+
+    main_profile = cProfile.Profile()
+    threading.setprofile(profile_thread)
+    main_profile.enable()
+    try:
+        return func()
+    finally:
+        main_profile.disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(main_profile, stream=sys.stdout)
+        with lock:
+            for profile in profiles:
+                stats.add(profile)
+        print(f"\n🔥 TOP {top} FUNCTIONS BY OWN TIME:")
+        stats.sort_stats('tottime').print_stats(top)
@@ -0,0 +1,730 @@
+#!/usr/bin/env python3
+"""
+WebP Recompression for RadioFusion Image Optimizer
+Shrinks existing WebP assets without losing quality: lossless files are
+re-encoded losslessly at maximum encoder effort and lossy files are repacked
+without their metadata. Lossy re-encoding is opt-in and keeps a result only
+when it is smaller and within a pixel-difference bound of the original.
+"""
+
+import os
+import sys
+import time
+import shutil
+import struct
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from image_probe import probe_image, webp_chunks
+from image_scanner import ExcludeMatcher, ScannedFile, scan_images
+from job_supervisor import (JobCancelled, JobSupervisor, Quarantine, WorkerPool, handle_signals,
+                            temp_output_path)
+from memory_budget import estimate_decode_bytes
+from result_writer import CONVERTED, FAILED, OUTPUT_MODES, QUARANTINED, SKIPPED, ResultWriter
+from tracing import Tracer
+
+try:
+    from PIL import Image, ImageChops
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    PIL_AVAILABLE = False
+
+# Encoders for the recompression pass; auto prefers cwebp (multi-pass and
+# auto-filter), then Pillow. Pillow also decodes both files for the comparison.
+RECOMPRESS_ENGINES = ('auto', 'cwebp', 'ffmpeg', 'pillow')
+
+# Share of pixels, in percent, whose difference is bounded; a mean would hide
+# sharp local damage such as smeared text in a banner, a high percentile does not
+DIFF_PERCENTILE = 99.9
+
+# Largest accepted difference of any channel (0-255 scale, alpha
+# premultiplied) at DIFF_PERCENTILE, for opt-in lossy re-encodes; one at
+# about the source quality stays below it, one clearly below does not
+DEFAULT_MAX_PIXEL_DIFF = 10
+
+# Chunks repacking drops, and the VP8X flag bits announcing them
+METADATA_CHUNKS = {b'EXIF': 0x08, b'XMP ': 0x04}
+
+# cwebp entropy passes for lossy re-encodes
+CWEBP_PASSES = 10
+
+# Files already recompressed (or found not worth it), skipped until they change
+DEFAULT_STATE_FILE = '.webp_recompress.json'
+
+# Same directories ImageOptimizer never scans
+DEFAULT_EXCLUDE_PATTERNS = ['**/node_modules/**', '**/.git/**', '**/dist/**', '**/build/**']
+
+
+def premultiplied(img: 'Image.Image', alpha: bool) -> 'Image.Image':
+    """Convert a frame to RGB, or to RGBA with colour premultiplied by alpha."""
+    if not alpha:
+        return img.convert('RGB')
+    rgba = img.convert('RGBA')
+    a = rgba.getchannel('A')
+    rgb = ImageChops.multiply(rgba.convert('RGB'), Image.merge('RGB', (a, a, a)))
+    return Image.merge('RGBA', (*rgb.split(), a))
+
+
+def pixel_difference(reference_path: str, candidate_path: str) -> int:
+    """
+    Measure how far a re-encoded image strays from its original.
+
+    Colour is premultiplied by alpha, so changes hidden under fully
+    transparent pixels (which encoders may rewrite freely) do not count.
+
+    Args:
+        reference_path (str): Original image
+        candidate_path (str): Re-encoded image
+
+    Returns:
+        int: Absolute difference of the worst channel that DIFF_PERCENTILE
+        percent of the pixels stay within, 0-255
+
+    Raises:
+        ValueError: If the images differ in size
+        OSError: If either image cannot be decoded
+    """
+    with Image.open(reference_path) as reference, Image.open(candidate_path) as candidate:
+        if reference.size != candidate.size:
+            raise ValueError(f"size changed from {reference.size} to {candidate.size}")
+        alpha = 'A' in reference.getbands() or 'A' in candidate.getbands()
+        diff = ImageChops.difference(premultiplied(reference, alpha), premultiplied(candidate, alpha))
+        histogram = diff.histogram()
+        bounded = diff.width * diff.height * DIFF_PERCENTILE / 100
+        worst = 0
+        for band in range(len(diff.getbands())):
+            seen = 0
+            for value, count in enumerate(histogram[band * 256:(band + 1) * 256]):
+                seen += count
+                if seen >= bounded:
+                    worst = max(worst, value)
+                    break
+        return worst
+
+
+def compare_webp(reference_path: str, candidate_path: str) -> Tuple[Optional[int], str]:
+    """
+    Process pool worker: pixel_difference that reports failures instead of raising.
+
+    Returns:
+        Tuple[Optional[int], str]: (difference, error message); the
+        difference is None on failure
+    """
+    try:
+        return pixel_difference(reference_path, candidate_path), ''
+    except Exception as e:
+        return None, str(e)
+
+
+def strip_webp_metadata(input_path: Path, output_path: Path) -> bool:
+    """
+    Repack a WebP without its EXIF and XMP chunks, leaving the bitstream untouched.
+
+    Args:
+        input_path (Path): Existing WebP
+        output_path (Path): Where the repacked WebP is written
+
+    Returns:
+        bool: True if metadata was dropped and output_path written
+
+    Raises:
+        ValueError: If the file is not a well-formed WebP
+        OSError: If a file cannot be read or written
+    """
+    data = input_path.read_bytes()
+    if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WEBP':
+        raise ValueError("not a WebP")
+    end = min(len(data), 8 + struct.unpack('<I', data[4:8])[0])
+    kept, dropped_flags, offset = [], 0, 12
+    while offset + 8 <= end:
+        fourcc = data[offset:offset + 4]
+        size = struct.unpack('<I', data[offset + 4:offset + 8])[0]
+        # Payloads are padded to an even size
+        chunk = bytearray(data[offset:offset + 8 + size + (size & 1)])
+        if len(chunk) < 8 + size:
+            raise ValueError(f"truncated {fourcc!r} chunk")
+        offset += len(chunk)
+        if fourcc in METADATA_CHUNKS:
+            dropped_flags |= METADATA_CHUNKS[fourcc]
+            continue
+        kept.append(chunk)
+    if not dropped_flags:
+        return False
+
+    for chunk in kept:
+        if chunk[:4] == b'VP8X':
+            # The canvas header must not announce chunks that are gone
+            chunk[8] &= ~dropped_flags & 0xFF
+    body = b''.join(kept)
+    output_path.write_bytes(b'RIFF' + struct.pack('<I', 4 + len(body)) + b'WEBP' + body)
+    return True
+
+
+def recompress_webp_pillow(input_path: str, output_path: str, lossless: bool,
+                           quality: Optional[int]) -> Tuple[bool, Optional[int], str]:
+    """
+    Process pool worker: re-encode a WebP with Pillow at method 6 and measure the result.
+
+    EXIF and XMP are not carried over; an ICC profile is, since dropping it
+    changes how the image is displayed.
+
+    Args:
+        input_path (str): Existing WebP
+        output_path (str): Where the re-encoded WebP is written
+        lossless (bool): Encode losslessly at maximum effort
+        quality (Optional[int]): Lossy quality (ignored when lossless)
+
+    Returns:
+        Tuple[bool, Optional[int], str]: (encoded, pixel difference, error
+        message); the difference is None when the result is not smaller and
+        was not worth decoding
+    """
+    try:
+        with Image.open(input_path) as img:
+            img.load()
+            save_args = {'lossless': True, 'quality': 100} if lossless else {'quality': quality}
+            icc_profile = img.info.get('icc_profile')
+            if icc_profile:
+                save_args['icc_profile'] = icc_profile
+            img.save(output_path, 'WEBP', method=6, **save_args)
+        if os.path.getsize(output_path) >= os.path.getsize(input_path):
+            return True, None, ''
+        difference, error = compare_webp(input_path, output_path)
+        return difference is not None, difference, error
+    except Exception as e:
+        return False, None, str(e)
+
+
+class WebPRecompressor:
+    """
+    Recompresses WebP files in place, in parallel, keeping only clear wins.
+
+    By default no pixel changes: lossless sources are re-encoded losslessly
+    at maximum effort and must decode identically, and lossy sources are
+    only repacked without their EXIF and XMP chunks, since any re-encode of
+    a lossy file adds a generation of loss. With lossy enabled, lossy
+    sources are re-encoded at the given quality with method 6 (plus
+    multi-pass and the auto-filter under cwebp), and a result is kept only
+    if its difference at DIFF_PERCENTILE is within max_pixel_diff. A result
+    replaces its source only if it is smaller; either way the file is
+    recorded in the state file and skipped until it changes, so lossy files
+    never drift over repeated runs.
+    """
+
+    def __init__(self, quality: Optional[int] = None, lossy: bool = False,
+                 max_pixel_diff: float = DEFAULT_MAX_PIXEL_DIFF,
+                 engine: str = 'auto', max_workers: Optional[int] = None,
+                 exclude_patterns: Optional[List[str]] = None, state_file: Optional[Path] = None,
+                 dry_run: bool = False, force: bool = False, supervisor: Optional[JobSupervisor] = None,
+                 tracer: Optional[Tracer] = None, results: Optional[ResultWriter] = None):
+        """
+        Initialize the WebPRecompressor.
+
+        Args:
+            quality (Optional[int]): Quality lossy sources are re-encoded at
+                (0-100); required when lossy
+            lossy (bool): Re-encode lossy sources instead of only repacking them
+            max_pixel_diff (float): Largest accepted channel difference at
+                DIFF_PERCENTILE for lossy re-encodes, 0-255 (default:
+                DEFAULT_MAX_PIXEL_DIFF)
+            engine (str): One of RECOMPRESS_ENGINES (default: auto)
+            max_workers (int): Files recompressed at once (default: CPU count)
+            exclude_patterns (List[str]): Patterns never scanned
+                (default: DEFAULT_EXCLUDE_PATTERNS)
+            state_file (Path): JSON file of finished files, None to keep the
+                state in memory
+            dry_run (bool): Measure every file but replace none
+            force (bool): Try files the state file lists as finished again
+            supervisor (JobSupervisor): Timeouts, retries and cancellation
+            tracer (Tracer): Span recorder
+            results (ResultWriter): Machine-readable result writer
+
+        Raises:
+            ValueError: If a setting is out of range or the engine is unknown
+        """
+        if engine not in RECOMPRESS_ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(RECOMPRESS_ENGINES)}")
+        if lossy and quality is None:
+            raise ValueError("Lossy re-encoding needs an explicit quality")
+        if quality is not None and not 0 <= quality <= 100:
+            raise ValueError(f"Quality must be between 0 and 100, got {quality}")
+        if max_pixel_diff < 0:
+            raise ValueError(f"Pixel difference bound must not be negative, got {max_pixel_diff}")
+
+        self.quality = quality
+        self.lossy = lossy
+        self.max_pixel_diff = max_pixel_diff
+        self.engine = engine
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.exclude_matcher = ExcludeMatcher(DEFAULT_EXCLUDE_PATTERNS if exclude_patterns is None
+                                              else exclude_patterns)
+        # Same bookkeeping as the quarantine: an entry holds until the file's
+        # size or modification time changes
+        self.state = Quarantine(state_file)
+        self.dry_run = dry_run
+        self.force = force
+        self.supervisor = supervisor if supervisor is not None else JobSupervisor()
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.results = results if results is not None else ResultWriter()
+        self.process_pool = None
+        self.lock = threading.Lock()
+        self.stats = {
+            'recompressed': 0,
+            'kept': 0,
+            'skipped': 0,
+            'quarantined': 0,
+            'errors': 0,
+            'total_size_before': 0,
+            'total_size_after': 0
+        }
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], root: Path = Path('.'),
+                    **shared: Any) -> 'WebPRecompressor':
+        """
+        Build a recompressor from a 'webp_recompress' configuration block.
+
+        Args:
+            config (Optional[Dict[str, Any]]): Block with 'lossy', 'quality',
+                'max_pixel_diff', 'engine', 'workers', 'exclude_patterns' and
+                'state_file' (all optional)
+            root (Path): Directory a relative state_file is resolved against
+            **shared (Any): supervisor, tracer, results, dry_run or force
+
+        Returns:
+            WebPRecompressor: Configured recompressor
+
+        Raises:
+            ValueError: If a setting is out of range
+        """
+        config = config or {}
+        state_file = config.get('state_file', DEFAULT_STATE_FILE)
+        return cls(quality=config.get('quality'),
+                   lossy=config.get('lossy', False),
+                   max_pixel_diff=config.get('max_pixel_diff', DEFAULT_MAX_PIXEL_DIFF),
+                   engine=config.get('engine', 'auto'),
+                   max_workers=config.get('workers'),
+                   exclude_patterns=config.get('exclude_patterns'),
+                   state_file=root / state_file if state_file else None,
+                   **shared)
+
+    def update_stats(self, **deltas: int) -> None:
+        """Add to stats counters under the lock (called from worker threads)."""
+        with self.lock:
+            for key, delta in deltas.items():
+                self.stats[key] += delta
+
+    def check_engine(self) -> bool:
+        """
+        Resolve the auto engine and check that the encoder and Pillow are available.
+
+        Returns:
+            bool: True if files can be recompressed and compared
+        """
+        if not PIL_AVAILABLE:
+            print("❌ Pillow is required to compare recompressed WebPs: pip install Pillow")
+            return False
+        if self.engine == 'auto':
+            self.engine = 'cwebp' if shutil.which('cwebp') else 'pillow'
+        if self.engine == 'pillow':
+            print("✅ Pillow (libwebp) is available")
+            return True
+
+        try:
+            subprocess.run([self.engine, '-version'], capture_output=True, text=True, check=True)
+            print(f"✅ {self.engine} is available")
+            return True
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            print(f"❌ {self.engine} is not installed or not in PATH")
+            return False
+
+    def get_command(self, input_path: Path, output_path: Path, lossless: bool) -> List[str]:
+        """
+        Get the cwebp or FFmpeg command re-encoding a WebP at maximum effort.
+
+        cwebp keeps only the ICC profile; FFmpeg keeps no metadata at all.
+
+        Args:
+            input_path (Path): Existing WebP
+            output_path (Path): Where the re-encoded WebP is written
+            lossless (bool): Encode losslessly
+
+        Returns:
+            List[str]: Command to run
+        """
+        if self.engine == 'cwebp':
+            if lossless:
+                # -z 9: lossless at method 6 and maximum quality (effort)
+                args = ['-lossless', '-z', '9']
+            else:
+                args = ['-q', str(self.quality), '-m', '6', '-pass', str(CWEBP_PASSES), '-af']
+            return ['cwebp', '-quiet', '-mt', *args, '-metadata', 'icc', str(input_path), '-o', str(output_path)]
+
+        if lossless:
+            args = ['-lossless', '1', '-quality', '100']
+        else:
+            args = ['-quality', str(self.quality)]
+        return ['ffmpeg', '-y', '-v', 'error', '-i', str(input_path), '-map_metadata', '-1',
+                '-c:v', 'libwebp', *args, '-compression_level', '6', str(output_path)]
+
+    def encode(self, input_path: Path, temp_path: Path, lossless: bool) -> Tuple[bool, Optional[int], str]:
+        """
+        Re-encode (or repack) one WebP to a temporary file and measure it if it is smaller.
+
+        Args:
+            input_path (Path): Existing WebP
+            temp_path (Path): Temporary output next to it
+            lossless (bool): Whether the source is lossless
+
+        Returns:
+            Tuple[bool, Optional[int], str]: (encoded, pixel difference or
+            None when not smaller, error message)
+        """
+        if not lossless and not self.lossy:
+            # The bitstream is copied as it is, so there is nothing to compare
+            with self.tracer.span('repack', input_path):
+                try:
+                    stripped = strip_webp_metadata(input_path, temp_path)
+                except (OSError, ValueError) as e:
+                    return False, None, str(e)
+            if not stripped or temp_path.stat().st_size >= input_path.stat().st_size:
+                return True, None, ''
+            return True, 0, ''
+
+        if self.engine == 'pillow':
+            with self.tracer.span('encode', input_path, lossless=lossless):
+                return self.supervisor.submit(self.process_pool, recompress_webp_pillow,
+                                              str(input_path), str(temp_path), lossless, self.quality)
+
+        with self.tracer.span('encode', input_path, lossless=lossless):
+            try:
+                self.supervisor.run(self.get_command(input_path, temp_path, lossless))
+            except subprocess.CalledProcessError as e:
+                return False, None, (e.stderr or '').strip()
+        if temp_path.stat().st_size >= input_path.stat().st_size:
+            return True, None, ''
+        with self.tracer.span('compare', input_path):
+            difference, error = self.supervisor.submit(self.process_pool, compare_webp,
+                                                       str(input_path), str(temp_path))
+        return difference is not None, difference, error
+
+    def recompress(self, input_path: Path, source_stat: os.stat_result) -> bool:
+        """
+        Recompress a single WebP in place.
+
+        Args:
+            input_path (Path): Existing WebP
+            source_stat (os.stat_result): Stat taken during the scan
+
+        Returns:
+            bool: True unless the file failed
+        """
+        started = time.perf_counter()
+        original_size = source_stat.st_size
+
+        def skip(reason: str, message: str, stat: os.stat_result = source_stat) -> bool:
+            print(f"⏭️  Keeping {input_path.name} ({message})")
+            self.update_stats(kept=1, total_size_before=original_size, total_size_after=original_size)
+            if not self.dry_run:
+                self.state.add(input_path, stat, 1)
+            self.results.file_result(input_path, SKIPPED, time.perf_counter() - started, original_size,
+                                     original_size, [input_path], error=reason)
+            return True
+
+        if not self.force and self.state.contains(input_path, source_stat):
+            self.update_stats(skipped=1)
+            self.results.file_result(input_path, SKIPPED, time.perf_counter() - started, original_size,
+                                     original_size, [input_path], error='already recompressed')
+            return True
+
+        if self.supervisor.is_quarantined(input_path, source_stat):
+            print(f"⛔ Skipping {input_path.name} (quarantined after repeated failures)")
+            self.update_stats(quarantined=1)
+            self.results.file_result(input_path, QUARANTINED, time.perf_counter() - started,
+                                     original_size, error='quarantined after repeated failures')
+            return False
+
+        chunks = webp_chunks(input_path)
+        if chunks is None:
+            print(f"❌ {input_path.name} is not a valid WebP")
+            self.update_stats(errors=1)
+            self.results.file_result(input_path, FAILED, time.perf_counter() - started, original_size,
+                                     error='not a valid WebP')
+            return False
+        if b'ANIM' in chunks:
+            # Pillow and FFmpeg would flatten or mishandle the frames
+            return skip('animated', 'animated')
+        lossless = b'VP8L' in chunks
+
+        temp_path = temp_output_path(input_path)
+        outcome: Dict[str, Any] = {}
+
+        def attempt() -> bool:
+            try:
+                encoded, difference, error = self.encode(input_path, temp_path, lossless)
+            except subprocess.TimeoutExpired:
+                encoded, difference, error = False, None, 'timed out'
+            if not encoded:
+                print(f"❌ Error recompressing {input_path.name}: {error}")
+            outcome['difference'] = difference
+            return encoded
+
+        try:
+            with self.supervisor.reserve_memory(estimate_decode_bytes(probe_image(input_path), original_size)):
+                recompressed = self.supervisor.attempt(input_path.name, attempt)
+            if not recompressed:
+                self.supervisor.quarantine.add(input_path, source_stat, self.supervisor.retries + 1)
+                print(f"⛔ Quarantined {input_path.name} after {self.supervisor.retries + 1} failed attempts")
+                self.update_stats(errors=1)
+                self.results.file_result(input_path, FAILED, time.perf_counter() - started, original_size,
+                                         error=f"failed after {self.supervisor.retries + 1} attempts")
+                return False
+            self.supervisor.quarantine.release(input_path)
+
+            difference = outcome['difference']
+            if difference is None:
+                return skip('not smaller', 'not smaller')
+            # A lossless encode must reproduce every visible pixel exactly
+            limit = self.max_pixel_diff if self.lossy and not lossless else 0
+            if difference > limit:
+                return skip('difference too large', f"difference {difference} > {limit:g}")
+
+            new_size = temp_path.stat().st_size
+            with self.tracer.span('write', input_path, bytes_in=original_size, bytes_out=new_size):
+                # Never overwrite a file that changed while it was being encoded
+                current = input_path.stat()
+                if (current.st_size, current.st_mtime_ns) != (source_stat.st_size, source_stat.st_mtime_ns):
+                    return skip('changed during recompression', 'changed during recompression')
+                if not self.dry_run:
+                    shutil.copymode(input_path, temp_path)
+                    os.replace(temp_path, input_path)
+                    self.state.add(input_path, input_path.stat(), 1)
+        finally:
+            try:
+                temp_path.unlink()
+            except FileNotFoundError:
+                pass
+
+        reduction = (original_size - new_size) / original_size * 100
+        action = "Would recompress" if self.dry_run else "Recompressed"
+        print(f"✅ {action} {input_path.name}: {original_size:,} -> {new_size:,} bytes "
+              f"({reduction:.1f}% smaller, difference {difference})")
+        self.update_stats(recompressed=1, total_size_before=original_size, total_size_after=new_size)
+        self.results.file_result(input_path, CONVERTED, time.perf_counter() - started, original_size,
+                                 new_size, [input_path])
+        return True
+
+    def recompress_tree(self, root: Path, skip_dirs: Iterable[Path] = ()) -> None:
+        """
+        Recompress every WebP under a directory, files in parallel.
+
+        Args:
+            root (Path): Directory to scan recursively
+            skip_dirs (Iterable[Path]): Directories to prune, e.g. generated
+                output folders
+        """
+        if not root.exists():
+            print(f"⚠️  Directory not found: {root}")
+            return
+        print(f"📁 Recompressing WebPs in {root}")
+
+        # Pillow encodes and every comparison run in worker processes
+        if self.process_pool is None:
+            self.process_pool = WorkerPool(max_workers=self.max_workers)
+
+        future_to_path = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='recompress') as executor:
+            try:
+                for scanned in self.tracer.trace_iter('discover', scan_images(root, {'.webp'}, self.exclude_matcher,
+                                                                             skip_dirs=skip_dirs)):
+                    if self.supervisor.cancelled.is_set():
+                        break
+                    future = executor.submit(self.recompress_checked, scanned)
+                    future_to_path[future] = scanned.path
+
+                for future in as_completed(future_to_path):
+                    image_path = future_to_path[future]
+                    try:
+                        future.result()
+                    except JobCancelled:
+                        continue
+                    except Exception as e:
+                        print(f"❌ Unexpected error recompressing {image_path.name}: {str(e)}")
+                        self.update_stats(errors=1)
+                        self.results.file_result(image_path, FAILED, 0.0, error=str(e))
+            except BaseException:
+                # Interrupted: drop queued files so the pool only waits for running ones
+                for future in future_to_path:
+                    future.cancel()
+                raise
+
+    def recompress_checked(self, scanned: ScannedFile) -> bool:
+        """Recompress a scanned file unless the run was cancelled before it started."""
+        self.supervisor.check_cancelled()
+        return self.recompress(scanned.path, scanned.stat)
+
+    def close(self) -> None:
+        """Shut down the process pool."""
+        if self.process_pool is not None:
+            self.process_pool.shutdown(cancel_futures=self.supervisor.cancelled.is_set())
+            self.process_pool = None
+
+    def print_summary(self, duration: float) -> None:
+        """Print recompression summary."""
+        saved = self.stats['total_size_before'] - self.stats['total_size_after']
+        print("\n" + "=" * 50)
+        print("📊 RECOMPRESSION SUMMARY")
+        print("=" * 50)
+        print(f"✅ Recompressed: {self.stats['recompressed']} files")
+        print(f"⏭️  Kept: {self.stats['kept']} files")
+        print(f"♻️  Already done: {self.stats['skipped']} files")
+        if self.stats['quarantined']:
+            print(f"⛔ Quarantined: {self.stats['quarantined']} files")
+        print(f"❌ Errors: {self.stats['errors']} files")
+        print(f"⏱️  Duration: {duration:.2f} seconds")
+        if self.stats['total_size_before'] > 0:
+            print(f"💾 Size: {self.stats['total_size_before']:,} -> {self.stats['total_size_after']:,} bytes")
+            print(f"💰 Space saved: {saved:,} bytes "
+                  f"({saved / self.stats['total_size_before'] * 100:.1f}%)")
+
+
+def main():
+    """Main function to handle command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Shrink existing WebP files in place without quality loss (lossy re-encoding with --lossy)"
+    )
+
+    parser.add_argument(
+        'paths',
+        nargs='+',
+        help='Directories to scan recursively, e.g. frontend/public'
+    )
+
+    parser.add_argument(
+        '--lossy',
+        action='store_true',
+        help='Re-encode lossy WebPs at --quality instead of only stripping their metadata'
+    )
+
+    parser.add_argument(
+        '-q', '--quality',
+        type=int,
+        help='Quality lossy WebPs are re-encoded at with --lossy (0-100); pick one at or '
+             'above what they were encoded with'
+    )
+
+    parser.add_argument(
+        '--max-diff',
+        type=float,
+        default=DEFAULT_MAX_PIXEL_DIFF,
+        help=f'Largest accepted channel difference at the {DIFF_PERCENTILE:g}th percentile of '
+             f'pixels for --lossy re-encodes, 0-255 (default: {DEFAULT_MAX_PIXEL_DIFF})'
+    )
+
+    parser.add_argument(
+        '--engine',
+        choices=RECOMPRESS_ENGINES,
+        default='auto',
+        help='Encoder: cwebp, ffmpeg, pillow or auto (cwebp if installed, else pillow)'
+    )
+
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        help='Files recompressed at once (default: CPU count)'
+    )
+
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        help='Exclude pattern relative to each directory (repeatable, '
+             'default: node_modules, .git, dist, build)'
+    )
+
+    parser.add_argument(
+        '--state-file',
+        default=DEFAULT_STATE_FILE,
+        help=f'Record of finished files, skipped until they change (default: {DEFAULT_STATE_FILE})'
+    )
+
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Ignore the state file and try every file again'
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Report what would be recompressed without replacing any file'
+    )
+
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        help='Seconds allowed per attempt at one file (default: 120)'
+    )
+
+    parser.add_argument(
+        '--output',
+        choices=OUTPUT_MODES,
+        default='text',
+        help='text (default), json (one document at the end), ndjson (one record per file) or quiet'
+    )
+
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='With --output json/ndjson/quiet, keep the human output on stderr'
+    )
+
+    args = parser.parse_args()
+    results = ResultWriter(args.output)
+
+    try:
+        supervisor = JobSupervisor.from_config({'timeout_seconds': args.timeout} if args.timeout else None)
+        recompressor = WebPRecompressor(quality=args.quality, lossy=args.lossy, max_pixel_diff=args.max_diff,
+                                        engine=args.engine, max_workers=args.workers,
+                                        exclude_patterns=args.exclude,
+                                        state_file=Path(args.state_file) if args.state_file else None,
+                                        dry_run=args.dry_run, force=args.force,
+                                        supervisor=supervisor, results=results)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    # In json/ndjson/quiet modes stdout carries only result records
+    with results.human_output(args.verbose):
+        if not recompressor.check_engine():
+            sys.exit(1)
+
+        print("🚀 RadioFusion WebP Recompressor")
+        if recompressor.lossy:
+            print(f"🎚️  Lossy re-encodes at quality {recompressor.quality}, difference <= "
+                  f"{recompressor.max_pixel_diff:g} at the {DIFF_PERCENTILE:g}th percentile")
+        else:
+            print("🔒 Lossless only: lossless files re-encoded, lossy files stripped of metadata")
+        print("=" * 50)
+
+        start_time = time.time()
+        try:
+            with handle_signals(supervisor):
+                for path in args.paths:
+                    recompressor.recompress_tree(Path(path))
+        except (KeyboardInterrupt, JobCancelled):
+            print("🛑 Cancelled; existing files were left untouched")
+            sys.exit(130)
+        finally:
+            recompressor.close()
+            recompressor.print_summary(time.time() - start_time)
+            results.summary(recompressor.stats, time.time() - start_time,
+                            cancelled=supervisor.cancelled.is_set(), dry_run=args.dry_run)
+            results.close()
+
+if __name__ == "__main__":
+    main()